@@ -0,0 +1,269 @@
+"""arXiv module - Batched paper metadata from the arXiv export API
+
+HuggingFace paper pages are addressed by arXiv ID, so the day's IDs are known
+as soon as the list page is parsed. Instead of relying on the CSS layout of
+each HF detail page for the abstract and author list, the enricher resolves
+all IDs with a few `id_list` queries against the arXiv export API (Atom feed,
+up to ARXIV_BATCH_SIZE IDs per request):
+
+    title, abstract, authors, arxiv_url, categories, version
+
+Results are kept in a SQLite cache (ARXIV_CACHE_PATH), so hourly cycles and
+backfills do not query arXiv again for known papers. Entries expire after
+ARXIV_CACHE_TTL seconds (new versions are picked up), IDs arXiv does not know
+yet after ARXIV_MISS_TTL. Values scraped from the HF page are only used when
+arXiv has no entry for a paper or cannot be reached.
+
+HF detail pages are still fetched for upvotes and GitHub links, which the
+arXiv API does not provide.
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import urlencode
+
+from config import Config
+from hf import PaperDetails, fetch_url
+from metrics import ARXIV_PAPERS
+from resilience import Upstream
+
+logger = logging.getLogger(__name__)
+
+ArxivMetadata = Dict[str, Any]
+
+ARXIV_ID_RE = re.compile(r"^\d{4}\.\d{4,5}$")
+# Entry IDs look like http://arxiv.org/abs/2510.00001v2
+ENTRY_ID_RE = re.compile(r"arxiv\.org/abs/(\d{4}\.\d{4,5})(?:v(\d+))?$")
+# Old-style IDs such as hep-th/9901001 or math.GT/0309136
+OLD_ARXIV_ID_RE = re.compile(r"^[a-z\-]+(\.[A-Z]{2})?/\d{7}$")
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+_SPACE_RE = re.compile(r"\s+")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS arxiv_metadata (
+    arxiv_id TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    data TEXT
+);
+"""
+
+
+def _clean(text: Optional[str]) -> str:
+    """Collapse the line breaks and indentation of Atom text fields"""
+    return _SPACE_RE.sub(" ", text or "").strip()
+
+
+def normalize_arxiv_id(value: Optional[str]) -> Optional[str]:
+    """Bare arXiv ID of an ID, "arXiv:" reference or abs/pdf/HF paper URL, without version
+
+    Returns:
+    e.g. "2510.00001" for "https://arxiv.org/pdf/2510.00001v2.pdf", None if not an arXiv ID
+    """
+    if not value:
+        return None
+    value = value.strip().rstrip('/')
+    if value.lower().startswith("arxiv:"):
+        value = value[len("arxiv:"):]
+    for marker in ("/abs/", "/pdf/", "/papers/"):
+        if marker in value:
+            value = value.split(marker, 1)[1]
+            break
+    value = re.sub(r"(v\d+)?(\.pdf)?$", "", value.split('?')[0].split('#')[0])
+    if ARXIV_ID_RE.match(value) or OLD_ARXIV_ID_RE.match(value):
+        return value
+    return None
+
+
+def parse_feed(content: Union[bytes, str]) -> Dict[str, ArxivMetadata]:
+    """Parse an export API Atom feed into metadata by arXiv ID (error entries are skipped)"""
+    root = ET.fromstring(content)
+    results = {}
+    for entry in root.iter(f"{ATOM}entry"):
+        match = ENTRY_ID_RE.search(_clean(entry.findtext(f"{ATOM}id")))
+        if not match:
+            continue
+        arxiv_id, version = match.group(1), match.group(2)
+        primary = entry.find(f"{ARXIV}primary_category")
+        categories = [c.get("term") for c in entry.findall(f"{ATOM}category") if c.get("term")]
+        if primary is not None and primary.get("term") in categories:
+            # Primary category first
+            categories.remove(primary.get("term"))
+            categories.insert(0, primary.get("term"))
+        results[arxiv_id] = {
+            'title': _clean(entry.findtext(f"{ATOM}title")),
+            'abstract': _clean(entry.findtext(f"{ATOM}summary")),
+            'authors': [_clean(a.findtext(f"{ATOM}name")) for a in entry.findall(f"{ATOM}author")],
+            'arxiv_url': f"https://arxiv.org/abs/{arxiv_id}",
+            'categories': categories,
+            'version': int(version) if version else None,
+            # First submission, e.g. "2025-10-01"
+            'published': _clean(entry.findtext(f"{ATOM}published"))[:10] or None,
+        }
+    return results
+
+
+def merge_details(details: PaperDetails, metadata: Optional[ArxivMetadata]) -> PaperDetails:
+    """HF page details with abstract, authors and arXiv fields taken from arXiv where known"""
+    if not metadata:
+        return details
+    merged = dict(details)
+    merged['abstract'] = metadata['abstract'] or details.get('abstract', '')
+    merged['authors'] = metadata['authors'] or details.get('authors', [])
+    merged['arxiv_url'] = metadata['arxiv_url']
+    merged['arxiv_categories'] = metadata['categories']
+    merged['arxiv_version'] = metadata['version']
+    return merged
+
+
+class ArxivCache:
+    """SQLite cache of arXiv metadata; a NULL row records an ID arXiv did not return"""
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        """Initialize cache
+
+        Args:
+        path: SQLite database file (":memory:" for a throwaway cache)
+        """
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA_SQL)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, arxiv_ids: List[str], ttl: float, miss_ttl: float) -> Dict[str, Optional[ArxivMetadata]]:
+        """Unexpired entries by ID (None for a cached miss); expired and unknown IDs are absent"""
+        now = time.time()
+        results = {}
+        with self._lock:
+            for start in range(0, len(arxiv_ids), 500):
+                chunk = arxiv_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT arxiv_id, fetched_at, data FROM arxiv_metadata WHERE arxiv_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for arxiv_id, fetched_at, data in rows:
+                    if now - fetched_at <= (ttl if data is not None else miss_ttl):
+                        results[arxiv_id] = json.loads(data) if data is not None else None
+        return results
+
+    def put_many(self, found: Dict[str, ArxivMetadata], missing: Iterable[str] = ()) -> None:
+        now = time.time()
+        rows = [(arxiv_id, now, json.dumps(metadata, ensure_ascii=False)) for arxiv_id, metadata in found.items()]
+        rows.extend((arxiv_id, now, None) for arxiv_id in missing)
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO arxiv_metadata (arxiv_id, fetched_at, data) VALUES (?, ?, ?)", rows)
+
+
+class ArxivEnricher:
+    """Resolves arXiv IDs to metadata: cache first, then batched export API queries"""
+
+    def __init__(
+        self,
+        cache: ArxivCache,
+        api_url: str = "https://export.arxiv.org/api/query",
+        batch_size: int = 100,
+        ttl: float = 7 * 86400,
+        miss_ttl: float = 6 * 3600,
+        request_interval: float = 3.0,
+        upstream: Optional[Upstream] = None,
+    ):
+        """Initialize enricher
+
+        Args:
+        cache: Persistent metadata cache
+        api_url: Export API query endpoint
+        batch_size: IDs per request
+        ttl: Seconds a cached entry is used
+        miss_ttl: Seconds an ID arXiv did not return is not asked for again
+        request_interval: Minimum seconds between API requests (arXiv asks for 3)
+        upstream: Retry/circuit-breaker policy (default: ARXIV_TIMEOUT and RETRY_* settings)
+        """
+        self.cache = cache
+        self.api_url = api_url
+        self.batch_size = max(batch_size, 1)
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.request_interval = request_interval
+        self.upstream = upstream or Upstream.from_config("arxiv", Config.ARXIV_TIMEOUT)
+        self._last_request = 0.0
+
+    @classmethod
+    def from_config(cls) -> "ArxivEnricher":
+        return cls(
+            ArxivCache(Config.ARXIV_CACHE_PATH),
+            api_url=Config.ARXIV_API_URL,
+            batch_size=Config.ARXIV_BATCH_SIZE,
+            ttl=Config.ARXIV_CACHE_TTL,
+            miss_ttl=Config.ARXIV_MISS_TTL,
+        )
+
+    def lookup(self, arxiv_ids: Iterable[str]) -> Dict[str, ArxivMetadata]:
+        """Metadata for the given IDs (IDs arXiv does not know, or that failed, are absent)
+
+        Never raises: if the API cannot be reached, the cached entries are returned
+        and the callers fall back to the HF pages.
+        """
+        arxiv_ids = list(dict.fromkeys(i for i in arxiv_ids if ARXIV_ID_RE.match(i)))
+        cached = self.cache.get_many(arxiv_ids, self.ttl, self.miss_ttl)
+        results = {arxiv_id: metadata for arxiv_id, metadata in cached.items() if metadata is not None}
+        ARXIV_PAPERS.inc(len(cached), source="cache")
+        pending = [arxiv_id for arxiv_id in arxiv_ids if arxiv_id not in cached]
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            try:
+                found = self._fetch_batch(batch)
+            except Exception as e:
+                logger.warning("arXiv lookup failed, using HF pages", extra={'ids': len(pending) - start, 'error': str(e)})
+                break
+            missing = [arxiv_id for arxiv_id in batch if arxiv_id not in found]
+            self.cache.put_many(found, missing)
+            results.update(found)
+            ARXIV_PAPERS.inc(len(found), source="api")
+            ARXIV_PAPERS.inc(len(missing), source="missing")
+
+        if pending:
+            logger.info("Resolved arXiv metadata", extra={'ids': len(arxiv_ids), 'cached': len(cached), 'requested': len(pending)})
+        return results
+
+    def _fetch_batch(self, arxiv_ids: List[str]) -> Dict[str, ArxivMetadata]:
+        """One id_list query, spaced by `request_interval` from the previous one"""
+        wait = self._last_request + self.request_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        url = f"{self.api_url}?{urlencode({'id_list': ','.join(arxiv_ids), 'max_results': len(arxiv_ids)})}"
+        try:
+            response = fetch_url(self.upstream, url)
+        finally:
+            self._last_request = time.monotonic()
+        return parse_feed(response.content)
+
+    def close(self) -> None:
+        self.cache.close()
+
+
+_default: Optional[ArxivEnricher] = None
+_default_lock = threading.Lock()
+
+
+def default_enricher() -> ArxivEnricher:
+    """Process-wide enricher configured from ARXIV_* settings"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ArxivEnricher.from_config()
+        return _default
@@ -0,0 +1,116 @@
+"""Backfill module - Fetch and store past days without posting
+
+    python backfill.py 2025-09-01 2025-09-30
+    python backfill.py 2025-09-01 2025-09-30 --skip-existing --profile
+"""
+import argparse
+import logging
+import time
+from datetime import date, timedelta
+from typing import Iterable, Iterator, List, Optional
+
+import opendal
+
+from config import Config
+from hf import Paper, iter_huggingface_papers
+from profiling import DISABLED, CycleProfiler, ProfileSession
+from storage import PaperStorage
+
+logger = logging.getLogger(__name__)
+
+
+def iter_days(start: date, end: date) -> Iterator[date]:
+    """Dates from start to end, inclusive"""
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def day_exists(storage: PaperStorage, day: date) -> bool:
+    """Whether a daily file is already stored for the day"""
+    try:
+        storage.data_operator.stat(storage._daily_key(day))
+        return True
+    except opendal.exceptions.NotFound:
+        return False
+
+
+def _timed(papers: Iterable[Paper], profile: ProfileSession, counter: List[int]) -> Iterator[Paper]:
+    """Pass papers through, adding the time spent waiting for each to the "fetch" span"""
+    iterator = iter(papers)
+    while True:
+        with profile.span("fetch"):
+            paper = next(iterator, None)
+        if paper is None:
+            return
+        counter[0] += 1
+        yield paper
+
+
+def backfill(
+    storage: PaperStorage,
+    start: date,
+    end: date,
+    skip_existing: bool = False,
+    delay: float = 1.0,
+    profiler: CycleProfiler = DISABLED,
+) -> int:
+    """Fetch and save every day in [start, end]
+
+    Papers are streamed from `iter_huggingface_papers` into the daily file in
+    batches of SAVE_BATCH_SIZE, so memory does not grow with the day's size
+    and a failure mid-day keeps the papers saved so far.
+
+    Args:
+    storage: Target storage
+    start, end: Inclusive date range
+    skip_existing: Skip days that already have a daily file
+    delay: Pause between days (seconds)
+    profiler: Profiles the whole run as one cycle when sampled
+
+    Returns:
+    Number of papers saved
+    """
+    saved = 0
+    with profiler.cycle("backfill") as profile:
+        for day in iter_days(start, end):
+            if skip_existing and day_exists(storage, day):
+                logger.info("Skipping stored day", extra={'date': day.isoformat()})
+                continue
+            counter = [0]
+            try:
+                with profile.span("day"):
+                    storage.save_daily_papers(_timed(iter_huggingface_papers(day), profile, counter), day,
+                                              batch_size=Config.SAVE_BATCH_SIZE)
+            except Exception as e:
+                logger.warning("Fetching day failed", extra={'date': day.isoformat(), 'saved': counter[0], 'error': str(e)})
+                continue
+            finally:
+                saved += counter[0]
+            if delay and day < end:
+                time.sleep(delay)
+    logger.info("Backfill finished", extra={'start': start.isoformat(), 'end': end.isoformat(), 'papers': saved})
+    return saved
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Backfill command"""
+    from log import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Fetch and store past HuggingFace daily papers")
+    parser.add_argument("start", type=date.fromisoformat)
+    parser.add_argument("end", type=date.fromisoformat)
+    parser.add_argument("--skip-existing", action="store_true", help="Skip days that are already stored")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds between days")
+    parser.add_argument("--profile", action="store_true", help="Profile the run (see PROFILE_* settings)")
+    args = parser.parse_args(argv)
+
+    profiler = CycleProfiler.from_config(rate=1.0 if args.profile else None)
+    backfill(PaperStorage.from_env(), args.start, args.end, args.skip_existing, args.delay, profiler)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,11 @@
 """Cache management module - Records sent papers to avoid duplicates"""
 import json
+import logging
 from pathlib import Path
 from typing import Set
 
+logger = logging.getLogger(__name__)
+
 
 class PaperCache:
     """Paper cache manager"""
@@ -15,7 +18,7 @@ class PaperCache:
         if initial_ids:
             self.cached_ids.update(initial_ids)
             self._save_cache()
-            print(f"Cache initialized with {len(self.cached_ids)} paper IDs")
+            logger.info("Cache initialized", extra={'paper_ids': len(self.cached_ids)})
     
     def _load_cache(self) -> Set[str]:
         """Load cached paper IDs from file"""
@@ -25,7 +28,7 @@ class PaperCache:
                     data = json.load(f)
                     return set(data.get('paper_ids', []))
             except Exception as e:
-                print(f"Warning: Failed to load cache: {e}")
+                logger.warning("Failed to load cache", extra={'error': str(e)})
                 return set()
         return set()
 
@@ -35,7 +38,7 @@ class PaperCache:
             with open(self.cache_file, 'w', encoding='utf-8') as f:
                 json.dump({'paper_ids': list(self.cached_ids)}, f, indent=2)
         except Exception as e:
-            print(f"Failed to save cache: {e}")
+            logger.error("Failed to save cache", extra={'error': str(e)})
     
     def is_cached(self, paper_id: str) -> bool:
         """Check if paper is cached"""
@@ -0,0 +1,113 @@
+"""Checkpoint module - Resumable state of an interrupted check cycle
+
+A check cycle scrapes ~50 detail pages and spends one or two LLM calls per
+new paper. When the process is stopped mid-cycle (deploy, SIGTERM), the
+checkpoint keeps what was already done so the next start continues from
+there instead of repeating network and LLM work:
+
+    details     scraped detail pages by paper URL (filled during the fetch)
+    papers      the complete fetched list, once the fetch finished
+    processed   summarized/translated abstracts by paper ID
+    posted      paper IDs posted in this cycle (guards against re-posting
+                when the process was killed before the cache was written)
+
+The file is JSON, rewritten atomically after every step and removed when the
+cycle completes. A checkpoint of another day or older than `max_age` seconds
+is discarded, so a regular cycle never runs on stale upvote counts.
+"""
+import json
+import logging
+import os
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from hf import Paper, PaperDetails
+
+logger = logging.getLogger(__name__)
+
+
+class CycleCheckpoint:
+    """Progress of one check cycle, persisted to a JSON file"""
+
+    def __init__(self, path: Union[str, Path], day: date):
+        self.path = Path(path)
+        self.day = day
+        self.started_at = time.time()
+        self.details: Dict[str, PaperDetails] = {}
+        self.papers: Optional[List[Paper]] = None
+        self.processed: Dict[str, Optional[str]] = {}
+        self.posted: List[str] = []
+        # True when loaded from an interrupted cycle
+        self.resumed = False
+
+    @classmethod
+    def load(cls, path: Union[str, Path], day: date, max_age: float) -> "CycleCheckpoint":
+        """Resume the checkpoint at `path` if it belongs to `day` and is recent, else start a new one"""
+        checkpoint = cls(path, day)
+        try:
+            data = json.loads(checkpoint.path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return checkpoint
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint", extra={'path': str(checkpoint.path), 'error': str(e)})
+            return checkpoint
+
+        age = time.time() - data.get('started_at', 0)
+        if data.get('day') != day.isoformat() or age > max_age:
+            logger.info("Discarding stale checkpoint", extra={'day': data.get('day'), 'age_s': round(age)})
+            checkpoint.clear()
+            return checkpoint
+
+        checkpoint.started_at = data['started_at']
+        checkpoint.details = data.get('details', {})
+        if data.get('papers') is not None:
+            checkpoint.papers = [Paper(**paper) for paper in data['papers']]
+        checkpoint.processed = data.get('processed', {})
+        checkpoint.posted = data.get('posted', [])
+        checkpoint.resumed = True
+        logger.info("Resuming interrupted cycle", extra={
+            'details': len(checkpoint.details),
+            'fetched': checkpoint.papers is not None,
+            'processed': len(checkpoint.processed),
+            'posted': len(checkpoint.posted),
+        })
+        return checkpoint
+
+    def _to_dict(self) -> Dict[str, Any]:
+        return {
+            'day': self.day.isoformat(),
+            'started_at': self.started_at,
+            'details': self.details,
+            'papers': [paper.model_dump(mode='json') for paper in self.papers] if self.papers is not None else None,
+            'processed': self.processed,
+            'posted': self.posted,
+        }
+
+    def save(self) -> None:
+        """Write the checkpoint atomically (a kill mid-write leaves the previous version)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self._to_dict(), ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        """Remove the file once the cycle completed"""
+        self.path.unlink(missing_ok=True)
+
+    def record_details(self, paper_url: str, details: PaperDetails) -> None:
+        self.details[paper_url] = details
+        self.save()
+
+    def record_papers(self, papers: List[Paper]) -> None:
+        self.papers = papers
+        self.save()
+
+    def record_processed(self, paper_id: str, abstract: Optional[str]) -> None:
+        self.processed[paper_id] = abstract
+        self.save()
+
+    def record_posted(self, paper_id: str) -> None:
+        self.posted.append(paper_id)
+        self.save()
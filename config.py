@@ -24,6 +24,144 @@ class Config:
     # Storage configuration
     DATA_DIR: str = os.getenv("DATA_DIR", "data")
     ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", f"{DATA_DIR}/archive")
+    # Upvote/star history on the storage backend (empty = <data dir>/history)
+    HISTORY_DIR: str = os.getenv("HISTORY_DIR", "")
+    # OpenDAL backend for data and archive roots (fs, memory, s3, ...)
+    STORAGE_SCHEME: str = os.getenv("STORAGE_SCHEME", "fs")
+    STORAGE_PREFETCH_CONCURRENCY: int = int(os.getenv("STORAGE_PREFETCH_CONCURRENCY", "8"))
+    S3_BUCKET: str = os.getenv("S3_BUCKET", "")
+    S3_ENDPOINT: str = os.getenv("S3_ENDPOINT", "")
+    S3_REGION: str = os.getenv("S3_REGION", "us-east-1")
+    S3_ACCESS_KEY: str = os.getenv("S3_ACCESS_KEY", "")
+    S3_SECRET_KEY: str = os.getenv("S3_SECRET_KEY", "")
+    # Parquet storage profiles (see schema.STORAGE_PROFILES)
+    DAILY_STORAGE_PROFILE: str = os.getenv("DAILY_STORAGE_PROFILE", "hot")
+    ARCHIVE_STORAGE_PROFILE: str = os.getenv("ARCHIVE_STORAGE_PROFILE", "archive")
+
+    # Weekly/monthly digest configuration
+    # Aggregate cache and posted markers on the storage backend (empty = <data dir>/digest)
+    DIGEST_DIR: str = os.getenv("DIGEST_DIR", "")
+    # Comma-separated periods to post automatically: week, month (empty = disabled)
+    DIGEST_PERIODS: str = os.getenv("DIGEST_PERIODS", "")
+    DIGEST_TOP_N: int = int(os.getenv("DIGEST_TOP_N", "10"))
+    # Post the digest as a photo album (up to 10 papers with hero images) instead of one long message
+    DIGEST_AS_ALBUM: bool = os.getenv("DIGEST_AS_ALBUM", "false").lower() == "true"
+
+    # Static RSS/Atom/JSON feeds and HTML archive (export.py), refreshed after every check when enabled
+    ENABLE_EXPORT: bool = os.getenv("ENABLE_EXPORT", "false").lower() == "true"
+    EXPORT_DIR: str = os.getenv("EXPORT_DIR", f"{DATA_DIR}/site")
+    EXPORT_TITLE: str = os.getenv("EXPORT_TITLE", "Hugging Face Daily Papers")
+    # Public URL of EXPORT_DIR, for absolute links in the feeds (empty = relative links)
+    EXPORT_BASE_URL: str = os.getenv("EXPORT_BASE_URL", "")
+    EXPORT_FEED_SIZE: int = int(os.getenv("EXPORT_FEED_SIZE", "50"))
+    EXPORT_WORKERS: int = int(os.getenv("EXPORT_WORKERS", "0"))  # Render processes, 0 = CPU count
+    # Export only papers recorded in MESSAGE_STORE_PATH as posted
+    EXPORT_POSTED_ONLY: bool = os.getenv("EXPORT_POSTED_ONLY", "true").lower() == "true"
+
+    # Interactive bot commands (/search), polled alongside the scheduled checks. Opt-in:
+    # polling getUpdates conflicts with any other consumer of the bot token
+    ENABLE_BOT_COMMANDS: bool = os.getenv("ENABLE_BOT_COMMANDS", "false").lower() == "true"
+    # Full-text index file; SQLite needs a local file, so with object stores it stays
+    # under the local DATA_DIR (empty = <data dir>/search.sqlite, in-memory for the memory scheme)
+    SEARCH_INDEX_PATH: str = os.getenv("SEARCH_INDEX_PATH", "")
+    SEARCH_RESULTS_LIMIT: int = int(os.getenv("SEARCH_RESULTS_LIMIT", "8"))
+    # /today list length and number of rendered replies kept in memory
+    COMMAND_LIST_LIMIT: int = int(os.getenv("COMMAND_LIST_LIMIT", "10"))
+    COMMAND_CACHE_SIZE: int = int(os.getenv("COMMAND_CACHE_SIZE", "256"))
+
+    # In-place refresh of upvote/star counts on posted messages (see refresh.py); opt-in,
+    # message IDs are recorded either way
+    ENABLE_MESSAGE_REFRESH: bool = os.getenv("ENABLE_MESSAGE_REFRESH", "false").lower() == "true"
+    # Posted message IDs (default: <DATA_DIR>/messages.sqlite)
+    MESSAGE_STORE_PATH: str = os.getenv("MESSAGE_STORE_PATH", f"{DATA_DIR}/messages.sqlite")
+    REFRESH_INTERVAL: int = int(os.getenv("REFRESH_INTERVAL", "1800"))  # seconds, also runs after each save
+    REFRESH_MAX_AGE_DAYS: float = float(os.getenv("REFRESH_MAX_AGE_DAYS", "7"))
+    # A count is re-rendered once it moved by at least REFRESH_MIN_DELTA and REFRESH_MIN_RATIO of the shown value
+    REFRESH_MIN_DELTA: int = int(os.getenv("REFRESH_MIN_DELTA", "5"))
+    REFRESH_MIN_RATIO: float = float(os.getenv("REFRESH_MIN_RATIO", "0.1"))
+    # Edits plus new posts per channel and minute (Telegram allows about 20), edits sent per batch
+    REFRESH_EDITS_PER_MINUTE: float = float(os.getenv("REFRESH_EDITS_PER_MINUTE", "15"))
+    REFRESH_BATCH_SIZE: int = int(os.getenv("REFRESH_BATCH_SIZE", "10"))
+
+    # Graceful shutdown: seconds in-flight sends/LLM calls get after SIGTERM before being cancelled
+    SHUTDOWN_TIMEOUT: float = float(os.getenv("SHUTDOWN_TIMEOUT", "20"))
+    # Progress of the running check cycle, resumed after a restart if younger than CHECKPOINT_MAX_AGE seconds
+    CHECKPOINT_PATH: str = os.getenv("CHECKPOINT_PATH", f"{DATA_DIR}/checkpoint.json")
+    CHECKPOINT_MAX_AGE: float = float(os.getenv("CHECKPOINT_MAX_AGE", "900"))
+    # Stored papers queued by `reconcile.py --requeue`, posted in the next check
+    REQUEUE_PATH: str = os.getenv("REQUEUE_PATH", f"{DATA_DIR}/requeue.json")
+
+    # Multi-replica deployments (see coordination.py): only the leader-lease holder posts
+    ENABLE_LEADER_ELECTION: bool = os.getenv("ENABLE_LEADER_ELECTION", "false").lower() == "true"
+    LEADER_LEASE_NAME: str = os.getenv("LEADER_LEASE_NAME", "leader")
+    LEADER_LEASE_TTL: float = float(os.getenv("LEADER_LEASE_TTL", "30"))  # seconds
+    # Lock/lease backend ("file" or "memory") and its directory, shared by all replicas
+    COORDINATION_BACKEND: str = os.getenv("COORDINATION_BACKEND", "file")
+    COORDINATION_DIR: str = os.getenv("COORDINATION_DIR", f"{DATA_DIR}/coordination")
+
+    # Upstream resilience (see resilience.py): per-attempt timeouts in seconds
+    HF_TIMEOUT: float = float(os.getenv("HF_TIMEOUT", "20"))
+    GITHUB_TIMEOUT: float = float(os.getenv("GITHUB_TIMEOUT", "5"))
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "60"))
+    # Attempts per call and jittered exponential backoff (first retry waits up to RETRY_BASE_DELAY)
+    RETRY_ATTEMPTS: int = int(os.getenv("RETRY_ATTEMPTS", "3"))
+    RETRY_BASE_DELAY: float = float(os.getenv("RETRY_BASE_DELAY", "1"))
+    RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "30"))
+    # An upstream failing this many times in a row is skipped for CIRCUIT_RESET_TIMEOUT seconds
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "60"))
+    # Start a second request for a HuggingFace page not answered within this many seconds (0 = off)
+    HF_HEDGE_AFTER: float = float(os.getenv("HF_HEDGE_AFTER", "0"))
+
+    # Abstract, authors, categories and versions from the arXiv export API (see arxiv_api.py)
+    ENABLE_ARXIV_ENRICHMENT: bool = os.getenv("ENABLE_ARXIV_ENRICHMENT", "true").lower() == "true"
+    ARXIV_API_URL: str = os.getenv("ARXIV_API_URL", "https://export.arxiv.org/api/query")
+    ARXIV_CACHE_PATH: str = os.getenv("ARXIV_CACHE_PATH", f"{DATA_DIR}/arxiv.sqlite")
+    ARXIV_BATCH_SIZE: int = int(os.getenv("ARXIV_BATCH_SIZE", "100"))  # IDs per request
+    ARXIV_TIMEOUT: float = float(os.getenv("ARXIV_TIMEOUT", "30"))
+    # Seconds a cached entry is used, and an ID unknown to arXiv is not asked for again
+    ARXIV_CACHE_TTL: float = float(os.getenv("ARXIV_CACHE_TTL", str(7 * 86400)))
+    ARXIV_MISS_TTL: float = float(os.getenv("ARXIV_MISS_TTL", str(6 * 3600)))
+
+    # Streaming fetch: detail pages fetched ahead of the consumer, papers merged into the daily file per batch
+    HF_FETCH_CONCURRENCY: int = int(os.getenv("HF_FETCH_CONCURRENCY", "1"))
+    HF_RATE_LIMIT: float = float(os.getenv("HF_RATE_LIMIT", "2"))  # Detail pages per second, all workers
+    SAVE_BATCH_SIZE: int = int(os.getenv("SAVE_BATCH_SIZE", "10"))
+
+    # Paper sources run concurrently in each check, in priority order (see sources.py)
+    PAPER_SOURCES: str = os.getenv("PAPER_SOURCES", "huggingface")
+    # "arxiv" source: newest submissions in these categories
+    ARXIV_LISTING_CATEGORIES: str = os.getenv("ARXIV_LISTING_CATEGORIES", "cs.CL,cs.LG")
+    ARXIV_LISTING_SIZE: int = int(os.getenv("ARXIV_LISTING_SIZE", "50"))
+
+    # Per-channel topic routing rules (JSON, see routing.py); empty = post everything to TELEGRAM_CHANNEL_ID
+    ROUTING_RULES_FILE: str = os.getenv("ROUTING_RULES_FILE", "")
+
+    # Near-duplicate detection (MinHash/LSH over title + abstract); opt-in, it withholds
+    # posts and indexes all posted papers on first start
+    ENABLE_DEDUP: bool = os.getenv("ENABLE_DEDUP", "false").lower() == "true"
+    # Estimated Jaccard similarity of word 3-grams at or above which a paper is skipped
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+    # Signatures on the storage backend (empty = <data dir>/dedup)
+    DEDUP_DIR: str = os.getenv("DEDUP_DIR", "")
+
+    # `main.py --once`: days of daily files read to seed the cache (instead of all history)
+    ONCE_LOOKBACK_DAYS: int = int(os.getenv("ONCE_LOOKBACK_DAYS", "3"))
+
+    # Logging: level name and format ("text" or "json")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")
+
+    # Prometheus metrics endpoint (/metrics); port 0 disables it
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9108"))
+
+    # Cycle profiling (see profiling.py): fraction of check cycles profiled, 0 = off
+    PROFILE_RATE: float = float(os.getenv("PROFILE_RATE", "0"))
+    # "sample" (low-overhead stack sampling) or "cprofile" (deterministic, slower)
+    PROFILE_MODE: str = os.getenv("PROFILE_MODE", "sample")
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", f"{DATA_DIR}/profiles")
+    PROFILE_KEEP: int = int(os.getenv("PROFILE_KEEP", "20"))
 
     # Message formatting constants
     MAX_ABSTRACT_LENGTH_WITH_IMAGE: int = 500
@@ -49,6 +187,38 @@ class Config:
         if cls.ENABLE_AI_TRANSLATION and not cls.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY must be set when AI translation is enabled")
 
+    @classmethod
+    def get_storage_options(cls, scheme: str | None = None) -> dict:
+        """Get OpenDAL backend options for a storage scheme (root is set per operator)
+
+        Any STORAGE_OPTION_<NAME>=value environment variable is passed through
+        as option `<name>`, so other OpenDAL services need no code changes.
+        """
+        scheme = scheme or cls.STORAGE_SCHEME
+        options = {}
+        if scheme == "s3":
+            options = {
+                'bucket': cls.S3_BUCKET,
+                'endpoint': cls.S3_ENDPOINT,
+                'region': cls.S3_REGION,
+                'access_key_id': cls.S3_ACCESS_KEY,
+                'secret_access_key': cls.S3_SECRET_KEY,
+            }
+        for key, value in os.environ.items():
+            if key.startswith("STORAGE_OPTION_"):
+                options[key[len("STORAGE_OPTION_"):].lower()] = value
+        return {key: value for key, value in options.items() if value}
+
+    @classmethod
+    def get_digest_periods(cls) -> list[str]:
+        """Get enabled digest periods ('week', 'month')."""
+        return [p.strip() for p in cls.DIGEST_PERIODS.split(",") if p.strip() in ("week", "month")]
+
+    @classmethod
+    def get_paper_sources(cls) -> list[str]:
+        """Get enabled paper source names, in priority order."""
+        return [s.strip() for s in cls.PAPER_SOURCES.split(",") if s.strip()]
+
     @classmethod
     def get_data_dir(cls) -> Path:
         """Get data directory as Path object."""
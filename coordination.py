@@ -0,0 +1,373 @@
+"""Coordination module - Leader election and locks for multi-replica deployments
+
+Two replicas of the bot each keep their own cache and would post every paper
+twice. With leader election enabled, replicas compete for a lease; only the
+holder runs check cycles, command polling and message refreshes, the others
+stand by and take over when the lease expires. Every Telegram send is fenced:
+it checks that this replica still holds the lease (with the same fencing
+token) and aborts otherwise, so a replica that stalled past its lease cannot
+post next to the new leader.
+
+Read-merge-write of daily Parquet files is serialized by named locks, so the
+bot, a backfill run or another replica never lose each other's rows.
+
+Backends:
+    file    fcntl locks and JSON lease records in COORDINATION_DIR; the
+            directory must be on a volume shared by all replicas (same host
+            or a filesystem with working POSIX locks)
+    memory  process-local (tests, single replica)
+
+Other backends (Redis, etcd, ...) subclass `Coordination` and are added with
+`register_backend`.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOCK_POLL_SECONDS = 0.05
+
+
+class LockTimeout(TimeoutError):
+    """A named lock could not be acquired in time"""
+
+
+class NotLeaderError(RuntimeError):
+    """This replica does not (or no longer) hold the leader lease"""
+
+
+class Coordination:
+    """Named locks and leases; subclasses implement the five primitives below"""
+
+    def acquire_lock(self, name: str, timeout: float) -> Any:
+        """Block until the named lock is held; returns a handle for `release_lock`"""
+        raise NotImplementedError
+
+    def release_lock(self, handle: Any) -> None:
+        raise NotImplementedError
+
+    def acquire_lease(self, name: str, holder: str, ttl: float) -> Optional[int]:
+        """Acquire or renew a lease
+
+        Returns:
+        Fencing token (grows with every change of holder), None if another holder has it
+        """
+        raise NotImplementedError
+
+    def release_lease(self, name: str, holder: str) -> None:
+        raise NotImplementedError
+
+    def holds_lease(self, name: str, holder: str, token: int) -> bool:
+        """Whether `holder` still holds an unexpired lease with this token"""
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 60.0) -> Iterator[None]:
+        """Hold the named lock for the duration of the block"""
+        handle = self.acquire_lock(name, timeout)
+        try:
+            yield
+        finally:
+            self.release_lock(handle)
+
+    @asynccontextmanager
+    async def lock_async(self, name: str, timeout: float = 60.0) -> AsyncIterator[None]:
+        """Async variant of `lock`; waiting happens in a worker thread"""
+        handle = await asyncio.to_thread(self.acquire_lock, name, timeout)
+        try:
+            yield
+        finally:
+            self.release_lock(handle)
+
+
+class MemoryCoordination(Coordination):
+    """Process-local locks and leases"""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+        # name -> (holder, token, expires_at)
+        self._leases: Dict[str, Tuple[str, int, float]] = {}
+
+    def acquire_lock(self, name: str, timeout: float) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        if not lock.acquire(timeout=timeout):
+            raise LockTimeout(name)
+        return lock
+
+    def release_lock(self, handle: threading.Lock) -> None:
+        handle.release()
+
+    def acquire_lease(self, name: str, holder: str, ttl: float) -> Optional[int]:
+        now = time.time()
+        with self._guard:
+            current = self._leases.get(name)
+            token = _next_token(current, holder, now)
+            if token is not None:
+                self._leases[name] = (holder, token, now + ttl)
+            return token
+
+    def release_lease(self, name: str, holder: str) -> None:
+        with self._guard:
+            current = self._leases.get(name)
+            if current and current[0] == holder:
+                self._leases[name] = (holder, current[1], 0.0)
+
+    def holds_lease(self, name: str, holder: str, token: int) -> bool:
+        with self._guard:
+            current = self._leases.get(name)
+        return current is not None and current[:2] == (holder, token) and current[2] > time.time()
+
+
+class FileCoordination(Coordination):
+    """fcntl locks and JSON lease records in a shared directory"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def acquire_lock(self, name: str, timeout: float):
+        handle = open(self.directory / f"{name}.lock", "a+")
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    handle.close()
+                    raise LockTimeout(name)
+                time.sleep(LOCK_POLL_SECONDS)
+
+    def release_lock(self, handle) -> None:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+    def _lease_path(self, name: str) -> Path:
+        return self.directory / f"{name}.lease"
+
+    def _read_lease(self, name: str) -> Optional[Tuple[str, int, float]]:
+        try:
+            data = json.loads(self._lease_path(name).read_text())
+            return data['holder'], int(data['token']), float(data['expires_at'])
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _write_lease(self, name: str, holder: str, token: int, expires_at: float) -> None:
+        path = self._lease_path(name)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({'holder': holder, 'token': token, 'expires_at': expires_at}))
+        os.replace(tmp, path)
+
+    def acquire_lease(self, name: str, holder: str, ttl: float) -> Optional[int]:
+        with self.lock(f"{name}.lease", timeout=ttl):
+            now = time.time()
+            token = _next_token(self._read_lease(name), holder, now)
+            if token is not None:
+                self._write_lease(name, holder, token, now + ttl)
+            return token
+
+    def release_lease(self, name: str, holder: str) -> None:
+        with self.lock(f"{name}.lease"):
+            current = self._read_lease(name)
+            if current and current[0] == holder:
+                # Keep the token so the next holder's token is still larger
+                self._write_lease(name, holder, current[1], 0.0)
+
+    def holds_lease(self, name: str, holder: str, token: int) -> bool:
+        current = self._read_lease(name)
+        return current is not None and current[:2] == (holder, token) and current[2] > time.time()
+
+
+def _next_token(current: Optional[Tuple[str, int, float]], holder: str, now: float) -> Optional[int]:
+    """Token for `holder` given the current lease, None if someone else holds it"""
+    if current is None:
+        return 1
+    current_holder, token, expires_at = current
+    if expires_at > now:
+        return token if current_holder == holder else None
+    # Expired: a new term, even for the same holder
+    return token + 1
+
+
+BACKENDS: Dict[str, Callable[[str], Coordination]] = {
+    'file': FileCoordination,
+    'memory': lambda directory: MemoryCoordination(),
+}
+
+
+def register_backend(name: str, factory: Callable[[str], Coordination]) -> None:
+    """Register a coordination backend (factory receives COORDINATION_DIR)"""
+    BACKENDS[name] = factory
+
+
+def create_coordination(backend: str, directory: str) -> Coordination:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown coordination backend {backend!r} (available: {', '.join(BACKENDS)})")
+    return BACKENDS[backend](directory)
+
+
+def require_shared(coordination: Coordination, directory: str) -> None:
+    """Refuse leader election on a lease store other replicas cannot see
+
+    Raises:
+    ValueError: for the process-local memory backend, or a file backend outside
+        `directory` (COORDINATION_DIR, the directory all replicas share)
+    """
+    if isinstance(coordination, MemoryCoordination):
+        raise ValueError("Leader election needs a shared coordination backend, not 'memory'")
+    if isinstance(coordination, FileCoordination) and coordination.directory.resolve() != Path(directory).resolve():
+        raise ValueError(
+            f"Leader election needs the shared lease directory {directory}, storage uses {coordination.directory}"
+        )
+
+
+def default_holder_id() -> str:
+    """Replica identity: container hostname plus process ID"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaderElector:
+    """Keeps trying to acquire, then renews, a leader lease
+
+    Leadership is assumed lost once the lease could not be renewed for `ttl`
+    seconds minus a safety margin, measured on the local monotonic clock from
+    the start of the last successful renewal, so the old leader always steps
+    down before another replica can acquire the expired lease.
+    """
+
+    def __init__(
+        self,
+        coordination: Coordination,
+        name: str = "leader",
+        holder: Optional[str] = None,
+        ttl: float = 30.0,
+        renew_interval: Optional[float] = None,
+    ):
+        """Initialize elector
+
+        Args:
+        coordination: Backend holding the lease
+        name: Lease name (replicas of one deployment share it)
+        holder: This replica's identity (default: hostname-pid)
+        ttl: Lease duration in seconds
+        renew_interval: Seconds between renewals (default: ttl / 3)
+        """
+        self.coordination = coordination
+        self.name = name
+        self.holder = holder or default_holder_id()
+        self.ttl = ttl
+        self.renew_interval = renew_interval or ttl / 3
+        self.token: Optional[int] = None
+        self._valid_until = 0.0
+        self._elected: Optional[asyncio.Event] = None
+        self._lost: Optional[asyncio.Event] = None
+
+    def _events(self) -> Tuple[asyncio.Event, asyncio.Event]:
+        if self._elected is None:
+            self._elected = asyncio.Event()
+            self._lost = asyncio.Event()
+            self._lost.set()
+        return self._elected, self._lost
+
+    @property
+    def is_leader(self) -> bool:
+        return self.token is not None and time.monotonic() < self._valid_until
+
+    def try_acquire(self) -> bool:
+        """Acquire or renew the lease once (blocking)
+
+        Returns:
+        True if this replica is the leader afterwards
+        """
+        started = time.monotonic()
+        try:
+            token = self.coordination.acquire_lease(self.name, self.holder, self.ttl)
+        except Exception as e:
+            # Backend unreachable: a leader keeps leading until its local deadline passes
+            logger.warning("Lease renewal failed", extra={'lease': self.name, 'error': str(e)})
+            return self.is_leader
+        if token is None:
+            # Held by another replica
+            self.token = None
+        else:
+            if not self.is_leader or token != self.token:
+                logger.info("Acquired leader lease", extra={'lease': self.name, 'holder': self.holder, 'token': token})
+            self.token = token
+            # Step down a little before the lease can expire elsewhere
+            self._valid_until = started + self.ttl * 0.9
+        return self.is_leader
+
+    def check(self) -> int:
+        """Fencing check before a side effect (local clock only)
+
+        Returns:
+        The fencing token
+
+        Raises:
+        NotLeaderError: if the lease is not held
+        """
+        if not self.is_leader:
+            raise NotLeaderError(f"{self.holder} does not hold lease {self.name!r}")
+        return self.token
+
+    async def ensure(self) -> int:
+        """Fencing check against the backend (the lease may have been taken over)"""
+        token = self.check()
+        if not await asyncio.to_thread(self.coordination.holds_lease, self.name, self.holder, token):
+            self.token = None
+            self._update_events()
+            raise NotLeaderError(f"{self.holder} lost lease {self.name!r} (token {token})")
+        return token
+
+    def _update_events(self) -> None:
+        elected, lost = self._events()
+        if self.is_leader:
+            lost.clear()
+            elected.set()
+        else:
+            if elected.is_set():
+                logger.warning("Lost leader lease", extra={'lease': self.name, 'holder': self.holder})
+            elected.clear()
+            lost.set()
+
+    async def wait_elected(self) -> None:
+        await self._events()[0].wait()
+
+    async def wait_lost(self) -> None:
+        await self._events()[1].wait()
+
+    async def run(self) -> None:
+        """Acquire/renew every `renew_interval` seconds until cancelled, then release"""
+        self._events()
+        try:
+            while True:
+                await asyncio.to_thread(self.try_acquire)
+                self._update_events()
+                # Wake up in time to notice the local deadline even if renewals hang
+                delay = self.renew_interval
+                if self.is_leader:
+                    delay = min(delay, max(self._valid_until - time.monotonic(), 0.0))
+                await asyncio.sleep(delay)
+        finally:
+            await asyncio.to_thread(self.release)
+
+    def release(self) -> None:
+        """Give up the lease so a standby can take over without waiting for expiry"""
+        if self.token is None:
+            return
+        self.token = None
+        self.coordination.release_lease(self.name, self.holder)
+        logger.info("Released leader lease", extra={'lease': self.name, 'holder': self.holder})
@@ -0,0 +1,370 @@
+"""Near-duplicate module - MinHash/LSH detection over title + abstract
+
+The same work often appears under several HF entries (revisions, companion
+papers), which `get_paper_id` cannot catch. Each paper gets a MinHash
+signature of its word 3-gram shingles; signatures are split into LSH bands,
+so a lookup only compares against papers sharing a band bucket instead of
+the whole history.
+
+Signatures are persisted under DEDUP_DIR (next to the data store):
+    signatures.parquet                       compacted signatures
+    segments/YYYYMMDDTHHMMSSffffff.parquet   signatures added since the last compaction
+Band buckets are rebuilt in memory on load.
+
+Command line:
+    python dedup.py rebuild            # index every stored paper
+    python dedup.py check "<title>"    # show near-duplicates of a title/abstract
+"""
+import argparse
+import logging
+import re
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Collection, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import opendal
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import Config
+from hf import Paper
+from schema import read_paper_table
+
+if TYPE_CHECKING:
+    from storage import PaperStorage
+
+logger = logging.getLogger(__name__)
+
+SIGNATURES_KEY = "signatures.parquet"
+SEGMENT_PREFIX = "segments/"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SHINGLE_SIZE = 3
+# Multipliers combining consecutive word hashes into one 64-bit shingle hash
+_SHINGLE_MULTIPLIERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 1], dtype=np.uint64)
+
+
+def _lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands * rows == num_perm
+
+    Uses the most rows per band (fewest candidates) whose S-curve midpoint
+    (1 / bands) ** (1 / rows) is still below the threshold, so pairs above
+    the threshold almost always share a bucket; candidates are then checked
+    against the full signature.
+    """
+    candidates = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    below = [p for p in candidates if (1 / p[0]) ** (1 / p[1]) <= threshold]
+    return max(below, key=lambda p: p[1]) if below else candidates[0]
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """64-bit hashes of the word 3-grams of normalized text (unique)"""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    word_hashes = np.fromiter((zlib.crc32(w.encode()) for w in words), dtype=np.uint64, count=len(words))
+    if len(word_hashes) < _SHINGLE_SIZE:
+        return np.unique(word_hashes)
+    # windows: (n - 2, 3) view of consecutive word hashes
+    windows = np.lib.stride_tricks.sliding_window_view(word_hashes, _SHINGLE_SIZE)
+    with np.errstate(over='ignore'):
+        return np.unique((windows * _SHINGLE_MULTIPLIERS).sum(axis=1, dtype=np.uint64))
+
+
+def paper_text(paper: Paper) -> str:
+    return f"{paper.title} {paper.abstract}"
+
+
+class NearDuplicateIndex:
+    """MinHash signatures of seen papers with an LSH band index"""
+
+    def __init__(
+        self,
+        operator: opendal.Operator,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        seed: int = 1,
+        compact_after: int = 24,
+    ):
+        """Initialize near-duplicate index
+
+        Args:
+        operator: OpenDAL operator rooted at the dedup directory
+        threshold: Estimated Jaccard similarity at or above which papers count as duplicates
+        num_perm: Signature length (more = more accurate, larger index)
+        seed: Seed of the hash functions; changing it invalidates stored signatures
+        compact_after: Compact once this many segments have accumulated
+        """
+        self.operator = operator
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.compact_after = compact_after
+        self.bands, self.rows = _lsh_params(num_perm, threshold)
+
+        # Multiply-shift hash family: h_i(x) = (a_i * x + b_i) >> 32 over uint64
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+        self._ids: List[str] = []
+        # Signature rows [0, len(self._ids)); capacity grows by doubling
+        self._matrix = np.zeros((0, num_perm), dtype=np.uint32)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._pending: List[Tuple[str, np.ndarray]] = []
+        self._loaded = False
+
+    # ---- Signatures --------------------------------------------------------
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature (num_perm uint32 values) of a text, None for text without words"""
+        hashes = shingle_hashes(text)
+        if hashes.size == 0:
+            return None
+        # (num_perm, n_shingles) permuted hashes, minimum per hash function
+        with np.errstate(over='ignore'):
+            permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, self.rows)]
+
+    # ---- Index -------------------------------------------------------------
+
+    def _insert(self, paper_id: str, signature: np.ndarray) -> None:
+        position = len(self._ids)
+        if position == len(self._matrix):
+            grown = np.zeros((max(1024, 2 * len(self._matrix)), self.num_perm), dtype=np.uint32)
+            grown[:position] = self._matrix
+            self._matrix = grown
+        self._matrix[position] = signature
+        self._ids.append(paper_id)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(position)
+
+    def _load(self) -> None:
+        """Load persisted signatures and rebuild band buckets"""
+        if self._loaded:
+            return
+        self._loaded = True
+        keys = ([SIGNATURES_KEY] if self.operator.exists(SIGNATURES_KEY) else []) + self._segment_keys()
+        if not keys:
+            return
+        table = pa.concat_tables([self._read(key) for key in keys])
+        ids = table.column("paper_id").to_pylist()
+        signatures = np.asarray(
+            table.column("signature").combine_chunks().flatten().to_numpy(zero_copy_only=False), dtype=np.uint32
+        ).reshape(len(ids), -1)
+        if signatures.shape[1] != self.num_perm:
+            logger.warning(
+                "Stored signatures have a different length, ignoring them",
+                extra={'stored': signatures.shape[1], 'expected': self.num_perm},
+            )
+            return
+
+        self._ids = ids
+        self._matrix = signatures
+        for band in range(self.bands):
+            band_keys = signatures[:, band * self.rows:(band + 1) * self.rows]
+            buckets = self._buckets[band]
+            for position, key in enumerate(band_keys):
+                buckets.setdefault(key.tobytes(), []).append(position)
+        logger.info("Near-duplicate index loaded", extra={'papers': len(ids)})
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._ids)
+
+    def query(self, text: str, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Papers whose estimated similarity to the text reaches the threshold
+
+        Returns:
+        List of (paper_id, similarity), most similar first
+        """
+        self._load()
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        if not candidates:
+            return []
+
+        positions = np.fromiter(candidates, dtype=np.int64)
+        similarity = (self._matrix[positions] == signature).mean(axis=1)
+        matches = [
+            (self._ids[p], float(s)) for p, s in zip(positions, similarity)
+            if s >= self.threshold and self._ids[p] != exclude
+        ]
+        return sorted(matches, key=lambda m: m[1], reverse=True)
+
+    def find_duplicate(self, paper: Paper) -> Optional[Tuple[str, float]]:
+        """Most similar previously seen paper, if any reaches the threshold"""
+        matches = self.query(paper_text(paper), exclude=paper.get_paper_id())
+        return matches[0] if matches else None
+
+    def add(self, papers: Iterable[Paper]) -> int:
+        """Add papers to the index (persisted on `flush`)
+
+        Returns:
+        int: Number of papers added (already indexed IDs are skipped)
+        """
+        self._load()
+        known = set(self._ids)
+        added = 0
+        for paper in papers:
+            paper_id = paper.get_paper_id()
+            if paper_id in known:
+                continue
+            signature = self.signature(paper_text(paper))
+            if signature is None:
+                continue
+            self._insert(paper_id, signature)
+            self._pending.append((paper_id, signature))
+            known.add(paper_id)
+            added += 1
+        return added
+
+    # ---- Persistence -------------------------------------------------------
+
+    def _table(self, ids: List[str], signatures: np.ndarray) -> pa.Table:
+        values = pa.array(signatures.reshape(-1), type=pa.uint32())
+        return pa.table({
+            'paper_id': pa.array(ids, type=pa.string()),
+            'signature': pa.FixedSizeListArray.from_arrays(values, self.num_perm),
+        })
+
+    def _write(self, key: str, table: pa.Table) -> None:
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression='zstd')
+        self.operator.write(key, sink.getvalue().to_pybytes())
+
+    def _read(self, key: str) -> pa.Table:
+        return pq.read_table(pa.BufferReader(self.operator.read(key)))
+
+    def _segment_keys(self) -> List[str]:
+        try:
+            entries = self.operator.list(SEGMENT_PREFIX)
+        except opendal.exceptions.NotFound:
+            return []
+        return sorted(e.path for e in entries if e.path.endswith(".parquet"))
+
+    def flush(self) -> int:
+        """Persist signatures added since the last flush as a new segment
+
+        Returns:
+        int: Number of signatures written
+        """
+        if not self._pending:
+            return 0
+        ids = [paper_id for paper_id, _ in self._pending]
+        signatures = np.vstack([signature for _, signature in self._pending])
+        ts = datetime.now(timezone.utc)
+        self._write(f"{SEGMENT_PREFIX}{ts.strftime('%Y%m%dT%H%M%S%f')}.parquet", self._table(ids, signatures))
+        self._pending = []
+
+        if len(self._segment_keys()) >= self.compact_after:
+            self.compact()
+        return len(ids)
+
+    def compact(self) -> None:
+        """Rewrite all signatures into one file and drop the segments"""
+        self._load()
+        segment_keys = self._segment_keys()
+        self._write(SIGNATURES_KEY, self._table(self._ids, self._matrix[:len(self._ids)]))
+        for key in segment_keys:
+            self.operator.delete(key)
+        logger.info("Compacted near-duplicate index", extra={'papers': len(self._ids)})
+
+    def rebuild(self, storage: "PaperStorage", paper_ids: Optional[Collection[str]] = None) -> int:
+        """Index papers from daily and archive files (existing IDs are kept)
+
+        Args:
+        storage: Paper storage to read from
+        paper_ids: Only index these papers, e.g. the posted ones (default: every stored paper)
+
+        Returns:
+        int: Number of papers added
+        """
+        added = 0
+        sources = [(storage.data_operator, key) for key in storage.list_daily_files()]
+        sources += [(storage.operator, key) for key in storage.list_archive_files()]
+        for operator, key in sources:
+            table = read_paper_table(pa.BufferReader(operator.read(key)), columns=['paper_id', 'title', 'abstract'])
+            added += self.add(
+                _StoredPaper(row['paper_id'], row['title'] or '', row['abstract'] or '')
+                for row in table.to_pylist()
+                if paper_ids is None or row['paper_id'] in paper_ids
+            )
+        self.flush()
+        self.compact()
+        return added
+
+
+class _StoredPaper:
+    """Minimal stand-in for Paper when indexing stored rows"""
+
+    __slots__ = ('paper_id', 'title', 'abstract')
+
+    def __init__(self, paper_id: str, title: str, abstract: str):
+        self.paper_id = paper_id
+        self.title = title
+        self.abstract = abstract
+
+    def get_paper_id(self) -> str:
+        return self.paper_id
+
+
+def from_storage(storage: "PaperStorage", threshold: Optional[float] = None) -> NearDuplicateIndex:
+    """Near-duplicate index under Config.DEDUP_DIR (default "<data dir>/dedup") on the storage backend
+
+    Args:
+    storage: Paper storage whose backend holds the index
+    threshold: Similarity threshold (default Config.DEDUP_THRESHOLD)
+    """
+    dedup_dir = Config.DEDUP_DIR or f"{storage.local_data_dir}/dedup"
+    if threshold is None:
+        threshold = Config.DEDUP_THRESHOLD
+    return NearDuplicateIndex(storage.create_operator(Path(dedup_dir)), threshold=threshold)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Near-duplicate index command"""
+    from log import setup_logging
+    from storage import PaperStorage
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="MinHash/LSH near-duplicate index")
+    parser.add_argument("--threshold", type=float, default=None, help="Similarity threshold (default: DEDUP_THRESHOLD or 0.8)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Index stored papers that were posted")
+    rebuild_parser.add_argument("--all", action="store_true", help="Index every stored paper, posted or not")
+    check_parser = subparsers.add_parser("check", help="Find near-duplicates of a title/abstract")
+    check_parser.add_argument("text")
+    args = parser.parse_args(argv)
+
+    storage = PaperStorage.from_env()
+    index = from_storage(storage, threshold=args.threshold)
+    if args.command == "rebuild":
+        paper_ids = None
+        if not args.all:
+            from refresh import MessageStore
+
+            messages = MessageStore(Config.MESSAGE_STORE_PATH)
+            try:
+                paper_ids = set(messages.posted_paper_ids())
+            finally:
+                messages.close()
+        added = index.rebuild(storage, paper_ids)
+        print(f"Indexed {added} new papers ({len(index)} total, {index.bands} bands x {index.rows} rows)")
+        return 0
+
+    for paper_id, similarity in index.query(args.text):
+        print(f"{paper_id}  similarity {similarity:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,356 @@
+"""Digest module - Weekly/monthly top-papers rankings from the Parquet store
+
+Ranking runs on small per-file aggregates (paper_id, day, hf_upvotes,
+github_stars, source) rather than on full paper rows. Aggregates are cached
+under the digest directory together with a manifest of source signatures,
+so a re-run only recomputes files that changed since the last run. Full rows
+are read only for the winning papers.
+
+Command line:
+    python digest.py week [--date YYYY-MM-DD] [--top N]
+    python digest.py month [--date YYYY-MM-DD] [--top N]
+"""
+import argparse
+import calendar
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import opendal
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from config import Config
+from schema import PaperRecord, read_paper_table, table_to_records
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from storage import PaperStorage
+
+
+AGGREGATE_SCHEMA = pa.schema(
+    [
+        pa.field("paper_id", pa.string()),
+        pa.field("day", pa.date32()),
+        pa.field("hf_upvotes", pa.int64()),
+        pa.field("github_stars", pa.int64()),
+        pa.field("source", pa.string()),
+    ]
+)
+
+MANIFEST_KEY = "manifest.json"
+
+# Source = (tier, key): tier is 'daily' (data root) or 'archive' (archive root)
+Source = Tuple[str, str]
+
+
+def period_range(period: str, ref_date: date) -> Tuple[date, date]:
+    """Inclusive date range of the week (Mon-Sun) or calendar month containing ref_date"""
+    if period == "week":
+        start = ref_date - timedelta(days=ref_date.weekday())
+        return start, start + timedelta(days=6)
+    if period == "month":
+        last_day = calendar.monthrange(ref_date.year, ref_date.month)[1]
+        return ref_date.replace(day=1), ref_date.replace(day=last_day)
+    raise ValueError(f"Unknown digest period: {period} (expected 'week' or 'month')")
+
+
+class DigestBuilder:
+    """Builds top-paper rankings over the daily and archive tiers"""
+
+    def __init__(
+        self,
+        storage: "PaperStorage",
+        cache_operator: Optional[opendal.Operator] = None,
+        upvote_weight: float = 1.0,
+        star_weight: float = 0.1,
+        growth_weight: float = 2.0,
+    ):
+        """Initialize digest builder
+
+        Args:
+        storage: Paper storage to read from
+        cache_operator: Operator for aggregate cache (default: Config.DIGEST_DIR, otherwise "<data dir>/digest")
+        upvote_weight / star_weight / growth_weight: Score weights for upvotes,
+            GitHub stars and upvote growth during the period
+        """
+        self.storage = storage
+        if cache_operator is None:
+            digest_dir = Config.DIGEST_DIR or f"{storage.local_data_dir}/digest"
+            cache_operator = storage.create_operator(Path(digest_dir))
+        self.operator = cache_operator
+        self.upvote_weight = upvote_weight
+        self.star_weight = star_weight
+        self.growth_weight = growth_weight
+
+    # ---- Sources and aggregate cache ---------------------------------------
+
+    def _source_operator(self, tier: str) -> opendal.Operator:
+        return self.storage.data_operator if tier == 'daily' else self.storage.operator
+
+    def _sources(self, start: date, end: date) -> List[Source]:
+        """Daily files in range; archive files for months whose daily files are gone"""
+        sources: List[Source] = []
+        covered_months = set()
+        for key in self.storage.list_daily_files():
+            day = _key_date(key)
+            if start <= day <= end:
+                sources.append(('daily', key))
+                covered_months.add((day.year, day.month))
+
+        for key in self.storage.list_archive_files():
+            stem = key.rsplit('/', 1)[-1][:6]
+            year, month = int(stem[:4]), int(stem[4:6])
+            month_start = date(year, month, 1)
+            month_end = month_start.replace(day=calendar.monthrange(year, month)[1])
+            if month_end >= start and month_start <= end and (year, month) not in covered_months:
+                sources.append(('archive', key))
+        return sources
+
+    def _signature(self, source: Source) -> str:
+        """Change signature of a source file (size + modification time or etag)"""
+        tier, key = source
+        metadata = self._source_operator(tier).stat(key)
+        return f"{metadata.content_length}:{metadata.etag or metadata.last_modified}"
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            return json.loads(self.operator.read(MANIFEST_KEY))
+        except opendal.exceptions.NotFound:
+            return {}
+        except ValueError as e:
+            logger.warning("Digest manifest unreadable, rebuilding aggregates", extra={'error': str(e)})
+            return {}
+
+    @staticmethod
+    def _cache_key(source: Source) -> str:
+        tier, key = source
+        return f"aggregates/{tier}/{key}"
+
+    def _compute_aggregate(self, source: Source) -> pa.Table:
+        """Project one source file down to ranking columns"""
+        tier, key = source
+        content = self._source_operator(tier).read(key)
+        table = read_paper_table(
+            pa.BufferReader(content),
+            columns=['paper_id', 'hf_upvotes', 'github_stars', 'collected_at'],
+        )
+        if tier == 'daily':
+            day = pa.array([_key_date(key)] * table.num_rows, type=pa.date32())
+        else:
+            # Archives don't keep the listing day; use the collection day, clamped
+            # to the archive month (backfilled rows are collected much later)
+            stem = key.rsplit('/', 1)[-1][:6]
+            month_start = date(int(stem[:4]), int(stem[4:6]), 1)
+            month_end = month_start.replace(day=calendar.monthrange(month_start.year, month_start.month)[1])
+            day = pc.cast(table.column('collected_at'), pa.date32())
+            day = pc.min_element_wise(
+                pc.max_element_wise(day, pa.scalar(month_start, pa.date32())),
+                pa.scalar(month_end, pa.date32()),
+            )
+            day = pc.fill_null(day, pa.scalar(month_start, pa.date32()))
+        return pa.table(
+            {
+                'paper_id': table.column('paper_id'),
+                'day': day,
+                'hf_upvotes': table.column('hf_upvotes'),
+                'github_stars': table.column('github_stars'),
+                'source': pa.array([f"{tier}:{key}"] * table.num_rows, type=pa.string()),
+            },
+            schema=AGGREGATE_SCHEMA,
+        )
+
+    def aggregates(self, start: date, end: date) -> pa.Table:
+        """Per-day ranking aggregates for [start, end], recomputing only changed files"""
+        sources = self._sources(start, end)
+        manifest = self._load_manifest()
+
+        with ThreadPoolExecutor(max_workers=self.storage.prefetch_concurrency) as executor:
+            signatures = dict(zip(sources, executor.map(self._signature, sources)))
+
+        stale = [s for s in sources if manifest.get(self._cache_key(s)) != signatures[s]]
+
+        def _refresh(source: Source) -> pa.Table:
+            table = self._compute_aggregate(source)
+            sink = pa.BufferOutputStream()
+            pq.write_table(table, sink, compression='zstd')
+            self.operator.write(self._cache_key(source), sink.getvalue().to_pybytes())
+            return table
+
+        def _cached(source: Source) -> pa.Table:
+            return pq.read_table(pa.BufferReader(self.operator.read(self._cache_key(source))))
+
+        with ThreadPoolExecutor(max_workers=self.storage.prefetch_concurrency) as executor:
+            fresh = dict(zip(stale, executor.map(_refresh, stale)))
+            reused = [s for s in sources if s not in fresh]
+            cached = dict(zip(reused, executor.map(_cached, reused)))
+
+        if stale:
+            for source in stale:
+                manifest[self._cache_key(source)] = signatures[source]
+            self.operator.write(MANIFEST_KEY, json.dumps(manifest, indent=2).encode())
+        logger.info("Digest aggregates ready", extra={'files': len(sources), 'recomputed': len(stale)})
+
+        tables = [fresh[s] if s in fresh else cached[s] for s in sources]
+        if not tables:
+            return AGGREGATE_SCHEMA.empty_table()
+        table = pa.concat_tables(tables)
+        days = table.column('day')
+        in_range = pc.and_(
+            pc.greater_equal(days, pa.scalar(start, pa.date32())),
+            pc.less_equal(days, pa.scalar(end, pa.date32())),
+        )
+        return table.filter(in_range)
+
+    # ---- Ranking -----------------------------------------------------------
+
+    def rank(self, start: date, end: date, top: int = 10) -> pa.Table:
+        """Rank papers listed in [start, end]
+
+        Upvotes and stars use the latest value from the metrics history when
+        available (daily files hold only the first reading); growth is the
+        upvote increase during the period.
+
+        Returns:
+        pa.Table with paper_id, source, hf_upvotes, github_stars,
+        upvotes_delta and score, sorted by score (descending)
+        """
+        table = self.aggregates(start, end)
+        if table.num_rows == 0:
+            return pa.table({
+                'paper_id': pa.array([], pa.string()),
+                'source': pa.array([], pa.string()),
+                'hf_upvotes': pa.array([], pa.int64()),
+                'github_stars': pa.array([], pa.int64()),
+                'upvotes_delta': pa.array([], pa.int64()),
+                'score': pa.array([], pa.float64()),
+            })
+
+        # One row per paper: highest stored reading, earliest listing
+        table = table.sort_by([('paper_id', 'ascending'), ('day', 'ascending')])
+        papers = table.group_by('paper_id', use_threads=False).aggregate([
+            ('hf_upvotes', 'max'),
+            ('github_stars', 'max'),
+            ('source', 'first'),
+        ]).rename_columns(['paper_id', 'hf_upvotes', 'github_stars', 'source'])
+
+        period_end = datetime.combine(end + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        window = timedelta(days=(end - start).days + 1)
+        velocity = self.storage.history.velocity(window=window, now=period_end).select(
+            ['paper_id', 'hf_upvotes', 'github_stars', 'upvotes_delta']
+        )
+        joined = papers.join(velocity, 'paper_id', right_suffix='_latest')
+
+        upvotes = pc.fill_null(pc.coalesce(joined.column('hf_upvotes_latest'), joined.column('hf_upvotes')), 0)
+        stars = pc.fill_null(pc.coalesce(joined.column('github_stars_latest'), joined.column('github_stars')), 0)
+        growth = pc.fill_null(joined.column('upvotes_delta'), 0)
+        score = pc.add(
+            pc.add(
+                pc.multiply(pc.cast(upvotes, pa.float64()), self.upvote_weight),
+                pc.multiply(pc.cast(stars, pa.float64()), self.star_weight),
+            ),
+            pc.multiply(pc.cast(growth, pa.float64()), self.growth_weight),
+        )
+        ranked = pa.table({
+            'paper_id': joined.column('paper_id'),
+            'source': joined.column('source'),
+            'hf_upvotes': upvotes,
+            'github_stars': stars,
+            'upvotes_delta': growth,
+            'score': score,
+        })
+        return ranked.sort_by([('score', 'descending'), ('paper_id', 'ascending')]).slice(0, top)
+
+    def _load_papers(self, ranked: pa.Table) -> List[PaperRecord]:
+        """Load full rows for ranked papers, reading only the files that contain them"""
+        rows = ranked.to_pylist()
+        by_source: Dict[str, List[str]] = {}
+        for row in rows:
+            by_source.setdefault(row['source'], []).append(row['paper_id'])
+
+        details: Dict[str, PaperRecord] = {}
+        for source, paper_ids in by_source.items():
+            tier, key = source.split(':', 1)
+            table = read_paper_table(pa.BufferReader(self._source_operator(tier).read(key)))
+            table = table.filter(pc.is_in(table.column('paper_id'), value_set=pa.array(paper_ids)))
+            for record in table_to_records(table):
+                details.setdefault(record.paper_id, record)
+
+        papers = []
+        for row in rows:
+            record = details.get(row['paper_id'])
+            if not record:
+                continue
+            # Latest readings come from the ranking (history), not the stored first reading
+            record.title = record.title or ''
+            record.authors = record.authors or []
+            record.abstract = record.abstract or ''
+            record.github_stars = row['github_stars'] if record.github_url else None
+            record.hf_upvotes = row['hf_upvotes']
+            papers.append(record)
+        return papers
+
+    def build(self, period: str, ref_date: Optional[date] = None, top: int = 10) -> dict:
+        """Build a digest for the week or month containing ref_date
+
+        Returns:
+        dict with period, start, end, papers (List[PaperRecord]) and ranking (pa.Table)
+        """
+        start, end = period_range(period, ref_date or date.today())
+        ranking = self.rank(start, end, top=top)
+        return {
+            'period': period,
+            'start': start,
+            'end': end,
+            'papers': self._load_papers(ranking),
+            'ranking': ranking,
+        }
+
+    # ---- Posting state -----------------------------------------------------
+
+    @staticmethod
+    def _posted_key(period: str, start: date) -> str:
+        return f"posted/{period}-{start.isoformat()}"
+
+    def is_posted(self, period: str, start: date) -> bool:
+        """Whether the digest for this period was already posted"""
+        return self.operator.exists(self._posted_key(period, start))
+
+    def mark_posted(self, period: str, start: date) -> None:
+        """Record that the digest for this period was posted"""
+        self.operator.write(self._posted_key(period, start), datetime.now(timezone.utc).isoformat().encode())
+
+
+def _key_date(key: str) -> date:
+    """Date of a daily file key YYYY/MM/YYYYMMDD.parquet"""
+    return datetime.strptime(key.rsplit('/', 1)[-1][:8], "%Y%m%d").date()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Digest preview command"""
+    from log import setup_logging
+    from storage import PaperStorage
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Build a top-papers digest from stored data")
+    parser.add_argument("period", choices=["week", "month"])
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today(), help="Any date inside the period")
+    parser.add_argument("--top", type=int, default=10, help="Number of papers")
+    args = parser.parse_args(argv)
+
+    digest = DigestBuilder(PaperStorage.from_env()).build(args.period, args.date, top=args.top)
+    print(f"\nTop papers {digest['start']} - {digest['end']}:")
+    scores = {row['paper_id']: row for row in digest['ranking'].to_pylist()}
+    for i, paper in enumerate(digest['papers'], 1):
+        row = scores[paper.get_paper_id()]
+        print(f"{i:>2}. [{row['score']:.1f}] {paper.title[:70]}  (👍 {row['hf_upvotes']}, ⭐ {row['github_stars']}, +{row['upvotes_delta']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
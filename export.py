@@ -0,0 +1,504 @@
+"""Export module - Static feeds and HTML archive from the Parquet store
+
+Renders, from the daily and archive files the bot already writes:
+
+    index.html       months with paper counts and links to the feeds
+    YYYY/MM.html     one page per month, papers grouped by listing day
+    feed.xml         RSS 2.0 feed of the latest papers
+    atom.xml         Atom feed of the latest papers
+    feed.json        JSON Feed 1.1 of the latest papers
+
+A month is one partition: its daily files, or its archive file once the daily
+files are gone (the same rule as digest.py). `manifest.json` in the output
+root records the change signature of every source file, so a run re-renders
+only months whose files changed, appeared or disappeared; an hourly update
+touches the current month page, the index and the feeds. Month pages are
+rendered in a process pool when several months changed. Output goes through
+an OpenDAL operator, so the site can be written to any storage backend.
+
+With a message store (EXPORT_POSTED_ONLY, the default), only papers the bot
+posted are exported; papers held back by routing, near-duplicate detection or
+a missing abstract stay out. The manifest keeps each month's left-out IDs, so
+a month is rendered again once one of them is posted (e.g. from the requeue).
+
+Command line:
+    python export.py [--full] [--workers N]
+"""
+import argparse
+import calendar
+import html
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import opendal
+import pyarrow as pa
+
+from config import Config
+from metrics import EXPORT_PAGES
+from schema import read_paper_table
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from refresh import MessageStore
+    from storage import PaperStorage
+
+
+MANIFEST_KEY = "manifest.json"
+MANIFEST_VERSION = 1
+EXPORT_COLUMNS = [
+    'paper_id', 'title', 'authors', 'abstract', 'url', 'arxiv_url',
+    'github_url', 'github_stars', 'hf_upvotes', 'collected_at',
+]
+
+# Source = (tier, key): tier is 'daily' (data root) or 'archive' (archive root)
+Source = Tuple[str, str]
+Row = Dict[str, Any]
+
+
+def month_page_key(month_key: str) -> str:
+    """Output key of a month page: "2025-10" -> 2025/10.html"""
+    return f"{month_key[:4]}/{month_key[5:7]}.html"
+
+
+def _source_month(source: Source) -> str:
+    """'YYYY-MM' of a daily (YYYY/MM/YYYYMMDD.parquet) or archive (YYYY/YYYYMM.parquet) key"""
+    stem = source[1].rsplit('/', 1)[-1]
+    return f"{stem[:4]}-{stem[4:6]}"
+
+
+def _published(row: Row) -> datetime:
+    """Publication time of a paper: collection time, or midnight UTC of its listing day"""
+    if row['collected_at'] is not None:
+        return row['collected_at']
+    return datetime.combine(date.fromisoformat(row['day']), datetime.min.time(), tzinfo=timezone.utc)
+
+
+def _sort_rows(rows: List[Row]) -> List[Row]:
+    """Newest day first, most upvoted first within a day"""
+    return sorted(rows, key=lambda row: (row['day'], row['hf_upvotes'] or 0, row['paper_id']), reverse=True)
+
+
+# ---- Rendering (module-level so process pool workers can run it) -----------
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<link rel="alternate" type="application/rss+xml" title="RSS" href="{root}feed.xml">
+<link rel="alternate" type="application/atom+xml" title="Atom" href="{root}atom.xml">
+<link rel="alternate" type="application/feed+json" title="JSON Feed" href="{root}feed.json">
+<style>
+body {{ max-width: 52rem; margin: 2rem auto; padding: 0 1rem; font: 16px/1.5 system-ui, sans-serif; color: #222; }}
+article {{ margin: 1.5rem 0; }}
+article h3 {{ margin-bottom: .2rem; }}
+.meta {{ color: #666; font-size: .9rem; }}
+details {{ margin-top: .3rem; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def _page(title: str, body: str, root: str) -> str:
+    return PAGE_TEMPLATE.format(title=html.escape(title), body=body, root=root)
+
+
+def _paper_html(row: Row) -> str:
+    links = [f'<a href="{html.escape(row["url"] or "")}">HuggingFace</a>']
+    if row['arxiv_url']:
+        links.append(f'<a href="{html.escape(row["arxiv_url"])}">arXiv</a>')
+    if row['github_url']:
+        stars = f" ★ {row['github_stars']}" if row['github_stars'] is not None else ""
+        links.append(f'<a href="{html.escape(row["github_url"])}">GitHub</a>{stars}')
+    upvotes = f"👍 {row['hf_upvotes']} · " if row['hf_upvotes'] is not None else ""
+    return (
+        f'<article id="{html.escape(row["paper_id"])}">\n'
+        f'<h3><a href="{html.escape(row["url"] or "")}">{html.escape(row["title"] or "")}</a></h3>\n'
+        f'<div class="meta">{html.escape(", ".join(row["authors"] or []))}</div>\n'
+        f'<div class="meta">{upvotes}{" · ".join(links)}</div>\n'
+        f'<details><summary>Abstract</summary><p>{html.escape(row["abstract"] or "")}</p></details>\n'
+        f'</article>'
+    )
+
+
+def render_month(month_key: str, rows: List[Row], settings: Dict[str, Any]) -> str:
+    """HTML page of one month, papers grouped by day (rows sorted newest first)"""
+    parts = [f'<p><a href="../index.html">{html.escape(settings["title"])}</a></p>',
+             f'<h1>{month_key} · {len(rows)} papers</h1>']
+    day = None
+    for row in rows:
+        if row['day'] != day:
+            day = row['day']
+            parts.append(f'<h2 id="{day}">{day}</h2>')
+        parts.append(_paper_html(row))
+    return _page(f"{settings['title']} – {month_key}", "\n".join(parts), "../")
+
+
+def render_index(months: Dict[str, int], settings: Dict[str, Any]) -> str:
+    """HTML index of all months, newest first"""
+    parts = [f'<h1>{html.escape(settings["title"])}</h1>',
+             '<p><a href="feed.xml">RSS</a> · <a href="atom.xml">Atom</a> · <a href="feed.json">JSON Feed</a></p>',
+             '<ul>']
+    for month_key in sorted(months, reverse=True):
+        parts.append(f'<li><a href="{month_page_key(month_key)}">{month_key}</a> ({months[month_key]} papers)</li>')
+    parts.append('</ul>')
+    return _page(settings['title'], "\n".join(parts), "")
+
+
+def _absolute(settings: Dict[str, Any], key: str) -> str:
+    base = settings['base_url']
+    return f"{base.rstrip('/')}/{key}" if base else key
+
+
+def render_rss(items: List[Row], settings: Dict[str, Any]) -> str:
+    """RSS 2.0 feed"""
+    entries = []
+    for row in items:
+        entries.append(
+            "<item>"
+            f"<title>{html.escape(row['title'] or '')}</title>"
+            f"<link>{html.escape(row['url'] or '')}</link>"
+            f"<guid isPermaLink=\"false\">{html.escape(row['paper_id'])}</guid>"
+            f"<pubDate>{format_datetime(_published(row))}</pubDate>"
+            f"<description>{html.escape(row['abstract'] or '')}</description>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0"><channel>'
+        f"<title>{html.escape(settings['title'])}</title>"
+        f"<link>{html.escape(_absolute(settings, 'index.html'))}</link>"
+        f"<description>{html.escape(settings['title'])}</description>"
+        + "".join(entries)
+        + "</channel></rss>\n"
+    )
+
+
+def render_atom(items: List[Row], settings: Dict[str, Any]) -> str:
+    """Atom feed"""
+    updated = max((_published(row) for row in items), default=datetime(1970, 1, 1, tzinfo=timezone.utc))
+    entries = []
+    for row in items:
+        authors = "".join(f"<author><name>{html.escape(name)}</name></author>" for name in row['authors'] or [])
+        entries.append(
+            "<entry>"
+            f"<id>{html.escape(row['url'] or row['paper_id'])}</id>"
+            f"<title>{html.escape(row['title'] or '')}</title>"
+            f"<link href=\"{html.escape(row['url'] or '')}\"/>"
+            f"<updated>{_published(row).isoformat()}</updated>"
+            f"{authors}"
+            f"<summary>{html.escape(row['abstract'] or '')}</summary>"
+            "</entry>"
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<id>{html.escape(_absolute(settings, 'atom.xml'))}</id>"
+        f"<title>{html.escape(settings['title'])}</title>"
+        f"<updated>{updated.isoformat()}</updated>"
+        f"<link rel=\"self\" href=\"{html.escape(_absolute(settings, 'atom.xml'))}\"/>"
+        + "".join(entries)
+        + "</feed>\n"
+    )
+
+
+def render_json_feed(items: List[Row], settings: Dict[str, Any]) -> str:
+    """JSON Feed 1.1"""
+    feed = {
+        'version': "https://jsonfeed.org/version/1.1",
+        'title': settings['title'],
+        'home_page_url': _absolute(settings, "index.html"),
+        'feed_url': _absolute(settings, "feed.json"),
+        'items': [
+            {
+                'id': row['paper_id'],
+                'url': row['url'],
+                'external_url': row['arxiv_url'],
+                'title': row['title'],
+                'content_text': row['abstract'],
+                'date_published': _published(row).isoformat(),
+                'authors': [{'name': name} for name in row['authors'] or []],
+            }
+            for row in items
+        ],
+    }
+    return json.dumps(feed, ensure_ascii=False, indent=1)
+
+
+def _render_month_job(job: Tuple[str, List[Row], Dict[str, Any]]) -> Tuple[str, str]:
+    month_key, rows, settings = job
+    return month_key, render_month(month_key, rows, settings)
+
+
+# ---- Exporter ---------------------------------------------------------------
+
+class SiteExporter:
+    """Incrementally renders feeds and month pages from a PaperStorage"""
+
+    def __init__(
+        self,
+        storage: "PaperStorage",
+        operator: Optional[opendal.Operator] = None,
+        title: str = "Hugging Face Daily Papers",
+        base_url: str = "",
+        feed_size: int = 50,
+        workers: Optional[int] = None,
+        messages: Optional["MessageStore"] = None,
+    ):
+        """Initialize exporter
+
+        Args:
+        storage: Paper storage to read from
+        operator: Output operator (default: EXPORT_DIR on the storage backend)
+        title: Site and feed title
+        base_url: Public URL of the output root, used for absolute feed links (empty = relative links)
+        feed_size: Papers in each feed
+        workers: Render processes for month pages (default: CPU count)
+        messages: Posted messages; when given, only posted papers are exported
+        """
+        self.storage = storage
+        self.operator = operator or storage.create_operator(Path(Config.EXPORT_DIR))
+        self.messages = messages
+        self.settings = {'title': title, 'base_url': base_url, 'feed_size': feed_size, 'posted_only': messages is not None}
+        self.workers = workers or os.cpu_count() or 1
+
+    @classmethod
+    def from_config(cls, storage: "PaperStorage", messages: Optional["MessageStore"] = None) -> "SiteExporter":
+        """Exporter from EXPORT_* settings; `messages` is used when EXPORT_POSTED_ONLY is set"""
+        return cls(
+            storage,
+            title=Config.EXPORT_TITLE,
+            base_url=Config.EXPORT_BASE_URL,
+            feed_size=Config.EXPORT_FEED_SIZE,
+            workers=Config.EXPORT_WORKERS or None,
+            messages=messages if Config.EXPORT_POSTED_ONLY else None,
+        )
+
+    # ---- Sources and manifest ----------------------------------------------
+
+    def _source_operator(self, tier: str) -> opendal.Operator:
+        return self.storage.data_operator if tier == 'daily' else self.storage.operator
+
+    def _sources(self) -> Dict[str, List[Source]]:
+        """Source files by month: daily files, or the archive for months without them"""
+        months: Dict[str, List[Source]] = {}
+        for key in self.storage.list_daily_files():
+            months.setdefault(_source_month(('daily', key)), []).append(('daily', key))
+        for key in self.storage.list_archive_files():
+            month_key = _source_month(('archive', key))
+            if month_key not in months:
+                months[month_key] = [('archive', key)]
+        return months
+
+    def _signature(self, source: Source) -> str:
+        """Change signature of a source file (size + modification time or etag)"""
+        tier, key = source
+        metadata = self._source_operator(tier).stat(key)
+        return f"{metadata.content_length}:{metadata.etag or metadata.last_modified}"
+
+    def _load_manifest(self) -> dict:
+        try:
+            manifest = json.loads(self.operator.read(MANIFEST_KEY))
+        except opendal.exceptions.NotFound:
+            return {}
+        except ValueError as e:
+            logger.warning("Export manifest unreadable, rebuilding site", extra={'error': str(e)})
+            return {}
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('settings') != self.settings:
+            # Layout or title/links changed: every page has to be rendered again
+            return {}
+        return manifest
+
+    # ---- Reading -----------------------------------------------------------
+
+    def _read_source(self, source: Source) -> List[Row]:
+        """Export columns of one source file, with the listing day of every row"""
+        tier, key = source
+        content = self._source_operator(tier).read(key)
+        rows = read_paper_table(pa.BufferReader(content), columns=EXPORT_COLUMNS).to_pylist()
+        if tier == 'daily':
+            stem = key.rsplit('/', 1)[-1]
+            day = f"{stem[:4]}-{stem[4:6]}-{stem[6:8]}"
+            for row in rows:
+                row['day'] = day
+            return rows
+
+        # Archives don't keep the listing day; use the collection day, clamped to the month
+        year, month = int(_source_month(source)[:4]), int(_source_month(source)[5:7])
+        first, last = date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+        for row in rows:
+            collected = row['collected_at'].date() if row['collected_at'] else first
+            row['day'] = min(max(collected, first), last).isoformat()
+        return rows
+
+    def _read_month(self, sources: List[Source]) -> List[Row]:
+        """Rows of one month, each paper once (first listing day), sorted newest first"""
+        rows: List[Row] = []
+        for source in sorted(sources):
+            rows.extend(self._read_source(source))
+        seen = set()
+        unique = []
+        for row in sorted(rows, key=lambda row: row['day']):
+            if row['paper_id'] not in seen:
+                seen.add(row['paper_id'])
+                unique.append(row)
+        return _sort_rows(unique)
+
+    @staticmethod
+    def _split_posted(rows: List[Row], posted: Optional[Dict[str, float]]) -> Tuple[List[Row], List[str]]:
+        """Rows of posted papers and the IDs left out (everything is kept without a message store)"""
+        if posted is None:
+            return rows, []
+        return [row for row in rows if row['paper_id'] in posted], [row['paper_id'] for row in rows if row['paper_id'] not in posted]
+
+    # ---- Export ------------------------------------------------------------
+
+    def _render_months(self, jobs: List[Tuple[str, List[Row], Dict[str, Any]]]) -> List[Tuple[str, str]]:
+        """Render month pages, in worker processes when more than one month changed"""
+        if len(jobs) <= 1 or self.workers <= 1:
+            return [_render_month_job(job) for job in jobs]
+        # spawn: the bot is multi-threaded, forking it could copy held locks
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)), mp_context=context) as pool:
+            return list(pool.map(_render_month_job, jobs, chunksize=max(1, len(jobs) // (self.workers * 4))))
+
+    def export(self, full: bool = False) -> dict:
+        """Render changed months, the index and the feeds
+
+        Args:
+        full: Ignore the manifest and render every month
+
+        Returns:
+        dict with months (total), rendered, removed, feed_items and seconds
+        """
+        started = time.perf_counter()
+        months = self._sources()
+        manifest = {} if full else self._load_manifest()
+        previous_sources: Dict[str, Dict[str, str]] = manifest.get('sources', {})
+        counts: Dict[str, int] = manifest.get('months', {})
+        unposted: Dict[str, List[str]] = manifest.get('unposted', {})
+        posted = self.messages.posted_paper_ids() if self.messages is not None else None
+
+        all_sources = [source for sources in months.values() for source in sources]
+        with ThreadPoolExecutor(max_workers=self.storage.prefetch_concurrency) as executor:
+            signatures = dict(zip(all_sources, executor.map(self._signature, all_sources)))
+        current_sources = {
+            month_key: {f"{tier}:{key}": signatures[(tier, key)] for tier, key in sources}
+            for month_key, sources in months.items()
+        }
+        changed = sorted(
+            m for m in months
+            if previous_sources.get(m) != current_sources[m] or m not in counts
+            # A paper left out last time has been posted since
+            or (posted is not None and any(paper_id in posted for paper_id in unposted.get(m, ())))
+        )
+        removed = sorted(m for m in previous_sources if m not in months)
+
+        if not changed and not removed:
+            logger.info("Export up to date", extra={'months': len(months)})
+            return {'months': len(months), 'rendered': 0, 'removed': 0, 'feed_items': 0,
+                    'seconds': round(time.perf_counter() - started, 3)}
+
+        with ThreadPoolExecutor(max_workers=self.storage.prefetch_concurrency) as executor:
+            loaded = dict(zip(changed, executor.map(lambda m: self._read_month(months[m]), changed)))
+        for month_key in changed:
+            loaded[month_key], left_out = self._split_posted(loaded[month_key], posted)
+            if left_out:
+                unposted[month_key] = left_out
+            else:
+                unposted.pop(month_key, None)
+
+        for month_key, page in self._render_months([(m, loaded[m], self.settings) for m in changed]):
+            self.operator.write(month_page_key(month_key), page.encode())
+            counts[month_key] = len(loaded[month_key])
+            EXPORT_PAGES.inc(kind="month")
+        for month_key in removed:
+            try:
+                self.operator.delete(month_page_key(month_key))
+            except opendal.exceptions.NotFound:
+                pass
+            counts.pop(month_key, None)
+            unposted.pop(month_key, None)
+
+        # Feeds: newest months until enough papers, reading unchanged months only if needed
+        items: List[Row] = []
+        for month_key in sorted(months, reverse=True):
+            if len(items) >= self.settings['feed_size']:
+                break
+            if month_key in loaded:
+                rows = loaded[month_key]
+            else:
+                rows, _ = self._split_posted(self._read_month(months[month_key]), posted)
+            items.extend(rows)
+        items = items[:self.settings['feed_size']]
+
+        self.operator.write("index.html", render_index(counts, self.settings).encode())
+        self.operator.write("feed.xml", render_rss(items, self.settings).encode())
+        self.operator.write("atom.xml", render_atom(items, self.settings).encode())
+        self.operator.write("feed.json", render_json_feed(items, self.settings).encode())
+        EXPORT_PAGES.inc(kind="index")
+        EXPORT_PAGES.inc(3, kind="feed")
+
+        # Manifest last: an interrupted run renders the same months again
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'settings': self.settings,
+            'sources': current_sources,
+            'months': counts,
+            'unposted': unposted,
+        }
+        self.operator.write(MANIFEST_KEY, json.dumps(manifest, indent=1).encode())
+
+        stats = {
+            'months': len(months),
+            'rendered': len(changed),
+            'removed': len(removed),
+            'feed_items': len(items),
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.info("Export finished", extra=stats)
+        return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Static export command"""
+    from log import setup_logging
+    from refresh import MessageStore
+    from storage import PaperStorage
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Export feeds and a static HTML archive from stored papers")
+    parser.add_argument("--full", action="store_true", help="Render every month, ignoring the manifest")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: EXPORT_WORKERS or CPU count)")
+    args = parser.parse_args(argv)
+
+    messages = MessageStore(Config.MESSAGE_STORE_PATH) if Config.EXPORT_POSTED_ONLY else None
+    exporter = SiteExporter.from_config(PaperStorage.from_env(), messages)
+    if args.workers:
+        exporter.workers = args.workers
+    try:
+        stats = exporter.export(full=args.full)
+    finally:
+        if messages is not None:
+            messages.close()
+    print(f"Exported {stats['rendered']} of {stats['months']} months "
+          f"({stats['removed']} removed, {stats['feed_items']} feed items) in {stats['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
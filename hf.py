@@ -1,13 +1,30 @@
+import asyncio
 import json
+import logging
 import re
 import time
-from typing import Dict, List, Optional, Any
+from collections import deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 
 import requests
 from bs4 import BeautifulSoup
 from pydantic import BaseModel, AnyHttpUrl
 from datetime import date
 
+from config import Config
+from metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS, PAPERS, PARSE_SECONDS
+from resilience import CircuitOpenError, RateLimiter, Upstream
+
+if TYPE_CHECKING:
+    from arxiv_api import ArxivEnricher
+
+logger = logging.getLogger(__name__)
+
+# Retry/circuit-breaker policy per upstream; detail pages may be hedged (HF_HEDGE_AFTER)
+HUGGINGFACE = Upstream.from_config("huggingface", Config.HF_TIMEOUT, hedge_after=Config.HF_HEDGE_AFTER)
+GITHUB = Upstream.from_config("github", Config.GITHUB_TIMEOUT)
+
 class Paper(BaseModel):
     title: str
     authors: list[str]
@@ -18,6 +35,9 @@ class Paper(BaseModel):
     github_url: AnyHttpUrl | None = None
     github_stars: int | None = None
     hf_upvotes: int | None = None
+    # From the arXiv export API (kept in its cache, not in the Parquet files)
+    arxiv_categories: list[str] | None = None
+    arxiv_version: int | None = None
     
     def get_paper_id(self) -> str:
         """Extract paper ID from URL as unique identifier"""
@@ -26,12 +46,71 @@ class Paper(BaseModel):
 
 PaperDetails = Dict[str, Any]
 
+
+class FetchInterrupted(Exception):
+    """The fetch was stopped early (shutdown requested)"""
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """requests.get with per-host latency and status metrics"""
+    host = urlparse(url).hostname or "unknown"
+    with HTTP_REQUEST_SECONDS.time(host=host):
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.RequestException:
+            HTTP_REQUESTS.inc(host=host, status="error")
+            raise
+    HTTP_REQUESTS.inc(host=host, status=str(response.status_code))
+    return response
+
+
+def fetch_url(upstream: Upstream, url: str, hedge: bool = False) -> requests.Response:
+    """GET `url` under the upstream's timeout, retry and circuit-breaker policy
+
+    Raises:
+    requests.HTTPError: for error statuses (after retries for 429/5xx)
+    CircuitOpenError: if the upstream is considered down
+    """
+    def attempt() -> requests.Response:
+        response = http_get(url, timeout=upstream.timeout)
+        response.raise_for_status()
+        return response
+
+    return upstream.call(attempt, hedge=hedge)
+
+
+def fetch_github_stars(github_url: str) -> Optional[int]:
+    """Fetch the star count of a repository via the GitHub API"""
+    try:
+        # Extract owner/repo from URL
+        url_parts = github_url.rstrip('/').split('github.com/')[-1].split('/')
+        if len(url_parts) >= 2:
+            owner, repo = url_parts[0], url_parts[1]
+            api_url = f'https://api.github.com/repos/{owner}/{repo}'
+            gh_data = fetch_url(GITHUB, api_url).json()
+            return gh_data.get('stargazers_count')
+    except Exception as e:
+        logger.warning("Failed to fetch GitHub stars", extra={'github_url': github_url, 'error': str(e)})
+    return None
+
+
 def fetch_paper_details(paper_url: str) -> PaperDetails:
     """Fetch detailed information for a single paper (full abstract and author list)"""
-    response = requests.get(paper_url)
-    response.raise_for_status()
-    
-    soup = BeautifulSoup(response.content, 'html.parser')
+    # Idempotent GET: a slow answer may be raced by a second request
+    response = fetch_url(HUGGINGFACE, paper_url, hedge=True)
+
+    with PARSE_SECONDS.time(page="detail"):
+        details = parse_paper_details(response.content)
+
+    # If the page doesn't show stars, try fetching via GitHub API
+    if details['github_stars'] is None and details['github_url']:
+        details['github_stars'] = fetch_github_stars(details['github_url'])
+    return details
+
+
+def parse_paper_details(html: bytes | str) -> PaperDetails:
+    """Parse a paper page (full abstract, authors, links, stars and upvotes)"""
+    soup = BeautifulSoup(html, 'html.parser')
     
     # Extract full abstract
     abstract = ""
@@ -118,21 +197,6 @@ def fetch_paper_details(paper_url: str) -> PaperDetails:
                     github_stars = int(stars_val)
                 except ValueError:
                     pass
-
-        # If not found above, try fetching via GitHub API
-        if github_stars is None and github_url:
-            try:
-                # Extract owner/repo from URL
-                url_parts = github_url.rstrip('/').split('github.com/')[-1].split('/')
-                if len(url_parts) >= 2:
-                    owner, repo = url_parts[0], url_parts[1]
-                    api_url = f'https://api.github.com/repos/{owner}/{repo}'
-                    gh_response = requests.get(api_url, timeout=5)
-                    if gh_response.status_code == 200:
-                        gh_data = gh_response.json()
-                        github_stars = gh_data.get('stargazers_count')
-            except Exception as e:
-                print(f"  Failed to fetch GitHub stars: {e}")
     
     # Extract HuggingFace upvotes
     hf_upvotes = None
@@ -158,14 +222,11 @@ def fetch_paper_details(paper_url: str) -> PaperDetails:
         'hf_upvotes': hf_upvotes
     }
 
-def fetch_huggingface_papers(target_date: date) -> List[Paper]:
-    url = f"https://huggingface.co/papers/date/{target_date.strftime('%Y-%m-%d')}"
-    response = requests.get(url)
-    response.raise_for_status()
-    
-    soup = BeautifulSoup(response.content, 'html.parser')
-    papers = []
-    
+def parse_papers_list(html: bytes | str) -> List[Dict[str, Optional[str]]]:
+    """Parse a daily list page into title, url and hero_image per paper card"""
+    soup = BeautifulSoup(html, 'html.parser')
+    entries = []
+
     # Find all paper cards
     paper_cards = soup.find_all('article', class_='relative flex flex-col overflow-hidden rounded-xl border')
 
@@ -186,36 +247,230 @@ def fetch_huggingface_papers(target_date: date) -> List[Paper]:
             if hero_image.startswith('/'):
                 hero_image = "https://huggingface.co" + hero_image
 
-        # Fetch paper details (full abstract and authors)
-        print(f"Fetching paper details: {title[:50]}...")
-        try:
-            details = fetch_paper_details(paper_url)
+        entries.append({'title': title, 'url': paper_url, 'hero_image': hero_image})
+    return entries
+
+
+def _fetch_list(
+    target_date: date,
+    known_details: Dict[str, PaperDetails],
+    enricher: Optional["ArxivEnricher"],
+) -> Tuple[List[Dict[str, Optional[str]]], Dict[str, Dict[str, Any]]]:
+    """Fetch the daily list and resolve arXiv metadata for all papers not yet scraped
+
+    Returns:
+    List entries and arXiv metadata by paper ID
+    """
+    url = f"https://huggingface.co/papers/date/{target_date.strftime('%Y-%m-%d')}"
+    response = fetch_url(HUGGINGFACE, url)
+
+    with PARSE_SECONDS.time(page="list"):
+        entries = parse_papers_list(response.content)
+
+    if enricher is None and Config.ENABLE_ARXIV_ENRICHMENT:
+        from arxiv_api import default_enricher
+
+        enricher = default_enricher()
+    arxiv_metadata = {}
+    if enricher is not None:
+        pending = [entry['url'] for entry in entries if entry['url'] not in known_details]
+        arxiv_metadata = enricher.lookup(_url_paper_id(paper_url) for paper_url in pending)
+    return entries, arxiv_metadata
+
+
+def _url_paper_id(paper_url: str) -> str:
+    return paper_url.rstrip('/').split('/')[-1]
+
+
+def _entry_details(
+    entry: Dict[str, Optional[str]],
+    arxiv_metadata: Dict[str, Dict[str, Any]],
+    limiter: Optional[RateLimiter] = None,
+) -> Optional[PaperDetails]:
+    """Fetch one paper's detail page and merge its arXiv metadata
+
+    Without a limiter, each fetch is followed by a 0.5s pause.
+
+    Returns:
+    The details, None if the paper is skipped (page unavailable or no abstract)
+
+    Raises:
+    CircuitOpenError: if HuggingFace is considered down
+    """
+    paper_url = entry['url']
+    logger.info("Fetching paper details", extra={'title': entry['title'][:50]})
+    try:
+        if limiter is not None:
+            limiter.acquire()
+        details = fetch_paper_details(paper_url)
+        if arxiv_metadata:
+            from arxiv_api import merge_details
+
+            details = merge_details(details, arxiv_metadata.get(_url_paper_id(paper_url)))
+        if limiter is None:
             time.sleep(0.5)  # Avoid making requests too quickly
-        except Exception as e:
-            print(f"Failed to fetch paper details: {e}")
-            details = {
-                'authors': [],
-                'abstract': '',
-                'arxiv_url': None,
-                'github_url': None,
-                'github_stars': None,
-                'hf_upvotes': None
-            }
-        
-        papers.append(Paper(
-            title=title,
-            authors=details.get('authors', []),
-            abstract=details.get('abstract', ''),
-            url=paper_url,
-            hero_image=hero_image,
-            arxiv_url=details.get('arxiv_url'),
-            github_url=details.get('github_url'),
-            github_stars=details.get('github_stars'),
-            hf_upvotes=details.get('hf_upvotes')
-        ))
-    
-    return papers
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.warning("Skipping paper, details unavailable", extra={'url': paper_url, 'error': str(e)})
+        PAPERS.inc(stage="incomplete")
+        return None
+    if not details.get('abstract'):
+        logger.warning("Skipping paper without abstract", extra={'url': paper_url})
+        PAPERS.inc(stage="incomplete")
+        return None
+    return details
+
+
+def _entry_paper(entry: Dict[str, Optional[str]], details: PaperDetails) -> Paper:
+    return Paper(
+        title=entry['title'],
+        authors=details.get('authors', []),
+        abstract=details.get('abstract', ''),
+        url=entry['url'],
+        hero_image=entry['hero_image'],
+        arxiv_url=details.get('arxiv_url'),
+        github_url=details.get('github_url'),
+        github_stars=details.get('github_stars'),
+        hf_upvotes=details.get('hf_upvotes'),
+        arxiv_categories=details.get('arxiv_categories'),
+        arxiv_version=details.get('arxiv_version')
+    )
+
+
+def iter_huggingface_papers(
+    target_date: date,
+    known_details: Optional[Dict[str, PaperDetails]] = None,
+    on_details: Optional[Callable[[str, PaperDetails], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    enricher: Optional["ArxivEnricher"] = None,
+) -> Iterator[Paper]:
+    """Yield the day's papers in list order, each as soon as its detail page is done
+
+    Abstract, authors and arXiv fields come from the arXiv export API, resolved
+    for the whole list in a few batched requests (see arxiv_api.py); the values
+    scraped from each HF page are the fallback. Papers whose detail page could
+    not be fetched or without any abstract are left out (not saved, not
+    cached), so a later cycle picks them up complete.
+
+    Args:
+    target_date: Day of the list
+    known_details: Detail pages already scraped, by paper URL (not fetched again)
+    on_details: Called with (paper URL, details) after each successful detail fetch
+    should_stop: Polled before each detail fetch; raises FetchInterrupted when it returns True
+    enricher: arXiv metadata source (default: shared enricher if ENABLE_ARXIV_ENRICHMENT)
+
+    Raises:
+    CircuitOpenError: if HuggingFace is considered down (also mid-list; details so far went to on_details)
+    """
+    known_details = known_details or {}
+    entries, arxiv_metadata = _fetch_list(target_date, known_details, enricher)
+    yielded = 0
+
+    for entry in entries:
+        details = known_details.get(entry['url'])
+        if details is None:
+            if should_stop is not None and should_stop():
+                raise FetchInterrupted(f"stopped after {yielded} of {len(entries)} papers")
+            details = _entry_details(entry, arxiv_metadata)
+            if details is None:
+                continue
+            if on_details is not None:
+                on_details(entry['url'], details)
+        yielded += 1
+        yield _entry_paper(entry, details)
+
+
+async def aiter_huggingface_papers(
+    target_date: date,
+    known_details: Optional[Dict[str, PaperDetails]] = None,
+    on_details: Optional[Callable[[str, PaperDetails], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    enricher: Optional["ArxivEnricher"] = None,
+    concurrency: int = 1,
+    ordered: bool = True,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncIterator[Paper]:
+    """Async variant of `iter_huggingface_papers`
+
+    Detail pages are fetched in worker threads, `concurrency` of them ahead of
+    the consumer, so the next pages download while the caller processes the
+    current paper. `on_details` runs on the event loop.
+
+    Args:
+    concurrency: Detail fetches in flight
+    ordered: Yield in list order (False: in completion order)
+    limiter: Paces detail fetches across all workers (default: 0.5s pause after each fetch)
+    Other arguments as for `iter_huggingface_papers`
+    """
+    known_details = known_details or {}
+    entries, arxiv_metadata = await asyncio.to_thread(_fetch_list, target_date, known_details, enricher)
+    loop = asyncio.get_running_loop()
+    queue = deque(entries)
+    # (future of details, entry, whether the details were fetched now), in list order
+    running: List[Tuple[asyncio.Future, Dict[str, Optional[str]], bool]] = []
+    stopped = False
+    yielded = 0
+
+    def refill() -> None:
+        nonlocal stopped
+        while queue and not stopped and len(running) < max(concurrency, 1):
+            entry = queue.popleft()
+            details = known_details.get(entry['url'])
+            if details is not None:
+                future = loop.create_future()
+                future.set_result(details)
+                running.append((future, entry, False))
+            elif should_stop is not None and should_stop():
+                stopped = True
+            else:
+                running.append((asyncio.ensure_future(asyncio.to_thread(_entry_details, entry, arxiv_metadata, limiter)), entry, True))
+
+    try:
+        while True:
+            refill()
+            if not running:
+                break
+
+            if ordered:
+                item = running[0]
+                await asyncio.wait([item[0]])
+            else:
+                done, _ = await asyncio.wait([future for future, _, _ in running], return_when=asyncio.FIRST_COMPLETED)
+                item = next(item for item in running if item[0] in done)
+            running.remove(item)
+            # Start the next fetch before handing this paper to the consumer
+            refill()
+            future, entry, fetched = item
+            details = future.result()
+            if details is None:
+                continue
+            if fetched and on_details is not None:
+                on_details(entry['url'], details)
+            yielded += 1
+            yield _entry_paper(entry, details)
+
+        if stopped:
+            raise FetchInterrupted(f"stopped after {yielded} of {len(entries)} papers")
+    finally:
+        # Consumer stopped early or a fetch failed: let the worker threads finish
+        if running:
+            await asyncio.gather(*(future for future, _, _ in running), return_exceptions=True)
+
+
+def fetch_huggingface_papers(
+    target_date: date,
+    known_details: Optional[Dict[str, PaperDetails]] = None,
+    on_details: Optional[Callable[[str, PaperDetails], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    enricher: Optional["ArxivEnricher"] = None,
+) -> List[Paper]:
+    """All papers of `iter_huggingface_papers` as a list"""
+    return list(iter_huggingface_papers(target_date, known_details, on_details, should_stop, enricher))
 
 
 if __name__ == "__main__":
+    from log import setup_logging
+
+    setup_logging()
     print(fetch_huggingface_papers(date(2025, 10, 1)))
@@ -0,0 +1,408 @@
+"""Metrics history module - Time series of HF upvotes and GitHub stars per paper
+
+Every check re-scrapes upvotes and stars, but daily files keep only the first
+reading of each paper. This store keeps (paper_id, ts, hf_upvotes, github_stars)
+snapshots instead, recording a row only when a value changed.
+
+Layout under the history root:
+    segments/YYYYMMDDTHHMMSSffffff.parquet   one small file per recording
+    YYYY/YYYYMM.parquet                      compacted month, sorted by (paper_id, ts),
+                                             delta-encoded timestamps and counts
+    latest.parquet                           last compacted snapshot of every paper
+    openings/YYYYMM.parquet                  snapshot before the month's first row, for
+                                             papers that changed in the month
+
+The state files are rewritten at compaction, so startup and velocity queries
+read the state plus the months they cover instead of the whole history.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import opendal
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from hf import Paper
+from schema import StorageProfile
+
+logger = logging.getLogger(__name__)
+
+
+HISTORY_SCHEMA = pa.schema(
+    [
+        pa.field("paper_id", pa.string(), nullable=False),
+        pa.field("ts", pa.timestamp("us", tz="UTC"), nullable=False),
+        pa.field("hf_upvotes", pa.int64()),
+        pa.field("github_stars", pa.int64()),
+    ]
+)
+
+# Compacted files are sorted by (paper_id, ts), so consecutive values are close
+# and delta encoding stores them in a few bits each
+HISTORY_PROFILE = StorageProfile(
+    name='history',
+    compression='zstd',
+    compression_level=9,
+    use_dictionary=("paper_id",),
+    column_encoding={
+        'ts': 'DELTA_BINARY_PACKED',
+        'hf_upvotes': 'DELTA_BINARY_PACKED',
+        'github_stars': 'DELTA_BINARY_PACKED',
+    },
+)
+
+SEGMENT_PREFIX = "segments/"
+OPENING_PREFIX = "openings/"
+STATE_KEY = "latest.parquet"
+
+Metrics = Tuple[Optional[int], Optional[int]]
+
+
+class MetricsHistory:
+    """Upvote/star snapshot store with change-only recording"""
+
+    def __init__(self, operator: opendal.Operator, compact_after: int = 24):
+        """Initialize metrics history
+
+        Args:
+        operator: OpenDAL operator rooted at the history directory
+        compact_after: Compact once this many segments have accumulated
+        """
+        self.operator = operator
+        self.compact_after = compact_after
+        self._async_operator: Optional[opendal.AsyncOperator] = None
+        # Latest known (upvotes, stars) per paper, loaded on first use
+        self._latest: Optional[Dict[str, Metrics]] = None
+
+    @property
+    def async_operator(self) -> opendal.AsyncOperator:
+        """AsyncOperator for the history root (must be used from a running event loop)"""
+        if self._async_operator is None:
+            self._async_operator = self.operator.to_async_operator()
+        return self._async_operator
+
+    # ---- Recording -------------------------------------------------------
+
+    def _latest_metrics(self) -> Dict[str, Metrics]:
+        """Latest known values per paper (compacted state plus pending segments)"""
+        if self._latest is None:
+            segments = [self._read(key) for key in self._segment_keys()]
+            last = _last_per_paper(pa.concat_tables([self._load_state(), *segments]))
+            self._latest = {
+                paper_id: (upvotes, stars)
+                for paper_id, upvotes, stars in zip(
+                    last.column("paper_id").to_pylist(),
+                    last.column("hf_upvotes").to_pylist(),
+                    last.column("github_stars").to_pylist(),
+                )
+            }
+        return self._latest
+
+    def latest(self, paper_ids: Iterable[str]) -> Dict[str, Metrics]:
+        """Latest known (upvotes, stars) of the given papers"""
+        latest = self._latest_metrics()
+        return {paper_id: latest[paper_id] for paper_id in paper_ids if paper_id in latest}
+
+    def _changed_rows(self, papers: Iterable[Paper], ts: datetime) -> List[dict]:
+        """Snapshot rows for papers whose upvotes or stars changed
+
+        A missing reading (None, e.g. a failed scrape) keeps the previous value
+        instead of counting as a change. The latest values are only updated by
+        `_remember`, once the rows are written.
+        """
+        latest = self._latest_metrics()
+        pending: Dict[str, Metrics] = {}
+        rows = []
+        for paper in papers:
+            paper_id = paper.get_paper_id()
+            previous = pending.get(paper_id) or latest.get(paper_id, (None, None))
+            current = (
+                paper.hf_upvotes if paper.hf_upvotes is not None else previous[0],
+                paper.github_stars if paper.github_stars is not None else previous[1],
+            )
+            if current == previous:
+                continue
+            pending[paper_id] = current
+            rows.append({'paper_id': paper_id, 'ts': ts, 'hf_upvotes': current[0], 'github_stars': current[1]})
+        return rows
+
+    def _remember(self, rows: List[dict]) -> None:
+        latest = self._latest_metrics()
+        for row in rows:
+            latest[row['paper_id']] = (row['hf_upvotes'], row['github_stars'])
+
+    @staticmethod
+    def _segment_key(ts: datetime) -> str:
+        return f"{SEGMENT_PREFIX}{ts.strftime('%Y%m%dT%H%M%S%f')}.parquet"
+
+    @staticmethod
+    def _serialize(table: pa.Table, profile: StorageProfile) -> bytes:
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, **profile.write_options())
+        return sink.getvalue().to_pybytes()
+
+    def record(self, papers: Iterable[Paper], ts: Optional[datetime] = None) -> int:
+        """Record a snapshot of changed values
+
+        Returns:
+        int: Number of snapshot rows written
+        """
+        ts = ts or datetime.now(timezone.utc)
+        rows = self._changed_rows(papers, ts)
+        if not rows:
+            return 0
+
+        table = pa.Table.from_pylist(rows, schema=HISTORY_SCHEMA)
+        self.operator.write(self._segment_key(ts), self._serialize(table, HISTORY_PROFILE))
+        self._remember(rows)
+        logger.info("Recorded metric changes", extra={'rows': len(rows)})
+
+        if len(self._segment_keys()) >= self.compact_after:
+            self.compact()
+        return len(rows)
+
+    async def record_async(self, papers: Iterable[Paper], ts: Optional[datetime] = None) -> int:
+        """Async variant of `record`; compaction runs in a worker thread"""
+        ts = ts or datetime.now(timezone.utc)
+        if self._latest is None:
+            await asyncio.to_thread(self._latest_metrics)
+        rows = self._changed_rows(papers, ts)
+        if not rows:
+            return 0
+
+        table = pa.Table.from_pylist(rows, schema=HISTORY_SCHEMA)
+        await self.async_operator.write(self._segment_key(ts), self._serialize(table, HISTORY_PROFILE))
+        self._remember(rows)
+        logger.info("Recorded metric changes", extra={'rows': len(rows)})
+
+        if len(await asyncio.to_thread(self._segment_keys)) >= self.compact_after:
+            await asyncio.to_thread(self.compact)
+        return len(rows)
+
+    # ---- Compaction ------------------------------------------------------
+
+    def _segment_keys(self) -> List[str]:
+        try:
+            entries = self.operator.list(SEGMENT_PREFIX)
+        except opendal.exceptions.NotFound:
+            return []
+        return sorted(e.path for e in entries if e.path.endswith(".parquet"))
+
+    def _month_keys(self) -> List[str]:
+        """Compacted month files: YYYY/YYYYMM.parquet"""
+        keys = []
+        for entry in self.operator.scan(""):
+            parts = entry.path.split("/")
+            if len(parts) == 2 and parts[0].isdigit() and parts[1].endswith(".parquet"):
+                keys.append(entry.path)
+        return sorted(keys)
+
+    def _read(self, key: str) -> pa.Table:
+        return pq.read_table(pa.BufferReader(self.operator.read(key))).cast(HISTORY_SCHEMA)
+
+    def _read_optional(self, key: str) -> pa.Table:
+        try:
+            return self._read(key)
+        except opendal.exceptions.NotFound:
+            return HISTORY_SCHEMA.empty_table()
+
+    @staticmethod
+    def _opening_key(month: str) -> str:
+        return f"{OPENING_PREFIX}{month}.parquet"
+
+    def _load_state(self) -> pa.Table:
+        """Last compacted snapshot per paper; built once from the month files if missing"""
+        try:
+            return self._read(STATE_KEY)
+        except opendal.exceptions.NotFound:
+            pass
+        month_keys = self._month_keys()
+        if not month_keys:
+            return HISTORY_SCHEMA.empty_table()
+
+        # History written before the state files existed: replay it once
+        logger.info("Building metrics history state", extra={'months': len(month_keys)})
+        state = HISTORY_SCHEMA.empty_table()
+        for key in month_keys:
+            month = key.split("/")[1][:6]
+            rows = self._read(key)
+            self._write_opening(month, _openings(state, rows, month), replace=True)
+            state = _state(pa.concat_tables([state, rows]))
+        self.operator.write(STATE_KEY, self._serialize(state, HISTORY_PROFILE))
+        return state
+
+    def _write_opening(self, month: str, opening: pa.Table, replace: bool = False) -> None:
+        if not replace:
+            opening = pa.concat_tables([self._read_optional(self._opening_key(month)), opening])
+        if opening.num_rows:
+            opening = opening.sort_by([("paper_id", "ascending")])
+            self.operator.write(self._opening_key(month), self._serialize(opening, HISTORY_PROFILE))
+
+    def compact(self) -> int:
+        """Merge segments into sorted, delta-encoded month files and update the state files
+
+        Returns:
+        int: Number of segments compacted
+        """
+        segment_keys = self._segment_keys()
+        if not segment_keys:
+            return 0
+
+        state = self._load_state()
+        segments = pa.concat_tables([self._read(key) for key in segment_keys])
+        month_ids = pc.strftime(segments.column("ts"), format="%Y%m")
+        for month in sorted(pc.unique(month_ids).to_pylist()):
+            month_key = f"{month[:4]}/{month}.parquet"
+            rows = segments.filter(pc.equal(month_ids, month))
+            self._write_opening(month, _openings(state, rows, month))
+            state = _state(pa.concat_tables([state, rows]))
+            if self.operator.exists(month_key):
+                rows = pa.concat_tables([self._read(month_key), rows])
+            rows = rows.sort_by([("paper_id", "ascending"), ("ts", "ascending")])
+            self.operator.write(month_key, self._serialize(rows, HISTORY_PROFILE))
+        self.operator.write(STATE_KEY, self._serialize(state, HISTORY_PROFILE))
+
+        for key in segment_keys:
+            self.operator.delete(key)
+        logger.info("Compacted metric segments", extra={'segments': len(segment_keys)})
+        return len(segment_keys)
+
+    # ---- Queries ---------------------------------------------------------
+
+    def load(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pa.Table:
+        """Load snapshots with start <= ts <= end (compacted months and pending segments)"""
+        keys = self._segment_keys()
+        for key in self._month_keys():
+            month = key.split("/")[1][:6]
+            if start and month < start.strftime("%Y%m"):
+                continue
+            if end and month > end.strftime("%Y%m"):
+                continue
+            keys.append(key)
+
+        if not keys:
+            return HISTORY_SCHEMA.empty_table()
+
+        table = pa.concat_tables([self._read(key) for key in keys])
+        ts = table.column("ts")
+        if start:
+            table = table.filter(pc.greater_equal(ts, pa.scalar(start, type=ts.type)))
+            ts = table.column("ts")
+        if end:
+            table = table.filter(pc.less_equal(ts, pa.scalar(end, type=ts.type)))
+        return table
+
+    def velocity(self, window: timedelta = timedelta(hours=24), now: Optional[datetime] = None) -> pa.Table:
+        """Growth of upvotes and stars per paper over a time window
+
+        The baseline is the last snapshot at or before the window start; papers
+        first seen inside the window use their first snapshot.
+
+        Returns:
+        pa.Table with paper_id, hf_upvotes, github_stars (latest values),
+        upvotes_delta, stars_delta, upvotes_per_hour, stars_per_hour
+        """
+        now = now or datetime.now(timezone.utc)
+        start = now - window
+        # Months overlapping [start, now]; earlier values come from the state files
+        month_start = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        table = self.load(start=month_start, end=now)
+        if table.num_rows == 0:
+            return _empty_velocity()
+
+        table = table.sort_by([("paper_id", "ascending"), ("ts", "ascending")])
+        ts = table.column("ts")
+        in_window = pc.greater(ts, pa.scalar(start, type=ts.type))
+
+        latest = _last_per_paper(table.filter(in_window))
+        if latest.num_rows == 0:
+            return _empty_velocity()
+        # Last snapshot at or before the window start: the start month's rows, else the
+        # value before the month (opening), else the compacted state if it predates the start
+        state = self._load_state()
+        earlier = pa.concat_tables([
+            self._read_optional(self._opening_key(start.strftime("%Y%m"))),
+            state.filter(pc.less_equal(state.column("ts"), pa.scalar(start, type=ts.type))),
+            table.filter(pc.invert(in_window)),
+        ])
+        baseline = _last_per_paper(earlier)
+        first_in_window = table.filter(in_window).group_by("paper_id", use_threads=False).aggregate(
+            [("hf_upvotes", "first"), ("github_stars", "first"), ("ts", "first")]
+        ).rename_columns(["paper_id", "hf_upvotes", "github_stars", "ts"])
+        # Papers without a snapshot before the window fall back to their first snapshot in it
+        missing = pc.invert(pc.is_in(first_in_window.column("paper_id"), value_set=baseline.column("paper_id")))
+        baseline = pa.concat_tables(
+            [baseline, first_in_window.filter(missing).select(baseline.column_names)], promote_options="permissive"
+        )
+
+        joined = latest.join(baseline, "paper_id", right_suffix="_base")
+        hours = window.total_seconds() / 3600
+        upvotes_delta = pc.fill_null(pc.subtract(joined.column("hf_upvotes"), joined.column("hf_upvotes_base")), 0)
+        stars_delta = pc.fill_null(pc.subtract(joined.column("github_stars"), joined.column("github_stars_base")), 0)
+        return pa.table({
+            'paper_id': joined.column("paper_id"),
+            'hf_upvotes': joined.column("hf_upvotes"),
+            'github_stars': joined.column("github_stars"),
+            'upvotes_delta': upvotes_delta,
+            'stars_delta': stars_delta,
+            'upvotes_per_hour': pc.divide(pc.cast(upvotes_delta, pa.float64()), hours),
+            'stars_per_hour': pc.divide(pc.cast(stars_delta, pa.float64()), hours),
+        })
+
+    def top_movers(
+        self,
+        n: int = 10,
+        window: timedelta = timedelta(hours=24),
+        by: str = "upvotes_delta",
+        now: Optional[datetime] = None,
+    ) -> pa.Table:
+        """Papers with the largest growth in the window, sorted by `by` (descending)"""
+        table = self.velocity(window=window, now=now)
+        if table.num_rows == 0:
+            return table
+        return table.sort_by([(by, "descending"), ("paper_id", "ascending")]).slice(0, n)
+
+
+def _last_per_paper(table: pa.Table) -> pa.Table:
+    """Last snapshot of each paper"""
+    if table.num_rows == 0:
+        return pa.table({
+            'paper_id': pa.array([], pa.string()),
+            'hf_upvotes': pa.array([], pa.int64()),
+            'github_stars': pa.array([], pa.int64()),
+            'ts': pa.array([], HISTORY_SCHEMA.field("ts").type),
+        })
+    table = table.sort_by([("paper_id", "ascending"), ("ts", "ascending")])
+    return table.group_by("paper_id", use_threads=False).aggregate(
+        [("hf_upvotes", "last"), ("github_stars", "last"), ("ts", "last")]
+    ).rename_columns(["paper_id", "hf_upvotes", "github_stars", "ts"])
+
+
+def _state(table: pa.Table) -> pa.Table:
+    """Last snapshot of each paper, in the history schema"""
+    return _last_per_paper(table).select(HISTORY_SCHEMA.names).cast(HISTORY_SCHEMA)
+
+
+def _openings(state: pa.Table, rows: pa.Table, month: str) -> pa.Table:
+    """State snapshots of the papers in `rows` that have no earlier row in `month`"""
+    first_day = datetime(int(month[:4]), int(month[4:]), 1, tzinfo=timezone.utc)
+    ts = state.column("ts")
+    return state.filter(pc.and_(
+        pc.is_in(state.column("paper_id"), value_set=pc.unique(rows.column("paper_id"))),
+        pc.less(ts, pa.scalar(first_day, type=ts.type)),
+    ))
+
+
+def _empty_velocity() -> pa.Table:
+    return pa.table({
+        'paper_id': pa.array([], pa.string()),
+        'hf_upvotes': pa.array([], pa.int64()),
+        'github_stars': pa.array([], pa.int64()),
+        'upvotes_delta': pa.array([], pa.int64()),
+        'stars_delta': pa.array([], pa.int64()),
+        'upvotes_per_hour': pa.array([], pa.float64()),
+        'stars_per_hour': pa.array([], pa.float64()),
+    })
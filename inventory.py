@@ -0,0 +1,256 @@
+"""Storage inventory module - Metadata-only statistics and health scan
+
+Reads Parquet footers (row counts, compressed/uncompressed sizes) of every
+daily and archive file in parallel, plus the `paper_id` column when duplicate
+counts are requested. No other column data is loaded.
+
+Command line:
+    python inventory.py [--json] [--no-duplicates] [--workers N]
+"""
+import argparse
+import calendar
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import opendal
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    from storage import PaperStorage
+
+
+def read_file_info(operator: opendal.Operator, key: str, with_ids: bool = True) -> dict:
+    """Read footer metadata (and optionally paper IDs) of one Parquet object
+
+    The file is opened for ranged reads, so only the footer and the selected
+    column chunk are fetched.
+    """
+    with operator.open(key, "rb") as source:
+        parquet_file = pq.ParquetFile(source)
+        metadata = parquet_file.metadata
+        compressed = 0
+        uncompressed = 0
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                compressed += column.total_compressed_size
+                uncompressed += column.total_uncompressed_size
+
+        paper_ids = None
+        if with_ids:
+            paper_ids = parquet_file.read(columns=["paper_id"]).column("paper_id").to_pylist()
+
+    return {
+        'key': key,
+        'rows': metadata.num_rows,
+        'row_groups': metadata.num_row_groups,
+        'bytes': operator.stat(key).content_length,
+        'compressed_bytes': compressed,
+        'uncompressed_bytes': uncompressed,
+        'paper_ids': paper_ids,
+    }
+
+
+def scan_files(
+    storage: "PaperStorage",
+    with_ids: bool = True,
+    workers: Optional[int] = None,
+) -> Tuple[List[Tuple[str, dict]], List[dict]]:
+    """Read the file info of every daily and archive file in parallel
+
+    Each info also carries 'month' ('YYYY-MM') and, for daily files, 'day'
+    ('YYYY-MM-DD'), parsed from the file name.
+
+    Returns:
+    ([(tier, info)], [{key, tier, error}]) with tier 'daily' or 'archive'
+    """
+    jobs = [(storage.data_operator, key, 'daily') for key in storage.list_daily_files()]
+    jobs += [(storage.operator, key, 'archive') for key in storage.list_archive_files()]
+
+    def _scan(job):
+        operator, key, tier = job
+        try:
+            return tier, read_file_info(operator, key, with_ids=with_ids), None
+        except Exception as e:
+            return tier, {'key': key}, e
+
+    results = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 4) * 4)) as executor:
+        for tier, info, error in executor.map(_scan, jobs):
+            if error is not None:
+                errors.append({'key': info['key'], 'tier': tier, 'error': str(error)})
+                continue
+            stem = info['key'].rsplit('/', 1)[-1][:-len('.parquet')]
+            info['month'] = f"{stem[:4]}-{stem[4:6]}"
+            info['day'] = f"{info['month']}-{stem[6:8]}" if tier == 'daily' else None
+            results.append((tier, info))
+    return results, errors
+
+
+def _ratio(uncompressed: int, compressed: int) -> float:
+    return round(uncompressed / compressed, 2) if compressed else 0.0
+
+
+def _missing_days(year: int, month: int, days: List[int], today: date) -> List[str]:
+    """Days of the month (up to today) without a daily file"""
+    if (year, month) > (today.year, today.month):
+        return []
+    last_day = calendar.monthrange(year, month)[1]
+    if (year, month) == (today.year, today.month):
+        last_day = today.day
+    present = set(days)
+    return [f"{year}-{month:02d}-{day:02d}" for day in range(1, last_day + 1) if day not in present]
+
+
+def build_inventory(
+    storage: "PaperStorage",
+    workers: Optional[int] = None,
+    check_duplicates: bool = True,
+    today: Optional[date] = None,
+) -> dict:
+    """Build per-month statistics for the daily and archive tiers
+
+    Returns:
+    dict with totals, per-tier totals and a 'months' mapping of
+    'YYYY-MM' -> statistics (see docs/USAGE.md)
+    """
+    today = today or date.today()
+    results, errors = scan_files(storage, with_ids=check_duplicates, workers=workers)
+
+    months: Dict[str, dict] = {}
+    daily_days: Dict[str, List[int]] = {}
+    daily_ids: Dict[str, Counter] = {}
+
+    def _month(month_key: str) -> dict:
+        return months.setdefault(month_key, {
+            'files': 0,
+            'rows': 0,
+            'bytes': 0,
+            'size_mb': 0.0,
+            'compression_ratio': 0.0,
+            'uncompressed_bytes': 0,
+            'compressed_bytes': 0,
+            'missing_days': [],
+            'duplicate_ids': 0,
+            'archive': None,
+        })
+
+    for tier, info in results:
+        month_key = info['month']
+        month = _month(month_key)
+
+        if tier == 'daily':
+            month['files'] += 1
+            month['rows'] += info['rows']
+            month['bytes'] += info['bytes']
+            month['compressed_bytes'] += info['compressed_bytes']
+            month['uncompressed_bytes'] += info['uncompressed_bytes']
+            daily_days.setdefault(month_key, []).append(int(info['day'][-2:]))
+            if info['paper_ids'] is not None:
+                # Count each ID once per file, so repeats across days show up
+                daily_ids.setdefault(month_key, Counter()).update(set(info['paper_ids']))
+        else:
+            ids = info['paper_ids']
+            month['archive'] = {
+                'rows': info['rows'],
+                'bytes': info['bytes'],
+                'size_mb': round(info['bytes'] / 1024 / 1024, 2),
+                'row_groups': info['row_groups'],
+                'compression_ratio': _ratio(info['uncompressed_bytes'], info['compressed_bytes']),
+                'duplicate_ids': len(ids) - len(set(ids)) if ids is not None else None,
+            }
+
+    for month_key, month in months.items():
+        year, month_num = int(month_key[:4]), int(month_key[5:7])
+        month['size_mb'] = round(month['bytes'] / 1024 / 1024, 2)
+        month['compression_ratio'] = _ratio(month['uncompressed_bytes'], month['compressed_bytes'])
+        if month_key in daily_days:
+            month['missing_days'] = _missing_days(year, month_num, daily_days[month_key], today)
+        if check_duplicates:
+            month['duplicate_ids'] = sum(1 for count in daily_ids.get(month_key, Counter()).values() if count > 1)
+        else:
+            month['duplicate_ids'] = None
+
+    tiers = Counter(tier for tier, _ in results) + Counter(error['tier'] for error in errors)
+    daily_bytes = sum(info['bytes'] for tier, info in results if tier == 'daily')
+    archive_bytes = sum(info['bytes'] for tier, info in results if tier == 'archive')
+    return {
+        'total_files': len(results),
+        'total_size_mb': round((daily_bytes + archive_bytes) / 1024 / 1024, 2),
+        'daily': {
+            'files': tiers['daily'],
+            'rows': sum(m['rows'] for m in months.values()),
+            'size_mb': round(daily_bytes / 1024 / 1024, 2),
+        },
+        'archive': {
+            'files': tiers['archive'],
+            'rows': sum(m['archive']['rows'] for m in months.values() if m['archive']),
+            'size_mb': round(archive_bytes / 1024 / 1024, 2),
+        },
+        'months': dict(sorted(months.items())),
+        'errors': errors,
+    }
+
+
+def print_report(stats: dict) -> None:
+    """Print an inventory as a human-readable report"""
+    print("Storage inventory:")
+    print(f"  Total files: {stats['total_files']}, total size: {stats['total_size_mb']} MB")
+    print(f"  Daily tier:   {stats['daily']['files']} files, {stats['daily']['rows']} rows, {stats['daily']['size_mb']} MB")
+    print(f"  Archive tier: {stats['archive']['files']} files, {stats['archive']['rows']} rows, {stats['archive']['size_mb']} MB")
+    print()
+    print(f"  {'month':<8} {'files':>5} {'rows':>7} {'MB':>8} {'ratio':>6} {'gaps':>5} {'dups':>5} | {'archive rows':>12} {'MB':>8} {'ratio':>6} {'dups':>5}")
+    for month_key, month in stats['months'].items():
+        archive = month['archive']
+        archive_part = (
+            f"{archive['rows']:>12} {archive['size_mb']:>8} {archive['compression_ratio']:>6} {archive['duplicate_ids'] if archive['duplicate_ids'] is not None else '-':>5}"
+            if archive else f"{'-':>12} {'-':>8} {'-':>6} {'-':>5}"
+        )
+        duplicates = month['duplicate_ids'] if month['duplicate_ids'] is not None else '-'
+        print(
+            f"  {month_key:<8} {month['files']:>5} {month['rows']:>7} {month['size_mb']:>8} "
+            f"{month['compression_ratio']:>6} {len(month['missing_days']):>5} {duplicates:>5} | {archive_part}"
+        )
+
+    gaps = {k: m['missing_days'] for k, m in stats['months'].items() if m['missing_days']}
+    if gaps:
+        print("\n  Missing days:")
+        for month_key, days in gaps.items():
+            print(f"    {month_key}: {', '.join(day[-2:] for day in days)}")
+
+    if stats['errors']:
+        print("\n  Unreadable files:")
+        for error in stats['errors']:
+            print(f"    [{error['tier']}] {error['key']}: {error['error']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Storage inventory command"""
+    from log import setup_logging
+    from storage import PaperStorage
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Metadata-only storage statistics and health scan")
+    parser.add_argument("--json", action="store_true", help="Print the inventory as JSON")
+    parser.add_argument("--no-duplicates", action="store_true", help="Skip reading paper_id columns")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel metadata readers")
+    args = parser.parse_args(argv)
+
+    # Log output goes to stderr, so stdout stays clean for --json
+    storage = PaperStorage.from_env()
+    stats = build_inventory(storage, workers=args.workers, check_duplicates=not args.no_duplicates)
+    if args.json:
+        print(json.dumps(stats, indent=2, ensure_ascii=False))
+    else:
+        print_report(stats)
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
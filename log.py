@@ -0,0 +1,82 @@
+"""Logging module - Leveled, structured log output
+
+Modules log through `logging.getLogger(__name__)` and pass structured fields
+via `extra`:
+
+    logger.info("Saved daily papers", extra={'path': str(path), 'rows': 42})
+
+Output format is selected by LOG_FORMAT:
+    text (default)  2025-10-01T08:00:00Z INFO storage: Saved daily papers path=data/... rows=42
+    json            {"ts": "...", "level": "INFO", "logger": "storage", "msg": "...", "path": "...", "rows": 42}
+"""
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+# Attributes every LogRecord has; anything else came from `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+def _timestamp(record: logging.LogRecord) -> str:
+    return datetime.fromtimestamp(record.created, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+class TextFormatter(logging.Formatter):
+    """`<ts> <LEVEL> <logger>: <message> key=value ...`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{_timestamp(record)} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={_text_value(value)}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def _text_value(value) -> str:
+    text = str(value)
+    return json.dumps(text, ensure_ascii=False) if (" " in text or not text) else text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': _timestamp(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """Configure the root logger (stderr)
+
+    Args:
+    level: Log level name (default read from LOG_LEVEL, otherwise INFO)
+    fmt: "text" or "json" (default read from LOG_FORMAT, otherwise text)
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    # Third-party request logs are noisy at INFO
+    for name in ("httpx", "httpcore", "urllib3", "telegram", "openai"):
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
@@ -1,34 +1,343 @@
-"""Telegram Bot - Automated daily paper posting from HuggingFace"""
-import asyncio
-from datetime import date, datetime
-from typing import List, Optional
+"""Telegram Bot - Automated daily paper posting from HuggingFace
 
-from telegram import Bot
-from telegram.constants import ParseMode
-from telegram.error import TelegramError
+Heavy dependencies (telegram, pyarrow/opendal via storage, numpy via dedup)
+are imported where they are used, so configuration errors are reported
+before they are loaded.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import signal
+import threading
+import time
+from contextlib import aclosing
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, TypeVar
+from urllib.parse import urlparse
 
 from config import Config
-from hf import fetch_huggingface_papers, Paper
+from hf import FetchInterrupted, Paper
 from cache import PaperCache
-from storage import PaperStorage
+from checkpoint import CycleCheckpoint
+from coordination import LeaderElector, NotLeaderError, require_shared
+from message_cache import RenderedMessageCache
+from resilience import CircuitOpenError, Upstream
+from refresh import EditQueue, MessageEdit, MessageRefresher, MessageStore, PostedMessage
+from routing import PaperRouter
+from sources import SourceContext, SourceSet
+from profiling import CycleProfiler
+from log import setup_logging
+from metrics import (
+    CYCLE_SECONDS, CYCLES, LLM_ERRORS, LLM_REQUEST_SECONDS, LLM_TOKENS, PAPERS, REFRESH_EDITS,
+    TELEGRAM_ERRORS, TELEGRAM_RETRY_AFTER, TELEGRAM_SEND_SECONDS, start_metrics_server,
+)
+
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.error import RetryAfter
+    from telegram.ext import Application, ContextTypes
+    from dedup import NearDuplicateIndex
+    from schema import PaperRecord
+
+logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+BOT_COMMANDS = ("search", "today", "top", "paper")
+# arXiv-style IDs inside HF / arXiv URLs or given bare
+PAPER_ID_RE = re.compile(r"\d{4}\.\d{4,5}")
+STATS_LINE_RE = re.compile(r"^📊 .*$", re.MULTILINE)
 
 # Configuration is now handled by the Config class
 
 
+def escape_markdown(text: str) -> str:
+    """Escape Telegram MarkdownV2 special characters"""
+    special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
+    for char in special_chars:
+        text = text.replace(char, f'\\{char}')
+    return text
+
+
+def paper_links(url, arxiv_url=None, github_url=None, hf_label: str = "HuggingFace") -> List[str]:
+    """MarkdownV2 links of a paper
+
+    The paper page is labelled by its host: papers from the arXiv source have no
+    HF page, so a page that is the arXiv abstract itself is only linked once.
+    """
+    links = []
+    host = urlparse(str(url)).hostname or ""
+    if host == "huggingface.co" or host.endswith(".huggingface.co"):
+        links.append(f"[{hf_label}]({url})")
+    elif url and str(url).rstrip('/') != str(arxiv_url or "").rstrip('/'):
+        links.append(f"[{escape_markdown(host.removeprefix('www.'))}]({url})")
+    if arxiv_url:
+        links.append(f"[ArXiv]({arxiv_url})")
+    if github_url:
+        links.append(f"[GitHub]({github_url})")
+    return links
+
+
+def format_paper_message(paper: Paper, translated_abstract: Optional[str] = None, max_length: Optional[int] = None) -> str:
+    """Format a paper as a MarkdownV2 message
+
+    Args:
+        paper: Paper object
+        translated_abstract: Translated abstract (optional)
+        max_length: Maximum message length (1024 for images, 4096 for text)
+    """
+    # Clean title: remove newlines and extra spaces
+    title = paper.title.strip()
+    title = ' '.join(title.split())  # Replace all whitespace (including newlines) with single spaces
+    title = escape_markdown(title)
+
+    authors = ", ".join(paper.authors[:Config.MAX_AUTHORS_DISPLAY])  # Show only first 5 authors
+    if len(paper.authors) > Config.MAX_AUTHORS_DISPLAY:
+        authors += f" et al. ({len(paper.authors)} authors)"
+    authors = escape_markdown(authors) if authors else "Unknown"
+    
+    # Use translated abstract if available, otherwise use original
+    if translated_abstract:
+        abstract = translated_abstract
+    else:
+        abstract = paper.abstract
+
+    # Note: Abstract length control is done before calling this function via AI summarization
+    # This is just a final safety truncation (in case something goes wrong)
+    if max_length:
+        # Estimate length of other parts (title, authors, links, etc.)
+        other_parts_length = len(title) + len(authors) + 200  # 200 is estimate for other fixed text
+        available_for_abstract = max_length - other_parts_length
+
+        if available_for_abstract > 100:  # Keep at least 100 characters for abstract
+            if len(abstract) > available_for_abstract:
+                # Safe truncation (shouldn't usually get here since AI summarization was done)
+                abstract = abstract[:available_for_abstract - 3] + "..."
+
+    abstract = escape_markdown(abstract) if abstract else "No abstract available"
+    
+    message = f"*{title}*\n\n"
+    message += f"👥 *Authors:* {authors}\n\n"
+    message += f"📄 *Abstract:* {abstract}\n\n"
+    
+    # Add statistics
+    stats_line = format_stats_line(paper.hf_upvotes, paper.github_stars)
+    if stats_line:
+        message += f"{stats_line}\n\n"
+    
+    # Add links
+    links = paper_links(paper.url, paper.arxiv_url, paper.github_url)
+    
+    message += f"🔗 *Read More：* {' \\| '.join(links)}"
+    
+    return message
+
+
+def format_stats_line(hf_upvotes: Optional[int], github_stars: Optional[int]) -> Optional[str]:
+    """Stats line of a paper message, None when neither count is known"""
+    stats_parts = []
+    if hf_upvotes is not None:
+        stats_parts.append(f"👍 {hf_upvotes} upvotes")
+    if github_stars is not None:
+        stats_parts.append(f"⭐ {github_stars} stars")
+    return f"📊 {' \\| '.join(stats_parts)}" if stats_parts else None
+
+
+def replace_stats_line(message: str, hf_upvotes: Optional[int], github_stars: Optional[int]) -> str:
+    """Swap the stats line of a formatted paper message for new counts
+
+    The rest of the message (including a translated abstract) is kept as posted.
+    """
+    stats_line = format_stats_line(hf_upvotes, github_stars)
+    if stats_line is None:
+        return message
+    matches = list(STATS_LINE_RE.finditer(message))
+    if matches:
+        # The stats line is the last one; an abstract line could start with 📊 too
+        last = matches[-1]
+        return message[:last.start()] + stats_line + message[last.end():]
+    # Posted without counts: insert the line before the links
+    head, links, tail = message.rpartition("🔗 ")
+    return f"{head}{stats_line}\n\n{links}{tail}" if links else message
+
+
+def retry_after_seconds(error: "RetryAfter") -> float:
+    """Flood-control wait of a RetryAfter error in seconds"""
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+
+def classify_telegram_error(error: BaseException, idempotent: bool = True) -> Optional[float]:
+    """Retry delay for flood control and network errors, None for permanent errors
+
+    A timed-out send may have been delivered anyway, so timeouts are only
+    retried for idempotent calls (edits).
+    """
+    from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+    if isinstance(error, RetryAfter):
+        return retry_after_seconds(error)
+    if isinstance(error, BadRequest):
+        return None
+    if isinstance(error, TimedOut):
+        return 0.0 if idempotent else None
+    if isinstance(error, NetworkError):
+        return 0.0
+    return None
+
+
+def classify_openai_error(error: BaseException) -> Optional[float]:
+    """Retry delay for connection errors, timeouts, rate limits and 5xx, None otherwise"""
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return 0.0
+    return None
+
+
+# Shared by all Telegram calls of the process (one bot token, one flood-control budget)
+TELEGRAM = Upstream.from_config("telegram", classify=classify_telegram_error)
+
+
+async def telegram_call(
+    method: str,
+    call: Callable[[], Awaitable[T]],
+    idempotent: bool = False,
+    attempts: Optional[int] = None,
+) -> T:
+    """Make a Telegram API call under the retry/circuit-breaker policy, recording
+    its duration, flood-control responses and errors
+
+    Args:
+    method: Bot API method name used as metric label (e.g. "send_photo")
+    call: Creates the API coroutine (called once per attempt)
+    idempotent: Whether repeating the call is harmless (timeouts are retried only then)
+    attempts: Override RETRY_ATTEMPTS (1 when the caller handles retries itself)
+
+    Raises:
+    CircuitOpenError: if Telegram is considered down
+    """
+    from telegram.error import RetryAfter, TelegramError
+
+    async def attempt() -> T:
+        try:
+            with TELEGRAM_SEND_SECONDS.time(method=method):
+                return await call()
+        except RetryAfter as e:
+            TELEGRAM_RETRY_AFTER.inc(method=method)
+            logger.warning("Telegram flood control", extra={'method': method, 'retry_after': str(e.retry_after)})
+            raise
+        except TelegramError:
+            TELEGRAM_ERRORS.inc(method=method)
+            raise
+
+    classify = None if idempotent else (lambda error: classify_telegram_error(error, idempotent=False))
+    return await TELEGRAM.call_async(attempt, attempts=attempts, classify=classify)
+
+
+async def _iter_list(papers: Iterable[T]) -> AsyncIterator[T]:
+    """Already fetched papers as an async iterator"""
+    for paper in papers:
+        yield paper
+
+
 class HuggingFacePaperBot:
     """HuggingFace daily papers bot"""
 
-    def __init__(self, token: str, channel_id: str, enable_translation: Optional[bool] = None):
+    def __init__(
+        self,
+        token: str,
+        channel_id: str,
+        enable_translation: Optional[bool] = None,
+        profiler: Optional[CycleProfiler] = None,
+        enable_commands: Optional[bool] = None,
+    ):
+        from telegram import Bot
+        from digest import DigestBuilder
+        from storage import PaperStorage
+
         self.bot = Bot(token=token)
         self.channel_id = channel_id
 
         # Initialize storage (automatically reads config from environment variables)
         self.storage = PaperStorage.from_env()
 
-        # Load all saved paper IDs from storage and initialize cache
-        stored_paper_ids = self.storage.load_all_paper_ids()
-        self.cache = PaperCache(initial_ids=stored_paper_ids)
+        # Cache is seeded with stored paper IDs in run() / run_once(), on the event loop
+        self.cache = PaperCache()
+
+        # Weekly/monthly rankings over stored data
+        self.digest = DigestBuilder(self.storage)
+
+        # Paper sources (PAPER_SOURCES), run concurrently and merged in every check
+        self.sources = SourceSet.from_config()
+
+        # Per-channel topic rules; without a rules file every paper goes to channel_id
+        if Config.ROUTING_RULES_FILE:
+            self.router = PaperRouter.from_file(Config.ROUTING_RULES_FILE, default_channel_id=channel_id)
+        else:
+            self.router = PaperRouter.single_channel(channel_id)
+
+        # MinHash/LSH index of posted papers, consulted before sending
+        self.dedup: Optional["NearDuplicateIndex"] = None
+        if Config.ENABLE_DEDUP:
+            from dedup import from_storage as dedup_from_storage
+
+            self.dedup = dedup_from_storage(self.storage)
+
+        # Interactive commands are polled on the same event loop as the scheduled checks
+        self.application: Optional["Application"] = None
+        if enable_commands if enable_commands is not None else Config.ENABLE_BOT_COMMANDS:
+            from telegram.ext import Application, CommandHandler
+
+            self.application = Application.builder().bot(self.bot).build()
+            for command in BOT_COMMANDS:
+                self.application.add_handler(CommandHandler(command, getattr(self, f"handle_{command}")))
+
+        # Rendered command replies, dropped when a daily save changes the underlying data
+        self.rendered = RenderedMessageCache(Config.COMMAND_CACHE_SIZE)
+        self.storage.add_save_listener(self.rendered.invalidate_saved)
+
+        # Posted message IDs; stats lines are refreshed in place as counts grow
+        self.messages = MessageStore(Config.MESSAGE_STORE_PATH)
+        self.edits = EditQueue(self.apply_edit, Config.REFRESH_EDITS_PER_MINUTE, Config.REFRESH_BATCH_SIZE)
+        self.refresher = MessageRefresher(
+            self.messages,
+            self.storage.history.latest,
+            lambda message, upvotes, stars: replace_stats_line(message.body, upvotes, stars),
+            self.edits,
+            max_age_days=Config.REFRESH_MAX_AGE_DAYS,
+            min_delta=Config.REFRESH_MIN_DELTA,
+            min_ratio=Config.REFRESH_MIN_RATIO,
+        )
+        # Each save records new readings in the history, so look for changed counts right away
+        self.storage.add_save_listener(self.refresher.request_scan)
+
+        # Static feeds and HTML archive of posted papers, refreshed after every check
+        self.exporter = None
+        if Config.ENABLE_EXPORT:
+            from export import SiteExporter
+
+            self.exporter = SiteExporter.from_config(self.storage, self.messages)
+
+        # With several replicas only the lease holder checks, posts and polls commands
+        self.leader: Optional[LeaderElector] = None
+        if Config.ENABLE_LEADER_ELECTION:
+            require_shared(self.storage.coordination, Config.COORDINATION_DIR)
+            self.leader = LeaderElector(self.storage.coordination, name=Config.LEADER_LEASE_NAME, ttl=Config.LEADER_LEASE_TTL)
+
+        # Progress of the running check cycle (see checkpoint.py)
+        self.checkpoint: Optional[CycleCheckpoint] = None
+        # Set on SIGTERM/SIGINT; a threading.Event so the fetch thread can poll it
+        self.stopping = threading.Event()
+        self._stop_requested: Optional[asyncio.Event] = None
+
+        # Samples a fraction of check cycles (PROFILE_RATE) for CPU/allocation/stage reports
+        self.profiler = profiler or CycleProfiler.from_config()
+
+        # Retry/circuit-breaker policy of LLM calls; while open, abstracts fall back to truncation
+        self.llm = Upstream.from_config("openai", Config.LLM_TIMEOUT, classify=classify_openai_error)
 
         # Use provided enable_translation or fall back to config
         self.enable_translation = enable_translation if enable_translation is not None else Config.ENABLE_AI_TRANSLATION
@@ -36,20 +345,39 @@ class HuggingFacePaperBot:
         # Initialize OpenAI client (if translation is enabled)
         if self.enable_translation:
             if not Config.OPENAI_API_KEY:
-                print("Warning: Translation enabled but OPENAI_API_KEY not configured, translation will be disabled")
+                logger.warning("Translation enabled but OPENAI_API_KEY not configured, translation will be disabled")
                 self.enable_translation = False
             else:
                 try:
                     from openai import OpenAI
+                    # Retries and timeouts are handled by self.llm
                     self.openai_client = OpenAI(
                         api_key=Config.OPENAI_API_KEY,
-                        base_url=Config.OPENAI_BASE_URL
+                        base_url=Config.OPENAI_BASE_URL,
+                        timeout=Config.LLM_TIMEOUT,
+                        max_retries=0
                     )
-                    print(f"AI translation enabled (model: {Config.OPENAI_MODEL}, target language: {Config.TRANSLATION_TARGET_LANG})")
+                    logger.info("AI translation enabled", extra={'model': Config.OPENAI_MODEL, 'target_lang': Config.TRANSLATION_TARGET_LANG})
                 except ImportError:
-                    print("Warning: openai library not installed, translation will be disabled")
-                    print("    Please run: pip install openai")
+                    logger.warning("openai library not installed, translation will be disabled (pip install openai)")
                     self.enable_translation = False
+
+    def _chat_completion(self, operation: str, **kwargs):
+        """Chat completion request (blocking, with retries) with latency, token and error metrics"""
+        def attempt():
+            with LLM_REQUEST_SECONDS.time(operation=operation):
+                return self.openai_client.chat.completions.create(model=Config.OPENAI_MODEL, **kwargs)
+
+        try:
+            response = self.llm.call(attempt)
+        except Exception:
+            LLM_ERRORS.inc(operation=operation)
+            raise
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            LLM_TOKENS.inc(usage.prompt_tokens or 0, operation=operation, kind="prompt")
+            LLM_TOKENS.inc(usage.completion_tokens or 0, operation=operation, kind="completion")
+        return response
     
     async def translate_text(self, text: str) -> str:
         """Use AI to translate text"""
@@ -57,8 +385,9 @@ class HuggingFacePaperBot:
             return text
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
+            response = await asyncio.to_thread(
+                self._chat_completion,
+                "translate",
                 messages=[
                     {
                         "role": "system",
@@ -77,7 +406,7 @@ class HuggingFacePaperBot:
             return translation
         
         except Exception as e:
-            print(f"Warning: Translation failed: {e}")
+            logger.warning("Translation failed", extra={'error': str(e)})
             return text  # Return original text if translation fails
 
     async def summarize_abstract(self, text: str, max_length: int = 300) -> str:
@@ -95,8 +424,9 @@ class HuggingFacePaperBot:
             return text
 
         try:
-            response = self.openai_client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
+            response = await asyncio.to_thread(
+                self._chat_completion,
+                "summarize",
                 messages=[
                     {
                         "role": "system",
@@ -115,218 +445,841 @@ class HuggingFacePaperBot:
             return summary
 
         except Exception as e:
-            print(f"Warning: Abstract summarization failed: {e}")
+            logger.warning("Abstract summarization failed", extra={'error': str(e)})
             # Fall back to simple truncation on failure
             return text[:max_length] + "..." if len(text) > max_length else text
         
     def format_paper_message(self, paper: Paper, translated_abstract: Optional[str] = None, max_length: Optional[int] = None) -> str:
-        """Format paper message
+        """Format paper message (see `format_paper_message`)"""
+        return format_paper_message(paper, translated_abstract, max_length)
+
+    async def send_paper(self, paper: Paper, channel_ids: Optional[List[str]] = None) -> bool:
+        """Send a single paper to the channel(s)
 
         Args:
             paper: Paper object
-            translated_abstract: Translated abstract (optional)
-            max_length: Maximum message length (1024 for images, 4096 for text)
-        """
-        # Escape Markdown special characters
-        def escape_markdown(text: str) -> str:
-            special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-            for char in special_chars:
-                text = text.replace(char, f'\\{char}')
-            return text
+            channel_ids: Target channels (default: the bot's channel); the abstract
+                is summarized/translated once for all of them
 
-        # Clean title: remove newlines and extra spaces
-        title = paper.title.strip()
-        title = ' '.join(title.split())  # Replace all whitespace (including newlines) with single spaces
-        title = escape_markdown(title)
+        Returns:
+            True if the paper was posted to at least one channel
+        """
+        from telegram.constants import ParseMode
+        from telegram.error import TelegramError
 
-        authors = ", ".join(paper.authors[:Config.MAX_AUTHORS_DISPLAY])  # Show only first 5 authors
-        if len(paper.authors) > Config.MAX_AUTHORS_DISPLAY:
-            authors += f" et al. ({len(paper.authors)} authors)"
-        authors = escape_markdown(authors) if authors else "Unknown"
-        
-        # Use translated abstract if available, otherwise use original
-        if translated_abstract:
-            abstract = translated_abstract
+        channel_ids = channel_ids or [self.channel_id]
+        processed_abstract = await self.prepare_abstract(paper)
+        # Format once, then send to every target channel
+        if paper.hero_image:
+            # Message with image (caption limited to 1024 characters)
+            message = self.format_paper_message(paper, processed_abstract, max_length=Config.MAX_MESSAGE_LENGTH_WITH_IMAGE)
         else:
-            abstract = paper.abstract
+            # Text-only message (limited to 4096 characters)
+            message = self.format_paper_message(paper, processed_abstract, max_length=Config.MAX_MESSAGE_LENGTH_WITHOUT_IMAGE)
 
-        # Note: Abstract length control is done before calling this function via AI summarization
-        # This is just a final safety truncation (in case something goes wrong)
-        if max_length:
-            # Estimate length of other parts (title, authors, links, etc.)
-            other_parts_length = len(title) + len(authors) + 200  # 200 is estimate for other fixed text
-            available_for_abstract = max_length - other_parts_length
+        posted = False
+        for channel_id in channel_ids:
+            # Raises NotLeaderError (aborting the cycle) if another replica took over
+            await self.fence()
+            try:
+                if paper.hero_image:
+                    sent = await telegram_call("send_photo", lambda: self.bot.send_photo(
+                        chat_id=channel_id,
+                        photo=str(paper.hero_image),
+                        caption=message,
+                        parse_mode=ParseMode.MARKDOWN_V2
+                    ))
+                else:
+                    sent = await telegram_call("send_message", lambda: self.bot.send_message(
+                        chat_id=channel_id,
+                        text=message,
+                        parse_mode=ParseMode.MARKDOWN_V2,
+                        disable_web_page_preview=False
+                    ))
+                self.edits.note_post(channel_id)
+                self.messages.add(PostedMessage(
+                    chat_id=channel_id,
+                    message_id=sent.message_id,
+                    paper_id=paper.get_paper_id(),
+                    kind="caption" if paper.hero_image else "text",
+                    body=message,
+                    hf_upvotes=paper.hf_upvotes,
+                    github_stars=paper.github_stars,
+                ))
+                logger.info("Posted paper", extra={'channel': channel_id, 'paper_id': paper.get_paper_id(), 'title': paper.title[:50]})
+                posted = True
+            except TelegramError as e:
+                logger.error("Posting paper failed", extra={'channel': channel_id, 'paper_id': paper.get_paper_id(), 'error': str(e)})
+            except CircuitOpenError as e:
+                if not posted:
+                    # Telegram is down: abort the cycle, the paper is retried with the next one
+                    raise
+                # Already in some channels: record it as posted rather than repost it there later
+                logger.error("Posting paper failed", extra={'channel': channel_id, 'paper_id': paper.get_paper_id(), 'error': str(e)})
+                break
+        return posted
 
-            if available_for_abstract > 100:  # Keep at least 100 characters for abstract
-                if len(abstract) > available_for_abstract:
-                    # Safe truncation (shouldn't usually get here since AI summarization was done)
-                    abstract = abstract[:available_for_abstract - 3] + "..."
+    async def prepare_abstract(self, paper: Paper) -> Optional[str]:
+        """Summarize/translate (AI enabled) or truncate the abstract for posting
 
-        abstract = escape_markdown(abstract) if abstract else "No abstract available"
-        
-        message = f"*{title}*\n\n"
-        message += f"👥 *Authors:* {authors}\n\n"
-        message += f"📄 *Abstract:* {abstract}\n\n"
-        
-        # Add statistics
-        stats_parts = []
-        if paper.hf_upvotes is not None:
-            stats_parts.append(f"👍 {paper.hf_upvotes} upvotes")
-        if paper.github_stars is not None:
-            stats_parts.append(f"⭐ {paper.github_stars} stars")
-        
-        if stats_parts:
-            message += f"📊 {' \\| '.join(stats_parts)}\n\n"
-        
-        # Add links
-        links = [f"[HuggingFace]({paper.url})"]
-        if paper.arxiv_url:
-            links.append(f"[ArXiv]({paper.arxiv_url})")
-        if paper.github_url:
-            links.append(f"[GitHub]({paper.github_url})")
-        
-        message += f"🔗 *Read More：* {' \\| '.join(links)}"
-        
-        return message
-    
-    async def send_paper(self, paper: Paper) -> bool:
-        """Send a single paper to the channel"""
-        try:
-            # Prepare abstract: translate or summarize
-            processed_abstract = None
+        Results are kept in the cycle checkpoint, so a resumed cycle does not
+        call the LLM again for the same paper.
+        """
+        paper_id = paper.get_paper_id()
+        if self.checkpoint is not None and paper_id in self.checkpoint.processed:
+            return self.checkpoint.processed[paper_id]
 
-            if self.enable_translation and paper.abstract:
-                # If AI is enabled, use intelligent processing
-                if paper.hero_image:
-                    # With image: summarize to appropriate length first, then translate
-                    print("  Using AI to summarize abstract...")
-                    summarized = await self.summarize_abstract(paper.abstract, max_length=Config.MAX_ABSTRACT_LENGTH_WITH_IMAGE)
-                    print("  Translating abstract...")
-                    processed_abstract = await self.translate_text(summarized)
-                else:
-                    # Text only: translate directly (can be longer)
-                    print("  Translating abstract...")
-                    summarized = await self.summarize_abstract(paper.abstract, max_length=Config.MAX_ABSTRACT_LENGTH_WITHOUT_IMAGE)
-                    processed_abstract = await self.translate_text(summarized)
-            elif paper.abstract:
-                # No AI enabled, just control length
-                if paper.hero_image:
-                    processed_abstract = paper.abstract[:Config.MAX_ABSTRACT_LENGTH_WITH_IMAGE] + "..." if len(paper.abstract) > Config.MAX_ABSTRACT_LENGTH_WITH_IMAGE else paper.abstract
-                else:
-                    processed_abstract = paper.abstract[:Config.MAX_ABSTRACT_LENGTH_WITHOUT_IMAGE] + "..." if len(paper.abstract) > Config.MAX_ABSTRACT_LENGTH_WITHOUT_IMAGE else paper.abstract
-            # Format and send message
+        # Prepare abstract: translate or summarize
+        processed_abstract = None
+
+        if self.enable_translation and paper.abstract:
+            # If AI is enabled, use intelligent processing
             if paper.hero_image:
-                # Message with image (caption limited to 1024 characters)
-                message = self.format_paper_message(paper, processed_abstract, max_length=Config.MAX_MESSAGE_LENGTH_WITH_IMAGE)
-                await self.bot.send_photo(
-                    chat_id=self.channel_id,
-                    photo=str(paper.hero_image),
-                    caption=message,
+                # With image: summarize to appropriate length first, then translate
+                logger.debug("Summarizing and translating abstract", extra={'paper_id': paper.get_paper_id()})
+                summarized = await self.summarize_abstract(paper.abstract, max_length=Config.MAX_ABSTRACT_LENGTH_WITH_IMAGE)
+                processed_abstract = await self.translate_text(summarized)
+            else:
+                # Text only: translate directly (can be longer)
+                logger.debug("Translating abstract", extra={'paper_id': paper.get_paper_id()})
+                summarized = await self.summarize_abstract(paper.abstract, max_length=Config.MAX_ABSTRACT_LENGTH_WITHOUT_IMAGE)
+                processed_abstract = await self.translate_text(summarized)
+        elif paper.abstract:
+            # No AI enabled, just control length
+            if paper.hero_image:
+                processed_abstract = paper.abstract[:Config.MAX_ABSTRACT_LENGTH_WITH_IMAGE] + "..." if len(paper.abstract) > Config.MAX_ABSTRACT_LENGTH_WITH_IMAGE else paper.abstract
+            else:
+                processed_abstract = paper.abstract[:Config.MAX_ABSTRACT_LENGTH_WITHOUT_IMAGE] + "..." if len(paper.abstract) > Config.MAX_ABSTRACT_LENGTH_WITHOUT_IMAGE else paper.abstract
+
+        if self.checkpoint is not None:
+            self.checkpoint.record_processed(paper_id, processed_abstract)
+        return processed_abstract
+
+    async def fence(self) -> None:
+        """Fencing check before a Telegram send (no-op without leader election)
+
+        Raises:
+        NotLeaderError: if this replica does not hold the leader lease
+        """
+        if self.leader is not None:
+            await self.leader.ensure()
+
+    async def apply_edit(self, edit: MessageEdit) -> Optional[float]:
+        """Edit a posted message to show new counts (called by the edit queue)
+
+        Returns:
+        Seconds to wait before retrying (flood control), None when done
+        """
+        from telegram.constants import ParseMode
+        from telegram.error import BadRequest, RetryAfter, TelegramError
+
+        message = edit.message
+        try:
+            await self.fence()
+        except NotLeaderError:
+            return None
+        try:
+            # Single attempt: the edit queue reschedules on flood control
+            if message.kind == "caption":
+                await telegram_call("edit_message_caption", lambda: self.bot.edit_message_caption(
+                    chat_id=message.chat_id,
+                    message_id=message.message_id,
+                    caption=edit.body,
                     parse_mode=ParseMode.MARKDOWN_V2
-                )
+                ), idempotent=True, attempts=1)
             else:
-                # Text-only message (limited to 4096 characters)
-                message = self.format_paper_message(paper, processed_abstract, max_length=Config.MAX_MESSAGE_LENGTH_WITHOUT_IMAGE)
-                await self.bot.send_message(
-                    chat_id=self.channel_id,
-                    text=message,
+                await telegram_call("edit_message_text", lambda: self.bot.edit_message_text(
+                    edit.body,
+                    chat_id=message.chat_id,
+                    message_id=message.message_id,
                     parse_mode=ParseMode.MARKDOWN_V2,
                     disable_web_page_preview=False
-                )
+                ), idempotent=True, attempts=1)
+        except RetryAfter as e:
+            REFRESH_EDITS.inc(outcome="retry")
+            return retry_after_seconds(e)
+        except CircuitOpenError as e:
+            REFRESH_EDITS.inc(outcome="retry")
+            return e.retry_in
+        except BadRequest as e:
+            error = str(e).lower()
+            if "not modified" not in error:
+                if "not found" in error:
+                    # Deleted from the channel: stop tracking it
+                    REFRESH_EDITS.inc(outcome="gone")
+                    self.messages.remove(message)
+                else:
+                    REFRESH_EDITS.inc(outcome="error")
+                    logger.warning("Refreshing message failed", extra={'channel': message.chat_id, 'message_id': message.message_id, 'error': str(e)})
+                return None
+            REFRESH_EDITS.inc(outcome="unchanged")
+        except TelegramError as e:
+            REFRESH_EDITS.inc(outcome="error")
+            logger.warning("Refreshing message failed", extra={'channel': message.chat_id, 'message_id': message.message_id, 'error': str(e)})
+            return None
+        else:
+            REFRESH_EDITS.inc(outcome="edited")
+        self.messages.update(edit)
+        return None
+    
+    def format_digest_message(self, digest: dict, max_length: int = Config.MAX_MESSAGE_LENGTH_WITHOUT_IMAGE) -> str:
+        """Format a weekly/monthly digest as one long message
+
+        Args:
+            digest: Result of DigestBuilder.build()
+            max_length: Maximum message length; trailing entries are dropped to fit
+        """
+        label = "Weekly" if digest['period'] == 'week' else "Monthly"
+        date_range = escape_markdown(f"{digest['start']:%Y-%m-%d} – {digest['end']:%Y-%m-%d}")
+        header = f"🏆 *{label} Top Papers*\n_{date_range}_\n\n"
+        ranking = {row['paper_id']: row for row in digest['ranking'].to_pylist()}
+
+        message = header
+        for i, paper in enumerate(digest['papers'], 1):
+            title = escape_markdown(' '.join(paper.title.split()))
+            row = ranking.get(paper.get_paper_id(), {})
+            stats = [f"👍 {paper.hf_upvotes or 0}"]
+            if row.get('upvotes_delta'):
+                stats.append(f"\\+{row['upvotes_delta']} this {digest['period']}")
+            if paper.github_stars is not None:
+                stats.append(f"⭐ {paper.github_stars}")
+            links = paper_links(paper.url, paper.arxiv_url, paper.github_url, hf_label="HF")
+
+            entry = f"*{i}\\.* {title}\n{' \\| '.join(stats)} · {' \\| '.join(links)}\n\n"
+            if len(message) + len(entry) > max_length:
+                break
+            message += entry
+        return message.rstrip()
+
+    async def send_digest(self, digest: dict, as_album: bool = False) -> bool:
+        """Post a digest as one long message, or as a photo album of papers with images
 
-            print(f"Posted: {paper.title[:50]}")
+        Albums hold up to 10 photos; when fewer than two papers have a hero
+        image the long message is used instead.
+        """
+        from telegram import InputMediaPhoto
+        from telegram.constants import ParseMode
+        from telegram.error import TelegramError
+
+        if not digest['papers']:
+            logger.info("No papers for digest", extra={'period': digest['period'], 'start': str(digest['start']), 'end': str(digest['end'])})
+            return False
+        await self.fence()
+
+        try:
+            with_images = [p for p in digest['papers'] if p.hero_image][:10]
+            if as_album and len(with_images) >= 2:
+                media = [
+                    InputMediaPhoto(
+                        media=str(paper.hero_image),
+                        caption=self.format_paper_message(paper, max_length=Config.MAX_MESSAGE_LENGTH_WITH_IMAGE),
+                        parse_mode=ParseMode.MARKDOWN_V2,
+                    )
+                    for paper in with_images
+                ]
+                await telegram_call("send_message", lambda: self.bot.send_message(
+                    chat_id=self.channel_id,
+                    text=self.format_digest_message(digest),
+                    parse_mode=ParseMode.MARKDOWN_V2,
+                    disable_web_page_preview=True
+                ))
+                await telegram_call("send_media_group", lambda: self.bot.send_media_group(chat_id=self.channel_id, media=media))
+            else:
+                await telegram_call("send_message", lambda: self.bot.send_message(
+                    chat_id=self.channel_id,
+                    text=self.format_digest_message(digest),
+                    parse_mode=ParseMode.MARKDOWN_V2,
+                    disable_web_page_preview=True
+                ))
+            logger.info("Posted digest", extra={'period': digest['period'], 'papers': len(digest['papers'])})
             return True
 
         except TelegramError as e:
-            print(f"Error: Posting failed: {e}")
+            logger.error("Posting digest failed", extra={'period': digest['period'], 'error': str(e)})
             return False
-    
-    async def check_and_send_new_papers(self) -> None:
-        """Check and send new papers"""
-        print(f"\nStarting to check for new papers... {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-        try:
-            # Get today's papers
-            today = date.today()
-            papers = fetch_huggingface_papers(today)
-            print(f"Found {len(papers)} papers")
-
-            # Filter out new papers
-            new_papers = [
-                paper for paper in papers
-                if not self.cache.is_cached(paper.get_paper_id())
-            ]
+    async def send_requeued(self) -> List[Paper]:
+        """Post stored papers queued by `reconcile.py --requeue`
 
-            print(f"Found {len(new_papers)} new papers")
+        Routing, abstract and near-duplicate checks apply as for new papers.
+        Entries are dropped once posted, already posted (message store), skipped
+        or no longer stored; failed sends stay queued for the next check. Only
+        handled entries are removed, so papers queued while posting are kept.
 
-            # Save all paper data to local Parquet files (including new and existing papers)
-            if papers:
-                self.storage.save_daily_papers(papers, today)
-            
-            # Send new papers
-            sent_papers = []
-            for paper in new_papers:
-                success = await self.send_paper(paper)
-                if success:
-                    sent_papers.append(paper)
-                    # Avoid sending too quickly
+        Returns:
+        The papers posted
+        """
+        from reconcile import REQUEUE_LOCK, group_by_day, load_requeue, remove_requeued
+
+        async with self.storage.coordination.lock_async(REQUEUE_LOCK):
+            queued = await asyncio.to_thread(load_requeue, Config.REQUEUE_PATH)
+        posted_ids = await asyncio.to_thread(self.messages.posted_paper_ids)
+        sent: List[Paper] = []
+        # Entries left in the queue: failed sends and papers not reached before a stop
+        kept = set()
+        for day, paper_ids in group_by_day(queued).items():
+            records = {r.paper_id: r for r in await asyncio.to_thread(self.storage.load_records_by_date, day)}
+            for paper_id in paper_ids:
+                if self.stopping.is_set():
+                    kept.add(paper_id)
+                    continue
+                record = records.get(paper_id)
+                if record is None or paper_id in posted_ids:
+                    continue
+                paper = record.to_paper()
+                channel_ids = self.router.route(paper)
+                if not channel_ids or not paper.abstract:
+                    continue
+                if self.dedup is not None and self.dedup.find_duplicate(paper):
+                    continue
+                if await self.send_paper(paper, channel_ids):
+                    sent.append(paper)
+                    self.checkpoint.record_posted(paper_id)
+                    if self.dedup is not None:
+                        self.dedup.add([paper])
                     await asyncio.sleep(Config.SEND_DELAY)
-            
-            # Batch add to cache
-            if sent_papers:
-                self.cache.add_batch([p.get_paper_id() for p in sent_papers])
-                print(f"Successfully posted {len(sent_papers)} new papers")
-            else:
-                print("No new papers")
+                else:
+                    kept.add(paper_id)
 
-            # Check if monthly archiving is needed (archive last month on the 1st of each month)
-            if today.day == 1:
-                last_month = today.month - 1 if today.month > 1 else 12
-                last_year = today.year if today.month > 1 else today.year - 1
-                print(f"Starting to archive data for {last_year}-{last_month:02d}...")
-                self.storage.archive_month(last_year, last_month, delete_daily_files=False)
+        handled = {entry['paper_id'] for entry in queued} - kept
+        async with self.storage.coordination.lock_async(REQUEUE_LOCK):
+            left = await asyncio.to_thread(remove_requeued, Config.REQUEUE_PATH, handled)
+        logger.info("Requeued papers processed", extra={'queued': len(queued), 'posted': len(sent), 'remaining': left})
+        return sent
+
+    async def post_due_digests(self, today: date) -> None:
+        """Post digests for periods that ended yesterday (week on Monday, month on the 1st)"""
+        from digest import period_range
+
+        yesterday = today - timedelta(days=1)
+        for period in Config.get_digest_periods():
+            if period == 'week' and today.weekday() != 0:
+                continue
+            if period == 'month' and today.day != 1:
+                continue
+            start, _ = period_range(period, yesterday)
+            if await asyncio.to_thread(self.digest.is_posted, period, start):
+                continue
+            digest = await asyncio.to_thread(self.digest.build, period, yesterday, Config.DIGEST_TOP_N)
+            if await self.send_digest(digest, as_album=Config.DIGEST_AS_ALBUM):
+                self.digest.mark_posted(period, digest['start'])
+
+    async def check_and_send_new_papers(self, papers: Optional[List[Paper]] = None) -> bool:
+        """Check and send new papers (profiled when the cycle is sampled, see profiling.py)
+
+        Papers are streamed from the enabled sources (`SourceSet`): each one is
+        routed, sent and saved (in batches of SAVE_BATCH_SIZE) while the next
+        detail pages are still being fetched. Progress is checkpointed
+        (CHECKPOINT_PATH); after a shutdown request the cycle stops between
+        papers and the next start resumes it.
+
+        Args:
+        papers: Today's papers if already fetched (fetched here otherwise)
+
+        Returns:
+        False if the cycle failed
+        """
+        logger.info("Checking for new papers")
+        started = time.perf_counter()
+        status = "ok"
+
+        with self.profiler.cycle("check") as profile:
+            try:
+                # Get today's papers; an interrupted cycle of today continues from its checkpoint
+                today = date.today()
+                self.checkpoint = await asyncio.to_thread(
+                    CycleCheckpoint.load, Config.CHECKPOINT_PATH, today, Config.CHECKPOINT_MAX_AGE
+                )
+                if self.checkpoint.posted:
+                    # Posted before the interruption, possibly never written to the cache
+                    self.cache.add_batch(self.checkpoint.posted)
+                if papers is None:
+                    papers = self.checkpoint.papers
+                if papers is not None:
+                    if self.checkpoint.papers is None:
+                        await asyncio.to_thread(self.checkpoint.record_papers, papers)
+                    stream = _iter_list(papers)
+                else:
+                    # Papers arrive as their detail pages are done; sending overlaps with scraping
+                    stream = self.sources.papers(today, SourceContext(
+                        known_details=self.checkpoint.details,
+                        on_details=self.checkpoint.record_details,
+                        should_stop=self.stopping.is_set,
+                    ))
+
+                fetched: List[Paper] = []
+                unsaved: List[Paper] = []
+                new_count = 0
+                sent_papers = []
+                duplicate_papers = []
+                filtered_count = 0
+                # Stat refreshes of earlier posts wait until posting is done
+                async with self.edits.priority(), aclosing(stream):
+                    while True:
+                        # In-flight work is done; the rest is left to the resumed cycle
+                        if self.stopping.is_set():
+                            status = "interrupted"
+                            logger.info("Shutdown requested, stopping cycle", extra={'processed': len(fetched)})
+                            break
+                        with profile.span("fetch"):
+                            paper = await anext(stream, None)
+                        if paper is None:
+                            break
+                        fetched.append(paper)
+
+                        # Save all paper data (new and existing papers) to the daily Parquet file, batch by batch
+                        unsaved.append(paper)
+                        if len(unsaved) >= Config.SAVE_BATCH_SIZE:
+                            with profile.span("save"):
+                                await self.storage.save_daily_papers_async(unsaved, today)
+                            unsaved = []
+
+                        if self.cache.is_cached(paper.get_paper_id()):
+                            continue
+                        new_count += 1
+
+                        # Route by topic rules before any LLM call is spent; filtered papers
+                        # are not cached, so they are re-evaluated as upvotes grow
+                        with profile.span("route"):
+                            channel_ids = self.router.route(paper)
+                        if not channel_ids:
+                            filtered_count += 1
+                            continue
+
+                        # Never post a paper without abstract; not cached, so it is retried once complete
+                        if not paper.abstract:
+                            PAPERS.inc(stage="incomplete")
+                            logger.warning("Skipped paper without abstract", extra={'paper_id': paper.get_paper_id()})
+                            continue
+
+                        # Skip near-duplicates of posted papers (revisions, companion entries)
+                        if self.dedup is not None:
+                            with profile.span("dedup"):
+                                duplicate = self.dedup.find_duplicate(paper)
+                            if duplicate:
+                                logger.info("Skipped near-duplicate", extra={'paper_id': paper.get_paper_id(), 'duplicate_of': duplicate[0], 'similarity': round(duplicate[1], 2)})
+                                duplicate_papers.append(paper)
+                                continue
+
+                        # LLM summarize/translate and Telegram calls
+                        with profile.span("send"):
+                            success = await self.send_paper(paper, channel_ids)
+                        if success:
+                            sent_papers.append(paper)
+                            self.checkpoint.record_posted(paper.get_paper_id())
+                            if self.dedup is not None:
+                                self.dedup.add([paper])
+                            # Avoid sending too quickly
+                            with profile.span("send_delay"):
+                                await asyncio.sleep(Config.SEND_DELAY)
+
+                if unsaved:
+                    with profile.span("save"):
+                        await self.storage.save_daily_papers_async(unsaved, today)
+                if self.checkpoint.papers is None and status != "interrupted" and not self.sources.failed:
+                    # The fetch completed: a resumed cycle does not need the list pages again
+                    await asyncio.to_thread(self.checkpoint.record_papers, fetched)
+                PAPERS.inc(len(fetched), stage="fetched")
+                PAPERS.inc(new_count, stage="new")
+                logger.info("Fetched papers", extra={'papers': len(fetched), 'new': new_count})
+
+                # Stored papers that were never posted, queued by `reconcile.py --requeue`
+                if status != "interrupted" and os.path.exists(Config.REQUEUE_PATH):
+                    with profile.span("send"):
+                        requeued = await self.send_requeued()
+                    sent_papers.extend(requeued)
+                    PAPERS.inc(len(requeued), stage="requeued")
+
+                # Batch add to cache (duplicates too, so they are not checked again)
+                with profile.span("cache"):
+                    if sent_papers or duplicate_papers:
+                        self.cache.add_batch([p.get_paper_id() for p in sent_papers + duplicate_papers])
+                    if self.dedup is not None:
+                        await asyncio.to_thread(self.dedup.flush)
+                PAPERS.inc(filtered_count, stage="filtered")
+                PAPERS.inc(len(duplicate_papers), stage="duplicate")
+                PAPERS.inc(len(sent_papers), stage="posted")
+                logger.info("Check finished", extra={'posted': len(sent_papers), 'filtered': filtered_count, 'duplicates': len(duplicate_papers)})
+                if status == "interrupted":
+                    return False
+
+                # Check if monthly archiving is needed (archive last month on the 1st of each month)
+                if today.day == 1:
+                    last_month = today.month - 1 if today.month > 1 else 12
+                    last_year = today.year if today.month > 1 else today.year - 1
+                    logger.info("Archiving last month", extra={'month': f"{last_year}-{last_month:02d}"})
+                    with profile.span("archive"):
+                        await asyncio.to_thread(self.storage.archive_month, last_year, last_month, delete_daily_files=False)
+
+                # Post weekly/monthly digests once their period has ended
+                with profile.span("digest"):
+                    await self.post_due_digests(today)
+
+                # Only changed months are rendered again; a failed export is retried next cycle
+                if self.exporter is not None:
+                    with profile.span("export"):
+                        try:
+                            await asyncio.to_thread(self.exporter.export)
+                        except Exception as e:
+                            logger.warning("Static export failed", extra={'error': str(e)})
+
+                await asyncio.to_thread(self.checkpoint.clear)
+
+            except FetchInterrupted as e:
+                status = "interrupted"
+                logger.info("Shutdown requested, fetch stopped", extra={'error': str(e)})
+            except NotLeaderError as e:
+                status = "fenced"
+                logger.warning("Check aborted, leader lease lost", extra={'error': str(e)})
+            except CircuitOpenError as e:
+                status = "unavailable"
+                logger.warning("Check aborted, upstream unavailable", extra={'upstream': e.upstream, 'retry_in': round(e.retry_in)})
+            except Exception as e:
+                status = "error"
+                logger.exception("Error while checking papers", extra={'error': str(e)})
+            finally:
+                self.checkpoint = None
+                CYCLE_SECONDS.observe(time.perf_counter() - started)
+                CYCLES.inc(status=status)
+        return status == "ok"
+
+    def format_search_results(self, query: str, results: List[dict]) -> str:
+        """Format full-text search results as a MarkdownV2 message"""
+        if not results:
+            return f"🔍 No papers found for *{escape_markdown(query)}*"
+
+        message = f"🔍 *{escape_markdown(query)}*\n\n"
+        for i, result in enumerate(results, 1):
+            title = escape_markdown(' '.join((result['title'] or '').split()))
+            meta = [escape_markdown(result['day'] or '')]
+            if result['hf_upvotes'] is not None:
+                meta.append(f"👍 {result['hf_upvotes']}")
+            links = paper_links(result['url'], result['arxiv_url'], hf_label="HF")
+            snippet = escape_markdown(' '.join((result['snippet'] or '').split()))
+            entry = f"*{i}\\.* {title}\n{' · '.join(m for m in meta if m)} · {' \\| '.join(links)}\n_{snippet}_\n\n"
+            if len(message) + len(entry) > Config.MAX_MESSAGE_LENGTH_WITHOUT_IMAGE:
+                break
+            message += entry
+        return message.rstrip()
+
+    async def handle_search(self, update: "Update", context: "ContextTypes.DEFAULT_TYPE") -> None:
+        """/search <query> - full-text search over stored papers"""
+        from telegram.constants import ParseMode
+
+        if not update.effective_message:
+            return
+        query = ' '.join(context.args or []).strip()
+        if not query:
+            await telegram_call("reply_text", lambda: update.effective_message.reply_text("Usage: /search <keywords>, e.g. /search diffusion transformer"))
+            return
+
+        results = await asyncio.to_thread(self.storage.search_index.search, query, Config.SEARCH_RESULTS_LIMIT)
+        await telegram_call("reply_text", lambda: update.effective_message.reply_text(
+            self.format_search_results(query, results),
+            parse_mode=ParseMode.MARKDOWN_V2,
+            disable_web_page_preview=True
+        ))
+
+    def format_day_message(self, day: Optional[date], papers: List["PaperRecord"], limit: int) -> str:
+        """Format the most upvoted papers of a day as a MarkdownV2 list"""
+        if day is None or not papers:
+            return "📭 No stored papers in the last days"
+
+        papers = sorted(papers, key=lambda p: p.hf_upvotes or 0, reverse=True)[:limit]
+        message = f"📅 *Papers of {escape_markdown(day.isoformat())}*\n\n"
+        for i, paper in enumerate(papers, 1):
+            title = escape_markdown(' '.join((paper.title or '').split()))
+            stats = [f"👍 {paper.hf_upvotes or 0}"]
+            if paper.github_stars is not None:
+                stats.append(f"⭐ {paper.github_stars}")
+            links = paper_links(paper.url, paper.arxiv_url, hf_label="HF")
+            entry = f"*{i}\\.* {title}\n{' \\| '.join(stats)} · {' \\| '.join(links)} · `/paper {paper.paper_id}`\n\n"
+            if len(message) + len(entry) > Config.MAX_MESSAGE_LENGTH_WITHOUT_IMAGE:
+                break
+            message += entry
+        return message.rstrip()
+
+    def render_today(self, today: date) -> str:
+        """/today reply: the latest stored day up to `today` (within ONCE_LOOKBACK_DAYS)"""
+        for offset in range(max(Config.ONCE_LOOKBACK_DAYS, 1)):
+            day = today - timedelta(days=offset)
+            papers = self.storage.load_records_by_date(day)
+            if papers:
+                return self.format_day_message(day, papers, Config.COMMAND_LIST_LIMIT)
+        return self.format_day_message(None, [], Config.COMMAND_LIST_LIMIT)
+
+    def render_top(self, period: str, today: date) -> str:
+        """/top reply: ranking of the current week or month so far"""
+        digest = self.digest.build(period, today, Config.DIGEST_TOP_N)
+        if not digest['papers']:
+            return f"📭 No ranked papers this {period} yet"
+        return self.format_digest_message(digest)
+
+    def render_paper(self, paper_id: str) -> str:
+        """/paper reply: the stored paper as it would be posted (original abstract)"""
+        day = self.storage.search_index.paper_day(paper_id)
+        record = self.storage.find_record(paper_id, day) if day is not None else None
+        if record is not None:
+            return format_paper_message(record, max_length=Config.MAX_MESSAGE_LENGTH_WITHOUT_IMAGE)
+        return f"🔍 Paper *{escape_markdown(paper_id)}* is not stored"
+
+    async def _reply_rendered(self, update: "Update", key: tuple, render, *args) -> None:
+        """Reply with a cached rendering, rendering from storage (in a thread) on a miss
+
+        Only stored data is read: no scraping and no LLM calls on the request path.
+        """
+        from telegram.constants import ParseMode
+
+        message = self.rendered.get(key)
+        if message is None:
+            generation = self.rendered.generation
+            message = await asyncio.to_thread(render, *args)
+            self.rendered.put(key, message, generation)
+        await telegram_call("reply_text", lambda: update.effective_message.reply_text(
+            message,
+            parse_mode=ParseMode.MARKDOWN_V2,
+            disable_web_page_preview=True
+        ))
+
+    async def handle_today(self, update: "Update", context: "ContextTypes.DEFAULT_TYPE") -> None:
+        """/today - most upvoted papers of the latest stored day"""
+        if not update.effective_message:
+            return
+        today = date.today()
+        await self._reply_rendered(update, ("today", today.isoformat()), self.render_today, today)
+
+    async def handle_top(self, update: "Update", context: "ContextTypes.DEFAULT_TYPE") -> None:
+        """/top [week|month] - ranking of the current period"""
+        if not update.effective_message:
+            return
+        period = (context.args or ["week"])[0].lower()
+        if period not in ("week", "month"):
+            await telegram_call("reply_text", lambda: update.effective_message.reply_text("Usage: /top [week|month]"))
+            return
+        today = date.today()
+        await self._reply_rendered(update, ("top", period, today.isoformat()), self.render_top, period, today)
+
+    async def handle_paper(self, update: "Update", context: "ContextTypes.DEFAULT_TYPE") -> None:
+        """/paper <id or URL> - a single stored paper"""
+        if not update.effective_message:
+            return
+        match = PAPER_ID_RE.search(' '.join(context.args or []))
+        if not match:
+            await telegram_call("reply_text", lambda: update.effective_message.reply_text("Usage: /paper <id>, e.g. /paper 2510.00001"))
+            return
+        await self._reply_rendered(update, ("paper", match.group(0)), self.render_paper, match.group(0))
+
+    async def load_stored_paper_ids(self) -> None:
+        """Seed the cache with all stored paper IDs (files are prefetched concurrently)"""
+        stored_paper_ids = await self.storage.load_all_paper_ids_async()
+        if stored_paper_ids:
+            self.cache.add_batch(list(stored_paper_ids))
+            logger.info("Cache initialized", extra={'paper_ids': self.cache.size()})
 
-        except Exception as e:
-            print(f"Error while checking papers: {e}")
-    
     async def run(self) -> None:
-        """Run the bot (scheduled checking)"""
-        print("HuggingFace Daily Papers Bot started")
-        print(f"Posting channel: {self.channel_id}")
-        print(f"Check interval: {Config.CHECK_INTERVAL} seconds")
-        print(f"Cached papers count: {self.cache.size()}\n")
-        
-        # Initial check immediately
-        await self.check_and_send_new_papers()
+        """Run the bot (scheduled checking); with leader election, only while holding the lease"""
+        if self.leader is None:
+            await self.run_active()
+            return
+
+        elector = asyncio.create_task(self.leader.run(), name="leader-elector")
+        try:
+            while not self.stopping.is_set():
+                logger.info("Standing by for leader lease", extra={'holder': self.leader.holder})
+                elected = asyncio.create_task(self.leader.wait_elected())
+                stop = asyncio.create_task(self._stop_event().wait())
+                await asyncio.wait({elected, stop}, return_when=asyncio.FIRST_COMPLETED)
+                elected.cancel()
+                stop.cancel()
+                if self.stopping.is_set():
+                    break
+                active = asyncio.create_task(self.run_active(), name="active")
+                lost = asyncio.create_task(self.leader.wait_lost(), name="lease-lost")
+                done, _ = await asyncio.wait({active, lost, elector}, return_when=asyncio.FIRST_COMPLETED)
+                active.cancel()
+                lost.cancel()
+                await asyncio.gather(active, lost, return_exceptions=True)
+                # Re-raise crashes; losing the lease just means standing by again
+                if elector in done:
+                    elector.result()
+                if active in done:
+                    active.result()
+        finally:
+            elector.cancel()
+            await asyncio.gather(elector, return_exceptions=True)
+
+    async def run_active(self) -> None:
+        """Checks, command polling and message refreshes of the active replica"""
+        # Reload on every election: the previous leader may have posted since startup
+        await self.load_stored_paper_ids()
+
+        # First run with near-duplicate detection: index the stored papers that were posted
+        # (papers never shown in the channel must not suppress a later copy)
+        if self.dedup is not None and await asyncio.to_thread(len, self.dedup) == 0:
+            posted = await asyncio.to_thread(self.messages.posted_paper_ids)
+            if posted:
+                added = await asyncio.to_thread(self.dedup.rebuild, self.storage, set(posted))
+                logger.info("Near-duplicate index built from storage", extra={'papers': added})
+
+        logger.info("HuggingFace Daily Papers Bot started", extra={
+            'channel': self.channel_id,
+            'check_interval': Config.CHECK_INTERVAL,
+            'cached_papers': self.cache.size(),
+        })
+
+        # Stats refresh of posted messages runs beside the checks on the same loop
+        background = []
+        if Config.ENABLE_MESSAGE_REFRESH:
+            background = [
+                asyncio.create_task(self.edits.run(), name="edit-queue"),
+                asyncio.create_task(self.refresher.run(Config.REFRESH_INTERVAL), name="message-refresher"),
+            ]
+        try:
+            if self.application is None:
+                await self.run_schedule()
+                return
+
+            async with self.application:
+                await self.application.start()
+                await self.application.updater.start_polling()
+                logger.info("Bot commands enabled", extra={'commands': ",".join(f"/{c}" for c in BOT_COMMANDS)})
+                try:
+                    await self.run_schedule()
+                finally:
+                    await self.application.updater.stop()
+                    await self.application.stop()
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+
+    async def run_once(self) -> bool:
+        """Single check for cron / CI runs: no command polling, no full storage scan
+
+        The persisted cache file covers earlier runs; only the daily files of
+        the last ONCE_LOOKBACK_DAYS days are read to seed it. Papers are fetched
+        by the regular check, so it resumes from the checkpoint, stops on
+        shutdown requests and never runs while another replica holds the lease.
+
+        Returns:
+        False if the check failed
+        """
+        if self.leader is not None and not await asyncio.to_thread(self.leader.try_acquire):
+            logger.info("Another replica holds the leader lease, skipping check", extra={'holder': self.leader.holder})
+            return True
+        try:
+            recent_ids = await self.storage.load_recent_paper_ids_async(date.today(), Config.ONCE_LOOKBACK_DAYS)
+            if recent_ids:
+                self.cache.add_batch(list(recent_ids))
+            return await self.check_and_send_new_papers()
+        finally:
+            if self.leader is not None:
+                await asyncio.to_thread(self.leader.release)
 
-        # Scheduled checks
-        while True:
-            await asyncio.sleep(Config.CHECK_INTERVAL)
+    async def run_schedule(self) -> None:
+        """Check immediately, then every CHECK_INTERVAL seconds, until shutdown is requested"""
+        stop_requested = self._stop_event()
+        while not self.stopping.is_set():
             await self.check_and_send_new_papers()
+            try:
+                await asyncio.wait_for(stop_requested.wait(), timeout=Config.CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _stop_event(self) -> asyncio.Event:
+        if self._stop_requested is None:
+            self._stop_requested = asyncio.Event()
+            if self.stopping.is_set():
+                self._stop_requested.set()
+        return self._stop_requested
+
+    def request_shutdown(self) -> None:
+        """Stop after in-flight work (signal handler; must run on the event loop)"""
+        if self.stopping.is_set():
+            return
+        logger.info("Shutdown requested", extra={'deadline_s': Config.SHUTDOWN_TIMEOUT})
+        self.stopping.set()
+        self._stop_event().set()
+
+    async def close(self) -> None:
+        """Flush and close local state (cache, near-duplicate index, SQLite stores)"""
+        self.cache._save_cache()
+        if self.dedup is not None:
+            await asyncio.to_thread(self.dedup.flush)
+        self.messages.close()
+        self.storage.search_index.close()
 
 
-async def main() -> None:
-    """Main function"""
+async def main(argv: Optional[List[str]] = None) -> int:
+    """Main function
+
+    Returns:
+    Process exit code (0 ok, 1 check failed, 2 configuration error)
+    """
+    parser = argparse.ArgumentParser(description="HuggingFace daily papers Telegram bot")
+    parser.add_argument("--once", action="store_true", help="Run a single check and exit (cron / CI)")
+    parser.add_argument("--profile", action="store_true", help="Profile every check cycle (overrides PROFILE_RATE)")
+    args = parser.parse_args(argv)
+
+    setup_logging(Config.LOG_LEVEL, Config.LOG_FORMAT)
+
     # Validate configuration
     try:
         Config.validate()
     except ValueError as e:
-        print(f"Error: Configuration error: {e}")
-        print("   Please set the required environment variables")
-        return
-    
+        logger.error("Configuration error, please set the required environment variables", extra={'error': str(e)})
+        return 2
+
+    if Config.METRICS_PORT > 0 and not args.once:
+        start_metrics_server(Config.METRICS_PORT, Config.METRICS_HOST)
+
     # Start the bot
-    bot = HuggingFacePaperBot(
-        Config.TELEGRAM_BOT_TOKEN,
-        Config.TELEGRAM_CHANNEL_ID,
-        enable_translation=Config.ENABLE_AI_TRANSLATION
-    )
-    await bot.run()
+    try:
+        bot = HuggingFacePaperBot(
+            Config.TELEGRAM_BOT_TOKEN,
+            Config.TELEGRAM_CHANNEL_ID,
+            enable_translation=Config.ENABLE_AI_TRANSLATION,
+            profiler=CycleProfiler.from_config(rate=1.0 if args.profile else None),
+            enable_commands=False if args.once else None,
+        )
+    except ValueError as e:
+        logger.error("Configuration error", extra={'error': str(e)})
+        return 2
+
+    # SIGTERM (docker stop, deploys) / SIGINT: finish in-flight sends and LLM calls,
+    # checkpoint the cycle and flush state within SHUTDOWN_TIMEOUT seconds
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, bot.request_shutdown)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    if args.once:
+        running = asyncio.create_task(bot.run_once())
+    else:
+        running = asyncio.create_task(bot.run())
+
+    stop_requested = asyncio.create_task(bot._stop_event().wait())
+    await asyncio.wait({running, stop_requested}, return_when=asyncio.FIRST_COMPLETED)
+    stop_requested.cancel()
+    try:
+        ok = await asyncio.wait_for(running, timeout=Config.SHUTDOWN_TIMEOUT) if bot.stopping.is_set() else running.result()
+    except asyncio.TimeoutError:
+        logger.warning("Shutdown deadline exceeded, cancelled in-flight work", extra={'deadline_s': Config.SHUTDOWN_TIMEOUT})
+        ok = False
+    finally:
+        await bot.close()
+    logger.info("Bot stopped")
+
+    if args.once:
+        return 0 if ok else 1
+    return 0
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        raise SystemExit(asyncio.run(main()))
     except KeyboardInterrupt:
-        print("\n\nBot stopped")
+        logger.info("Bot stopped")
 
@@ -0,0 +1,83 @@
+"""Message cache module - LRU of rendered bot command replies
+
+Replies to /today, /top and /paper are rendered from stored data once and
+then served from memory. Entries are keyed by tuples:
+
+    ("today", "2025-10-01")         /today as requested on that date
+    ("top", "week", "2025-10-01")   ranking of the current week/month
+    ("paper", "2510.00001")         a single paper
+
+`invalidate_saved` drops the entries a daily save can change. A render that
+started before an invalidation is not stored (see `generation`), so a reply
+computed from the old file cannot outlive the save.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Hashable, Iterable, Optional
+
+
+class RenderedMessageCache:
+    """Thread-safe LRU of rendered messages with save-driven invalidation"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            message = self._entries.get(key)
+            if message is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return message
+
+    def put(self, key: Hashable, message: str, generation: Optional[int] = None) -> bool:
+        """Store a rendered message
+
+        Args:
+        key: Cache key
+        message: Rendered message
+        generation: `generation` read before rendering; the entry is dropped if
+            an invalidation happened since
+
+        Returns:
+        True if the message was stored
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = message
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate_saved(self, day: date, paper_ids: Iterable[str]) -> None:
+        """Drop entries a save can change: day listings, rankings and the saved papers
+
+        /today may fall back to an earlier day, so every day listing is dropped,
+        not only the one keyed by `day`.
+        """
+        stale_papers = set(paper_ids)
+        with self._lock:
+            self.generation += 1
+            for key in list(self._entries):
+                kind = key[0]
+                if kind in ("today", "top") or (kind == "paper" and key[1] in stale_papers):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
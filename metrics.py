@@ -0,0 +1,246 @@
+"""Metrics module - Counters and histograms with a Prometheus text endpoint
+
+A small in-process registry (no client library needed) exposing metrics in
+the Prometheus text format on http://METRICS_HOST:METRICS_PORT/metrics.
+
+Usage:
+    from metrics import HTTP_REQUEST_SECONDS
+
+    with HTTP_REQUEST_SECONDS.time(host="huggingface.co"):
+        ...
+    TELEGRAM_RETRY_AFTER.inc(method="send_photo")
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets (seconds) covering fast local I/O to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1024, 16 * 1024, 128 * 1024, 1024**2, 8 * 1024**2, 64 * 1024**2, 512 * 1024**2)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution (count, sum and cumulative buckets) per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall-clock duration of the block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP fetches (HuggingFace pages, GitHub API)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram("hf_bot_http_request_seconds", "HTTP fetch duration", ["host"])
+HTTP_REQUESTS = REGISTRY.counter("hf_bot_http_requests_total", "HTTP fetches by host and status", ["host", "status"])
+
+# Upstream calls through resilience.Upstream (retries, circuit breakers, hedging)
+UPSTREAM_CALLS = REGISTRY.counter("hf_bot_upstream_calls_total", "Upstream call attempts by outcome (ok/retry/failed/rejected/hedged)", ["upstream", "outcome"])
+CIRCUIT_TRANSITIONS = REGISTRY.counter("hf_bot_circuit_transitions_total", "Circuit breaker state changes", ["upstream", "state"])
+
+# arXiv metadata lookups (arxiv_api.py)
+ARXIV_PAPERS = REGISTRY.counter("hf_bot_arxiv_papers_total", "arXiv metadata lookups by source (cache/api/missing)", ["source"])
+
+# Static site/feed export (export.py)
+EXPORT_PAGES = REGISTRY.counter("hf_bot_export_pages_total", "Static export files written by kind (month/index/feed)", ["kind"])
+
+# Paper sources (sources.py)
+SOURCE_PAPERS = REGISTRY.counter("hf_bot_source_papers_total", "Papers per source (new/duplicate by arXiv ID)", ["source", "outcome"])
+SOURCE_RUNS = REGISTRY.counter("hf_bot_source_runs_total", "Source runs per check by status (ok/failed/interrupted)", ["source", "status"])
+
+# HTML parsing
+PARSE_SECONDS = REGISTRY.histogram("hf_bot_parse_seconds", "HTML parse duration per page", ["page"])
+
+# LLM calls (summarize / translate)
+LLM_REQUEST_SECONDS = REGISTRY.histogram("hf_bot_llm_request_seconds", "LLM request duration", ["operation"])
+LLM_TOKENS = REGISTRY.counter("hf_bot_llm_tokens_total", "LLM tokens used", ["operation", "kind"])
+LLM_ERRORS = REGISTRY.counter("hf_bot_llm_errors_total", "Failed LLM requests", ["operation"])
+
+# Telegram sends
+TELEGRAM_SEND_SECONDS = REGISTRY.histogram("hf_bot_telegram_send_seconds", "Telegram API call duration", ["method"])
+TELEGRAM_RETRY_AFTER = REGISTRY.counter("hf_bot_telegram_retry_after_total", "Telegram RetryAfter (flood control) responses", ["method"])
+TELEGRAM_ERRORS = REGISTRY.counter("hf_bot_telegram_errors_total", "Failed Telegram API calls", ["method"])
+REFRESH_EDITS = REGISTRY.counter("hf_bot_refresh_edits_total", "Posted-message stat refreshes by outcome", ["outcome"])
+
+# Parquet I/O through OpenDAL
+PARQUET_BYTES = REGISTRY.counter("hf_bot_parquet_bytes_total", "Parquet bytes read/written", ["operation", "tier"])
+PARQUET_IO_SECONDS = REGISTRY.histogram("hf_bot_parquet_io_seconds", "Parquet object read/write duration", ["operation", "tier"])
+PARQUET_OBJECT_BYTES = REGISTRY.histogram("hf_bot_parquet_object_bytes", "Parquet object size per read/write", ["operation", "tier"], buckets=SIZE_BUCKETS)
+
+# Check cycles
+CYCLE_SECONDS = REGISTRY.histogram("hf_bot_cycle_seconds", "check_and_send_new_papers duration", buckets=DEFAULT_BUCKETS + (120.0, 300.0, 600.0, 1200.0))
+CYCLES = REGISTRY.counter("hf_bot_cycles_total", "Check cycles by outcome", ["status"])
+PAPERS = REGISTRY.counter("hf_bot_papers_total", "Papers per cycle stage", ["stage"])
+
+
+def record_parquet_io(operation: str, tier: str, size: int, seconds: float) -> None:
+    """Record one Parquet object read or write"""
+    PARQUET_BYTES.inc(size, operation=operation, tier=tier)
+    PARQUET_IO_SECONDS.observe(seconds, operation=operation, tier=tier)
+    PARQUET_OBJECT_BYTES.observe(size, operation=operation, tier=tier)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics request: " + format, *args)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread
+
+    Returns:
+    The running server (call shutdown() to stop it)
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Metrics endpoint listening", extra={'url': f"http://{host}:{server.server_port}/metrics"})
+    return server
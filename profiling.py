@@ -0,0 +1,259 @@
+"""Profiling module - Per-cycle CPU, allocation and stage timing reports
+
+A sampled cycle writes one directory under PROFILE_DIR:
+
+    <PROFILE_DIR>/check-20251001T080000Z/
+        spans.json         wall-clock time per stage (total, count)
+        stacks.txt         sampled stacks in collapsed format (PROFILE_MODE=sample)
+        profile.prof       cProfile dump, open with pstats/snakeviz (PROFILE_MODE=cprofile)
+        allocations.txt    tracemalloc top allocation sites and peak traced memory
+        summary.txt        the summary that is also logged
+
+Usage:
+    profiler = CycleProfiler.from_config()
+    with profiler.cycle("check") as profile:
+        with profile.span("fetch"):
+            ...
+
+Only a fraction (PROFILE_RATE) of cycles is profiled; other cycles get a no-op
+session whose spans cost a context-manager call. The default sampling mode
+reads thread stacks from a background thread every few milliseconds instead of
+tracing every call, so overhead stays low enough for production.
+"""
+import cProfile
+import json
+import logging
+import pstats
+import random
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sample", "cprofile")
+
+
+class StackSampler:
+    """Samples the stacks of all threads at a fixed interval (collapsed-stack output)"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def top_functions(self, limit: int = 5) -> List[tuple]:
+        """Leaf frames with the most samples (self time)"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def write(self, path: Path) -> None:
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+
+class _NullSession:
+    """Session of an unsampled cycle: spans do nothing"""
+
+    enabled = False
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        yield
+
+
+class ProfileSession:
+    """Profiling state of one sampled cycle"""
+
+    enabled = True
+
+    def __init__(self, name: str, directory: Path, mode: str, top_n: int):
+        self.name = name
+        self.directory = directory
+        self.mode = mode
+        self.top_n = top_n
+        # stage -> [total seconds, count]
+        self.spans: Dict[str, List[float]] = {}
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._owns_tracemalloc = False
+        self._started = 0.0
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Add the wall-clock duration of the block to `stage` (repeated spans accumulate)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.spans.setdefault(stage, [0.0, 0])
+            entry[0] += time.perf_counter() - started
+            entry[1] += 1
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = StackSampler()
+            self._sampler.start()
+        self._started = time.perf_counter()
+
+    def stop(self) -> str:
+        """Stop collecting, write the report files and return the summary"""
+        elapsed = time.perf_counter() - self._started
+        if self._profile:
+            self._profile.disable()
+        if self._sampler:
+            self._sampler.stop()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        _, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        spans = {stage: {'seconds': round(total, 4), 'count': count} for stage, (total, count) in self.spans.items()}
+        (self.directory / "spans.json").write_text(
+            json.dumps({'name': self.name, 'seconds': round(elapsed, 4), 'spans': spans}, indent=2),
+            encoding='utf-8',
+        )
+
+        allocations = snapshot.statistics('lineno')[:self.top_n]
+        lines = [f"peak traced memory: {peak / 1024**2:.1f} MiB", ""]
+        lines += [str(stat) for stat in allocations]
+        (self.directory / "allocations.txt").write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+        if self._profile:
+            self._profile.dump_stats(str(self.directory / "profile.prof"))
+            stats = pstats.Stats(self._profile)
+            hot = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:5]
+            hot_functions = [(f"{func[2]} ({Path(func[0]).name}:{func[1]})", round(timing[2], 3)) for func, timing in hot]
+        else:
+            self._sampler.write(self.directory / "stacks.txt")
+            interval = self._sampler.interval
+            hot_functions = [(frame, round(count * interval, 3)) for frame, count in self._sampler.top_functions()]
+
+        summary = [f"{self.name} cycle: {elapsed:.2f}s, peak traced memory {peak / 1024**2:.1f} MiB"]
+        summary.append("stages: " + ", ".join(
+            f"{stage}={total:.2f}s" for stage, (total, _) in sorted(self.spans.items(), key=lambda item: -item[1][0])
+        ))
+        summary.append("hot functions (self time): " + ", ".join(f"{name}={seconds}s" for name, seconds in hot_functions))
+        if allocations:
+            top = allocations[0]
+            summary.append(f"top allocation: {top.traceback[0].filename}:{top.traceback[0].lineno} {top.size / 1024:.0f} KiB")
+        text = "\n".join(summary)
+        (self.directory / "summary.txt").write_text(text + "\n", encoding='utf-8')
+        return text
+
+
+class CycleProfiler:
+    """Decides which cycles are profiled and where their reports go"""
+
+    def __init__(self, output_dir: str, rate: float = 0.0, mode: str = "sample", keep: int = 20, top_n: int = 25):
+        """
+        Args:
+        output_dir: Directory receiving one sub-directory per profiled cycle
+        rate: Fraction of cycles to profile (0 disables, 1 profiles every cycle)
+        mode: "sample" (low-overhead stack sampling) or "cprofile" (deterministic)
+        keep: Number of most recent cycle directories kept (0 keeps all)
+        top_n: Number of allocation sites written
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (expected one of {', '.join(PROFILE_MODES)})")
+        self.output_dir = Path(output_dir)
+        self.rate = rate
+        self.mode = mode
+        self.keep = keep
+        self.top_n = top_n
+
+    @classmethod
+    def from_config(cls, rate: Optional[float] = None) -> "CycleProfiler":
+        """Profiler configured from PROFILE_* settings (rate overrides PROFILE_RATE)"""
+        from config import Config
+
+        return cls(
+            Config.PROFILE_DIR,
+            rate=Config.PROFILE_RATE if rate is None else rate,
+            mode=Config.PROFILE_MODE,
+            keep=Config.PROFILE_KEEP,
+        )
+
+    def should_profile(self) -> bool:
+        return self.rate > 0 and (self.rate >= 1 or random.random() < self.rate)
+
+    @contextmanager
+    def cycle(self, name: str) -> Iterator[ProfileSession | _NullSession]:
+        """Profile the block if this cycle is sampled; yields a session for stage spans"""
+        if not self.should_profile():
+            yield _NullSession()
+            return
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        session = ProfileSession(name, self.output_dir / f"{name}-{stamp}", self.mode, self.top_n)
+        session.start()
+        try:
+            yield session
+        finally:
+            try:
+                summary = session.stop()
+                logger.info("Profiled cycle\n" + summary, extra={'path': str(session.directory)})
+                self._prune()
+            except Exception as e:
+                logger.warning("Writing profile failed", extra={'path': str(session.directory), 'error': str(e)})
+
+    def _prune(self) -> None:
+        """Delete all but the `keep` most recent cycle directories"""
+        if self.keep <= 0:
+            return
+        directories = sorted((p for p in self.output_dir.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime)
+        for old in directories[:-self.keep]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+# Profiler that never samples, for callers without profiling configured
+DISABLED = CycleProfiler(".", rate=0.0)
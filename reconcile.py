@@ -0,0 +1,257 @@
+"""Reconcile module - Consistency check between sent records, storage and archive
+
+Three records of the same papers can drift apart:
+
+    posted      papers actually posted (MessageStore, MESSAGE_STORE_PATH) and
+                the sent-ID cache (PaperCache, papers_cache.json)
+    daily       every fetched paper, posted or not (YYYY/MM/YYYYMMDD.parquet)
+    archive     monthly merges of the daily files (YYYY/YYYYMM.parquet)
+
+The cache is seeded from storage at startup, so it cannot tell a stored paper
+from a posted one; the message store can. The reconciler reads only the
+`paper_id` column and the footer metadata of every Parquet file, in parallel
+(inventory.scan_files), and reports:
+
+    unposted        stored since message tracking began, never posted
+                    (includes papers skipped on purpose: filtered by routing,
+                    near-duplicates)
+    not_stored      posted, but in no daily or archive file
+    uncached        posted, but missing from the cache (would be posted again
+                    if it shows up in a list and is not stored)
+    months          archived months whose archive and daily files disagree
+                    (IDs only on one side, duplicate rows)
+
+With --requeue, unposted papers whose daily file still exists are written to
+REQUEUE_PATH; the bot posts them in its next check (routing and near-duplicate
+checks still apply). Both sides change the queue file under the "requeue"
+coordination lock, and the bot removes only the entries it handled.
+
+Command line:
+    python reconcile.py [--json] [--requeue] [--workers N]
+"""
+import argparse
+import json
+import logging
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Union
+
+from cache import PaperCache
+from inventory import scan_files
+from refresh import MessageStore
+
+logger = logging.getLogger(__name__)
+
+# Coordination lock held while the queue file is read and rewritten
+REQUEUE_LOCK = "requeue"
+
+if TYPE_CHECKING:
+    from storage import PaperStorage
+
+
+def reconcile(
+    storage: "PaperStorage",
+    messages: MessageStore,
+    cached_ids: Set[str],
+    workers: Optional[int] = None,
+) -> dict:
+    """Diff posted records, daily files and archives
+
+    Args:
+    storage: Paper storage (daily and archive tiers)
+    messages: Posted messages
+    cached_ids: Paper IDs of the sent-ID cache
+    workers: Parallel file readers
+
+    Returns:
+    dict with unposted ([{paper_id, day}]), untracked (count of unposted papers
+    stored before message tracking began), not_stored, uncached, months
+    ('YYYY-MM' -> mismatch details) and errors
+    """
+    results, errors = scan_files(storage, with_ids=True, workers=workers)
+    daily: Dict[str, Dict[str, List[str]]] = {}
+    archive: Dict[str, dict] = {}
+    for tier, info in results:
+        if tier == 'daily':
+            daily.setdefault(info['month'], {})[info['day']] = info['paper_ids']
+        else:
+            archive[info['month']] = info
+
+    # First listing day of every paper in a daily file
+    stored_days: Dict[str, str] = {}
+    for days in daily.values():
+        for day in sorted(days):
+            for paper_id in days[day]:
+                stored_days.setdefault(paper_id, day)
+    archived_ids: Set[str] = set()
+    for info in archive.values():
+        archived_ids.update(info['paper_ids'])
+
+    posted = messages.posted_paper_ids()
+    tracking_since = (
+        datetime.fromtimestamp(min(posted.values()), tz=timezone.utc).date().isoformat() if posted else None
+    )
+    unposted = []
+    untracked = 0
+    for paper_id, day in sorted(stored_days.items(), key=lambda item: (item[1], item[0])):
+        if paper_id in posted:
+            continue
+        if tracking_since is not None and day >= tracking_since:
+            unposted.append({'paper_id': paper_id, 'day': day})
+        else:
+            untracked += 1
+    stored = stored_days.keys() | archived_ids
+
+    months = {}
+    for month_key, info in sorted(archive.items()):
+        archive_ids = info['paper_ids']
+        month = {
+            'archive_rows': info['rows'],
+            'duplicate_rows': len(archive_ids) - len(set(archive_ids)),
+            'daily_files': len(daily.get(month_key, {})),
+            'daily_only': [],
+            'archive_only': [],
+        }
+        if month_key in daily:
+            # Daily files still present: the archive must hold exactly their papers
+            daily_ids = set().union(*daily[month_key].values())
+            month['daily_only'] = sorted(daily_ids - set(archive_ids))
+            month['archive_only'] = sorted(set(archive_ids) - daily_ids)
+        if month['duplicate_rows'] or month['daily_only'] or month['archive_only']:
+            months[month_key] = month
+
+    report = {
+        'stored': len(stored),
+        'posted': len(posted),
+        'cached': len(cached_ids),
+        'tracking_since': tracking_since,
+        'unposted': unposted,
+        'untracked': untracked,
+        'not_stored': sorted(set(posted) - stored),
+        'uncached': sorted(set(posted) - cached_ids),
+        'months': months,
+        'errors': errors,
+    }
+    logger.info("Reconciliation finished", extra={
+        'files': len(results) + len(errors),
+        'unposted': len(unposted),
+        'not_stored': len(report['not_stored']),
+        'uncached': len(report['uncached']),
+        'mismatched_months': len(months),
+    })
+    return report
+
+
+# ---- Requeue file ------------------------------------------------------------
+
+def load_requeue(path: Union[str, Path]) -> List[dict]:
+    """Queued papers ([{paper_id, day}]); empty if there is no queue"""
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8')).get('papers', [])
+    except FileNotFoundError:
+        return []
+    except ValueError as e:
+        logger.warning("Requeue file unreadable, ignoring it", extra={'path': str(path), 'error': str(e)})
+        return []
+
+
+def save_requeue(path: Union[str, Path], papers: List[dict]) -> None:
+    """Write the queue (an empty queue removes the file)"""
+    path = Path(path)
+    if not papers:
+        path.unlink(missing_ok=True)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({'papers': papers}, indent=1), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def requeue(path: Union[str, Path], papers: List[dict]) -> int:
+    """Add papers to the queue (already queued IDs are kept once); returns the queue length"""
+    queued = load_requeue(path)
+    known = {entry['paper_id'] for entry in queued}
+    queued.extend(entry for entry in papers if entry['paper_id'] not in known)
+    save_requeue(path, queued)
+    return len(queued)
+
+
+def remove_requeued(path: Union[str, Path], paper_ids: Set[str]) -> int:
+    """Drop handled papers from the queue, keeping entries added in the meantime; returns the queue length"""
+    queued = [entry for entry in load_requeue(path) if entry['paper_id'] not in paper_ids]
+    save_requeue(path, queued)
+    return len(queued)
+
+
+def group_by_day(papers: List[dict]) -> Dict[date, List[str]]:
+    days: Dict[date, List[str]] = {}
+    for entry in papers:
+        days.setdefault(date.fromisoformat(entry['day']), []).append(entry['paper_id'])
+    return days
+
+
+def print_report(report: dict) -> None:
+    """Print a reconciliation report"""
+    print("Reconciliation:")
+    print(f"  Stored papers: {report['stored']}, posted: {report['posted']}, cached: {report['cached']}")
+    if report['tracking_since']:
+        print(f"  Message tracking since: {report['tracking_since']}")
+    print(f"  Stored, never posted: {len(report['unposted'])} (+{report['untracked']} stored before tracking began)")
+    for entry in report['unposted'][:20]:
+        print(f"    {entry['day']}  {entry['paper_id']}")
+    if len(report['unposted']) > 20:
+        print(f"    ... {len(report['unposted']) - 20} more")
+    print(f"  Posted, not stored: {len(report['not_stored'])} {' '.join(report['not_stored'][:20])}")
+    print(f"  Posted, not in cache: {len(report['uncached'])} {' '.join(report['uncached'][:20])}")
+
+    if report['months']:
+        print("\n  Archive / daily mismatches:")
+        for month_key, month in report['months'].items():
+            print(
+                f"    {month_key}: {len(month['daily_only'])} only in daily files, "
+                f"{len(month['archive_only'])} only in archive, {month['duplicate_rows']} duplicate archive rows"
+            )
+
+    if report['errors']:
+        print("\n  Unreadable files:")
+        for error in report['errors']:
+            print(f"    [{error['tier']}] {error['key']}: {error['error']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Reconciliation command"""
+    from config import Config
+    from log import setup_logging
+    from storage import PaperStorage
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Diff posted records, daily files and monthly archives")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--requeue", action="store_true", help="Queue unposted papers for the bot's next check")
+    parser.add_argument("--cache-file", default="papers_cache.json", help="Sent-ID cache file")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel file readers")
+    args = parser.parse_args(argv)
+
+    storage = PaperStorage.from_env()
+    messages = MessageStore(Config.MESSAGE_STORE_PATH)
+    try:
+        report = reconcile(storage, messages, PaperCache(args.cache_file).cached_ids, workers=args.workers)
+    finally:
+        messages.close()
+
+    if args.requeue and report['unposted']:
+        with storage.coordination.lock(REQUEUE_LOCK):
+            queued = requeue(Config.REQUEUE_PATH, report['unposted'])
+        logger.info("Queued unposted papers", extra={'papers': len(report['unposted']), 'queued': queued, 'path': Config.REQUEUE_PATH})
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+    mismatched = report['not_stored'] or report['uncached'] or report['months'] or report['errors']
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
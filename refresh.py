@@ -0,0 +1,413 @@
+"""Refresh module - Keep upvote/star counts of posted messages up to date
+
+The stats line of a post is frozen at send time while upvotes keep climbing
+for days. Every posted message is recorded in a small SQLite store
+(MESSAGE_STORE_PATH) together with the message as sent and the counts it
+shows. `MessageRefresher` periodically compares those counts with the latest
+readings of the metrics history and submits edits for messages whose counts
+changed meaningfully; `EditQueue` applies them in rate-limited batches and
+pauses while new papers are being posted.
+
+Telegram allows about 20 messages per minute in one chat and about 30 per
+second overall; edits count against both, so the queue keeps a token bucket
+per chat plus a global one, and posts consume tokens of their chat as well.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS messages (
+    chat_id TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    paper_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    body TEXT NOT NULL,
+    hf_upvotes INTEGER,
+    github_stars INTEGER,
+    posted_at REAL NOT NULL,
+    refreshed_at REAL,
+    PRIMARY KEY (chat_id, message_id)
+);
+CREATE INDEX IF NOT EXISTS messages_posted_at ON messages (posted_at);
+"""
+
+# Telegram: ~30 messages/s per bot overall
+GLOBAL_EDITS_PER_SECOND = 20.0
+# Poll interval while every pending edit is throttled
+THROTTLED_POLL_SECONDS = 0.5
+
+Metrics = Tuple[Optional[int], Optional[int]]
+
+
+@dataclass(slots=True)
+class PostedMessage:
+    """A posted paper message and the counts it currently shows"""
+
+    chat_id: str
+    message_id: int
+    paper_id: str
+    # "caption" (photo posts) or "text"
+    kind: str
+    # MarkdownV2 source as sent or last edited
+    body: str
+    hf_upvotes: Optional[int] = None
+    github_stars: Optional[int] = None
+    posted_at: float = 0.0
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return (self.chat_id, self.message_id)
+
+
+@dataclass(slots=True)
+class MessageEdit:
+    """A re-rendered message waiting in the edit queue"""
+
+    message: PostedMessage
+    body: str
+    hf_upvotes: Optional[int]
+    github_stars: Optional[int]
+
+
+class MessageStore:
+    """SQLite table of posted messages"""
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        """Initialize message store
+
+        Args:
+        path: SQLite database file (":memory:" for a throwaway store)
+        """
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA_SQL)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, message: PostedMessage) -> None:
+        """Record a posted message (posted_at defaults to now)"""
+        posted_at = message.posted_at or time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO messages (chat_id, message_id, paper_id, kind, body, hf_upvotes, github_stars, posted_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (message.chat_id, message.message_id, message.paper_id, message.kind, message.body,
+                 message.hf_upvotes, message.github_stars, posted_at),
+            )
+
+    def update(self, edit: MessageEdit) -> None:
+        """Store the body and counts of an applied edit"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE messages SET body = ?, hf_upvotes = ?, github_stars = ?, refreshed_at = ?"
+                " WHERE chat_id = ? AND message_id = ?",
+                (edit.body, edit.hf_upvotes, edit.github_stars, time.time(), *edit.message.key),
+            )
+
+    def remove(self, message: PostedMessage) -> None:
+        """Stop tracking a message (e.g. deleted from the channel)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE chat_id = ? AND message_id = ?", message.key)
+
+    def recent(self, since: float) -> List[PostedMessage]:
+        """Messages posted at or after `since` (Unix time)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chat_id, message_id, paper_id, kind, body, hf_upvotes, github_stars, posted_at"
+                " FROM messages WHERE posted_at >= ?",
+                (since,),
+            ).fetchall()
+        return [PostedMessage(**dict(row)) for row in rows]
+
+    def posted_paper_ids(self) -> Dict[str, float]:
+        """First posting time (Unix time) of every posted paper, by paper ID"""
+        with self._lock:
+            rows = self._conn.execute("SELECT paper_id, MIN(posted_at) FROM messages GROUP BY paper_id").fetchall()
+        return {paper_id: posted_at for paper_id, posted_at in rows}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+
+def meaningful_change(old: Optional[int], new: Optional[int], min_delta: int, min_ratio: float) -> bool:
+    """Whether a count moved enough to be worth an edit
+
+    The change must reach both `min_delta` and `min_ratio` of the shown value,
+    so small papers update on every few upvotes and popular ones less often.
+    """
+    if new is None or new == old:
+        return False
+    if old is None:
+        return True
+    return abs(new - old) >= max(min_delta, old * min_ratio)
+
+
+class _TokenBucket:
+    """Token bucket; tokens may go negative when posts are charged"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def available(self, now: float) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens >= 1
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def charge(self, now: float) -> None:
+        self.available(now)
+        self.tokens = max(self.tokens - 1, -self.capacity)
+
+
+ApplyEdit = Callable[[MessageEdit], Awaitable[Optional[float]]]
+
+
+class EditQueue:
+    """Coalescing, rate-limited queue of message edits
+
+    Pending edits are keyed by message, so a newer rendering replaces an older
+    one that was not sent yet and the queue never holds more than one edit per
+    tracked message. `apply` performs one edit and returns None when done, or
+    a delay in seconds (flood control) after which the edit is retried.
+    """
+
+    def __init__(self, apply: ApplyEdit, per_chat_per_minute: float = 20, batch_size: int = 10,
+                 global_per_second: float = GLOBAL_EDITS_PER_SECOND, burst: Optional[float] = None):
+        """Initialize edit queue
+
+        Args:
+        apply: Coroutine function performing one edit
+        per_chat_per_minute: Edits (plus posts) allowed per chat and minute
+        batch_size: Edits sent concurrently per batch
+        global_per_second: Edits allowed per second over all chats
+        burst: Edits a chat may receive back to back (default: 10 seconds worth)
+        """
+        self.apply = apply
+        self.per_chat_per_minute = per_chat_per_minute
+        self.batch_size = batch_size
+        self.burst = burst if burst is not None else max(1.0, per_chat_per_minute / 6)
+        self._global = _TokenBucket(global_per_second, max(1.0, float(batch_size)))
+        self._chats: Dict[str, _TokenBucket] = {}
+        self._pending: Dict[Tuple[str, int], MessageEdit] = {}
+        self._paused_until = 0.0
+        self._posting = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _events(self) -> Tuple[asyncio.Event, asyncio.Event]:
+        # Created lazily so the queue can be built outside a running loop
+        if self._idle is None:
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._wakeup = asyncio.Event()
+        return self._idle, self._wakeup
+
+    def _bucket(self, chat_id: str) -> _TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = _TokenBucket(self.per_chat_per_minute / 60, self.burst)
+        return bucket
+
+    def submit(self, edit: MessageEdit) -> None:
+        """Queue an edit, replacing a pending edit of the same message"""
+        self._pending[edit.message.key] = edit
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def note_post(self, chat_id: str) -> None:
+        """Charge a new post against its chat's budget"""
+        self._bucket(chat_id).charge(time.monotonic())
+
+    @asynccontextmanager
+    async def priority(self) -> AsyncIterator[None]:
+        """Hold edits back while new papers are being posted"""
+        idle, _ = self._events()
+        self._posting += 1
+        idle.clear()
+        try:
+            yield
+        finally:
+            self._posting -= 1
+            if not self._posting:
+                idle.set()
+
+    def _take_batch(self, now: float) -> List[MessageEdit]:
+        batch = []
+        throttled = set()
+        for key, edit in list(self._pending.items()):
+            if len(batch) >= self.batch_size or not self._global.available(now):
+                break
+            chat_id = key[0]
+            if chat_id in throttled:
+                continue
+            bucket = self._bucket(chat_id)
+            if not bucket.available(now):
+                throttled.add(chat_id)
+                continue
+            bucket.take()
+            self._global.take()
+            del self._pending[key]
+            batch.append(edit)
+        return batch
+
+    async def drain_once(self) -> int:
+        """Send one batch of edits the rate limits allow
+
+        Returns:
+        int: Number of edits attempted
+        """
+        idle, _ = self._events()
+        await idle.wait()
+        now = time.monotonic()
+        if now < self._paused_until:
+            return 0
+        batch = self._take_batch(now)
+        if not batch:
+            return 0
+
+        results = await asyncio.gather(*(self.apply(edit) for edit in batch))
+        for edit, retry_after in zip(batch, results):
+            if retry_after is None:
+                continue
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            # A newer rendering submitted meanwhile wins
+            self._pending.setdefault(edit.message.key, edit)
+        return len(batch)
+
+    async def run(self) -> None:
+        """Apply queued edits until cancelled"""
+        _, wakeup = self._events()
+        while True:
+            if not self._pending:
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            if await self.drain_once() == 0:
+                await asyncio.sleep(max(self._paused_until - time.monotonic(), THROTTLED_POLL_SECONDS))
+
+
+Render = Callable[[PostedMessage, Optional[int], Optional[int]], str]
+
+
+class MessageRefresher:
+    """Finds posted messages with outdated counts and queues their edits"""
+
+    def __init__(
+        self,
+        store: MessageStore,
+        latest_metrics: Callable[[Iterable[str]], Dict[str, Metrics]],
+        render: Render,
+        queue: EditQueue,
+        max_age_days: float = 7,
+        min_delta: int = 5,
+        min_ratio: float = 0.1,
+    ):
+        """Initialize refresher
+
+        Args:
+        store: Posted messages
+        latest_metrics: Latest (upvotes, stars) for paper IDs (e.g. MetricsHistory.latest)
+        render: Re-renders a message body with new counts
+        queue: Edit queue the changed messages are submitted to
+        max_age_days: Messages older than this are no longer refreshed
+        min_delta / min_ratio: Minimum change worth an edit (see `meaningful_change`)
+        """
+        self.store = store
+        self.latest_metrics = latest_metrics
+        self.render = render
+        self.queue = queue
+        self.max_age_days = max_age_days
+        self.min_delta = min_delta
+        self.min_ratio = min_ratio
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scan_requested: Optional[asyncio.Event] = None
+
+    def _changed(self, old: Optional[int], new: Optional[int]) -> bool:
+        return meaningful_change(old, new, self.min_delta, self.min_ratio)
+
+    def scan(self, now: Optional[float] = None) -> List[MessageEdit]:
+        """Re-render messages whose counts changed meaningfully
+
+        Returns:
+        List[MessageEdit]: Edits, largest upvote change first
+        """
+        now = now or time.time()
+        messages = self.store.recent(now - self.max_age_days * 86400)
+        if not messages:
+            return []
+        latest = self.latest_metrics({message.paper_id for message in messages})
+
+        changed = []
+        for message in messages:
+            upvotes, stars = latest.get(message.paper_id, (None, None))
+            if not (self._changed(message.hf_upvotes, upvotes) or self._changed(message.github_stars, stars)):
+                continue
+            # A missing reading keeps the shown value
+            upvotes = upvotes if upvotes is not None else message.hf_upvotes
+            stars = stars if stars is not None else message.github_stars
+            change = abs((upvotes or 0) - (message.hf_upvotes or 0))
+            changed.append((change, MessageEdit(message, self.render(message, upvotes, stars), upvotes, stars)))
+        changed.sort(key=lambda item: item[0], reverse=True)
+        return [edit for _, edit in changed]
+
+    async def refresh(self) -> int:
+        """Scan (in a worker thread) and queue the edits
+
+        Returns:
+        int: Number of edits queued
+        """
+        edits = await asyncio.to_thread(self.scan)
+        for edit in edits:
+            self.queue.submit(edit)
+        if edits:
+            logger.info("Queued message refreshes", extra={'edits': len(edits), 'pending': len(self.queue)})
+        return len(edits)
+
+    def request_scan(self, *args) -> None:
+        """Scan soon instead of waiting for the interval (thread-safe; usable as a save listener)"""
+        if self._loop is not None and self._scan_requested is not None:
+            self._loop.call_soon_threadsafe(self._scan_requested.set)
+
+    async def run(self, interval: float) -> None:
+        """Scan every `interval` seconds, or sooner when requested, until cancelled"""
+        self._loop = asyncio.get_running_loop()
+        self._scan_requested = asyncio.Event()
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.exception("Message refresh scan failed", extra={'error': str(e)})
+            try:
+                await asyncio.wait_for(self._scan_requested.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._scan_requested.clear()
@@ -0,0 +1,320 @@
+"""Resilience module - Retries, circuit breakers and hedged requests for upstreams
+
+Every call to an external service (HuggingFace pages, GitHub API, OpenAI,
+Telegram) goes through an `Upstream`, which applies one shared policy:
+
+    timeout     passed to the call (per attempt); the caller forwards it to
+                its HTTP client
+    retry       transient failures are retried with jittered exponential
+                backoff ("full jitter": a random delay up to base * 2^n,
+                capped), or after the delay the server asked for
+    breaker     after `failure_threshold` consecutive transient failures the
+                upstream is considered down: calls fail fast with
+                CircuitOpenError for `reset_timeout` seconds, then one probe
+                call decides whether it closes again
+    hedging     for idempotent reads, a second identical request is started
+                when the first did not answer within `hedge_after` seconds;
+                the first successful answer wins (cuts tail latency)
+
+Whether an error is transient is decided by the upstream's `classify`
+function: it returns None for permanent errors (raised at once, e.g. a 404,
+and not held against the breaker) or the minimum delay before a retry.
+
+`RateLimiter` spaces requests to an upstream independently of failures
+(e.g. the pace a paper source may scrape at).
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import requests
+
+from config import Config
+from metrics import CIRCUIT_TRANSITIONS, UPSTREAM_CALLS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Classifier = Callable[[BaseException], Optional[float]]
+
+
+class CircuitOpenError(RuntimeError):
+    """The upstream's circuit breaker is open; the call was not attempted"""
+
+    def __init__(self, upstream: str, retry_in: float):
+        super().__init__(f"{upstream} unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+class RetryPolicy:
+    """Attempt count and jittered exponential backoff"""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+        """Initialize policy
+
+        Args:
+        attempts: Total attempts per call (1 = no retry)
+        base_delay: Backoff cap of the first retry in seconds, doubled per retry
+        max_delay: Upper bound of any delay, including server-requested ones
+        """
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, retry: int, minimum: float = 0.0) -> float:
+        """Seconds to wait before retry number `retry` (0-based)
+
+        Returns:
+        A random delay up to the exponential cap, at least `minimum`
+        """
+        cap = min(self.max_delay, self.base_delay * 2 ** retry)
+        return min(max(random.uniform(0, cap), minimum), self.max_delay)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open)"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through
+
+        While open, the first call after `reset_timeout` is let through as the
+        probe; others keep failing fast until it reports back.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(self.name, max(remaining, 0.0))
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit closed", extra={'upstream': self.name})
+                CIRCUIT_TRANSITIONS.inc(upstream=self.name, state="closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                logger.warning("Circuit opened", extra={'upstream': self.name, 'failures': self._failures, 'reset_timeout': self.reset_timeout})
+                CIRCUIT_TRANSITIONS.inc(upstream=self.name, state="open")
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class RateLimiter:
+    """Spaces calls to at most `rate` per second, shared by threads and coroutines"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Initialize limiter
+
+        Args:
+        rate: Calls per second
+        burst: Calls allowed back to back after an idle period
+        """
+        self.interval = 1.0 / rate
+        self.burst = max(burst, 1)
+        # Monotonic time the next call may start
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Claim the next slot; returns the seconds to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now - (self.burst - 1) * self.interval)
+            self._next = start + self.interval
+            return start - now
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def classify_http_error(error: BaseException) -> Optional[float]:
+    """Transient for connection errors, timeouts, 429 and 5xx (honoring Retry-After)"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return 0.0
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        if status == 429 or status >= 500:
+            try:
+                return float(error.response.headers.get("Retry-After", 0))
+            except ValueError:
+                return 0.0
+    return None
+
+
+class Upstream:
+    """One external service: timeout, retry policy, circuit breaker and optional hedging"""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[float] = None,
+        policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        classify: Classifier = classify_http_error,
+        hedge_after: Optional[float] = None,
+    ):
+        """Initialize upstream
+
+        Args:
+        name: Service name (metric label, breaker name)
+        timeout: Per-attempt timeout in seconds (enforced for async calls, blocking callers pass it to their client)
+        policy: Retry policy (default: 3 attempts)
+        breaker: Circuit breaker (default: opens after 5 failures for 60 s)
+        classify: Maps an error to the minimum retry delay, None if permanent
+        hedge_after: Seconds before a hedged call starts its second request (None = never)
+        """
+        self.name = name
+        self.timeout = timeout
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(name)
+        self.classify = classify
+        self.hedge_after = hedge_after or None
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_config(cls, name: str, timeout: Optional[float] = None, classify: Classifier = classify_http_error,
+                    hedge_after: Optional[float] = None) -> "Upstream":
+        """Upstream with the RETRY_* and CIRCUIT_* settings"""
+        return cls(
+            name,
+            timeout=timeout,
+            policy=RetryPolicy(Config.RETRY_ATTEMPTS, Config.RETRY_BASE_DELAY, Config.RETRY_MAX_DELAY),
+            breaker=CircuitBreaker(name, Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_RESET_TIMEOUT),
+            classify=classify,
+            hedge_after=hedge_after,
+        )
+
+    def _attempt_failed(self, error: BaseException, retry: int, attempts: int, classify: Classifier) -> float:
+        """Record a failed attempt; re-raise it unless another attempt follows
+
+        Returns:
+        Seconds to wait before the next attempt
+        """
+        minimum = classify(error)
+        if minimum is None:
+            # The upstream answered; the request itself was wrong
+            self.breaker.record_success()
+            UPSTREAM_CALLS.inc(upstream=self.name, outcome="rejected")
+            raise error
+        self.breaker.record_failure()
+        if retry + 1 >= attempts or minimum > self.policy.max_delay:
+            UPSTREAM_CALLS.inc(upstream=self.name, outcome="failed")
+            raise error
+        UPSTREAM_CALLS.inc(upstream=self.name, outcome="retry")
+        delay = self.policy.delay(retry, minimum)
+        logger.info("Retrying upstream call", extra={'upstream': self.name, 'retry': retry + 1, 'delay_s': round(delay, 2), 'error': str(error)})
+        return delay
+
+    def call(self, fn: Callable[[], T], hedge: bool = False, attempts: Optional[int] = None) -> T:
+        """Call `fn` (blocking) under the retry, breaker and hedging policy
+
+        Args:
+        fn: The request; must be idempotent when `hedge` is set
+        hedge: Race a second request against a slow first one
+        attempts: Override the policy's attempt count
+
+        Raises:
+        CircuitOpenError: if the upstream is considered down
+        """
+        attempts = attempts or self.policy.attempts
+        for retry in range(attempts):
+            self.breaker.before_call()
+            try:
+                result = self._hedged(fn) if hedge and self.hedge_after else fn()
+            except Exception as e:
+                time.sleep(self._attempt_failed(e, retry, attempts, self.classify))
+            else:
+                self.breaker.record_success()
+                UPSTREAM_CALLS.inc(upstream=self.name, outcome="ok")
+                return result
+        raise AssertionError("unreachable")
+
+    def _hedged(self, fn: Callable[[], T]) -> T:
+        """First successful result of `fn`, starting a second copy after `hedge_after` seconds"""
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix=f"hedge-{self.name}")
+        first = self._hedge_pool.submit(fn)
+        try:
+            return first.result(timeout=self.hedge_after)
+        except FutureTimeout:
+            pass
+        UPSTREAM_CALLS.inc(upstream=self.name, outcome="hedged")
+        second = self._hedge_pool.submit(fn)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is None:
+            return winner.result()
+        # The faster one failed: the answer (or error) of the other decides
+        return (second if winner is first else first).result()
+
+    async def call_async(
+        self,
+        factory: Callable[[], Awaitable[T]],
+        attempts: Optional[int] = None,
+        classify: Optional[Classifier] = None,
+    ) -> T:
+        """Await `factory()` under the retry and breaker policy (no hedging)
+
+        Args:
+        factory: Creates a fresh coroutine per attempt
+        attempts: Override the policy's attempt count (1 for callers that handle retries)
+        classify: Override the upstream's classifier (e.g. for non-idempotent calls)
+
+        Raises:
+        CircuitOpenError: if the upstream is considered down
+        """
+        attempts = attempts or self.policy.attempts
+        for retry in range(attempts):
+            self.breaker.before_call()
+            try:
+                if self.timeout:
+                    result = await asyncio.wait_for(factory(), self.timeout)
+                else:
+                    result = await factory()
+            except Exception as e:
+                await asyncio.sleep(self._attempt_failed(e, retry, attempts, classify or self.classify))
+            else:
+                self.breaker.record_success()
+                UPSTREAM_CALLS.inc(upstream=self.name, outcome="ok")
+                return result
+        raise AssertionError("unreachable")
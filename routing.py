@@ -0,0 +1,189 @@
+"""Routing module - Per-channel topic rules compiled into one keyword automaton
+
+Rules are read from a JSON file (ROUTING_RULES_FILE):
+
+    {
+      "channels": [
+        {
+          "name": "diffusion",
+          "channel_id": "@hf_diffusion",
+          "include": ["diffusion", "score-based", "flow matching"],
+          "exclude": ["survey"],
+          "authors": ["Yang Song"],
+          "exclude_authors": [],
+          "min_upvotes": 5
+        }
+      ]
+    }
+
+A paper goes to a channel when it reaches `min_upvotes`, matches no exclude
+keyword/author, and matches an include keyword or author (channels without
+include keywords or authors accept every paper). Keywords match whole words,
+case-insensitively, anywhere in title + abstract.
+
+All keywords of all channels are compiled into a single Aho-Corasick
+automaton, so each paper is scanned once regardless of the number of rules.
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from hf import Paper
+
+logger = logging.getLogger(__name__)
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", text.lower()).strip()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords with whole-word matching"""
+
+    def __init__(self, keywords: Iterable[str]):
+        # goto[state][char] -> state; output[state] -> keywords ending at state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for keyword in keywords:
+            self._add(keyword)
+        self._build()
+
+    def _add(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if keyword not in self._output[state]:
+            self._output[state].append(keyword)
+
+    def _build(self) -> None:
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[str]:
+        """Keywords occurring in text as whole words (text must already be normalized)"""
+        found = set()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword in self._output[state]:
+                start = end - len(keyword) + 1
+                before = text[start - 1] if start > 0 else " "
+                after = text[end + 1] if end + 1 < len(text) else " "
+                if not before.isalnum() and not after.isalnum():
+                    found.add(keyword)
+        return found
+
+
+@dataclass
+class ChannelRule:
+    """Routing rule of one channel"""
+
+    name: str
+    channel_id: str
+    include: List[str] = field(default_factory=list)
+    exclude: List[str] = field(default_factory=list)
+    authors: List[str] = field(default_factory=list)
+    exclude_authors: List[str] = field(default_factory=list)
+    min_upvotes: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChannelRule":
+        if not data.get('channel_id'):
+            raise ValueError(f"Routing rule {data.get('name', '?')!r} has no channel_id")
+        return cls(
+            name=data.get('name') or data['channel_id'],
+            channel_id=data['channel_id'],
+            include=[_normalize(k) for k in data.get('include', [])],
+            exclude=[_normalize(k) for k in data.get('exclude', [])],
+            authors=[_normalize(a) for a in data.get('authors', [])],
+            exclude_authors=[_normalize(a) for a in data.get('exclude_authors', [])],
+            min_upvotes=int(data.get('min_upvotes', 0)),
+        )
+
+
+class PaperRouter:
+    """Routes papers to channels by compiled keyword/author rules"""
+
+    def __init__(self, rules: List[ChannelRule]):
+        self.rules = rules
+        # keyword / author -> [(rule index, is_exclude)]
+        self._keywords: Dict[str, List[Tuple[int, bool]]] = {}
+        self._authors: Dict[str, List[Tuple[int, bool]]] = {}
+        for i, rule in enumerate(rules):
+            for keyword in rule.include:
+                self._keywords.setdefault(keyword, []).append((i, False))
+            for keyword in rule.exclude:
+                self._keywords.setdefault(keyword, []).append((i, True))
+            for author in rule.authors:
+                self._authors.setdefault(author, []).append((i, False))
+            for author in rule.exclude_authors:
+                self._authors.setdefault(author, []).append((i, True))
+        self.automaton = KeywordAutomaton(sorted(self._keywords))
+        # Rules without include keywords or authors accept any paper
+        self._open_rules = {i for i, rule in enumerate(rules) if not rule.include and not rule.authors}
+
+    @classmethod
+    def single_channel(cls, channel_id: str) -> "PaperRouter":
+        """Router sending every paper to one channel (no rules configured)"""
+        return cls([ChannelRule(name="default", channel_id=channel_id)])
+
+    @classmethod
+    def from_file(cls, path: str, default_channel_id: Optional[str] = None) -> "PaperRouter":
+        """Load rules from a JSON file
+
+        Args:
+        path: Rules file
+        default_channel_id: Used when the file configures no channels
+        """
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+        rules = [ChannelRule.from_dict(item) for item in data.get('channels', [])]
+        if not rules and default_channel_id:
+            rules = [ChannelRule(name="default", channel_id=default_channel_id)]
+        logger.info("Routing rules loaded", extra={'channels': ",".join(rule.name for rule in rules)})
+        return cls(rules)
+
+    def route(self, paper: Paper) -> List[str]:
+        """Channel IDs a paper should be posted to (empty = filtered out)
+
+        Only rules hit by a keyword or author are visited, besides rules
+        without include conditions.
+        """
+        included = set(self._open_rules)
+        excluded: Set[int] = set()
+        hits = [self._keywords[k] for k in self.automaton.find(_normalize(f"{paper.title} {paper.abstract}"))]
+        hits += [self._authors.get(_normalize(author), ()) for author in paper.authors]
+        for matches in hits:
+            for index, is_exclude in matches:
+                (excluded if is_exclude else included).add(index)
+
+        upvotes = paper.hf_upvotes or 0
+        channels = []
+        for i in sorted(included - excluded):
+            rule = self.rules[i]
+            if upvotes >= rule.min_upvotes and rule.channel_id not in channels:
+                channels.append(rule.channel_id)
+        return channels
@@ -0,0 +1,538 @@
+"""Paper table schema - Versioned Arrow schema for stored paper data
+
+Version history:
+    1: Layout written by pandas (authors as JSON string, collected_at as ISO string,
+       URLs as plain strings, nullable counts stored as float)
+    2: Native Arrow layout (authors as list<string>, dictionary-encoded URLs,
+       collected_at as UTC timestamp, int64 counts)
+
+Files written before versioning carry no version key and are treated as version 1.
+Readers go through `read_paper_table`, which upgrades older layouts in memory.
+
+In memory, internal pipelines (storage writes, digests, backfills) use the
+slotted `PaperRecord` and convert lists of papers to and from Arrow column by
+column (`papers_to_table` / `table_to_records`); the pydantic `hf.Paper` model
+is only used where scraped data is validated.
+
+Writers pick a storage profile (Parquet codec, row groups, encodings) per write
+path: `hot` for the hourly daily-file rewrite, `archive` for monthly merges.
+
+The migrate and report commands list and rewrite files through the storage's
+OpenDAL operators, so they work on every configured backend (fs, s3, ...).
+
+Command line:
+    python schema.py migrate [--dry-run] [--workers N]
+    python schema.py report [--repeats N]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from dataclasses import dataclass, field as dataclass_field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    import opendal
+
+    from hf import Paper
+    from storage import PaperStorage
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA_VERSION = 2
+SCHEMA_VERSION_KEY = b"hf_papers.schema_version"
+
+URL_TYPE = pa.dictionary(pa.int32(), pa.string())
+TIMESTAMP_TYPE = pa.timestamp("us", tz="UTC")
+
+PAPER_SCHEMA = pa.schema(
+    [
+        pa.field("paper_id", pa.string(), nullable=False),
+        pa.field("title", pa.string()),
+        pa.field("authors", pa.list_(pa.string())),
+        pa.field("abstract", pa.string()),
+        pa.field("url", URL_TYPE),
+        pa.field("hero_image", URL_TYPE),
+        pa.field("arxiv_url", URL_TYPE),
+        pa.field("github_url", URL_TYPE),
+        pa.field("github_stars", pa.int64()),
+        pa.field("hf_upvotes", pa.int64()),
+        pa.field("collected_at", TIMESTAMP_TYPE),
+    ],
+    metadata={SCHEMA_VERSION_KEY: str(SCHEMA_VERSION).encode()},
+)
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """Parquet writer settings for one write path"""
+
+    name: str
+    compression: str
+    compression_level: Optional[int] = None
+    row_group_size: Optional[int] = None
+    # True for all columns, or a list of column paths to dictionary-encode
+    use_dictionary: Union[bool, tuple] = True
+    column_encoding: Dict[str, str] = dataclass_field(default_factory=dict)
+
+    def write_options(self) -> dict:
+        """Keyword arguments for `pyarrow.parquet.write_table`"""
+        options = self.writer_options()
+        if self.row_group_size is not None:
+            options['row_group_size'] = self.row_group_size
+        return options
+
+    def writer_options(self) -> dict:
+        """Keyword arguments for `pyarrow.parquet.ParquetWriter` (row groups are sized by the caller)"""
+        options = {
+            'compression': self.compression,
+            'use_dictionary': list(self.use_dictionary) if isinstance(self.use_dictionary, tuple) else self.use_dictionary,
+        }
+        if self.compression_level is not None:
+            options['compression_level'] = self.compression_level
+        if self.column_encoding:
+            options['column_encoding'] = dict(self.column_encoding)
+        return options
+
+
+_URL_COLUMNS = ("url", "hero_image", "arxiv_url", "github_url")
+
+STORAGE_PROFILES: Dict[str, StorageProfile] = {
+    # Hourly daily-file rewrite: cheapest codec, default encodings
+    'hot': StorageProfile(name='hot', compression='snappy'),
+    # Monthly archive: written once, read many times
+    'archive': StorageProfile(
+        name='archive',
+        compression='zstd',
+        compression_level=9,
+        row_group_size=128 * 1024,
+        use_dictionary=_URL_COLUMNS + ("authors.list.element",),
+        column_encoding={
+            'github_stars': 'DELTA_BINARY_PACKED',
+            'hf_upvotes': 'DELTA_BINARY_PACKED',
+            'collected_at': 'DELTA_BINARY_PACKED',
+        },
+    ),
+    # Balanced option: zstd at a fast level with default encodings
+    'balanced': StorageProfile(name='balanced', compression='zstd', compression_level=1),
+}
+
+
+def get_profile(profile: Union[str, StorageProfile]) -> StorageProfile:
+    """Resolve a profile name (or pass through a profile instance)"""
+    if isinstance(profile, StorageProfile):
+        return profile
+    try:
+        return STORAGE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown storage profile: {profile} (available: {', '.join(STORAGE_PROFILES)})")
+
+
+def schema_version(schema: pa.Schema) -> int:
+    """Return the layout version recorded in a schema (1 if unversioned)"""
+    metadata = schema.metadata or {}
+    try:
+        return int(metadata.get(SCHEMA_VERSION_KEY, b"1"))
+    except ValueError:
+        return 1
+
+
+def _decode_authors(column: pa.ChunkedArray) -> pa.Array:
+    """Decode version 1 JSON-string authors into list<string>"""
+    decoded = []
+    for value in column.to_pylist():
+        if not value:
+            decoded.append([])
+            continue
+        try:
+            authors = json.loads(value)
+        except (TypeError, ValueError):
+            authors = [value]
+        decoded.append([str(a) for a in authors] if isinstance(authors, list) else [str(authors)])
+    return pa.array(decoded, type=pa.list_(pa.string()))
+
+
+def _parse_timestamps(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Parse version 1 ISO strings (naive, written in container time = UTC) into timestamps"""
+    if pa.types.is_timestamp(column.type):
+        if column.type.tz is None:
+            return pc.assume_timezone(column.cast(pa.timestamp("us")), "UTC")
+        return column.cast(TIMESTAMP_TYPE)
+    naive = pc.cast(column, pa.timestamp("us"))
+    return pc.assume_timezone(naive, "UTC")
+
+
+def normalize_table(table: pa.Table) -> pa.Table:
+    """Bring a paper table of any known layout to the current `PAPER_SCHEMA`
+
+    Missing columns are filled with nulls, unknown columns (e.g. a pandas
+    index) are dropped. Tables already in the current layout pass through
+    without copying.
+    """
+    columns = []
+    for field in PAPER_SCHEMA:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, type=field.type))
+            continue
+
+        column = table.column(field.name)
+        if field.name == "authors" and not pa.types.is_list(column.type):
+            column = _decode_authors(column)
+        elif field.name == "collected_at":
+            column = _parse_timestamps(column)
+        elif field.name in ("github_stars", "hf_upvotes") and pa.types.is_floating(column.type):
+            # pandas stored nullable ints as float64 (NaN for missing)
+            column = pc.cast(column, pa.int64(), safe=False)
+        columns.append(column.cast(field.type) if column.type != field.type else column)
+
+    return pa.Table.from_arrays(columns, schema=PAPER_SCHEMA)
+
+
+def rows_to_table(rows: List[dict]) -> pa.Table:
+    """Build a current-layout table from row dictionaries"""
+    return pa.Table.from_pylist(rows, schema=PAPER_SCHEMA)
+
+
+@dataclass(slots=True)
+class PaperRecord:
+    """Unvalidated paper row with plain-string URLs, field order as in `PAPER_SCHEMA`
+
+    Has the attributes of `hf.Paper` (and `get_paper_id`), so it can be passed
+    wherever papers are only read.
+    """
+
+    paper_id: str
+    title: str
+    authors: List[str]
+    abstract: str
+    url: str
+    hero_image: Optional[str] = None
+    arxiv_url: Optional[str] = None
+    github_url: Optional[str] = None
+    github_stars: Optional[int] = None
+    hf_upvotes: Optional[int] = None
+    collected_at: Optional[datetime] = None
+
+    def get_paper_id(self) -> str:
+        return self.paper_id
+
+    @classmethod
+    def from_paper(cls, paper: "Paper") -> "PaperRecord":
+        return cls(
+            paper.get_paper_id(), paper.title, list(paper.authors), paper.abstract, str(paper.url),
+            _str_or_none(paper.hero_image), _str_or_none(paper.arxiv_url), _str_or_none(paper.github_url),
+            paper.github_stars, paper.hf_upvotes,
+        )
+
+    def to_paper(self) -> "Paper":
+        """Validated pydantic model (e.g. before handing data to external code)"""
+        from hf import Paper
+
+        return Paper(
+            title=self.title, authors=self.authors, abstract=self.abstract, url=self.url,
+            hero_image=self.hero_image, arxiv_url=self.arxiv_url, github_url=self.github_url,
+            github_stars=self.github_stars, hf_upvotes=self.hf_upvotes,
+        )
+
+
+def _str_or_none(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def papers_to_table(papers: List[Union["Paper", PaperRecord]], collected_at: Optional[datetime] = None) -> pa.Table:
+    """Build a current-layout table from papers or records, column by column
+
+    No per-row dictionaries are created; records keep their own collected_at
+    unless `collected_at` is given, papers get `collected_at` (default: now).
+    """
+    count = len(papers)
+    offsets = [0]
+    author_names: List[str] = []
+    for paper in papers:
+        author_names.extend(paper.authors)
+        offsets.append(len(author_names))
+
+    if collected_at is None and all(isinstance(p, PaperRecord) and p.collected_at for p in papers):
+        collected = pa.array([p.collected_at for p in papers], TIMESTAMP_TYPE)
+    else:
+        collected = pa.repeat(pa.scalar(collected_at or datetime.now(timezone.utc), TIMESTAMP_TYPE), count)
+
+    def url_column(attribute: str) -> pa.Array:
+        return pa.array([_str_or_none(getattr(p, attribute)) for p in papers], pa.string()).dictionary_encode()
+
+    columns = [
+        pa.array([p.get_paper_id() for p in papers], pa.string()),
+        pa.array([p.title for p in papers], pa.string()),
+        pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), pa.array(author_names, pa.string())),
+        pa.array([p.abstract for p in papers], pa.string()),
+        url_column('url'),
+        url_column('hero_image'),
+        url_column('arxiv_url'),
+        url_column('github_url'),
+        pa.array([p.github_stars for p in papers], pa.int64()),
+        pa.array([p.hf_upvotes for p in papers], pa.int64()),
+        collected,
+    ]
+    return pa.Table.from_arrays(columns, schema=PAPER_SCHEMA)
+
+
+def _column_values(column: pa.ChunkedArray) -> list:
+    """Python values of a column; repetitive columns are decoded once per distinct value"""
+    if pa.types.is_timestamp(column.type):
+        # Few distinct timestamps per file (one per save); converting each row is slow
+        column = pc.dictionary_encode(column)
+    if not pa.types.is_dictionary(column.type):
+        return column.to_pylist()
+    values = []
+    for chunk in column.chunks:
+        dictionary = chunk.dictionary.to_pylist()
+        values.extend(None if index is None else dictionary[index] for index in chunk.indices.to_pylist())
+    return values
+
+
+def table_to_records(table: pa.Table) -> List[PaperRecord]:
+    """Convert a paper table (any known layout) to records, column by column"""
+    table = normalize_table(table)
+    columns = [_column_values(table.column(field.name)) for field in PAPER_SCHEMA]
+    return [PaperRecord(*values) for values in zip(*columns)]
+
+
+def read_paper_table(source, columns: Optional[List[str]] = None) -> pa.Table:
+    """Read a paper Parquet file and return it in the current layout
+
+    Args:
+    source: File path or file-like object
+    columns: Optional subset of columns to return
+
+    Returns:
+    pa.Table conforming to `PAPER_SCHEMA` (or its selected columns)
+    """
+    table = normalize_table(pq.read_table(source, columns=columns))
+    if columns is not None:
+        table = table.select(columns)
+    return table
+
+
+def iter_paper_batches(source, batch_size: int = 8192) -> Iterator[pa.Table]:
+    """Stream a paper Parquet file as current-layout tables of at most `batch_size` rows
+
+    Only one batch is decoded at a time, so memory stays bounded by the batch
+    size rather than the file size.
+    """
+    parquet_file = pq.ParquetFile(source)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield normalize_table(pa.Table.from_batches([batch]))
+
+
+def drop_duplicate_ids(table: pa.Table, seen: Optional[Set[str]] = None) -> pa.Table:
+    """Keep the first row for every paper_id
+
+    Args:
+    table: Paper table
+    seen: IDs already emitted by earlier tables; updated in place so the same
+        set can deduplicate a stream of batches
+    """
+    if seen is None:
+        seen = set()
+    mask = []
+    for paper_id in table.column("paper_id").to_pylist():
+        mask.append(paper_id not in seen)
+        seen.add(paper_id)
+    if all(mask):
+        return table
+    return table.filter(pa.array(mask, type=pa.bool_()))
+
+
+# A stored paper file: operator of its root and key relative to it
+PaperFile = Tuple["opendal.Operator", str]
+
+
+def write_paper_table(
+    table: pa.Table, operator: "opendal.Operator", key: str, profile: Union[str, StorageProfile] = "hot"
+) -> None:
+    """Write a paper table as one object using a storage profile (fs operators write atomically)"""
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, **get_profile(profile).write_options())
+    operator.write(key, sink.getvalue().to_pybytes())
+
+
+def is_archive_file(key: str) -> bool:
+    """Archive files are named YYYYMM, daily files YYYYMMDD"""
+    return len(Path(key).stem) == 6
+
+
+def migrate_file(
+    operator: "opendal.Operator", key: str, dry_run: bool = False, profile: Union[str, StorageProfile] = "hot"
+) -> bool:
+    """Rewrite one Parquet object in the current layout (only the footer is read if it is current)
+
+    Returns:
+    bool: Whether the file needed migration
+    """
+    with operator.open(key, "rb") as source:
+        version = schema_version(pq.read_schema(source))
+    if version >= SCHEMA_VERSION:
+        return False
+    if not dry_run:
+        write_paper_table(read_paper_table(pa.BufferReader(operator.read(key))), operator, key, profile=profile)
+    return True
+
+
+def find_paper_files(storage: "PaperStorage") -> List[PaperFile]:
+    """Daily (YYYY/MM/YYYYMMDD) and archive (YYYY/YYYYMM) files of a storage, on any backend"""
+    files = [(storage.data_operator, key) for key in storage.list_daily_files()]
+    files.extend((storage.operator, key) for key in storage.list_archive_files())
+    return files
+
+
+def migrate_files(
+    files: Iterable[PaperFile],
+    workers: int = 4,
+    dry_run: bool = False,
+    daily_profile: Union[str, StorageProfile] = "hot",
+    archive_profile: Union[str, StorageProfile] = "archive",
+) -> dict:
+    """Migrate files in parallel (Parquet I/O and decoding release the GIL)
+
+    Returns:
+    dict with 'migrated', 'current' and 'failed' key lists
+    """
+    result = {'migrated': [], 'current': [], 'failed': []}
+
+    def _migrate(file: PaperFile):
+        operator, key = file
+        profile = archive_profile if is_archive_file(key) else daily_profile
+        try:
+            return key, migrate_file(operator, key, dry_run=dry_run, profile=profile), None
+        except Exception as e:
+            return key, False, e
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for key, migrated, error in executor.map(_migrate, files):
+            if error is not None:
+                logger.error("Migration failed", extra={'key': key, 'error': str(error)})
+                result['failed'].append(key)
+            elif migrated:
+                logger.info("Would migrate" if dry_run else "Migrated", extra={'key': key})
+                result['migrated'].append(key)
+            else:
+                result['current'].append(key)
+
+    return result
+
+
+def profile_report(table: pa.Table, profiles: Optional[Iterable[str]] = None, repeats: int = 3) -> List[dict]:
+    """Compare storage profiles on a table: write time, read time and bytes
+
+    Files are written to memory so the numbers reflect codec and encoding cost
+    rather than disk speed. Times are the best of `repeats` runs.
+    """
+    results = []
+    for name in profiles or STORAGE_PROFILES:
+        options = get_profile(name).write_options()
+        write_times, read_times, id_read_times = [], [], []
+        size = 0
+        for _ in range(max(1, repeats)):
+            sink = pa.BufferOutputStream()
+            start = time.perf_counter()
+            pq.write_table(table, sink, **options)
+            write_times.append(time.perf_counter() - start)
+            buffer = sink.getvalue()
+            size = buffer.size
+
+            start = time.perf_counter()
+            pq.read_table(pa.BufferReader(buffer))
+            read_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            pq.read_table(pa.BufferReader(buffer), columns=['paper_id'])
+            id_read_times.append(time.perf_counter() - start)
+
+        results.append({
+            'profile': name,
+            'rows': table.num_rows,
+            'bytes': size,
+            'write_ms': round(min(write_times) * 1000, 2),
+            'read_ms': round(min(read_times) * 1000, 2),
+            'read_ids_ms': round(min(id_read_times) * 1000, 2),
+        })
+    return results
+
+
+def _print_report(results: List[dict]) -> None:
+    """Print a profile report as a table"""
+    baseline = next((r['bytes'] for r in results if r['profile'] == 'hot'), None) or results[0]['bytes']
+    print(f"{'profile':<10} {'rows':>8} {'bytes':>12} {'ratio':>7} {'write ms':>10} {'read ms':>9} {'ids ms':>8}")
+    for r in results:
+        ratio = r['bytes'] / baseline if baseline else 0
+        print(
+            f"{r['profile']:<10} {r['rows']:>8} {r['bytes']:>12} {ratio:>7.2f} "
+            f"{r['write_ms']:>10} {r['read_ms']:>9} {r['read_ids_ms']:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Schema migration and storage profile report commands"""
+    from config import Config
+    from log import setup_logging
+    from storage import PaperStorage
+
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Stored paper schema tools")
+    parser.add_argument("--data-dir", default=Config.DATA_DIR, help="Daily data directory (key prefix on object stores)")
+    parser.add_argument("--archive-dir", default=Config.ARCHIVE_DIR, help="Archive directory (key prefix on object stores)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Rewrite stored files in the current schema")
+    migrate_parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Parallel workers")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Only report files that need migration")
+
+    report_parser = subparsers.add_parser("report", help="Compare storage profiles on stored data")
+    report_parser.add_argument("--repeats", type=int, default=3, help="Runs per profile (best is reported)")
+    report_parser.add_argument("--profiles", nargs="+", choices=list(STORAGE_PROFILES), help="Profiles to compare")
+
+    args = parser.parse_args(argv)
+    # Backend (STORAGE_SCHEME and its options) as configured for the bot
+    storage = PaperStorage(local_data_dir=args.data_dir, archive_dir=args.archive_dir)
+    files = find_paper_files(storage)
+
+    if args.command == "report":
+        if not files:
+            print("No paper files found")
+            return 1
+        # Daily files only: archive files contain the same papers again
+        daily_files = [f for f in files if not is_archive_file(f[1])] or files
+        table = drop_duplicate_ids(pa.concat_tables([
+            read_paper_table(pa.BufferReader(operator.read(key))) for operator, key in daily_files
+        ]))
+        print(f"Profile report over {len(daily_files)} files, {table.num_rows} papers")
+        _print_report(profile_report(table, args.profiles, repeats=args.repeats))
+        return 0
+
+    print(f"Found {len(files)} paper files (schema version {SCHEMA_VERSION})")
+    result = migrate_files(
+        files,
+        workers=args.workers,
+        dry_run=args.dry_run,
+        daily_profile=Config.DAILY_STORAGE_PROFILE,
+        archive_profile=Config.ARCHIVE_STORAGE_PROFILE,
+    )
+    print(
+        f"Migration finished: {len(result['migrated'])} migrated, "
+        f"{len(result['current'])} already current, {len(result['failed'])} failed"
+    )
+    return 1 if result['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
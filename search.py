@@ -0,0 +1,336 @@
+"""Search module - SQLite FTS5 full-text index over stored papers
+
+The index is a single SQLite file (SEARCH_INDEX_PATH) with a `papers` table
+and an external-content FTS5 table over title, authors and abstract. It is
+updated whenever daily papers are saved and can be rebuilt from the daily
+and archive tiers; queries never touch Parquet.
+
+Command line:
+    python search.py query "diffusion transformer" [--limit N]
+    python search.py rebuild [--workers N] [--full]
+"""
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
+
+import pyarrow as pa
+
+from hf import Paper
+from schema import read_paper_table
+
+if TYPE_CHECKING:
+    from storage import PaperStorage
+
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    paper_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    authors TEXT,
+    abstract TEXT,
+    url TEXT,
+    arxiv_url TEXT,
+    github_url TEXT,
+    hf_upvotes INTEGER,
+    day TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, authors, abstract,
+    content='papers', content_rowid='id',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, authors, abstract)
+    VALUES (new.id, new.title, new.authors, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, authors, abstract)
+    VALUES ('delete', old.id, old.title, old.authors, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, authors, abstract)
+    VALUES ('delete', old.id, old.title, old.authors, old.abstract);
+    INSERT INTO papers_fts(rowid, title, authors, abstract)
+    VALUES (new.id, new.title, new.authors, new.abstract);
+END;
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO papers (paper_id, title, authors, abstract, url, arxiv_url, github_url, hf_upvotes, day)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(paper_id) DO UPDATE SET
+    title = excluded.title,
+    authors = excluded.authors,
+    abstract = excluded.abstract,
+    url = excluded.url,
+    arxiv_url = excluded.arxiv_url,
+    github_url = excluded.github_url,
+    hf_upvotes = COALESCE(excluded.hf_upvotes, papers.hf_upvotes),
+    day = COALESCE(MIN(papers.day, excluded.day), papers.day, excluded.day)
+"""
+
+# Columns read from Parquet when (re)building the index
+INDEX_COLUMNS = ['paper_id', 'title', 'authors', 'abstract', 'url', 'arxiv_url', 'github_url', 'hf_upvotes', 'collected_at']
+
+Row = Tuple[str, str, str, str, Optional[str], Optional[str], Optional[str], Optional[int], Optional[str]]
+
+_TOKEN_RE = re.compile(r"[\w]+\*?", re.UNICODE)
+
+
+def build_match_query(text: str) -> str:
+    """Turn free text into a safe FTS5 MATCH expression
+
+    Every word becomes a quoted term (all terms must match); a trailing `*`
+    keeps prefix search, e.g. `diffus*`.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text):
+        prefix = token.endswith('*')
+        word = token.rstrip('*')
+        if word:
+            terms.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    """Full-text index of stored papers"""
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        """Initialize search index
+
+        Args:
+        path: SQLite database file (":memory:" for a throwaway index)
+        """
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by the event loop and worker threads, guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = self._connect(self.path)
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA_SQL)
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- Indexing ----------------------------------------------------------
+
+    @staticmethod
+    def _paper_row(paper: Paper, day: date) -> Row:
+        return (
+            paper.get_paper_id(),
+            paper.title,
+            ", ".join(paper.authors),
+            paper.abstract,
+            str(paper.url),
+            str(paper.arxiv_url) if paper.arxiv_url else None,
+            str(paper.github_url) if paper.github_url else None,
+            paper.hf_upvotes,
+            day.isoformat(),
+        )
+
+    @staticmethod
+    def table_rows(table: pa.Table, day: Optional[date] = None) -> List[Row]:
+        """Index rows from a paper table (day defaults to each row's collection date)"""
+        rows = []
+        for record in table.select([c for c in INDEX_COLUMNS if c in table.column_names]).to_pylist():
+            if day is not None:
+                row_day = day.isoformat()
+            elif isinstance(record.get('collected_at'), datetime):
+                row_day = record['collected_at'].date().isoformat()
+            else:
+                row_day = None
+            rows.append((
+                record['paper_id'],
+                record.get('title') or '',
+                ", ".join(record.get('authors') or []),
+                record.get('abstract') or '',
+                record.get('url'),
+                record.get('arxiv_url'),
+                record.get('github_url'),
+                record.get('hf_upvotes'),
+                row_day,
+            ))
+        return rows
+
+    def add_rows(self, rows: Iterable[Row], source: Optional[str] = None, signature: Optional[str] = None) -> int:
+        """Insert or update index rows in one transaction
+
+        Args:
+        rows: Rows as produced by `table_rows`
+        source / signature: Record the source file as indexed (used by incremental rebuilds)
+        """
+        rows = list(rows)
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT_SQL, rows)
+            if source is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (source, signature) VALUES (?, ?)", (source, signature or "")
+                )
+        return len(rows)
+
+    def add_papers(self, papers: Iterable[Paper], day: date) -> int:
+        """Index papers saved for a day
+
+        Returns:
+        int: Number of papers indexed
+        """
+        return self.add_rows(self._paper_row(paper, day) for paper in papers)
+
+    def source_signatures(self) -> dict:
+        with self._lock:
+            return {row['source']: row['signature'] for row in self._conn.execute("SELECT source, signature FROM sources")}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    # ---- Queries -----------------------------------------------------------
+
+    def paper_day(self, paper_id: str) -> Optional[date]:
+        """Day whose daily file holds the paper, None if the paper is not indexed"""
+        with self._lock:
+            row = self._conn.execute("SELECT day FROM papers WHERE paper_id = ?", (paper_id,)).fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def search(self, query: str, limit: int = 10, raw: bool = False) -> List[dict]:
+        """Search titles, authors and abstracts
+
+        Args:
+        query: Free text (every word must match; `word*` for prefixes)
+        limit: Maximum number of results
+        raw: Pass `query` to FTS5 unchanged (allows OR/NEAR/column filters)
+
+        Returns:
+        List[dict]: Matching papers ranked by BM25 (title weighted highest),
+        with a highlighted `snippet` of the abstract
+        """
+        match = query if raw else build_match_query(query)
+        if not match:
+            return []
+        sql = """
+            SELECT p.paper_id, p.title, p.authors, p.url, p.arxiv_url, p.github_url, p.hf_upvotes, p.day,
+                   snippet(papers_fts, 2, '[', ']', '…', 16) AS snippet,
+                   bm25(papers_fts, 10.0, 3.0, 1.0) AS score
+            FROM papers_fts JOIN papers p ON p.id = papers_fts.rowid
+            WHERE papers_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+        """
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, (match, limit))]
+
+    # ---- Rebuild -----------------------------------------------------------
+
+    def rebuild(self, storage: "PaperStorage", workers: Optional[int] = None, full: bool = False) -> dict:
+        """Index every daily and archive file
+
+        Files are read and converted in parallel; rows are written by a single
+        writer. Without `full`, files whose size/modification signature is
+        unchanged since the last rebuild are skipped.
+
+        Returns:
+        dict with files, skipped, rows and seconds
+        """
+        started = time.perf_counter()
+        sources = [('daily', key) for key in storage.list_daily_files()]
+        sources += [('archive', key) for key in storage.list_archive_files()]
+
+        if full:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM papers")
+                self._conn.execute("DELETE FROM sources")
+                self._conn.execute("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')")
+        known = self.source_signatures()
+
+        def _operator(tier: str):
+            return storage.data_operator if tier == 'daily' else storage.operator
+
+        def _signature(source) -> str:
+            metadata = _operator(source[0]).stat(source[1])
+            return f"{metadata.content_length}:{metadata.etag or metadata.last_modified}"
+
+        def _load(source) -> List[Row]:
+            tier, key = source
+            table = read_paper_table(pa.BufferReader(_operator(tier).read(key)), columns=INDEX_COLUMNS)
+            day = None
+            if tier == 'daily':
+                day = datetime.strptime(key.rsplit('/', 1)[-1][:8], "%Y%m%d").date()
+            return self.table_rows(table, day)
+
+        workers = workers or storage.prefetch_concurrency
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            signatures = dict(zip(sources, executor.map(_signature, sources)))
+            pending = [s for s in sources if known.get(f"{s[0]}:{s[1]}") != signatures[s]]
+            rows = 0
+            for source, source_rows in zip(pending, executor.map(_load, pending)):
+                rows += self.add_rows(source_rows, source=f"{source[0]}:{source[1]}", signature=signatures[source])
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO papers_fts(papers_fts) VALUES ('optimize')")
+        return {
+            'files': len(pending),
+            'skipped': len(sources) - len(pending),
+            'rows': rows,
+            'seconds': round(time.perf_counter() - started, 2),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Search index command"""
+    from log import setup_logging
+    from storage import PaperStorage
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Full-text search over stored papers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    query_parser = subparsers.add_parser("query", help="Search the index")
+    query_parser.add_argument("text")
+    query_parser.add_argument("--limit", type=int, default=10)
+    query_parser.add_argument("--raw", action="store_true", help="Use FTS5 query syntax")
+    rebuild_parser = subparsers.add_parser("rebuild", help="Index all daily and archive files")
+    rebuild_parser.add_argument("--workers", type=int, default=None)
+    rebuild_parser.add_argument("--full", action="store_true", help="Drop the index and re-read every file")
+    args = parser.parse_args(argv)
+
+    storage = PaperStorage.from_env()
+
+    if args.command == "rebuild":
+        result = storage.search_index.rebuild(storage, workers=args.workers, full=args.full)
+        print(f"Indexed {result['rows']} papers from {result['files']} files "
+              f"({result['skipped']} unchanged) in {result['seconds']}s; index size: {storage.search_index.count()}")
+        return 0
+
+    started = time.perf_counter()
+    results = storage.search_index.search(args.text, limit=args.limit, raw=args.raw)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for i, result in enumerate(results, 1):
+        print(f"{i:>2}. {result['title']}  ({result['day']}, 👍 {result['hf_upvotes']})")
+        print(f"    {result['url']}")
+        print(f"    {result['snippet']}")
+    print(f"{len(results)} results in {elapsed_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
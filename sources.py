@@ -0,0 +1,289 @@
+"""Sources module - Pluggable paper sources merged into one check cycle
+
+A source turns a day into a stream of `hf.Paper`s. Sources are registered by
+name and enabled with PAPER_SOURCES (comma-separated, in priority order):
+
+    huggingface     HF daily papers list (hf.aiter_huggingface_papers)
+    arxiv           newest submissions in ARXIV_LISTING_CATEGORIES (arXiv export API)
+
+`SourceSet` runs all enabled sources concurrently, so a slow or additional
+source does not delay the others, and yields their papers as they arrive.
+Papers are deduplicated by normalized arXiv ID (version, "arXiv:" prefix and
+abs/pdf/HF URLs all map to the same ID) before the caller checks its cache;
+the first source to deliver a paper wins.
+
+Each source has its own concurrency (requests in flight) and rate limit
+(requests per second). A failing source is logged and skipped; the cycle
+fails only when every source failed.
+
+A new source subclasses `PaperSource`, sets `name`, implements `papers()` and
+`from_config()`, and is decorated with `@register_source`.
+"""
+import asyncio
+import logging
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Type, TypeVar
+from urllib.parse import urlencode
+
+from arxiv_api import normalize_arxiv_id, parse_feed
+from config import Config
+from hf import FetchInterrupted, Paper, PaperDetails, aiter_huggingface_papers, fetch_url
+from metrics import SOURCE_PAPERS, SOURCE_RUNS
+from resilience import RateLimiter, Upstream
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class SourceContext:
+    """Per-cycle state handed to every source"""
+
+    # Detail pages already scraped, by paper URL (from the cycle checkpoint)
+    known_details: Dict[str, PaperDetails] = field(default_factory=dict)
+    on_details: Optional[Callable[[str, PaperDetails], None]] = None
+    should_stop: Optional[Callable[[], bool]] = None
+
+
+class PaperSource:
+    """A stream of papers for a day; subclasses implement `papers` and `from_config`"""
+
+    name: str = ""
+
+    def __init__(self, concurrency: int = 1, rate_limit: float = 0.0):
+        """Initialize source
+
+        Args:
+        concurrency: Requests in flight
+        rate_limit: Requests per second (0 = unlimited)
+        """
+        self.concurrency = max(concurrency, 1)
+        self.limiter = RateLimiter(rate_limit) if rate_limit > 0 else None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_config(cls) -> "PaperSource":
+        return cls()
+
+    def papers(self, target_date: date, context: SourceContext) -> AsyncIterator[Paper]:
+        """Papers of the day, each yielded as soon as it is complete"""
+        raise NotImplementedError
+
+    async def fetch(self, fn: Callable[..., T], *args) -> T:
+        """Run a blocking request in a worker thread within the source's limits"""
+        if self._semaphore is None:
+            # Created on first use, on the cycle's event loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+            return await asyncio.to_thread(fn, *args)
+
+
+SOURCES: Dict[str, Type[PaperSource]] = {}
+
+
+def register_source(cls: Type[PaperSource]) -> Type[PaperSource]:
+    """Class decorator: make a source available to PAPER_SOURCES under `cls.name`"""
+    SOURCES[cls.name] = cls
+    return cls
+
+
+def create_source(name: str) -> PaperSource:
+    if name not in SOURCES:
+        raise ValueError(f"Unknown paper source {name!r} (available: {', '.join(SOURCES)})")
+    return SOURCES[name].from_config()
+
+
+@register_source
+class HuggingFaceSource(PaperSource):
+    """HuggingFace daily papers, detail pages fetched `concurrency` at a time"""
+
+    name = "huggingface"
+
+    @classmethod
+    def from_config(cls) -> "HuggingFaceSource":
+        return cls(concurrency=Config.HF_FETCH_CONCURRENCY, rate_limit=Config.HF_RATE_LIMIT)
+
+    def papers(self, target_date: date, context: SourceContext) -> AsyncIterator[Paper]:
+        return aiter_huggingface_papers(
+            target_date,
+            known_details=context.known_details,
+            on_details=context.on_details,
+            should_stop=context.should_stop,
+            concurrency=self.concurrency,
+            limiter=self.limiter,
+        )
+
+
+@register_source
+class ArxivListingSource(PaperSource):
+    """Newest arXiv submissions in a set of categories, from one export API query"""
+
+    name = "arxiv"
+
+    def __init__(
+        self,
+        categories: List[str],
+        max_results: int = 50,
+        api_url: str = "https://export.arxiv.org/api/query",
+        upstream: Optional[Upstream] = None,
+        concurrency: int = 1,
+        rate_limit: float = 1 / 3,
+    ):
+        """Initialize source
+
+        Args:
+        categories: arXiv categories, e.g. ["cs.CL", "cs.LG"]
+        max_results: Newest submissions requested
+        api_url: Export API query endpoint
+        upstream: Retry/circuit-breaker policy (default: ARXIV_TIMEOUT and RETRY_* settings)
+        concurrency / rate_limit: As for PaperSource (arXiv asks for one request per 3 seconds)
+        """
+        super().__init__(concurrency, rate_limit)
+        self.categories = categories
+        self.max_results = max_results
+        self.api_url = api_url
+        self.upstream = upstream or Upstream.from_config("arxiv-listing", Config.ARXIV_TIMEOUT)
+
+    @classmethod
+    def from_config(cls) -> "ArxivListingSource":
+        return cls(
+            [c.strip() for c in Config.ARXIV_LISTING_CATEGORIES.split(",") if c.strip()],
+            max_results=Config.ARXIV_LISTING_SIZE,
+            api_url=Config.ARXIV_API_URL,
+        )
+
+    def _query_url(self) -> str:
+        query = " OR ".join(f"cat:{category}" for category in self.categories)
+        return f"{self.api_url}?{urlencode({'search_query': query, 'sortBy': 'submittedDate', 'sortOrder': 'descending', 'max_results': self.max_results})}"
+
+    async def papers(self, target_date: date, context: SourceContext) -> AsyncIterator[Paper]:
+        if not self.categories:
+            return
+        response = await self.fetch(fetch_url, self.upstream, self._query_url())
+        # Submissions of the day and the day before (listings lag submissions by a day)
+        earliest = (target_date - timedelta(days=1)).isoformat()
+        for arxiv_id, metadata in parse_feed(response.content).items():
+            if metadata.get('published') and metadata['published'] < earliest:
+                continue
+            if not metadata['abstract']:
+                continue
+            yield Paper(
+                title=metadata['title'],
+                authors=metadata['authors'],
+                abstract=metadata['abstract'],
+                url=metadata['arxiv_url'],
+                arxiv_url=metadata['arxiv_url'],
+                arxiv_categories=metadata['categories'],
+                arxiv_version=metadata['version'],
+            )
+
+
+def paper_key(paper: Paper) -> str:
+    """Deduplication key: normalized arXiv ID, otherwise the paper URL"""
+    for value in (str(paper.arxiv_url) if paper.arxiv_url else None, str(paper.url)):
+        arxiv_id = normalize_arxiv_id(value)
+        if arxiv_id:
+            return arxiv_id
+    return str(paper.url)
+
+
+_DONE = object()
+
+
+class SourceSet:
+    """Runs several sources concurrently and merges their papers"""
+
+    def __init__(self, sources: List[PaperSource], queue_size: int = 16):
+        """Initialize source set
+
+        Args:
+        sources: Sources in priority order
+        queue_size: Papers buffered ahead of the consumer (bounds how far sources run ahead)
+        """
+        self.sources = sources
+        self.queue_size = queue_size
+        # Names of the sources that failed during the last `papers` run
+        self.failed: List[str] = []
+
+    @classmethod
+    def from_config(cls) -> "SourceSet":
+        return cls([create_source(name) for name in Config.get_paper_sources()])
+
+    async def _pump(self, source: PaperSource, target_date: date, context: SourceContext, queue: asyncio.Queue) -> None:
+        """Feed one source's papers into the queue, then its outcome (None or the error)"""
+        outcome: Optional[BaseException] = None
+        try:
+            async with aclosing(source.papers(target_date, context)) as stream:
+                async for paper in stream:
+                    await queue.put((source, paper))
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            outcome = e
+        await queue.put((source, _DONE if outcome is None else outcome))
+
+    async def papers(self, target_date: date, context: Optional[SourceContext] = None) -> AsyncIterator[Paper]:
+        """Papers of all sources, deduplicated by arXiv ID, in arrival order
+
+        Raises:
+        FetchInterrupted: once all sources stopped, if any was stopped by `should_stop`
+        Exception: the first source's error, if every source failed
+        """
+        context = context or SourceContext()
+        self.failed = []
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        tasks = [asyncio.create_task(self._pump(source, target_date, context, queue)) for source in self.sources]
+        seen = set()
+        errors: List[BaseException] = []
+        interrupted: Optional[FetchInterrupted] = None
+        running = len(tasks)
+        try:
+            while running:
+                source, item = await queue.get()
+                if item is _DONE or isinstance(item, BaseException):
+                    running -= 1
+                    if isinstance(item, FetchInterrupted):
+                        interrupted = item
+                        SOURCE_RUNS.inc(source=source.name, status="interrupted")
+                    elif isinstance(item, BaseException):
+                        errors.append(item)
+                        self.failed.append(source.name)
+                        SOURCE_RUNS.inc(source=source.name, status="failed")
+                        logger.warning("Paper source failed", extra={'source': source.name, 'error': str(item)})
+                    else:
+                        SOURCE_RUNS.inc(source=source.name, status="ok")
+                    continue
+
+                key = paper_key(item)
+                if key in seen:
+                    SOURCE_PAPERS.inc(source=source.name, outcome="duplicate")
+                    continue
+                seen.add(key)
+                SOURCE_PAPERS.inc(source=source.name, outcome="new")
+                yield item
+        finally:
+            # Consumer stopped early: stop the sources and let their workers finish
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if interrupted is not None:
+            raise interrupted
+        if errors and len(errors) == len(self.sources):
+            raise errors[0]
+
+
+async def fetch_papers_async(target_date: date, sources: Optional[SourceSet] = None) -> List[Paper]:
+    """All merged papers of the day as a list"""
+    sources = sources or SourceSet.from_config()
+    return [paper async for paper in sources.papers(target_date)]
+
+
+def fetch_papers(target_date: date, sources: Optional[SourceSet] = None) -> List[Paper]:
+    """Blocking variant of `fetch_papers_async` (runs its own event loop)"""
+    return asyncio.run(fetch_papers_async(target_date, sources))
@@ -1,55 +1,158 @@
 """Data persistence module - Store paper data in Parquet format"""
+import asyncio
+import itertools
+import logging
 import os
-import pandas as pd
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from datetime import datetime, date
-from typing import List, Optional
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
 import opendal
-import json
 
+from config import Config
+from coordination import Coordination, create_coordination
 from hf import Paper
+from history import MetricsHistory
+from metrics import record_parquet_io
+from search import SearchIndex
+from schema import (
+    PAPER_SCHEMA,
+    PaperRecord,
+    StorageProfile,
+    drop_duplicate_ids,
+    get_profile,
+    iter_paper_batches,
+    papers_to_table,
+    read_paper_table,
+    table_to_records,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class PaperStorage:
     """Paper data storage manager
 
-    Uses OpenDAL filesystem for data storage, making it easy to extend to cloud storage later.
-    Current version only supports local filesystem.
+    All reads and writes go through OpenDAL operators, one rooted at the data
+    directory and one at the archive directory. The backend is selected by
+    scheme: `fs` (default, local filesystem), `memory` (tests) or an object
+    store such as `s3`. Async methods use the AsyncOperator on the caller's
+    event loop and prefetch several files concurrently.
     """
     
     def __init__(
         self,
         local_data_dir: Optional[str] = None,
         archive_dir: Optional[str] = None,
+        history_dir: Optional[str] = None,
+        daily_profile: Optional[str] = None,
+        archive_profile: Optional[str] = None,
+        scheme: Optional[str] = None,
+        storage_options: Optional[Dict[str, str]] = None,
+        search_index_path: Optional[str] = None,
+        coordination: Optional[Coordination] = None,
     ):
         """Initialize storage manager
 
         Args:
-        local_data_dir: Local data directory (default read from DATA_DIR env var, otherwise "data")
-        archive_dir: Archive directory (default read from ARCHIVE_DIR env var, otherwise "data/archive")
+        local_data_dir: Data directory, or key prefix for object stores (default read from DATA_DIR env var, otherwise "data")
+        archive_dir: Archive directory, or key prefix for object stores (default read from ARCHIVE_DIR env var, otherwise "data/archive")
+        history_dir: Upvote/star history directory (default Config.HISTORY_DIR, otherwise "<data dir>/history")
+        daily_profile: Parquet profile for daily files (default Config.DAILY_STORAGE_PROFILE)
+        archive_profile: Parquet profile for monthly archives (default Config.ARCHIVE_STORAGE_PROFILE)
+        scheme: OpenDAL scheme (default Config.STORAGE_SCHEME)
+        storage_options: OpenDAL backend options (default from Config.get_storage_options)
+        search_index_path: Local SQLite full-text index (default Config.SEARCH_INDEX_PATH, otherwise
+            "<data dir>/search.sqlite" for fs, in-memory for memory, "<DATA_DIR>/search.sqlite" for object stores)
+        coordination: Locks and leases (default from Config.COORDINATION_BACKEND / Config.COORDINATION_DIR,
+            the same shared local directory for every scheme)
         """
         # Get directories from environment variables or parameters
         if local_data_dir is None:
             local_data_dir = os.getenv("DATA_DIR", "data")
         if archive_dir is None:
             archive_dir = os.getenv("ARCHIVE_DIR", "data/archive")
+        if history_dir is None:
+            history_dir = Config.HISTORY_DIR or f"{local_data_dir}/history"
 
-        self.local_data_dir = Path(local_data_dir)
-        self.local_data_dir.mkdir(parents=True, exist_ok=True)
+        # Resolve storage profiles early so a typo fails at startup
+        self.daily_profile = get_profile(daily_profile or Config.DAILY_STORAGE_PROFILE)
+        self.archive_profile = get_profile(archive_profile or Config.ARCHIVE_STORAGE_PROFILE)
+
+        self.scheme = scheme or Config.STORAGE_SCHEME
+        if storage_options is None:
+            storage_options = Config.get_storage_options(self.scheme)
+        self.prefetch_concurrency = Config.STORAGE_PREFETCH_CONCURRENCY
 
         # Archive directory configuration (always independent of data directory)
+        self.local_data_dir = Path(local_data_dir)
         self.archive_dir = Path(archive_dir)
-        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.history_dir = Path(history_dir)
+
+        self.storage_options = storage_options
+        self.data_operator = self.create_operator(self.local_data_dir)
+        self.operator = self.create_operator(self.archive_dir)
+
+        # Upvote/star snapshots, recorded on every daily save
+        self.history = MetricsHistory(self.create_operator(self.history_dir))
+
+        # Full-text index, updated on every daily save. SQLite needs a local file,
+        # so object-store backends keep the index in the local DATA_DIR
+        if search_index_path is None:
+            search_index_path = Config.SEARCH_INDEX_PATH
+        if not search_index_path:
+            if self.scheme == "fs":
+                search_index_path = str(self.local_data_dir / "search.sqlite")
+            elif self.scheme == "memory":
+                search_index_path = ":memory:"
+            else:
+                search_index_path = str(Path(Config.DATA_DIR) / "search.sqlite")
+        self.search_index = SearchIndex(search_index_path)
+
+        # Daily files are read, merged and rewritten; replicas and backfill runs
+        # serialize that per day so no one's rows are lost. The lock directory is
+        # local for every scheme, so it comes from Config rather than the data root
+        if coordination is None:
+            coordination = create_coordination(Config.COORDINATION_BACKEND, Config.COORDINATION_DIR)
+        self.coordination = coordination
+
+        # Called with (day, paper IDs) after every daily save, e.g. to drop cached replies
+        self._save_listeners: List[Callable[[date, List[str]], None]] = []
+
+        # AsyncOperators need a running event loop; created on first async use
+        self._async_data_operator: Optional[opendal.AsyncOperator] = None
+        self._async_archive_operator: Optional[opendal.AsyncOperator] = None
+
+        logger.info(
+            "Storage initialized",
+            extra={'backend': self.scheme, 'data_dir': str(self.local_data_dir), 'archive_dir': str(self.archive_dir)},
+        )
 
-        # Initialize OpenDAL filesystem Operator
-        try:
-            self.operator = opendal.Operator("fs", root=str(self.archive_dir))
-            print(f"Data directory: {self.local_data_dir}")
-            print(f"Archive directory: {self.archive_dir}")
-        except Exception as e:
-            print(f"Warning: OpenDAL initialization failed: {e}")
-            print("   Will use standard file operations")
-            self.operator = None
+    def create_operator(self, root: Path) -> opendal.Operator:
+        """Create an OpenDAL operator on this storage's backend, rooted at `root`"""
+        options = dict(self.storage_options)
+        if self.scheme == "fs":
+            root = root.resolve()
+            root.mkdir(parents=True, exist_ok=True)
+            # Write to a temp dir first and rename, so readers never see torn files
+            options.setdefault("atomic_write_dir", str(root / ".opendal-tmp"))
+        return opendal.Operator(self.scheme, root=str(root), **options)
+
+    @property
+    def async_data_operator(self) -> opendal.AsyncOperator:
+        """AsyncOperator for the data root (must be used from a running event loop)"""
+        if self._async_data_operator is None:
+            self._async_data_operator = self.data_operator.to_async_operator()
+        return self._async_data_operator
+
+    @property
+    def async_archive_operator(self) -> opendal.AsyncOperator:
+        """AsyncOperator for the archive root (must be used from a running event loop)"""
+        if self._async_archive_operator is None:
+            self._async_archive_operator = self.operator.to_async_operator()
+        return self._async_archive_operator
     
     @classmethod
     def from_env(cls) -> "PaperStorage":
@@ -58,108 +161,305 @@ class PaperStorage:
         Environment variables:
         DATA_DIR: Data directory path (default: data)
         ARCHIVE_DIR: Archive directory path (optional)
+        HISTORY_DIR: Upvote/star history directory path (optional)
+        SEARCH_INDEX_PATH: Full-text index file (optional)
+        COORDINATION_BACKEND / COORDINATION_DIR: Lock backend and directory for daily-file writes (optional)
+        DAILY_STORAGE_PROFILE / ARCHIVE_STORAGE_PROFILE: Parquet storage profiles (optional)
+        STORAGE_SCHEME: OpenDAL scheme (optional, default: fs)
         """
         return cls(
             local_data_dir=os.getenv("DATA_DIR"),
-            archive_dir=os.getenv("ARCHIVE_DIR")
+            archive_dir=os.getenv("ARCHIVE_DIR"),
         )
-    
-    def _paper_to_dict(self, paper: Paper) -> dict:
-        """Convert Paper object to dictionary"""
-        return {
-            'paper_id': paper.get_paper_id(),
-            'title': paper.title,
-            'authors': json.dumps(paper.authors, ensure_ascii=False),  # Convert to JSON string
-            'abstract': paper.abstract,
-            'url': str(paper.url),
-            'hero_image': str(paper.hero_image) if paper.hero_image else None,
-            'arxiv_url': str(paper.arxiv_url) if paper.arxiv_url else None,
-            'github_url': str(paper.github_url) if paper.github_url else None,
-            'github_stars': paper.github_stars,
-            'hf_upvotes': paper.hf_upvotes,
-            'collected_at': datetime.now().isoformat(),
-        }
 
-    def save_daily_papers(self, papers: List[Paper], target_date: date) -> Optional[Path]:
-        """Save daily paper data to Parquet file (incremental update)"""
-        if not papers:
-            print(f"No paper data to save ({target_date})")
-            return None
+    @staticmethod
+    def _daily_key(target_date: date) -> str:
+        """Daily file key relative to the data root: YYYY/MM/YYYYMMDD.parquet"""
+        return f"{target_date.year}/{target_date.month:02d}/{target_date.strftime('%Y%m%d')}.parquet"
 
-        # Generate file path: data/YYYY/MM/YYYYMMDD.parquet
-        year_dir = self.local_data_dir / str(target_date.year)
-        month_dir = year_dir / f"{target_date.month:02d}"
-        month_dir.mkdir(parents=True, exist_ok=True)
+    @staticmethod
+    def _daily_lock_name(target_date: date) -> str:
+        return f"daily-{target_date.strftime('%Y%m%d')}"
 
-        filename = f"{target_date.strftime('%Y%m%d')}.parquet"
-        filepath = month_dir / filename
-        
-        # Convert new papers to DataFrame
-        new_data = [self._paper_to_dict(paper) for paper in papers]
-        new_df = pd.DataFrame(new_data)
+    @staticmethod
+    def _is_daily_key(key: str) -> bool:
+        """Daily files are stored as YYYY/MM/YYYYMMDD.parquet
 
-        # If file exists, load and merge with deduplication
-        if filepath.exists():
-            try:
-                existing_df = pd.read_parquet(filepath)
-                # Merge old and new data
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                # Deduplicate (based on paper_id, keep first occurrence)
-                combined_df = combined_df.drop_duplicates(subset=['paper_id'], keep='first')
-                df = combined_df
-                print(f"Merged data: {len(existing_df)} existing + {len(new_df)} new = {len(df)} after deduplication")
-            except Exception as e:
-                print(f"Warning: Failed to read existing file, will overwrite: {e}")
-                df = new_df
+        The full layout is checked so history or archive files that share the
+        data root are never mistaken for daily files.
+        """
+        parts = key.split('/')
+        if len(parts) != 3 or not parts[2].endswith('.parquet'):
+            return False
+        year, month, stem = parts[0], parts[1], parts[2][:-len('.parquet')]
+        return len(stem) == 8 and stem.isdigit() and stem.startswith(year + month)
+
+    @staticmethod
+    def _read_object(operator: opendal.Operator, key: str, tier: str) -> bytes:
+        """Read one object, recording bytes and duration"""
+        started = time.perf_counter()
+        content = operator.read(key)
+        record_parquet_io("read", tier, len(content), time.perf_counter() - started)
+        return content
+
+    @staticmethod
+    def _write_object(operator: opendal.Operator, key: str, content: bytes, tier: str) -> None:
+        """Write one object, recording bytes and duration"""
+        started = time.perf_counter()
+        operator.write(key, content)
+        record_parquet_io("write", tier, len(content), time.perf_counter() - started)
+
+    @staticmethod
+    async def _read_object_async(operator: opendal.AsyncOperator, key: str, tier: str) -> bytes:
+        started = time.perf_counter()
+        content = await operator.read(key)
+        record_parquet_io("read", tier, len(content), time.perf_counter() - started)
+        return content
+
+    @staticmethod
+    async def _write_object_async(operator: opendal.AsyncOperator, key: str, content: bytes, tier: str) -> None:
+        started = time.perf_counter()
+        await operator.write(key, content)
+        record_parquet_io("write", tier, len(content), time.perf_counter() - started)
+
+    @staticmethod
+    def _serialize_table(table: pa.Table, profile: StorageProfile) -> bytes:
+        """Encode a paper table as Parquet bytes"""
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, **profile.write_options())
+        return sink.getvalue().to_pybytes()
+
+    @staticmethod
+    def _parse_table(content: bytes, columns: Optional[List[str]] = None) -> pa.Table:
+        """Decode Parquet bytes (any schema version) into a current-layout table"""
+        return read_paper_table(pa.BufferReader(content), columns=columns)
+
+    def _merge_daily_table(self, existing: Optional[bytes], papers: List[Paper]) -> pa.Table:
+        """Merge new papers into the existing daily file content"""
+        # Convert new papers to an Arrow table
+        new_table = papers_to_table(papers)
+
+        if existing is None:
+            logger.info("Created new daily file", extra={'rows': new_table.num_rows})
+            return new_table
+
+        try:
+            existing_table = self._parse_table(existing)
+        except Exception as e:
+            logger.warning("Failed to read existing daily file, will overwrite", extra={'error': str(e)})
+            return new_table
+
+        # Merge old and new data, deduplicate (based on paper_id, keep first occurrence)
+        table = drop_duplicate_ids(pa.concat_tables([existing_table, new_table]))
+        logger.info(
+            "Merged daily file",
+            extra={'existing': existing_table.num_rows, 'new': new_table.num_rows, 'rows': table.num_rows},
+        )
+        return table
+
+    def save_daily_papers(self, papers: Iterable[Paper], target_date: date, batch_size: Optional[int] = None) -> Optional[Path]:
+        """Save daily paper data to Parquet file (incremental update)
+
+        Args:
+        papers: Papers, e.g. a list or the `hf.iter_huggingface_papers` generator
+        target_date: Day of the daily file
+        batch_size: Merge into the daily file every `batch_size` papers while
+            `papers` is consumed, so only one batch is held in memory
+            (default: everything in one write)
+
+        Returns:
+        Path of the daily file, None if there was nothing to save
+        """
+        filepath = None
+        if batch_size is None:
+            batches = [papers if isinstance(papers, list) else list(papers)]
         else:
-            df = new_df
-            print(f"Created new file: {len(df)} papers")
+            batches = (list(batch) for batch in itertools.batched(papers, batch_size))
+        for batch in batches:
+            if batch:
+                filepath = self._save_daily_batch(batch, target_date)
+        if filepath is None:
+            logger.info("No paper data to save", extra={'date': target_date.isoformat()})
+        return filepath
+
+    def _save_daily_batch(self, papers: List[Paper], target_date: date) -> Path:
+        """Merge papers into the daily file and update history, search index and listeners"""
+        # File key: YYYY/MM/YYYYMMDD.parquet under the data root
+        key = self._daily_key(target_date)
+        with self.coordination.lock(self._daily_lock_name(target_date)):
+            try:
+                existing = self._read_object(self.data_operator, key, "daily")
+            except opendal.exceptions.NotFound:
+                existing = None
+
+            table = self._merge_daily_table(existing, papers)
+            self._write_object(self.data_operator, key, self._serialize_table(table, self.daily_profile), "daily")
+        filepath = self.local_data_dir / key
+        logger.info("Saved daily papers", extra={'path': str(filepath), 'rows': table.num_rows})
+
+        # Daily files keep the first reading; the history keeps every change
+        self.history.record(papers)
+        self.search_index.add_papers(papers, target_date)
+        self._notify_saved(target_date, papers)
+
+        return filepath
+
+    async def save_daily_papers_async(self, papers: List[Paper], target_date: date) -> Optional[Path]:
+        """Async variant of `save_daily_papers` using the AsyncOperator"""
+        if not papers:
+            logger.info("No paper data to save", extra={'date': target_date.isoformat()})
+            return None
+
+        key = self._daily_key(target_date)
+        async with self.coordination.lock_async(self._daily_lock_name(target_date)):
+            try:
+                existing = await self._read_object_async(self.async_data_operator, key, "daily")
+            except opendal.exceptions.NotFound:
+                existing = None
 
-        # Save as Parquet file
-        df.to_parquet(filepath, engine='pyarrow', compression='snappy', index=False)
-        print(f"Saved to: {filepath}")
+            table = self._merge_daily_table(existing, papers)
+            await self._write_object_async(
+                self.async_data_operator, key, self._serialize_table(table, self.daily_profile), "daily"
+            )
+        filepath = self.local_data_dir / key
+        logger.info("Saved daily papers", extra={'path': str(filepath), 'rows': table.num_rows})
+
+        await self.history.record_async(papers)
+        await asyncio.to_thread(self.search_index.add_papers, papers, target_date)
+        self._notify_saved(target_date, papers)
 
         return filepath
+
+    def add_save_listener(self, callback: Callable[[date, List[str]], None]) -> None:
+        """Register a callback run with (day, paper IDs) after each daily save"""
+        self._save_listeners.append(callback)
+
+    def _notify_saved(self, target_date: date, papers: List[Paper]) -> None:
+        paper_ids = [paper.get_paper_id() for paper in papers]
+        for callback in self._save_listeners:
+            callback(target_date, paper_ids)
     
-    def get_monthly_files(self, year: int, month: int) -> List[Path]:
-        """Get all Parquet files for the specified month"""
-        month_dir = self.local_data_dir / str(year) / f"{month:02d}"
-        if not month_dir.exists():
+    def get_monthly_files(self, year: int, month: int) -> List[str]:
+        """Get keys of all daily Parquet files for the specified month"""
+        prefix = f"{year}/{month:02d}/"
+        try:
+            entries = self.data_operator.list(prefix)
+        except opendal.exceptions.NotFound:
             return []
 
-        return sorted(month_dir.glob("*.parquet"))
+        return sorted(entry.path for entry in entries if self._is_daily_key(entry.path))
 
-    def merge_monthly_data(self, year: int, month: int) -> Optional[Path]:
-        """Merge all data for the specified month into one Parquet file"""
-        files = self.get_monthly_files(year, month)
-        if not files:
-            print(f"No data files found for {year}-{month:02d}")
-            return None
+    def list_daily_files(self) -> List[str]:
+        """Get keys of all daily Parquet files under the data root"""
+        return sorted(entry.path for entry in self.data_operator.scan("") if self._is_daily_key(entry.path))
+
+    def list_archive_files(self) -> List[str]:
+        """Get keys of all monthly archive files (YYYY/YYYYMM.parquet) under the archive root"""
+        keys = []
+        for entry in self.operator.scan(""):
+            parts = entry.path.split('/')
+            if len(parts) != 2 or not parts[1].endswith('.parquet'):
+                continue
+            stem = parts[1][:-len('.parquet')]
+            if len(stem) == 6 and stem.isdigit() and stem.startswith(parts[0]):
+                keys.append(entry.path)
+        return sorted(keys)
+
+    async def list_daily_files_async(self) -> List[str]:
+        """Async variant of `list_daily_files`"""
+        keys = []
+        async for entry in await self.async_data_operator.scan(""):
+            if self._is_daily_key(entry.path):
+                keys.append(entry.path)
+        return sorted(keys)
+
+    async def prefetch_async(self, keys: Iterable[str], operator: Optional[opendal.AsyncOperator] = None) -> Dict[str, bytes]:
+        """Read several objects concurrently (bounded by STORAGE_PREFETCH_CONCURRENCY)
+
+        Missing objects are left out of the result.
+        """
+        tier = "archive" if operator is not None and operator is self._async_archive_operator else "daily"
+        operator = operator or self.async_data_operator
+        semaphore = asyncio.Semaphore(self.prefetch_concurrency)
+
+        async def _read(key: str):
+            async with semaphore:
+                try:
+                    return key, await self._read_object_async(operator, key, tier)
+                except opendal.exceptions.NotFound:
+                    return key, None
 
-        # Read all files and merge
-        dfs = []
-        for file in files:
-            df = pd.read_parquet(file)
-            dfs.append(df)
+        results = await asyncio.gather(*(_read(key) for key in keys))
+        return {key: content for key, content in results if content is not None}
 
-        merged_df = pd.concat(dfs, ignore_index=True)
+    @staticmethod
+    def _archive_key(year: int, month: int) -> str:
+        """Archive object key relative to the archive root: YYYY/YYYYMM.parquet"""
+        return f"{year}/{year}{month:02d}.parquet"
 
-        # Deduplicate (based on paper_id)
-        merged_df = merged_df.drop_duplicates(subset=['paper_id'], keep='first')
+    def _open_archive_writer(self, key: str):
+        """Open a streaming (multipart) writer for an archive object"""
+        return self.operator.open(key, "wb")
 
-        # Save merged file to archive directory: YYYYMM.parquet
-        merged_filename = f"{year}{month:02d}.parquet"
+    def merge_monthly_data(self, year: int, month: int, batch_size: int = 8192) -> Optional[Path]:
+        """Merge all data for the specified month into one archive Parquet file
 
-        # Save to archive directory
-        archive_year_dir = self.archive_dir / str(year)
-        archive_year_dir.mkdir(parents=True, exist_ok=True)
-        merged_path = archive_year_dir / merged_filename
+        Daily files are streamed batch by batch and deduplicated with a set of
+        seen paper IDs, then written once through the OpenDAL writer. Memory is
+        bounded by one row group, not by the size of the month.
+        """
+        files = self.get_monthly_files(year, month)
+        if not files:
+            logger.info("No data files found for month", extra={'month': f"{year}-{month:02d}"})
+            return None
+        started = time.perf_counter()
 
-        merged_df.to_parquet(merged_path, engine='pyarrow', compression='snappy', index=False)
+        archive_key = self._archive_key(year, month)
+        row_group_size = self.archive_profile.row_group_size or 64 * 1024
+        seen_ids: set[str] = set()
+        pending: List[pa.Table] = []
+        pending_rows = 0
+        total_rows = 0
+
+        sink = self._open_archive_writer(archive_key)
+        try:
+            with pq.ParquetWriter(sink, PAPER_SCHEMA, **self.archive_profile.writer_options()) as writer:
+                for key in files:
+                    with self.data_operator.open(key, "rb") as source:
+                        for batch in iter_paper_batches(source, batch_size=batch_size):
+                            batch = drop_duplicate_ids(batch, seen=seen_ids)
+                            if batch.num_rows == 0:
+                                continue
+                            pending.append(batch)
+                            pending_rows += batch.num_rows
+                            # Flush full row groups so memory stays bounded
+                            if pending_rows >= row_group_size:
+                                writer.write_table(pa.concat_tables(pending), row_group_size=row_group_size)
+                                total_rows += pending_rows
+                                pending, pending_rows = [], 0
+                if pending:
+                    writer.write_table(pa.concat_tables(pending), row_group_size=row_group_size)
+                    total_rows += pending_rows
+        except Exception:
+            sink.close()
+            self._delete_archive_object(archive_key)
+            raise
+        sink.close()
+        record_parquet_io(
+            "write", "archive", self.operator.stat(archive_key).content_length, time.perf_counter() - started
+        )
 
-        print(f"Merged {len(files)} files, total {len(merged_df)} papers: {merged_path}")
+        merged_path = self.archive_dir / archive_key
+        logger.info("Merged monthly data", extra={'files': len(files), 'rows': total_rows, 'path': str(merged_path)})
         return merged_path
-    
+
+    def _delete_archive_object(self, key: str) -> None:
+        """Remove a partially written archive object"""
+        try:
+            self.operator.delete(key)
+        except Exception as e:
+            logger.warning("Failed to remove partial archive", extra={'key': key, 'error': str(e)})
+
     def archive_month(self, year: int, month: int, delete_daily_files: bool = False) -> bool:
         """Archive monthly data: merge to archive directory
 
@@ -171,117 +471,150 @@ class PaperStorage:
         Returns:
         bool: Whether archiving was successful
         """
-        print(f"\n=== Starting archive {year}-{month:02d} ===")
+        logger.info("Starting archive", extra={'month': f"{year}-{month:02d}"})
 
-        # 1. Merge monthly data
-        merged_path = self.merge_monthly_data(year, month)
+        # 1. Stream-merge monthly data straight into the archive (single write)
+        try:
+            merged_path = self.merge_monthly_data(year, month)
+        except Exception as e:
+            logger.error("Archive write failed", extra={'month': f"{year}-{month:02d}", 'error': str(e)})
+            return False
         if not merged_path:
             return False
 
-        # 2. Write using OpenDAL (if available)
-        if self.operator:
-            try:
-                # Read merged file
-                with open(merged_path, 'rb') as f:
-                    content = f.read()
-
-                # Write using OpenDAL
-                archive_key = f"{year}/{year}{month:02d}.parquet"
-                self.operator.write(archive_key, content)
-                print(f"Written to archive via OpenDAL: {archive_key}")
-            except Exception as e:
-                print(f"Warning: OpenDAL write failed: {e}")
-                print("   File saved to local archive directory")
-
-        # 3. Delete daily files (optional)
+        # 2. Delete daily files (optional)
         if delete_daily_files:
             files = self.get_monthly_files(year, month)
-            for file in files:
+            for key in files:
                 try:
-                    file.unlink()
-                    print(f"Deleted daily file: {file.name}")
+                    self.data_operator.delete(key)
+                    logger.info("Deleted daily file", extra={'key': key})
                 except Exception as e:
-                    print(f"Error: Delete failed {file}: {e}")
+                    logger.error("Delete failed", extra={'key': key, 'error': str(e)})
 
-        print(f"=== Archive completed {year}-{month:02d} ===\n")
+        logger.info("Archive completed", extra={'month': f"{year}-{month:02d}"})
         return True
     
     def load_papers_by_date(self, target_date: date) -> List[dict]:
-        """Load paper data for the specified date"""
-        year_dir = self.local_data_dir / str(target_date.year)
-        month_dir = year_dir / f"{target_date.month:02d}"
-        filename = f"{target_date.strftime('%Y%m%d')}.parquet"
-        filepath = month_dir / filename
+        """Load paper data for the specified date
 
-        if not filepath.exists():
+        Files of any schema version are accepted; rows always use the current
+        layout (authors as list, collected_at as datetime).
+        """
+        try:
+            content = self._read_object(self.data_operator, self._daily_key(target_date), "daily")
+        except opendal.exceptions.NotFound:
             return []
 
-        df = pd.read_parquet(filepath)
-        return df.to_dict('records')
+        return self._parse_table(content).to_pylist()
 
-    def load_all_paper_ids(self) -> set[str]:
-        """Load stored paper IDs from all Parquet files"""
-        paper_ids = set()
-        
-        if not self.local_data_dir.exists():
-            return paper_ids
-        
-        # Iterate through all year and month directories
-        for year_dir in self.local_data_dir.iterdir():
-            if not year_dir.is_dir():
-                continue
+    def load_records_by_date(self, target_date: date) -> List[PaperRecord]:
+        """Load the papers of a date as `PaperRecord`s (no per-row dictionaries)"""
+        try:
+            content = self._read_object(self.data_operator, self._daily_key(target_date), "daily")
+        except opendal.exceptions.NotFound:
+            return []
 
-            for month_dir in year_dir.iterdir():
-                if not month_dir.is_dir():
+        return table_to_records(self._parse_table(content))
+
+    def find_record(self, paper_id: str, day: date) -> Optional[PaperRecord]:
+        """Look up one paper by its indexed day: the daily file, then the archive
+
+        Papers indexed from an archive carry their collection day, which can
+        fall after the listing day and whose daily file may be gone, so the
+        archives of that month and the month before are checked too.
+        """
+        for record in self.load_records_by_date(day):
+            if record.paper_id == paper_id:
+                return record
+
+        previous = day.replace(day=1) - timedelta(days=1)
+        for year, month in ((day.year, day.month), (previous.year, previous.month)):
+            key = self._archive_key(year, month)
+            if not self.operator.exists(key):
+                continue
+            with self.operator.open(key, "rb") as source:
+                # Ranged reads: the paper_id column first, full rows only on a match
+                paper_ids = pq.ParquetFile(source).read(columns=["paper_id"]).column("paper_id").to_pylist()
+                if paper_id not in paper_ids:
                     continue
+                table = read_paper_table(source)
+            for record in table_to_records(table):
+                if record.paper_id == paper_id:
+                    return record
+        return None
+
+    async def load_papers_by_dates_async(self, dates: Iterable[date]) -> Dict[date, List[dict]]:
+        """Load paper data for several dates, prefetching the files concurrently"""
+        keys = {self._daily_key(d): d for d in dates}
+        contents = await self.prefetch_async(keys)
+        return {
+            target_date: self._parse_table(contents[key]).to_pylist() if key in contents else []
+            for key, target_date in keys.items()
+        }
 
-                # Read all parquet files for this month (exclude monthly archive files)
-                files = [f for f in month_dir.glob("*.parquet") if len(f.stem) == 8]  # YYYYMMDD format
-                for file in files:
-                    try:
-                        df = pd.read_parquet(file, columns=['paper_id'])
-                        paper_ids.update(df['paper_id'].tolist())
-                    except Exception as e:
-                        print(f"Warning: Failed to read file {file}: {e}")
+    def _collect_paper_ids(self, contents: Dict[str, bytes]) -> set[str]:
+        """Extract paper IDs from prefetched daily file contents"""
+        paper_ids = set()
+        for key, content in contents.items():
+            try:
+                table = self._parse_table(content, columns=['paper_id'])
+                paper_ids.update(table.column('paper_id').to_pylist())
+            except Exception as e:
+                logger.warning("Failed to read file", extra={'key': key, 'error': str(e)})
+        return paper_ids
+
+    def load_all_paper_ids(self) -> set[str]:
+        """Load stored paper IDs from all daily Parquet files (monthly archives excluded)"""
+        contents = {}
+        for key in self.list_daily_files():
+            try:
+                contents[key] = self._read_object(self.data_operator, key, "daily")
+            except Exception as e:
+                logger.warning("Failed to read file", extra={'key': key, 'error': str(e)})
 
-        print(f"Loaded {len(paper_ids)} paper IDs from storage")
+        paper_ids = self._collect_paper_ids(contents)
+        logger.info("Loaded paper IDs from storage", extra={'count': len(paper_ids), 'files': len(contents)})
         return paper_ids
-    
-    def get_statistics(self) -> dict:
-        """Get storage statistics"""
-        stats = {
-            'total_files': 0,
-            'total_size_mb': 0,
-            'months': {}
-        }
 
-        for year_dir in self.local_data_dir.iterdir():
-            if not year_dir.is_dir():
-                continue
+    async def load_all_paper_ids_async(self) -> set[str]:
+        """Async variant of `load_all_paper_ids` with concurrent prefetch"""
+        keys = await self.list_daily_files_async()
+        contents = await self.prefetch_async(keys)
+        paper_ids = self._collect_paper_ids(contents)
+        logger.info("Loaded paper IDs from storage", extra={'count': len(paper_ids), 'files': len(contents)})
+        return paper_ids
 
-            for month_dir in year_dir.iterdir():
-                if not month_dir.is_dir():
-                    continue
+    async def load_recent_paper_ids_async(self, end: date, days: int) -> set[str]:
+        """Paper IDs of the daily files for the `days` days up to `end`
 
-                files = list(month_dir.glob("papers_*.parquet"))
-                total_size = sum(f.stat().st_size for f in files)
+        Keys are derived from the dates, so nothing is listed and older
+        history is never read.
+        """
+        keys = [self._daily_key(end - timedelta(days=offset)) for offset in range(days)]
+        contents = await self.prefetch_async(keys)
+        paper_ids = self._collect_paper_ids(contents)
+        logger.info("Loaded recent paper IDs from storage", extra={'count': len(paper_ids), 'files': len(contents)})
+        return paper_ids
+    
+    def get_statistics(self, check_duplicates: bool = True) -> dict:
+        """Get storage statistics for the daily and archive tiers
 
-                month_key = f"{year_dir.name}-{month_dir.name}"
-                stats['months'][month_key] = {
-                    'files': len(files),
-                    'size_mb': round(total_size / 1024 / 1024, 2)
-                }
-                stats['total_files'] += len(files)
-                stats['total_size_mb'] += total_size / 1024 / 1024
+        Only Parquet footers (and the paper_id column, for duplicate counts)
+        are read, in parallel. See `inventory.build_inventory` for the fields.
+        """
+        from inventory import build_inventory
 
-        stats['total_size_mb'] = round(stats['total_size_mb'], 2)
-        return stats
+        return build_inventory(self, check_duplicates=check_duplicates)
 
 
 # Example usage
 if __name__ == "__main__":
     from datetime import date
     from hf import fetch_huggingface_papers
+    from log import setup_logging
+
+    setup_logging()
 
     # Initialize storage (load configuration from environment variables)
     storage = PaperStorage.from_env()
@@ -295,9 +628,6 @@ if __name__ == "__main__":
     storage.save_daily_papers(papers, today)
 
     # Display statistics
-    stats = storage.get_statistics()
-    print("\nStorage statistics:")
-    print(f"  Total files: {stats['total_files']}")
-    print(f"  Total size: {stats['total_size_mb']} MB")
-    for month, info in stats['months'].items():
-        print(f"  {month}: {info['files']} files, {info['size_mb']} MB")
+    from inventory import print_report
+    print()
+    print_report(storage.get_statistics())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""性能基准：HTML 解析、消息格式化、记录与 Arrow 表转换、存储读写
+
+用法:
+    python tests/benchmark.py                                   # 默认规模 1k / 10k / 100k 行
+    python tests/benchmark.py --sizes 1000,10000,100000,1000000 # 包含 1M 行
+    python tests/benchmark.py --output tests/benchmark_baseline.json       # 保存基线
+    python tests/benchmark.py --baseline tests/benchmark_baseline.json     # 与基线比较，回归时退出码为 1
+
+结果为 JSON：每项记录中位数/最小耗时（秒）、重复次数与单项耗时（微秒）。
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pyarrow as pa
+
+from hf import Paper, parse_paper_details, parse_papers_list
+from main import escape_markdown, format_paper_message
+from schema import PaperRecord, normalize_table, papers_to_table, table_to_records
+from storage import PaperStorage
+
+FIXTURE_HTML = Path(__file__).parent / "debug_upvote.html"
+DAYS_PER_STORE = 30
+WORDS = ("diffusion", "transformer", "agent", "reasoning", "video", "alignment", "sparse", "retrieval",
+         "multimodal", "scaling", "RL", "tokenizer", "benchmark", "latent", "policy", "vision-language")
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def synthetic_papers(count: int, seed: int = 0, id_offset: int = 0) -> List[Paper]:
+    """Papers with MarkdownV2 special characters in titles and abstracts"""
+    rng = random.Random(seed)
+    papers = []
+    for i in range(count):
+        paper_id = f"25{id_offset + i:08d}"
+        papers.append(Paper(
+            title=f"{_sentence(rng, 8).title()}: [v{i % 3}] (A_{i}) *bold* claims!",
+            authors=[f"Author {rng.randint(1, 5000)}" for _ in range(rng.randint(1, 12))],
+            abstract=(_sentence(rng, 40) + ". We show +3.5% on x-y {tasks}; see `code` | ~#1. ") * 4,
+            url=f"https://huggingface.co/papers/{paper_id}",
+            hero_image=f"https://cdn-thumbnails.huggingface.co/social-thumbnails/papers/{paper_id}.png" if i % 2 else None,
+            arxiv_url=f"https://arxiv.org/abs/{paper_id}",
+            github_url=f"https://github.com/org{i % 97}/repo{i}" if i % 3 == 0 else None,
+            github_stars=rng.randint(0, 20000) if i % 3 == 0 else None,
+            hf_upvotes=rng.randint(0, 300),
+        ))
+    return papers
+
+
+def synthetic_list_html(count: int) -> str:
+    """A daily list page with `count` paper cards in the HuggingFace markup"""
+    cards = "".join(
+        f'<article class="relative flex flex-col overflow-hidden rounded-xl border">'
+        f'<a href="/papers/25{i:08d}"><img src="https://cdn-thumbnails.huggingface.co/{i}.png"></a>'
+        f'<div><h3><a href="/papers/25{i:08d}">Paper title number {i}</a></h3></div></article>'
+        for i in range(count)
+    )
+    return f"<html><body><section>{cards}</section></body></html>"
+
+
+def synthetic_table(rows: int, id_offset: int, day: date) -> pa.Table:
+    """Paper table built column-wise (fast enough for million-row stores)"""
+    ids = [f"25{id_offset + i:08d}" for i in range(rows)]
+    abstract = "We study " + " ".join(WORDS) * 2
+    authors = pa.ListArray.from_arrays(
+        pa.array(range(0, 3 * rows + 1, 3), pa.int32()),
+        pa.array([f"Author {i % 5000}" for i in range(3 * rows)]),
+    )
+    table = pa.table({
+        'paper_id': ids,
+        'title': [f"Synthetic paper {paper_id}" for paper_id in ids],
+        'authors': authors,
+        'abstract': pa.array([abstract] * rows),
+        'url': [f"https://huggingface.co/papers/{paper_id}" for paper_id in ids],
+        'arxiv_url': [f"https://arxiv.org/abs/{paper_id}" for paper_id in ids],
+        'hf_upvotes': pa.array([i % 300 for i in range(rows)], pa.int64()),
+        'collected_at': pa.array([datetime(day.year, day.month, day.day, tzinfo=timezone.utc)] * rows),
+    })
+    return normalize_table(table)
+
+
+def build_store(root: Path, rows: int) -> PaperStorage:
+    """Local store with `rows` papers spread over one month of daily files"""
+    storage = PaperStorage(
+        local_data_dir=str(root / "data"),
+        archive_dir=str(root / "archive"),
+        history_dir=str(root / "history"),
+        scheme="fs",
+        storage_options={},
+        search_index_path=":memory:",
+    )
+    per_day = max(1, rows // DAYS_PER_STORE)
+    for day_index in range(DAYS_PER_STORE):
+        day = date(2025, 9, day_index + 1)
+        table = synthetic_table(per_day, day_index * per_day, day)
+        storage.data_operator.write(storage._daily_key(day), storage._serialize_table(table, storage.daily_profile))
+    return storage
+
+
+def measure(fn: Callable[[], object], repeat: int, items: int = 1) -> Dict:
+    """Run fn `repeat` times and summarize the wall-clock durations"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    median = statistics.median(durations)
+    return {
+        'median_s': round(median, 6),
+        'min_s': round(min(durations), 6),
+        'repeat': repeat,
+        'items': items,
+        'per_item_us': round(median / items * 1e6, 3),
+    }
+
+
+def run_parsing(repeat: int) -> Dict[str, Dict]:
+    html = FIXTURE_HTML.read_bytes()
+    list_html = synthetic_list_html(50)
+    return {
+        'parse.paper_details': measure(lambda: parse_paper_details(html), repeat),
+        'parse.papers_list[50]': measure(lambda: parse_papers_list(list_html), repeat, items=50),
+    }
+
+
+def run_formatting(repeat: int, count: int = 10_000) -> Dict[str, Dict]:
+    papers = synthetic_papers(count)
+    texts = [f"{paper.title} {paper.abstract}" for paper in papers]
+    return {
+        f'format.escape_markdown[{count}]': measure(lambda: [escape_markdown(t) for t in texts], repeat, items=count),
+        f'format.paper_message[{count}]': measure(
+            lambda: [format_paper_message(p, max_length=1000 if p.hero_image else 4000) for p in papers],
+            repeat, items=count,
+        ),
+    }
+
+
+def run_conversion(repeat: int, count: int = 100_000) -> Dict[str, Dict]:
+    table = synthetic_table(count, 0, date(2025, 9, 1))
+    records = table_to_records(table)
+    papers = synthetic_papers(10_000)
+    return {
+        f'convert.table_to_records[{count}]': measure(lambda: table_to_records(table), repeat, items=count),
+        f'convert.papers_to_table[{count}]': measure(lambda: papers_to_table(records), repeat, items=count),
+        'convert.paper_to_record[10000]': measure(lambda: [PaperRecord.from_paper(p) for p in papers], repeat, items=10_000),
+    }
+
+
+def run_storage(sizes: List[int], repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storage = build_store(Path(tmpdir), rows)
+            # 50 new papers merged into a day file of rows / 30 papers
+            batches = iter([synthetic_papers(50, seed=i, id_offset=10**7 + i * 50) for i in range(repeat)])
+            results[f'storage.save_daily_papers[{rows}]'] = measure(
+                lambda: storage.save_daily_papers(next(batches), date(2025, 9, 15)), repeat, items=50
+            )
+            results[f'storage.load_all_paper_ids[{rows}]'] = measure(storage.load_all_paper_ids, repeat, items=rows)
+            results[f'storage.merge_monthly_data[{rows}]'] = measure(
+                lambda: storage.merge_monthly_data(2025, 9), repeat, items=rows
+            )
+        print(f"  store {rows:>9,} rows done", file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Benchmarks whose median is slower than the baseline by more than `tolerance`"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['median_s'] / max(baseline[name]['median_s'], 1e-9)
+        result['baseline_ratio'] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {ratio:.2f}x baseline ({result['median_s']:.4f}s vs {baseline[name]['median_s']:.4f}s)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parsing / formatting / storage benchmarks")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Store sizes in rows, comma separated")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", choices=["parse", "format", "convert", "storage"], help="Run one group")
+    parser.add_argument("--output", help="Write results JSON to this file (e.g. to store a baseline)")
+    parser.add_argument("--baseline", help="Compare against a results JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = +25%%)")
+    args = parser.parse_args(argv)
+
+    # Storage logs every save at INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    results: Dict[str, Dict] = {}
+    if args.only in (None, "parse"):
+        results.update(run_parsing(args.repeat))
+    if args.only in (None, "format"):
+        results.update(run_formatting(args.repeat))
+    if args.only in (None, "convert"):
+        results.update(run_conversion(args.repeat))
+    if args.only in (None, "storage"):
+        results.update(run_storage([int(s) for s in args.sizes.split(",")], args.repeat))
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())['results']
+        regressions = compare(results, baseline, args.tolerance)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'pyarrow': pa.__version__,
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    print(text)
+
+    if regressions:
+        print("\n✗ 性能回归:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+"""测试共用的构造函数（测试脚本所在目录在 sys.path 中，直接 `from helpers import make_paper`）"""
+import sys
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hf import Paper
+
+
+def make_paper(
+    key: Union[int, str] = 1,
+    upvotes: Optional[int] = None,
+    stars: Optional[int] = None,
+    *,
+    title: Optional[str] = None,
+    abstract: Optional[str] = None,
+    authors: Iterable[str] = ("Alice",),
+    url: Optional[str] = None,
+    arxiv: bool = False,
+) -> Paper:
+    """构造论文：整数 key 对应 arXiv ID 2510.<key 补零到 5 位>，字符串 key 直接作为论文 ID
+
+    标题默认 "Paper <key>"，摘要默认 "Abstract <key>"，链接为该 ID 的 HF 页面（arxiv=True 时另加 arXiv 链接）。
+    """
+    paper_id = f"2510.{key:05d}" if isinstance(key, int) else key
+    return Paper(
+        title=f"Paper {key}" if title is None else title,
+        authors=list(authors),
+        abstract=f"Abstract {key}" if abstract is None else abstract,
+        url=url or f"https://huggingface.co/papers/{paper_id}",
+        arxiv_url=f"https://arxiv.org/abs/{paper_id}" if arxiv else None,
+        hf_upvotes=upvotes,
+        github_stars=stars,
+    )
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""测试 arXiv 元数据批量补全（使用本地 HTTP 服务模拟 arXiv export API）"""
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from arxiv_api import ArxivCache, ArxivEnricher, merge_details
+from resilience import RetryPolicy, Upstream
+
+ENTRY = """<entry>
+  <id>http://arxiv.org/abs/{id}v2</id>
+  <title>Paper
+    {id}</title>
+  <summary>  Abstract of {id},
+  wrapped over lines.
+</summary>
+  <author><name>Alice</name></author>
+  <author><name>Bob</name></author>
+  <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.LG"/>
+  <category term="cs.CV"/>
+  <category term="cs.LG"/>
+</entry>"""
+# arXiv 对未知 ID 返回的错误条目
+ERROR_ENTRY = """<entry><id>http://arxiv.org/api/errors#incorrect_id_format_for_{id}</id><title>Error</title></entry>"""
+
+
+class ArxivHandler(BaseHTTPRequestHandler):
+    """按 id_list 返回 Atom feed；以 9 结尾的 ID 视为 arXiv 中不存在"""
+    requests = []
+
+    def do_GET(self):
+        ids = parse_qs(urlparse(self.path).query)['id_list'][0].split(',')
+        self.requests.append(ids)
+        entries = [ERROR_ENTRY.format(id=i) if i.endswith('9') else ENTRY.format(id=i) for i in ids]
+        body = ('<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">'
+                + ''.join(entries) + '</feed>').encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _enricher(api_url: str, cache_path: str) -> ArxivEnricher:
+    return ArxivEnricher(ArxivCache(cache_path), api_url=api_url, batch_size=2, request_interval=0,
+                         upstream=Upstream("arxiv-test", timeout=5, policy=RetryPolicy(attempts=1)))
+
+
+def test_batched_lookup(api_url: str, cache_path: str):
+    """测试批量请求、解析与持久化缓存"""
+    print("\n=== 测试 1: 批量查询与缓存 ===")
+    ids = ["2510.00001", "2510.00002", "2510.00003", "2510.00009", "not-an-id"]
+    enricher = _enricher(api_url, cache_path)
+    results = enricher.lookup(ids)
+    # 4 个合法 ID，每批 2 个：2 次请求
+    assert ArxivHandler.requests == [["2510.00001", "2510.00002"], ["2510.00003", "2510.00009"]]
+    assert set(results) == {"2510.00001", "2510.00002", "2510.00003"}
+    metadata = results["2510.00001"]
+    assert metadata['title'] == "Paper 2510.00001"
+    assert metadata['abstract'] == "Abstract of 2510.00001, wrapped over lines."
+    assert metadata['authors'] == ["Alice", "Bob"] and metadata['version'] == 2
+    assert metadata['categories'] == ["cs.LG", "cs.CV"]
+    assert metadata['arxiv_url'] == "https://arxiv.org/abs/2510.00001"
+    enricher.close()
+
+    # 重新打开缓存：已知 ID（包括不存在的）不再请求，只请求新 ID
+    enricher = _enricher(api_url, cache_path)
+    results = enricher.lookup(ids + ["2510.00004"])
+    assert ArxivHandler.requests[2:] == [["2510.00004"]]
+    assert len(results) == 4
+    enricher.close()
+    print(f"✓ {len(ids) - 1} 个 ID 用 2 次请求解析，重启后缓存命中，只补查 1 个新 ID")
+
+
+def test_fallback(cache_path: str):
+    """测试 arXiv 不可达时退回 HF 页面数据"""
+    print("\n=== 测试 2: 回退到 HF 页面 ===")
+    enricher = _enricher("http://127.0.0.1:9/api/query", cache_path)
+    results = enricher.lookup(["2510.00001", "2510.00005"])
+    # 缓存中的结果仍可用，请求失败不抛异常
+    assert set(results) == {"2510.00001"}
+    enricher.close()
+
+    hf_details = {'abstract': "HF abstract", 'authors': ["Carol"], 'arxiv_url': None,
+                  'github_url': None, 'github_stars': None, 'hf_upvotes': 7}
+    assert merge_details(hf_details, None) == hf_details
+    merged = merge_details(hf_details, {**results["2510.00001"], 'authors': []})
+    assert merged['abstract'] == "Abstract of 2510.00001, wrapped over lines."
+    assert merged['authors'] == ["Carol"] and merged['hf_upvotes'] == 7
+    assert merged['arxiv_categories'] == ["cs.LG", "cs.CV"]
+    print("✓ 请求失败时返回缓存结果，缺少的字段使用 HF 页面数据")
+
+
+if __name__ == "__main__":
+    print("开始测试 arXiv 元数据补全...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArxivHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_path = f"{tmpdir}/arxiv.sqlite"
+        try:
+            test_batched_lookup(f"http://127.0.0.1:{server.server_port}/api/query", cache_path)
+            test_fallback(cache_path)
+        finally:
+            server.shutdown()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""测试检查周期的检查点与优雅停止后的恢复"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+TMPDIR = tempfile.mkdtemp()
+# 在导入 Config 之前设置：内存存储、临时检查点与缓存
+os.environ.update({
+    'STORAGE_SCHEME': 'memory',
+    'MESSAGE_STORE_PATH': ':memory:',
+    'CHECKPOINT_PATH': f"{TMPDIR}/checkpoint.json",
+    'ENABLE_DEDUP': 'false',
+})
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from checkpoint import CycleCheckpoint
+from config import Config
+from coordination import LeaderElector
+from hf import Paper
+from main import HuggingFacePaperBot
+
+PAPERS = [
+    Paper(title=f"Paper {i}", authors=["Alice"], abstract="Abstract", url=f"https://huggingface.co/papers/2510.{i:05d}")
+    for i in range(4)
+]
+
+
+def test_checkpoint_file():
+    """测试检查点的保存、恢复与过期丢弃"""
+    print("\n=== 测试 1: 检查点文件 ===")
+    path = Path(TMPDIR) / "unit.json"
+    today = date.today()
+    checkpoint = CycleCheckpoint.load(path, today, max_age=60)
+    assert not checkpoint.resumed and not path.exists()
+    checkpoint.record_details("https://huggingface.co/papers/2510.00000", {'abstract': "Abstract", 'hf_upvotes': 3})
+    checkpoint.record_papers(PAPERS)
+    checkpoint.record_processed("2510.00000", "摘要")
+    checkpoint.record_posted("2510.00000")
+
+    resumed = CycleCheckpoint.load(path, today, max_age=60)
+    assert resumed.resumed and resumed.papers == PAPERS
+    assert resumed.processed == {"2510.00000": "摘要"} and resumed.posted == ["2510.00000"]
+
+    # 其他日期或过期的检查点被丢弃
+    assert not CycleCheckpoint.load(path, date(2025, 1, 1), max_age=60).resumed and not path.exists()
+    checkpoint.save()
+    time.sleep(0.05)
+    assert not CycleCheckpoint.load(path, today, max_age=0.01).resumed
+    print("✓ 保存、恢复与过期丢弃正常")
+
+
+class FakeTelegram:
+    """只记录发送内容的 Telegram Bot；可在第一次发送时模拟收到 SIGTERM"""
+
+    def __init__(self, on_send=None):
+        self.sent = []
+        self.on_send = on_send
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.on_send is not None:
+            self.on_send()
+        await asyncio.sleep(0.1)
+        self.sent.append(text)
+        return type("Message", (), {'message_id': len(self.sent)})()
+
+
+async def _cycle(stop_on_send=False):
+    bot = HuggingFacePaperBot("1:token", "@channel", enable_commands=False)
+    bot.bot = FakeTelegram(bot.request_shutdown if stop_on_send else None)
+    bot.cache.clear()
+    processed = []
+    prepare = bot.prepare_abstract
+
+    async def counting_prepare(paper):
+        if paper.get_paper_id() not in bot.checkpoint.processed:
+            processed.append(paper.get_paper_id())
+        return await prepare(paper)
+
+    bot.prepare_abstract = counting_prepare
+    ok = await bot.check_and_send_new_papers(list(PAPERS))
+    await bot.close()
+    return ok, len(bot.bot.sent), processed
+
+
+def test_interrupt_and_resume():
+    """测试停止请求后周期在论文之间停止，重启后只发送剩余论文"""
+    print("\n=== 测试 2: 中断与恢复 ===")
+    os.chdir(TMPDIR)  # papers_cache.json
+    Config.SEND_DELAY = 0.2
+    # 第一次发送进行中收到停止请求：该发送完成后停止
+    ok, sent, processed = asyncio.run(_cycle(stop_on_send=True))
+    assert not ok and sent == 1 and processed == ["2510.00000"]
+    assert Path(Config.CHECKPOINT_PATH).exists()
+
+    # 缓存文件丢失也不会重复发送：检查点记录了已发送的论文
+    ok, sent, processed = asyncio.run(_cycle())
+    assert ok and sent == 3 and processed == ["2510.00001", "2510.00002", "2510.00003"]
+    assert not Path(Config.CHECKPOINT_PATH).exists()
+    print("✓ 第一次运行发送 1 篇后停止，恢复后发送剩余 3 篇，完成后删除检查点")
+
+
+class FakeSources:
+    """记录收到的 SourceContext 并产出 PAPERS 的来源"""
+
+    def __init__(self):
+        self.contexts = []
+        self.failed = []
+
+    async def papers(self, target_date, context=None):
+        self.contexts.append(context)
+        for paper in PAPERS:
+            yield paper
+
+
+def test_run_once():
+    """测试 --once 通过常规检查抓取：带上检查点中的详情页和停止回调，其他副本持有租约时不抓取"""
+    print("\n=== 测试 3: 单次运行 ===")
+    os.chdir(TMPDIR)
+    Config.SEND_DELAY = 0
+    known = {'abstract': "Abstract", 'hf_upvotes': 3}
+    checkpoint = CycleCheckpoint.load(Config.CHECKPOINT_PATH, date.today(), Config.CHECKPOINT_MAX_AGE)
+    checkpoint.record_details(str(PAPERS[0].url), known)
+
+    async def run(leader_election):
+        Config.ENABLE_LEADER_ELECTION = leader_election
+        bot = HuggingFacePaperBot("1:token", "@channel", enable_commands=False)
+        bot.bot = FakeTelegram()
+        bot.cache.clear()
+        bot.sources = FakeSources()
+        other = None
+        if leader_election:
+            other = LeaderElector(bot.storage.coordination, name=Config.LEADER_LEASE_NAME, holder="other-replica", ttl=30)
+            assert other.try_acquire()
+        try:
+            ok = await bot.run_once()
+        finally:
+            if other is not None:
+                other.release()
+            await bot.close()
+            Config.ENABLE_LEADER_ELECTION = False
+        return ok, bot
+
+    ok, bot = asyncio.run(run(leader_election=True))
+    assert ok and bot.sources.contexts == [] and bot.bot.sent == []
+
+    ok, bot = asyncio.run(run(leader_election=False))
+    (context,) = bot.sources.contexts
+    assert ok and len(bot.bot.sent) == len(PAPERS)
+    assert context.known_details == {str(PAPERS[0].url): known} and context.should_stop == bot.stopping.is_set
+    print("✓ 其他副本持有租约时不抓取；否则从检查点抓取并可被停止请求中断")
+
+
+if __name__ == "__main__":
+    print("开始测试检查点...")
+    logging.basicConfig(level=logging.WARNING)
+    test_checkpoint_file()
+    test_interrupt_and_resume()
+    test_run_once()
+    print("\n✓ 所有测试完成!")
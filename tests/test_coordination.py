@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""测试多副本协调：租约选主、发送前的 fencing 检查、每日文件写入锁"""
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from coordination import FileCoordination, LeaderElector, NotLeaderError, require_shared
+from hf import Paper
+from storage import PaperStorage
+
+DAY = date(2025, 10, 1)
+
+
+def test_leader_election():
+    """测试同一目录上的两个副本只有一个是 leader，释放/过期后另一个接管且 token 增大"""
+    print("\n=== 测试 1: 租约选主 ===")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        coordination = FileCoordination(tmpdir)
+        a = LeaderElector(coordination, holder="replica-a", ttl=0.5)
+        b = LeaderElector(coordination, holder="replica-b", ttl=0.5)
+
+        assert a.try_acquire() and not b.try_acquire()
+        token_a = a.check()
+        assert a.try_acquire() and a.token == token_a  # 续约不改变 token
+        try:
+            b.check()
+            raise AssertionError("standby passed the fencing check")
+        except NotLeaderError:
+            pass
+
+        a.release()
+        assert b.try_acquire() and b.token > token_a
+
+        # b 停止续约：本地在租约过期前就放弃，a 在过期后接管
+        time.sleep(0.46)
+        assert not b.is_leader
+        time.sleep(0.1)
+        assert a.try_acquire()
+
+        # b 误以为自己仍是 leader 时，后端检查会拦下发送
+        b.token, b._valid_until = a.token - 1, time.monotonic() + 10
+        try:
+            asyncio.run(b.ensure())
+            raise AssertionError("stale leader passed the fencing check")
+        except NotLeaderError:
+            pass
+        assert asyncio.run(a.ensure()) == a.token
+    print(f"✓ token {token_a} → {a.token}，过期的 leader 无法发送")
+
+
+def _save_batches(args) -> None:
+    root, worker = args
+    logging.disable(logging.CRITICAL)
+    storage = PaperStorage(local_data_dir=f"{root}/data", archive_dir=f"{root}/archive",
+                           scheme="fs", storage_options={}, search_index_path=":memory:")
+    for batch in range(5):
+        papers = [
+            Paper(title=f"Paper {worker}-{batch}-{i}", authors=["Alice"], abstract="Abstract",
+                  url=f"https://huggingface.co/papers/25{worker:02d}.{batch:02d}{i:03d}")
+            for i in range(20)
+        ]
+        storage.save_daily_papers(papers, DAY)
+
+
+def test_locked_daily_writes():
+    """测试多个进程同时写同一天的文件不会丢失数据"""
+    print("\n=== 测试 2: 每日文件写入锁 ===")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            list(pool.map(_save_batches, [(tmpdir, worker) for worker in range(4)]))
+        storage = PaperStorage(local_data_dir=f"{tmpdir}/data", archive_dir=f"{tmpdir}/archive",
+                               scheme="fs", storage_options={}, search_index_path=":memory:")
+        rows = storage.load_papers_by_date(DAY)
+        assert len(rows) == 4 * 5 * 20, len(rows)
+    print(f"✓ 4 个进程并发写入 20 批，{len(rows)} 行全部保留")
+
+
+def test_shared_lease_directory():
+    """测试对象存储/内存后端的两个副本使用同一个租约目录（COORDINATION_DIR），目录不一致时拒绝选主"""
+    print("\n=== 测试 3: 共享租约目录 ===")
+    s3_options = {'bucket': "papers", 'endpoint': "http://127.0.0.1:9", 'region': "us-east-1",
+                  'access_key_id': "key", 'secret_access_key': "secret"}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Config.ENABLE_LEADER_ELECTION = True
+        Config.COORDINATION_BACKEND, Config.COORDINATION_DIR = "file", f"{tmpdir}/coordination"
+        for scheme, options in (("s3", s3_options), ("memory", {})):
+            # 两个副本，数据前缀不同（各自的工作目录也不同）
+            a, b = (
+                PaperStorage(local_data_dir=f"replica-{name}/data", archive_dir=f"replica-{name}/archive",
+                             scheme=scheme, storage_options=options, search_index_path=":memory:")
+                for name in ("a", "b")
+            )
+            assert a.coordination.directory == b.coordination.directory == Path(Config.COORDINATION_DIR)
+            for storage in (a, b):
+                require_shared(storage.coordination, Config.COORDINATION_DIR)
+            leader_a = LeaderElector(a.coordination, holder=f"{scheme}-a", ttl=5)
+            leader_b = LeaderElector(b.coordination, holder=f"{scheme}-b", ttl=5)
+            assert leader_a.try_acquire() and not leader_b.try_acquire()
+            leader_a.release()
+
+        try:
+            require_shared(FileCoordination(f"{tmpdir}/elsewhere"), Config.COORDINATION_DIR)
+            raise AssertionError("lease directory outside COORDINATION_DIR accepted")
+        except ValueError:
+            pass
+    print("✓ s3 与 memory 后端的两个副本共用一个租约，只有一个成为 leader")
+
+
+if __name__ == "__main__":
+    print("开始测试多副本协调...")
+    logging.basicConfig(level=logging.WARNING)
+    test_leader_election()
+    test_locked_daily_writes()
+    test_shared_lease_directory()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""测试 MinHash/LSH 近重复检测"""
+import random
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import opendal
+
+from dedup import NearDuplicateIndex, _lsh_params, from_storage
+from helpers import make_paper
+from storage import PaperStorage
+
+ABSTRACT = (
+    "We present a diffusion transformer for high resolution video generation that scales to long "
+    "sequences by factorizing attention over space and time and training with a flow matching objective "
+    "on a curated dataset of ten million clips with dense captions"
+)
+
+
+def _random_paper(rng: random.Random, i: int):
+    words = [f"w{rng.randrange(20000)}" for _ in range(60)]
+    return make_paper(f"2510.{i:05d}", title=" ".join(words[:8]), abstract=" ".join(words[8:]))
+
+
+def test_lsh_params():
+    """测试 band/row 参数随阈值变化"""
+    print("\n=== 测试 1: LSH 参数 ===")
+    assert _lsh_params(128, 0.8) == (16, 8)
+    assert _lsh_params(128, 0.5)[1] < 8
+    print("✓ 阈值越低，每个 band 的行数越少")
+
+
+def test_detects_revisions():
+    """测试修订版被识别、无关论文不被误判"""
+    print("\n=== 测试 2: 近重复识别 ===")
+    index = NearDuplicateIndex(opendal.Operator("memory"), threshold=0.7)
+    index.add([make_paper("2510.00001", title="Scalable Video Diffusion Transformers", abstract=ABSTRACT)])
+
+    revision = make_paper("2510.00002", title="Scalable Video Diffusion Transformers (v2)", abstract=ABSTRACT.replace("ten million", "twelve million"))
+    other = make_paper("2510.00003", title="Reward Models for Language Agents", abstract="We train reward models for tool using language agents")
+    duplicate = index.find_duplicate(revision)
+    assert duplicate and duplicate[0] == "2510.00001" and duplicate[1] >= 0.7, duplicate
+    assert index.find_duplicate(other) is None
+    # 同一 ID 不与自身匹配
+    assert index.find_duplicate(make_paper("2510.00001", title="Scalable Video Diffusion Transformers", abstract=ABSTRACT)) is None
+    print(f"✓ 修订版相似度 {duplicate[1]:.2f}，无关论文未命中")
+
+
+def test_persistence_and_scale():
+    """测试持久化与大规模查询"""
+    print("\n=== 测试 3: 持久化与查询耗时 ===")
+    rng = random.Random(0)
+    operator = opendal.Operator("memory")
+    index = NearDuplicateIndex(operator, compact_after=2)
+    index.add(_random_paper(rng, i) for i in range(20000))
+    index.flush()
+    index.add([make_paper("2510.99999", title="Scalable Video Diffusion Transformers", abstract=ABSTRACT)])
+    index.flush()  # 第二个分段，触发压缩
+    assert operator.exists("signatures.parquet") and index._segment_keys() == []
+
+    reloaded = NearDuplicateIndex(operator)
+    assert len(reloaded) == 20001
+    started = time.perf_counter()
+    for i in range(100):
+        reloaded.find_duplicate(_random_paper(rng, 30000 + i))
+    elapsed_ms = (time.perf_counter() - started) * 10
+    assert reloaded.find_duplicate(make_paper("2510.88888", title="Scalable Video Diffusion Transformers", abstract=ABSTRACT))[0] == "2510.99999"
+    print(f"✓ 20001 篇论文，平均查询 {elapsed_ms:.2f} ms")
+
+
+def test_rebuild_from_storage():
+    """测试从存储构建索引，只索引给定（已发送）的论文"""
+    print("\n=== 测试 4: 从存储构建 ===")
+    storage = PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory", storage_options={})
+    storage.save_daily_papers([
+        make_paper("2510.00001", title="Scalable Video Diffusion Transformers", abstract=ABSTRACT),
+        # 已存储但从未发送（如被路由过滤）
+        make_paper("2510.00003", title="Sparse Mixture of Experts for Speech", abstract=ABSTRACT.replace("video", "speech")),
+    ], date(2025, 10, 1))
+    index = from_storage(storage, threshold=0.8)
+    assert index.rebuild(storage, {"2510.00001"}) == 1
+    revision = make_paper("2510.00002", title="Scalable Video Diffusion Transformers", abstract=ABSTRACT + " and audio")
+    assert index.find_duplicate(revision)[0] == "2510.00001"
+    unposted_copy = make_paper("2510.00004", title="Sparse Mixture of Experts for Speech", abstract=ABSTRACT.replace("video", "speech"))
+    assert index.find_duplicate(unposted_copy) is None
+    assert index.rebuild(storage) == 1  # 不限 ID 时补上其余论文
+    print("✓ 已发送论文的修订版被识别，未发送论文的副本照常发送")
+
+
+if __name__ == "__main__":
+    print("开始测试近重复检测...")
+    test_lsh_params()
+    test_detects_revisions()
+    test_persistence_and_scale()
+    test_rebuild_from_storage()
+    print("\n✓ 所有测试完成!")
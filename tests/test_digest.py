@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""测试周榜 / 月榜生成"""
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from digest import AGGREGATE_SCHEMA, DigestBuilder, period_range
+from helpers import make_paper
+from storage import PaperStorage
+
+
+def test_period_range():
+    """测试周期范围"""
+    print("\n=== 测试 1: 周期范围 ===")
+    assert period_range("week", date(2025, 10, 8)) == (date(2025, 10, 6), date(2025, 10, 12))
+    assert period_range("month", date(2024, 2, 10)) == (date(2024, 2, 1), date(2024, 2, 29))
+    print("✓ 周一至周日 / 自然月")
+
+
+def test_incremental_ranking():
+    """测试排名、增量聚合缓存和归档回退"""
+    print("\n=== 测试 2: 增量排名 ===")
+    storage = PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory", storage_options={})
+    storage.save_daily_papers([make_paper(i, i) for i in range(5)], date(2025, 10, 6))
+    storage.save_daily_papers([make_paper(i, i * 2) for i in range(5, 10)], date(2025, 10, 8))
+    storage.save_daily_papers([make_paper(i, 100) for i in range(10, 12)], date(2025, 10, 14))
+    # 本周内 Paper 1 的 upvote 增长 40
+    storage.history.record([make_paper(1, 41)], ts=datetime(2025, 10, 9, tzinfo=timezone.utc))
+
+    builder = DigestBuilder(storage)
+    digest = builder.build("week", date(2025, 10, 7), top=3)
+    assert [p.title for p in digest['papers']] == ["Paper 1", "Paper 9", "Paper 8"], digest['papers']
+    assert digest['papers'][0].hf_upvotes == 41
+    assert len(builder._load_manifest()) == 2
+
+    # 文件未变化时只读取缓存的聚合
+    builder._compute_aggregate = None
+    assert builder.build("week", date(2025, 10, 7), top=3)['papers'][0].title == "Paper 1"
+    del builder._compute_aggregate
+
+    # 新计算的聚合为空表（0 行）时不回退到缓存
+    storage.save_daily_papers([make_paper(12, 1)], date(2025, 10, 9))
+    builder._compute_aggregate = lambda source: AGGREGATE_SCHEMA.empty_table()
+    assert builder.build("week", date(2025, 10, 7), top=3)['papers'][0].title == "Paper 1"
+    del builder._compute_aggregate
+    print(f"✓ 周榜: {[p.title for p in digest['papers']]}")
+
+    # 删除每日文件后从归档读取
+    assert storage.archive_month(2025, 10, delete_daily_files=True)
+    digest = builder.build("month", date(2025, 10, 1), top=3)
+    assert {p.title for p in digest['papers'][:2]} == {"Paper 10", "Paper 11"}
+    print(f"✓ 归档月榜: {[p.title for p in digest['papers']]}")
+
+    # 发布记录
+    assert not builder.is_posted("month", digest['start'])
+    builder.mark_posted("month", digest['start'])
+    assert builder.is_posted("month", digest['start'])
+
+
+if __name__ == "__main__":
+    print("开始测试周榜 / 月榜...")
+    test_period_range()
+    test_incremental_ranking()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""测试静态导出：RSS/Atom/JSON Feed 与按月 HTML 归档页，基于 manifest 的增量更新"""
+import json
+import sys
+import xml.etree.ElementTree as ET
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from export import SiteExporter
+from helpers import make_paper
+from refresh import MessageStore, PostedMessage
+from storage import PaperStorage
+
+
+def _paper(i: int, upvotes: int):
+    # Titles with HTML/XML special characters
+    return make_paper(i, upvotes, title=f"Paper {i} <& co>", authors=("Alice", "Bob"), arxiv=True)
+
+
+def _storage() -> PaperStorage:
+    storage = PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory",
+                           storage_options={}, search_index_path=":memory:")
+    storage.save_daily_papers([_paper(i, i) for i in range(0, 3)], date(2025, 8, 5))
+    storage.save_daily_papers([_paper(i, i) for i in range(3, 6)], date(2025, 9, 10))
+    storage.save_daily_papers([_paper(i, i) for i in range(6, 9)], date(2025, 10, 1))
+    storage.save_daily_papers([_paper(i, i) for i in range(9, 11)], date(2025, 10, 2))
+    return storage
+
+
+def test_full_export():
+    """测试首次导出生成全部页面与 feed"""
+    print("\n=== 测试 1: 全量导出 ===")
+    storage = _storage()
+    exporter = SiteExporter(storage, feed_size=4, base_url="https://papers.example.com/", workers=1)
+    stats = exporter.export()
+    assert stats['months'] == 3 and stats['rendered'] == 3 and stats['feed_items'] == 4
+
+    feed = json.loads(exporter.operator.read("feed.json"))
+    # 最新的一天在前，同一天内按 upvote 排序
+    assert [item['id'] for item in feed['items']] == ["2510.00010", "2510.00009", "2510.00008", "2510.00007"]
+    assert feed['feed_url'] == "https://papers.example.com/feed.json"
+    assert feed['items'][0]['authors'] == [{'name': "Alice"}, {'name': "Bob"}]
+
+    rss = ET.fromstring(bytes(exporter.operator.read("feed.xml")))
+    assert [item.findtext("title") for item in rss.iter("item")][0] == "Paper 10 <& co>"
+    atom = ET.fromstring(bytes(exporter.operator.read("atom.xml")))
+    assert len(atom.findall("{http://www.w3.org/2005/Atom}entry")) == 4
+
+    page = bytes(exporter.operator.read("2025/10.html")).decode()
+    assert "Paper 6 &lt;&amp; co&gt;" in page and '<h2 id="2025-10-02">' in page
+    index = bytes(exporter.operator.read("index.html")).decode()
+    assert '<a href="2025/08.html">2025-08</a> (3 papers)' in index
+    print(f"✓ {stats['rendered']} 个月份页面、3 个 feed，用时 {stats['seconds']}s")
+    return storage, exporter
+
+
+def test_incremental_export(storage: PaperStorage, exporter: SiteExporter):
+    """测试只重新渲染变化的月份"""
+    print("\n=== 测试 2: 增量导出 ===")
+    assert exporter.export()['rendered'] == 0
+
+    storage.save_daily_papers([_paper(11, 50)], date(2025, 10, 2))
+    stats = exporter.export()
+    assert stats['rendered'] == 1 and stats['removed'] == 0
+    feed = json.loads(exporter.operator.read("feed.json"))
+    assert feed['items'][0]['id'] == "2510.00011"
+    print(f"✓ 新增论文后只渲染 2025-10，用时 {stats['seconds']}s")
+
+    # 每日文件归档并删除后，8 月页面改由归档文件生成
+    assert storage.archive_month(2025, 8, delete_daily_files=True)
+    stats = exporter.export()
+    assert stats['rendered'] == 1
+    page = bytes(exporter.operator.read("2025/08.html")).decode()
+    assert page.count("<article") == 3
+    manifest = json.loads(exporter.operator.read("manifest.json"))
+    assert list(manifest['sources']['2025-08']) == ["archive:2025/202508.parquet"]
+    print("✓ 归档后 8 月页面从归档文件重新生成")
+
+
+def test_process_pool():
+    """测试多进程渲染与单进程结果一致"""
+    print("\n=== 测试 3: 多进程渲染 ===")
+    storage = _storage()
+    serial = SiteExporter(storage, workers=1)
+    serial.export()
+    parallel = SiteExporter(storage, operator=storage.create_operator(Path("/site-parallel")), workers=2)
+    stats = parallel.export()
+    assert stats['rendered'] == 3
+    for key in ("2025/08.html", "2025/09.html", "2025/10.html", "index.html", "feed.json"):
+        assert bytes(serial.operator.read(key)) == bytes(parallel.operator.read(key)), key
+    print(f"✓ 2 个进程渲染 {stats['rendered']} 个月份，输出与单进程相同")
+
+
+def test_posted_only():
+    """测试只导出已发送的论文，之后补发的论文使所在月份重新渲染"""
+    print("\n=== 测试 4: 只导出已发送论文 ===")
+    storage = _storage()
+    messages = MessageStore(":memory:")
+
+    def post(paper_id: str):
+        messages.add(PostedMessage(chat_id="@channel", message_id=len(messages) + 1, paper_id=paper_id, kind="text",
+                                   body="", hf_upvotes=None, github_stars=None, posted_at=0.0))
+
+    for i in (0, 1, 2, 6, 9):
+        post(f"2510.{i:05d}")
+    exporter = SiteExporter(storage, workers=1, messages=messages)
+    exporter.export()
+    feed = json.loads(exporter.operator.read("feed.json"))
+    assert [item['id'] for item in feed['items']] == ["2510.00009", "2510.00006", "2510.00002", "2510.00001", "2510.00000"]
+    index = bytes(exporter.operator.read("index.html")).decode()
+    assert '<a href="2025/09.html">2025-09</a> (0 papers)' in index
+
+    # 源文件未变化，但之前未发送的论文已补发
+    assert exporter.export()['rendered'] == 0
+    post("2510.00004")
+    stats = exporter.export()
+    assert stats['rendered'] == 1
+    assert bytes(exporter.operator.read("2025/09.html")).decode().count("<article") == 1
+    print("✓ 未发送的论文不导出，补发后只重新渲染所在月份")
+
+
+if __name__ == "__main__":
+    print("开始测试静态导出...")
+    storage, exporter = test_full_export()
+    test_incremental_export(storage, exporter)
+    test_process_pool()
+    test_posted_only()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""测试命令回复缓存（LRU 与保存后失效）"""
+import sys
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helpers import make_paper
+from message_cache import RenderedMessageCache
+from storage import PaperStorage
+
+
+def test_lru_and_invalidation():
+    """测试 LRU 淘汰、保存后失效与渲染期间失效的丢弃"""
+    print("\n=== 测试 1: LRU 与失效 ===")
+    cache = RenderedMessageCache(maxsize=3)
+    cache.put(("today", "2025-10-01"), "today")
+    cache.put(("top", "week", "2025-10-01"), "top")
+    cache.put(("paper", "2510.00001"), "p1")
+    assert cache.get(("today", "2025-10-01")) == "today"
+    cache.put(("paper", "2510.00002"), "p2")
+    # 最久未使用的 top 被淘汰
+    assert cache.get(("top", "week", "2025-10-01")) is None
+    assert len(cache) == 3
+
+    generation = cache.generation
+    cache.invalidate_saved(date(2025, 10, 1), ["2510.00001"])
+    assert cache.get(("today", "2025-10-01")) is None
+    assert cache.get(("paper", "2510.00001")) is None
+    assert cache.get(("paper", "2510.00002")) == "p2"
+
+    # 保存前开始的渲染不会写入缓存
+    assert not cache.put(("today", "2025-10-01"), "stale", generation)
+    assert cache.put(("today", "2025-10-01"), "fresh", cache.generation)
+    print(f"✓ 命中 {cache.hits} 次，未命中 {cache.misses} 次")
+
+
+def test_storage_save_listener():
+    """测试 save_daily_papers 通知监听器，并按日期读取记录"""
+    print("\n=== 测试 2: 保存通知 ===")
+    storage = PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory",
+                           storage_options={}, search_index_path=":memory:")
+    cache = RenderedMessageCache()
+    storage.add_save_listener(cache.invalidate_saved)
+    cache.put(("today", "2025-10-01"), "old")
+    cache.put(("paper", "2510.00001"), "old")
+
+    day = date(2025, 10, 1)
+    storage.save_daily_papers([make_paper("2510.00001", 5, arxiv=True), make_paper("2510.00002", 9, arxiv=True)], day)
+    assert len(cache) == 0 and cache.generation == 1
+
+    records = storage.load_records_by_date(day)
+    assert sorted(r.paper_id for r in records) == ["2510.00001", "2510.00002"]
+    assert storage.search_index.paper_day("2510.00002") == day
+    assert storage.search_index.paper_day("2510.99999") is None
+    print(f"✓ 保存后缓存清空，{len(records)} 篇可按日期读取")
+
+
+if __name__ == "__main__":
+    print("开始测试命令回复缓存...")
+    test_lru_and_invalidation()
+    test_storage_save_listener()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""测试监控指标与结构化日志"""
+import json
+import logging
+import sys
+import urllib.request
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from log import JsonFormatter, TextFormatter
+from metrics import Registry, start_metrics_server
+
+
+def test_render():
+    """测试 Counter / Histogram 的 Prometheus 文本输出"""
+    print("\n=== 测试 1: 指标输出 ===")
+    registry = Registry()
+    requests = registry.counter("test_requests_total", "Requests", ["host", "status"])
+    latency = registry.histogram("test_latency_seconds", "Latency", ["host"], buckets=(0.1, 1.0))
+
+    requests.inc(host="huggingface.co", status="200")
+    requests.inc(2, host="huggingface.co", status="200")
+    latency.observe(0.05, host="huggingface.co")
+    latency.observe(0.5, host="huggingface.co")
+    with latency.time(host="api.github.com"):
+        pass
+
+    text = registry.render()
+    assert 'test_requests_total{host="huggingface.co",status="200"} 3' in text
+    assert 'test_latency_seconds_bucket{host="huggingface.co",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{host="huggingface.co",le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count{host="huggingface.co"} 2' in text
+    assert latency.count(host="api.github.com") == 1
+    try:
+        requests.inc(host="x")
+        assert False, "缺少标签应报错"
+    except ValueError:
+        pass
+    print("✓ 计数、分桶与标签校验正确")
+
+
+def test_endpoint():
+    """测试 /metrics 端点"""
+    print("\n=== 测试 2: /metrics 端点 ===")
+    registry = Registry()
+    registry.counter("test_cycles_total", "Cycles", ["status"]).inc(status="ok")
+    server = start_metrics_server(0, registry=registry)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+            body = response.read().decode()
+            assert response.headers["Content-Type"].startswith("text/plain")
+        assert 'test_cycles_total{status="ok"} 1' in body
+    finally:
+        server.shutdown()
+    print("✓ 端点返回 Prometheus 文本格式")
+
+
+def test_log_formatters():
+    """测试结构化日志格式"""
+    print("\n=== 测试 3: 日志格式 ===")
+    record = logging.makeLogRecord({
+        'name': 'storage', 'levelname': 'INFO', 'msg': 'Saved daily papers',
+        'path': 'data/2025/10/2025-10-01.parquet', 'rows': 42,
+    })
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['level'] == 'INFO' and entry['logger'] == 'storage'
+    assert entry['msg'] == 'Saved daily papers' and entry['rows'] == 42
+
+    line = TextFormatter().format(record)
+    assert line.endswith("INFO    storage: Saved daily papers path=data/2025/10/2025-10-01.parquet rows=42"), line
+    print("✓ text / json 格式包含结构化字段")
+
+
+if __name__ == "__main__":
+    print("开始测试监控指标...")
+    test_render()
+    test_endpoint()
+    test_log_formatters()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""测试 upvote/star 时间序列历史"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import opendal
+
+from helpers import make_paper
+from history import MetricsHistory
+
+
+def test_record_changes_only():
+    """测试只记录变化的值"""
+    print("\n=== 测试 1: 只记录变化 ===")
+    history = MetricsHistory(opendal.Operator("memory"), compact_after=100)
+    t0 = datetime(2025, 10, 1, 0, tzinfo=timezone.utc)
+
+    assert history.record([make_paper("a", 1), make_paper("b", 5, 10)], ts=t0) == 2
+    # 无变化 / 读数缺失（None）不记录
+    assert history.record([make_paper("a", 1), make_paper("b", None, 10)], ts=t0 + timedelta(hours=1)) == 0
+    assert history.record([make_paper("a", 4), make_paper("b", 5, 12)], ts=t0 + timedelta(hours=2)) == 2
+    assert history.load().num_rows == 4
+    print("✓ 无变化的抓取未产生记录")
+
+
+def test_compaction_and_velocity():
+    """测试压缩与增长速度计算"""
+    print("\n=== 测试 2: 压缩与趋势 ===")
+    history = MetricsHistory(opendal.Operator("memory"), compact_after=3)
+    t0 = datetime(2025, 10, 31, 20, tzinfo=timezone.utc)
+
+    history.record([make_paper("a", 1), make_paper("b", 10)], ts=t0)
+    history.record([make_paper("a", 5), make_paper("b", 11)], ts=t0 + timedelta(hours=2))
+    history.record([make_paper("a", 25), make_paper("c", 3)], ts=t0 + timedelta(hours=6))  # 跨月，触发压缩
+    assert history._segment_keys() == []
+    assert history._month_keys() == ["2025/202510.parquet", "2025/202511.parquet"]
+    assert history.load().num_rows == 6
+
+    # 新实例从压缩文件恢复最新值
+    reloaded = MetricsHistory(history.operator)
+    assert reloaded.record([make_paper("a", 25), make_paper("b", 11)], ts=t0 + timedelta(hours=7)) == 0
+
+    now = t0 + timedelta(hours=8)
+    movers = history.top_movers(n=2, window=timedelta(hours=7), now=now).to_pylist()
+    assert [m['paper_id'] for m in movers] == ["a", "b"]
+    assert movers[0]['upvotes_delta'] == 24  # 25 - 1（窗口开始前的最后一次读数）
+    assert movers[1]['upvotes_delta'] == 1
+    velocity = {row['paper_id']: row for row in history.velocity(window=timedelta(hours=7), now=now).to_pylist()}
+    assert velocity["c"]['upvotes_delta'] == 0  # 窗口内首次出现
+    print(f"✓ Top movers: {[(m['paper_id'], m['upvotes_delta']) for m in movers]}")
+
+
+def test_state_files():
+    """测试状态文件：趋势只读取窗口覆盖的月份，写入失败的变化不会丢失"""
+    print("\n=== 测试 3: 状态文件 ===")
+    history = MetricsHistory(opendal.Operator("memory"), compact_after=1)
+    history.record([make_paper("a", 3), make_paper("b", 7)], ts=datetime(2025, 8, 5, tzinfo=timezone.utc))
+    history.record([make_paper("a", 10)], ts=datetime(2025, 9, 1, tzinfo=timezone.utc))
+    history.record([make_paper("a", 30)], ts=datetime(2025, 10, 20, tzinfo=timezone.utc))
+    history.record([make_paper("b", 9)], ts=datetime(2025, 10, 21, tzinfo=timezone.utc))
+
+    reloaded = MetricsHistory(history.operator)
+    read = []
+    original_read = reloaded._read
+    reloaded._read = lambda key: read.append(key) or original_read(key)
+    assert reloaded.latest(["a", "b"]) == {"a": (30, None), "b": (9, None)}
+    assert read == ["latest.parquet"]
+
+    # 窗口开始（10 月 15 日）前的最后读数在 9 月 / 8 月，由 10 月的 opening 文件提供
+    velocity = {row['paper_id']: row for row in reloaded.velocity(
+        window=timedelta(days=10), now=datetime(2025, 10, 25, tzinfo=timezone.utc)).to_pylist()}
+    assert velocity["a"]['upvotes_delta'] == 20 and velocity["b"]['upvotes_delta'] == 2
+    assert not any(key.startswith("2025/202508") or key.startswith("2025/202509") for key in read), read
+
+    class FailingOperator:
+        def __getattr__(self, name):
+            return getattr(history.operator, name)
+
+        def write(self, key, data):
+            raise OSError("disk full")
+
+    failing = MetricsHistory(FailingOperator(), compact_after=100)
+    try:
+        failing.record([make_paper("a", 31)], ts=datetime(2025, 10, 22, tzinfo=timezone.utc))
+        raise AssertionError("write error was swallowed")
+    except OSError:
+        pass
+    failing.operator = history.operator
+    assert failing.record([make_paper("a", 31)], ts=datetime(2025, 10, 22, 1, tzinfo=timezone.utc)) == 1
+    print(f"✓ 启动只读取 {read[0]}，跨月基线正确，写入失败后重试仍记录变化")
+
+
+if __name__ == "__main__":
+    print("开始测试指标历史...")
+    test_record_changes_only()
+    test_compaction_and_velocity()
+    test_state_files()
+    print("\n✓ 所有测试完成!")
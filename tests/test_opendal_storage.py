@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""测试 OpenDAL 存储后端（memory / fs / 本地 S3 兼容服务）
+
+S3 测试需要本地 S3 兼容服务：
+- 设置 S3_ENDPOINT（如 MinIO: http://127.0.0.1:9000）及 S3_BUCKET / S3_ACCESS_KEY / S3_SECRET_KEY
+- 或安装 moto（pip install "moto[server]"），测试会自动启动一个临时服务
+两者都不可用时跳过 S3 测试。
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hf import Paper
+from storage import PaperStorage
+
+
+def _make_papers(start: int, count: int) -> list[Paper]:
+    """生成测试论文"""
+    return [
+        Paper(
+            title=f"Paper {i}",
+            authors=["Alice", "Bob"],
+            abstract=f"Abstract {i}",
+            url=f"https://huggingface.co/papers/2510.{i:05d}",
+            hf_upvotes=i,
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def _run_storage_checks(storage: PaperStorage) -> None:
+    """对任意后端执行相同的读写检查"""
+    day1, day2 = date(2025, 10, 1), date(2025, 10, 2)
+
+    # 同步写入 + 增量合并
+    storage.save_daily_papers(_make_papers(0, 5), day1)
+    storage.save_daily_papers(_make_papers(3, 5), day1)
+    rows = storage.load_papers_by_date(day1)
+    assert len(rows) == 8, len(rows)
+    assert rows[0]['authors'] == ["Alice", "Bob"]
+    print(f"  ✓ 同步写入与合并: {len(rows)} 篇")
+
+    # 异步写入 + 并发预取
+    async def _async_checks():
+        await storage.save_daily_papers_async(_make_papers(100, 4), day2)
+        by_date = await storage.load_papers_by_dates_async([day1, day2, date(2025, 10, 3)])
+        assert len(by_date[day1]) == 8 and len(by_date[day2]) == 4 and by_date[date(2025, 10, 3)] == []
+        # --once 只读取最近几天的文件
+        assert len(await storage.load_recent_paper_ids_async(date(2025, 10, 3), days=2)) == 4
+        return await storage.load_all_paper_ids_async()
+
+    async_ids = asyncio.run(_async_checks())
+    assert async_ids == storage.load_all_paper_ids()
+    assert len(async_ids) == 12
+    print(f"  ✓ 异步写入与并发预取: {len(async_ids)} 个 ID")
+
+    # 元数据统计（只读 footer 和 paper_id 列）
+    stats = storage.get_statistics(check_duplicates=True)
+    month = stats['months']['2025-10']
+    assert month['files'] == 2 and month['rows'] == 12 and month['duplicate_ids'] == 0
+    assert "2025-10-03" in month['missing_days'] and month['archive'] is None
+    print(f"  ✓ 存储统计: {stats['total_files']} 个文件, 压缩比 {month['compression_ratio']}")
+
+    # 归档（流式合并）并删除每日文件
+    assert storage.get_monthly_files(2025, 10) == ["2025/10/20251001.parquet", "2025/10/20251002.parquet"]
+    assert storage.archive_month(2025, 10, delete_daily_files=True)
+    assert storage.operator.exists("2025/202510.parquet")
+    assert storage.get_monthly_files(2025, 10) == []
+    assert storage.get_statistics()['months']['2025-10']['archive']['rows'] == 12
+    print("  ✓ 月度归档写入完成")
+
+
+def test_memory_backend():
+    """测试 memory 后端"""
+    print("\n=== 测试 1: memory 后端 ===")
+    storage = PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory", storage_options={})
+    _run_storage_checks(storage)
+
+
+def test_fs_backend():
+    """测试 fs 后端"""
+    print("\n=== 测试 2: fs 后端 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = PaperStorage(local_data_dir=f"{tmp}/data", archive_dir=f"{tmp}/archive", scheme="fs", storage_options={})
+        _run_storage_checks(storage)
+        assert (Path(tmp) / "archive" / "2025" / "202510.parquet").exists()
+
+
+def _start_moto_server() -> tuple[subprocess.Popen, str] | None:
+    """启动临时 moto S3 服务（独立进程，避免与 OpenDAL 阻塞调用争用 GIL）"""
+    try:
+        import moto.server  # noqa: F401
+    except ImportError:
+        return None
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    endpoint = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, endpoint
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    return None
+
+
+def test_s3_backend():
+    """测试本地 S3 兼容服务"""
+    print("\n=== 测试 3: S3 兼容后端 ===")
+    process = None
+    endpoint = os.getenv("S3_ENDPOINT")
+    bucket = os.getenv("S3_BUCKET", "papers-test")
+    if not endpoint:
+        started = _start_moto_server()
+        if not started:
+            print("  - 跳过: 未设置 S3_ENDPOINT 且未安装 moto")
+            return
+        process, endpoint = started
+        # moto 接受未签名的建桶请求
+        urllib.request.urlopen(urllib.request.Request(f"{endpoint}/{bucket}", method="PUT"))
+
+    try:
+        options = {
+            'bucket': bucket,
+            'endpoint': endpoint,
+            'region': os.getenv("S3_REGION", "us-east-1"),
+            'access_key_id': os.getenv("S3_ACCESS_KEY", "test"),
+            'secret_access_key': os.getenv("S3_SECRET_KEY", "test"),
+        }
+        prefix = f"test-{int(time.time())}"
+        storage = PaperStorage(
+            local_data_dir=f"/{prefix}/data",
+            archive_dir=f"/{prefix}/archive",
+            scheme="s3",
+            storage_options=options,
+            search_index_path=":memory:",
+        )
+        _run_storage_checks(storage)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    print("开始测试 OpenDAL 存储后端...")
+    test_memory_backend()
+    test_fs_backend()
+    test_s3_backend()
+    print("\n✓ 所有测试完成!")
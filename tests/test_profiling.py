@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""测试按周期的性能剖析"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hf import parse_paper_details
+from profiling import CycleProfiler
+
+HTML = (Path(__file__).parent / "debug_upvote.html").read_bytes()
+
+
+def _workload(profile) -> None:
+    with profile.span("parse"):
+        for _ in range(3):
+            parse_paper_details(HTML)
+    with profile.span("alloc"):
+        data = [bytearray(1024) for _ in range(2000)]
+        time.sleep(0.02)
+        del data
+
+
+def test_profiled_cycle():
+    """测试两种模式输出 spans / 剖析文件 / 内存快照 / 摘要"""
+    print("\n=== 测试 1: 剖析输出 ===")
+    for mode, dump in (("sample", "stacks.txt"), ("cprofile", "profile.prof")):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profiler = CycleProfiler(tmpdir, rate=1.0, mode=mode)
+            with profiler.cycle("check") as profile:
+                assert profile.enabled
+                _workload(profile)
+
+            (cycle_dir,) = Path(tmpdir).iterdir()
+            assert cycle_dir.name.startswith("check-")
+            spans = json.loads((cycle_dir / "spans.json").read_text())
+            assert set(spans['spans']) == {"parse", "alloc"}
+            assert spans['spans']['alloc']['seconds'] >= 0.02
+            assert (cycle_dir / dump).stat().st_size > 0
+            assert "peak traced memory" in (cycle_dir / "allocations.txt").read_text()
+            summary = (cycle_dir / "summary.txt").read_text()
+            assert "stages: parse=" in summary or "stages: alloc=" in summary
+            print(f"✓ {mode}: {summary.splitlines()[0]}")
+
+
+def test_sampling_and_pruning():
+    """测试采样率与目录保留数量"""
+    print("\n=== 测试 2: 采样率与清理 ===")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        disabled = CycleProfiler(tmpdir, rate=0.0)
+        started = time.perf_counter()
+        for _ in range(10000):
+            with disabled.cycle("check") as profile:
+                with profile.span("fetch"):
+                    pass
+        overhead = (time.perf_counter() - started) / 10000 * 1e6
+        assert not profile.enabled and not any(Path(tmpdir).iterdir())
+
+        profiler = CycleProfiler(tmpdir, rate=1.0, keep=2)
+        for _ in range(4):
+            with profiler.cycle("check"):
+                pass
+            time.sleep(0.01)
+        assert len(list(Path(tmpdir).iterdir())) == 2
+
+        sampled = sum(CycleProfiler(tmpdir, rate=0.25).should_profile() for _ in range(4000))
+        assert 800 < sampled < 1200, sampled
+    print(f"✓ 未采样周期开销 {overhead:.1f} µs，保留最近 2 个目录，采样比例约 25%")
+
+
+if __name__ == "__main__":
+    print("开始测试性能剖析...")
+    test_profiled_cycle()
+    test_sampling_and_pruning()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""测试缓存、存储与归档之间的一致性对账，以及未发送论文的重新排队"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+TMPDIR = tempfile.mkdtemp()
+# 在导入 Config 之前设置：内存存储、临时检查点与重新排队文件
+os.environ.update({
+    'STORAGE_SCHEME': 'memory',
+    'MESSAGE_STORE_PATH': ':memory:',
+    'CHECKPOINT_PATH': f"{TMPDIR}/checkpoint.json",
+    'REQUEUE_PATH': f"{TMPDIR}/requeue.json",
+    'ENABLE_DEDUP': 'false',
+})
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from helpers import make_paper
+from main import HuggingFacePaperBot
+from reconcile import load_requeue, reconcile, requeue
+from refresh import MessageStore, PostedMessage
+from storage import PaperStorage
+
+
+def _posted(paper_id: str, day: date, message_id: int) -> PostedMessage:
+    posted_at = datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc).timestamp()
+    return PostedMessage(chat_id="@channel", message_id=message_id, paper_id=paper_id, kind="text",
+                         body="", hf_upvotes=None, github_stars=None, posted_at=posted_at)
+
+
+def test_reconcile():
+    """测试三方对账：未发送、未存储、未缓存以及归档与每日文件不一致"""
+    print("\n=== 测试 1: 对账 ===")
+    storage = PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory",
+                           storage_options={}, search_index_path=":memory:")
+    storage.save_daily_papers([make_paper(f"2509.0000{i}") for i in (1, 2, 3)], date(2025, 9, 10))
+    assert storage.archive_month(2025, 9, delete_daily_files=False)
+    # 归档之后才写入的每日文件：归档缺少这篇论文
+    storage.save_daily_papers([make_paper("2509.00004")], date(2025, 9, 30))
+    storage.save_daily_papers([make_paper(f"2510.0000{i}") for i in (5, 6, 7)], date(2025, 10, 1))
+
+    messages = MessageStore(":memory:")
+    messages.add(_posted("2510.00005", date(2025, 10, 1), 1))
+    messages.add(_posted("2510.00009", date(2025, 10, 2), 2))
+    report = reconcile(storage, messages, cached_ids={"2510.00005"}, workers=4)
+
+    assert report['tracking_since'] == "2025-10-01"
+    assert report['unposted'] == [{'paper_id': "2510.00006", 'day': "2025-10-01"}, {'paper_id': "2510.00007", 'day': "2025-10-01"}]
+    # 9 月的论文存储于消息记录开始之前，无法判断是否发送过
+    assert report['untracked'] == 4
+    assert report['not_stored'] == ["2510.00009"] and report['uncached'] == ["2510.00009"]
+    assert report['months'] == {'2025-09': {'archive_rows': 3, 'duplicate_rows': 0, 'daily_files': 2,
+                                            'daily_only': ["2509.00004"], 'archive_only': []}}
+    assert report['errors'] == []
+
+    path = Path(TMPDIR) / "unit-requeue.json"
+    assert requeue(path, report['unposted']) == 2
+    assert requeue(path, report['unposted'][:1]) == 2 and len(load_requeue(path)) == 2
+    print(f"✓ 未发送 {len(report['unposted'])} 篇，未存储/未缓存 1 篇，9 月归档缺少 1 篇")
+
+
+class FakeTelegram:
+    """只记录发送内容的 Telegram Bot"""
+
+    def __init__(self, on_send=None):
+        self.sent = []
+        self.on_send = on_send
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(text)
+        if self.on_send is not None:
+            self.on_send()
+        return type("Message", (), {'message_id': len(self.sent)})()
+
+
+def test_send_requeued():
+    """测试检查周期发送重新排队的论文，已发送或不存在的条目被丢弃，发送期间新加入的条目保留"""
+    print("\n=== 测试 2: 发送重新排队的论文 ===")
+    os.chdir(TMPDIR)  # papers_cache.json
+    Config.SEND_DELAY = 0
+
+    async def run():
+        bot = HuggingFacePaperBot("1:token", "@channel", enable_commands=False)
+        # 发送期间 reconcile.py --requeue 又加入一篇
+        bot.bot = FakeTelegram(on_send=lambda: requeue(Config.REQUEUE_PATH, [{'paper_id': "2510.00010", 'day': "2025-10-02"}]))
+        day = date(2025, 10, 1)
+        bot.storage.save_daily_papers([make_paper("2510.00006"), make_paper("2510.00007")], day)
+        bot.cache.add_batch(["2510.00006", "2510.00007"])  # 启动时从存储加载
+        bot.messages.add(_posted("2510.00007", day, 100))
+        requeue(Config.REQUEUE_PATH, [
+            {'paper_id': "2510.00006", 'day': "2025-10-01"},
+            {'paper_id': "2510.00007", 'day': "2025-10-01"},  # 已发送
+            {'paper_id': "2510.00008", 'day': "2025-10-01"},  # 未存储
+        ])
+        ok = await bot.check_and_send_new_papers([])
+        await bot.close()
+        return ok, bot.bot.sent
+
+    ok, sent = asyncio.run(run())
+    assert ok and len(sent) == 1 and "Paper 2510" in sent[0]
+    assert load_requeue(Config.REQUEUE_PATH) == [{'paper_id': "2510.00010", 'day': "2025-10-02"}]
+    assert "2510.00006" in json.loads(Path("papers_cache.json").read_text())['paper_ids']
+    print("✓ 只发送了存储中且未发送过的 1 篇论文，发送期间加入的条目仍在队列中")
+
+
+if __name__ == "__main__":
+    print("开始测试一致性对账...")
+    test_reconcile()
+    test_send_requeued()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""测试已发送消息的数据刷新（变化判断、合并、限速、让位于新推送）"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import format_paper_message, replace_stats_line
+from hf import Paper
+from refresh import EditQueue, MessageEdit, MessageRefresher, MessageStore, PostedMessage, meaningful_change
+
+
+def _posted(store: MessageStore, count: int, chats: int = 1) -> None:
+    for i in range(count):
+        paper = Paper(
+            title=f"Paper {i}",
+            authors=["Alice"],
+            abstract="📊 not the stats line",
+            url=f"https://huggingface.co/papers/2510.{i:05d}",
+            hf_upvotes=10,
+        )
+        store.add(PostedMessage(f"@chat{i % chats}", 100 + i, paper.get_paper_id(), "text",
+                                format_paper_message(paper), hf_upvotes=10))
+
+
+def test_scan_and_render():
+    """测试只重新渲染变化足够大的消息，且只替换统计行"""
+    print("\n=== 测试 1: 扫描与重新渲染 ===")
+    assert meaningful_change(10, 15, 5, 0.1) and not meaningful_change(10, 14, 5, 0.1)
+    assert not meaningful_change(200, 215, 5, 0.1) and meaningful_change(200, 220, 5, 0.1)
+    assert not meaningful_change(10, None, 5, 0.1) and meaningful_change(None, 1, 5, 0.1)
+
+    store = MessageStore()
+    _posted(store, 3)
+    latest = {"2510.00000": (30, None), "2510.00001": (12, None), "2510.00002": (10, 50)}
+    queue = EditQueue(lambda edit: None)
+    refresher = MessageRefresher(
+        store, lambda ids: {i: latest[i] for i in ids if i in latest},
+        lambda message, upvotes, stars: replace_stats_line(message.body, upvotes, stars), queue,
+    )
+    edits = refresher.scan()
+    assert [e.message.paper_id for e in edits] == ["2510.00000", "2510.00002"]
+    assert "👍 30 upvotes" in edits[0].body and "📊 not the stats line" in edits[0].body
+    assert "⭐ 50 stars" in edits[1].body and edits[1].hf_upvotes == 10
+
+    store.update(edits[0])
+    assert [e.message.paper_id for e in refresher.scan()] == ["2510.00002"]
+    print(f"✓ {len(edits)} 条需要编辑，摘要保持不变")
+
+
+def test_queue_limits():
+    """测试合并、按频道限速、新推送优先与 RetryAfter 重试"""
+    print("\n=== 测试 2: 编辑队列 ===")
+    applied = []
+    retried = []
+
+    async def apply(edit: MessageEdit):
+        if edit.message.message_id == 101 and not retried:
+            retried.append(edit)
+            return 0.2
+        applied.append((time.monotonic(), edit.message.chat_id, edit.body))
+        return None
+
+    async def run():
+        # 每个频道每秒 2 次，突发上限 1
+        queue = EditQueue(apply, per_chat_per_minute=120, batch_size=10, burst=1)
+        store = MessageStore()
+        _posted(store, 6, chats=2)
+        messages = store.recent(0)
+        for message in messages:
+            queue.submit(MessageEdit(message, "old", 1, None))
+        for message in messages:
+            queue.submit(MessageEdit(message, "new", 2, None))
+        assert len(queue) == 6
+
+        worker = asyncio.create_task(queue.run())
+        async with queue.priority():
+            await asyncio.sleep(0.3)
+            assert not applied
+        started = time.monotonic()
+        while len(applied) < 6:
+            await asyncio.sleep(0.05)
+        worker.cancel()
+        return started, time.monotonic() - started
+
+    started, elapsed = asyncio.run(run())
+    assert all(body == "new" for _, _, body in applied)
+    assert len(retried) == 1
+    for chat in ("@chat0", "@chat1"):
+        times = [t for t, c, _ in applied if c == chat]
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        assert all(gap > 0.4 for gap in gaps), gaps
+    print(f"✓ 6 条编辑（合并 12 次提交，1 次重试）用时 {elapsed:.2f}s，每频道间隔 ≥ 0.5s")
+
+
+if __name__ == "__main__":
+    print("开始测试消息刷新...")
+    test_scan_and_render()
+    test_queue_limits()
+    print("\n✓ 所有测试完成!")
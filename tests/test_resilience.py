@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""测试上游调用的重试、熔断与对冲请求（使用本地 HTTP 服务模拟上游）"""
+import asyncio
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hf import fetch_url
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, Upstream
+
+FAST = RetryPolicy(attempts=3, base_delay=0.01, max_delay=0.05)
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """/flaky 前两次返回 503，/missing 返回 404，/slow 第一次请求 1 秒后才响应"""
+    hits = {}
+
+    def do_GET(self):
+        count = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path == "/flaky" and count <= 2:
+            self.send_response(503)
+        elif self.path == "/missing":
+            self.send_response(404)
+        else:
+            if self.path == "/slow" and count == 1:
+                time.sleep(1.0)
+            self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_retry_and_rejection(base_url: str):
+    """测试 5xx 重试后成功，404 不重试也不计入熔断"""
+    print("\n=== 测试 1: 重试 ===")
+    upstream = Upstream("local", timeout=2, policy=FAST)
+    assert fetch_url(upstream, f"{base_url}/flaky").text == "ok"
+    assert FlakyHandler.hits["/flaky"] == 3
+
+    try:
+        fetch_url(upstream, f"{base_url}/missing")
+        raise AssertionError("404 did not raise")
+    except requests.HTTPError:
+        pass
+    assert FlakyHandler.hits["/missing"] == 1 and upstream.breaker.state == "closed"
+
+    # 连接失败是暂时性错误：重试至次数用尽
+    try:
+        fetch_url(upstream, "http://127.0.0.1:9/")
+        raise AssertionError("connection error did not raise")
+    except requests.ConnectionError:
+        pass
+    print("✓ 503 重试两次后成功，404 立即失败")
+
+
+def test_circuit_breaker():
+    """测试连续失败后熔断、快速失败，到期后一次探测请求恢复"""
+    print("\n=== 测试 2: 熔断 ===")
+    calls = []
+    healthy = False
+
+    def request():
+        calls.append(1)
+        if not healthy:
+            raise requests.ConnectionError("down")
+        return "ok"
+
+    upstream = Upstream("local", policy=RetryPolicy(attempts=1), breaker=CircuitBreaker("local", 3, reset_timeout=0.2))
+    for _ in range(3):
+        try:
+            upstream.call(request)
+        except requests.ConnectionError:
+            pass
+    assert upstream.breaker.state == "open"
+    try:
+        upstream.call(request)
+        raise AssertionError("open circuit let a call through")
+    except CircuitOpenError as e:
+        assert e.retry_in > 0
+    assert len(calls) == 3
+
+    # 探测失败：重新熔断
+    time.sleep(0.25)
+    try:
+        upstream.call(request)
+    except requests.ConnectionError:
+        pass
+    assert upstream.breaker.state == "open" and len(calls) == 4
+
+    healthy = True
+    time.sleep(0.25)
+    assert upstream.call(request) == "ok" and upstream.breaker.state == "closed"
+    print(f"✓ 3 次失败后熔断，期间不发请求，探测成功后恢复（共 {len(calls)} 次请求）")
+
+
+def test_hedged_request(base_url: str):
+    """测试慢请求被对冲的第二个请求抢先完成"""
+    print("\n=== 测试 3: 对冲请求 ===")
+    upstream = Upstream("local", timeout=5, policy=FAST, hedge_after=0.1)
+    started = time.monotonic()
+    assert fetch_url(upstream, f"{base_url}/slow", hedge=True).text == "ok"
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.8 and FlakyHandler.hits["/slow"] == 2, elapsed
+    print(f"✓ 第一个请求 1 秒后才响应，对冲请求 {elapsed:.2f}s 返回")
+
+
+def test_async_retry():
+    """测试异步调用：按服务端要求的延迟重试，非幂等调用的超时不重试"""
+    print("\n=== 测试 4: 异步重试 ===")
+    attempts = []
+
+    class Throttled(Exception):
+        pass
+
+    def classify(error):
+        if isinstance(error, Throttled):
+            return 0.03
+        if isinstance(error, TimeoutError):
+            return 0.0
+        return None
+
+    async def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 2:
+            raise Throttled()
+        return "sent"
+
+    async def hanging():
+        attempts.append(time.monotonic())
+        await asyncio.sleep(1)
+
+    upstream = Upstream("local", timeout=0.1, policy=FAST, classify=classify)
+    assert asyncio.run(upstream.call_async(flaky)) == "sent"
+    assert attempts[1] - attempts[0] >= 0.03
+
+    attempts.clear()
+    try:
+        asyncio.run(upstream.call_async(hanging, classify=lambda error: None))
+        raise AssertionError("timeout did not raise")
+    except TimeoutError:
+        pass
+    assert len(attempts) == 1
+    print("✓ 限流后按提示延迟重试，超时的非幂等调用只尝试一次")
+
+
+if __name__ == "__main__":
+    print("开始测试上游容错...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        test_retry_and_rejection(base_url)
+        test_circuit_breaker()
+        test_hedged_request(base_url)
+        test_async_retry()
+    finally:
+        server.shutdown()
+    print("\n✓ 所有测试完成!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""测试按频道的主题路由规则"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helpers import make_paper
+from routing import ChannelRule, KeywordAutomaton, PaperRouter
+
+RULES = {
+    "channels": [
+        {"name": "diffusion", "channel_id": "@diffusion", "include": ["diffusion", "Flow Matching"], "exclude": ["survey"]},
+        {"name": "rl", "channel_id": "@rl", "include": ["reinforcement learning", "RL"], "min_upvotes": 5},
+        {"name": "agents", "channel_id": "@agents", "include": ["agent", "agents"], "authors": ["Alice Chen"]},
+        {"name": "all", "channel_id": "@all", "exclude_authors": ["Spam Bot"], "min_upvotes": 2},
+    ]
+}
+
+
+def test_automaton():
+    """测试多模式匹配与整词边界"""
+    print("\n=== 测试 1: Aho-Corasick 自动机 ===")
+    automaton = KeywordAutomaton(["he", "she", "hers", "rl", "reinforcement learning"])
+    assert automaton.find("ushers use rl-based reinforcement learning; she agrees") == {"rl", "reinforcement learning", "she"}
+    assert automaton.find("world control") == set()
+    print("✓ 重叠模式与整词匹配正确")
+
+
+def test_routing_rules():
+    """测试 include / exclude / 作者 / upvote 阈值"""
+    print("\n=== 测试 2: 路由规则 ===")
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(RULES, f)
+    router = PaperRouter.from_file(f.name)
+    Path(f.name).unlink()
+
+    assert router.route(make_paper(title="Video Diffusion with flow  matching", upvotes=10)) == ["@diffusion", "@all"]
+    assert router.route(make_paper(title="A Survey of Diffusion Models", upvotes=10)) == ["@all"]
+    assert router.route(make_paper(title="Offline RL at scale", upvotes=3)) == ["@all"]
+    assert router.route(make_paper(title="Offline RL at scale", upvotes=8)) == ["@rl", "@all"]
+    assert router.route(make_paper(title="Tool use", authors=["alice chen"], upvotes=10)) == ["@agents", "@all"]
+    assert router.route(make_paper(title="Web Agents", authors=["Spam Bot"], upvotes=1)) == ["@agents"]
+    assert router.route(make_paper(title="Unrelated", upvotes=0)) == []
+    assert PaperRouter.single_channel("@main").route(make_paper(title="Anything", upvotes=0)) == ["@main"]
+    print("✓ 各频道规则生效")
+
+
+def test_cost_independent_of_rules():
+    """测试匹配耗时不随规则数量增长"""
+    print("\n=== 测试 3: 匹配耗时 ===")
+    paper = make_paper(title="Scaling diffusion agents", abstract="We study reinforcement learning for language agents. " * 20, upvotes=10)
+
+    def _time(rule_count: int) -> float:
+        rules = [ChannelRule(name=f"c{i}", channel_id=f"@c{i}", include=[f"topic{i}", f"keyword {i}"]) for i in range(rule_count)]
+        router = PaperRouter(rules)
+        started = time.perf_counter()
+        for _ in range(200):
+            router.route(paper)
+        return (time.perf_counter() - started) / 200 * 1000
+
+    small, large = _time(10), _time(5000)
+    assert large < small * 3, (small, large)
+    print(f"✓ 10 条规则 {small:.3f} ms / 5000 条规则 {large:.3f} ms")
+
+
+if __name__ == "__main__":
+    print("开始测试路由规则...")
+    test_automaton()
+    test_routing_rules()
+    test_cost_independent_of_rules()
+    print("\n✓ 所有测试完成!")
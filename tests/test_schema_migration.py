@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""测试 Parquet schema 版本与迁移"""
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import io
+import json
+import pandas as pd
+import pyarrow as pa
+
+from hf import Paper
+from schema import (
+    PAPER_SCHEMA,
+    SCHEMA_VERSION,
+    STORAGE_PROFILES,
+    PaperRecord,
+    find_paper_files,
+    migrate_files,
+    papers_to_table,
+    profile_report,
+    read_paper_table,
+    schema_version,
+    table_to_records,
+)
+from storage import PaperStorage
+
+
+def _legacy_bytes() -> bytes:
+    """按旧版布局（pandas + JSON 作者字符串）生成 Parquet 内容"""
+    df = pd.DataFrame([
+        {
+            'paper_id': '2510.00001',
+            'title': 'Legacy Paper',
+            'authors': json.dumps(['Alice', 'Bob']),
+            'abstract': 'Old layout',
+            'url': 'https://huggingface.co/papers/2510.00001',
+            'hero_image': None,
+            'arxiv_url': 'https://arxiv.org/abs/2510.00001',
+            'github_url': None,
+            'github_stars': None,
+            'hf_upvotes': 12,
+            'collected_at': '2025-10-01T08:00:00.123456',
+        }
+    ])
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, engine='pyarrow', compression='snappy', index=False)
+    return buffer.getvalue()
+
+
+def _write_legacy_file(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(_legacy_bytes())
+
+
+def test_read_legacy_layout():
+    """测试读取旧版布局"""
+    print("\n=== 测试 1: 透明读取旧版布局 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / "data" / "2025" / "10" / "20251001.parquet"
+        _write_legacy_file(legacy)
+
+        storage = PaperStorage(local_data_dir=f"{tmp}/data", archive_dir=f"{tmp}/archive")
+        rows = storage.load_papers_by_date(date(2025, 10, 1))
+        assert rows[0]['authors'] == ['Alice', 'Bob']
+        assert rows[0]['hf_upvotes'] == 12
+        assert rows[0]['collected_at'].year == 2025
+        assert storage.load_all_paper_ids() == {'2510.00001'}
+        print("✓ 旧版文件读取正常")
+
+
+def test_migrate_daily_and_archive():
+    """测试并行迁移每日文件和归档文件（本地目录与内存后端）"""
+    print("\n=== 测试 2: 迁移每日与归档文件 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in (
+            PaperStorage(local_data_dir=f"{tmp}/data", archive_dir=f"{tmp}/archive", scheme="fs"),
+            PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory", storage_options={}),
+        ):
+            storage.data_operator.write("2025/10/20251001.parquet", _legacy_bytes())
+            storage.operator.write("2025/202510.parquet", _legacy_bytes())
+
+            files = find_paper_files(storage)
+            assert [key for _, key in files] == ["2025/10/20251001.parquet", "2025/202510.parquet"]
+            assert len(migrate_files(files, dry_run=True)['migrated']) == 2
+            result = migrate_files(files, workers=2)
+            assert len(result['migrated']) == 2 and not result['failed']
+            for operator, key in files:
+                table = read_paper_table(pa.BufferReader(operator.read(key)))
+                assert schema_version(table.schema) == SCHEMA_VERSION
+                assert table.column('authors').to_pylist() == [['Alice', 'Bob']]
+
+            # 再次迁移应无操作
+            result = migrate_files(files, workers=2)
+            assert len(result['current']) == 2
+            print(f"✓ {storage.scheme}: 迁移完成且可重复执行")
+
+
+def test_storage_profiles():
+    """测试存储配置档报告"""
+    print("\n=== 测试 3: 存储配置档报告 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / "20251001.parquet"
+        _write_legacy_file(legacy)
+        table = read_paper_table(legacy)
+
+        results = profile_report(table, repeats=1)
+        assert [r['profile'] for r in results] == list(STORAGE_PROFILES)
+        for r in results:
+            assert r['rows'] == 1 and r['bytes'] > 0
+            print(f"✓ {r['profile']}: {r['bytes']} bytes, 写入 {r['write_ms']} ms, 读取 {r['read_ms']} ms")
+
+
+def test_record_conversion():
+    """测试 Paper / PaperRecord 与 Arrow 表的批量转换"""
+    print("\n=== 测试 4: 记录与表的转换 ===")
+    paper = Paper(
+        title="Diffusion Transformers", authors=["A", "B"], abstract="Abstract",
+        url="https://huggingface.co/papers/2510.00001", arxiv_url="https://arxiv.org/abs/2510.00001",
+        github_stars=12, hf_upvotes=34,
+    )
+    record = PaperRecord.from_paper(paper)
+    assert record.get_paper_id() == "2510.00001" and record.url == "https://huggingface.co/papers/2510.00001"
+    assert not hasattr(record, '__dict__')
+
+    table = papers_to_table([paper, PaperRecord("2510.00002", "Other", [], "", "https://huggingface.co/papers/2510.00002")])
+    assert table.schema.equals(PAPER_SCHEMA)
+    records = table_to_records(table)
+    assert records[0].authors == ["A", "B"] and records[0].hero_image is None and records[0].hf_upvotes == 34
+    assert records[1].authors == [] and records[1].collected_at is not None
+    assert records[0].to_paper() == paper
+
+    # Records keep their own collected_at on a round trip
+    assert papers_to_table(records).column('collected_at').equals(table.column('collected_at'))
+    print("✓ 往返转换保持字段与 schema 一致")
+
+
+if __name__ == "__main__":
+    print("开始测试 schema 迁移...")
+    test_read_legacy_layout()
+    test_migrate_daily_and_archive()
+    test_storage_profiles()
+    test_record_conversion()
+    print("\n✓ 所有测试完成!")
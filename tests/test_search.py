@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""测试全文检索索引（SQLite FTS5）"""
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helpers import make_paper
+from search import SearchIndex, build_match_query
+from storage import PaperStorage
+
+TOPICS = ["diffusion", "reinforcement learning", "language agents", "video generation", "retrieval"]
+
+
+def _paper(i: int):
+    topic = TOPICS[i % len(TOPICS)]
+    return make_paper(
+        i,
+        i % 50,
+        title=f"Scaling {topic} models {i}",
+        authors=(f"Author {i % 97}", "Bob"),
+        abstract=f"We study {topic} with a new objective. Experiments on benchmark {i} show gains.",
+    )
+
+
+def test_match_query():
+    """测试查询转义"""
+    print("\n=== 测试 1: 查询转义 ===")
+    assert build_match_query('diffus* "video" (NEAR') == '"diffus"* "video" "NEAR"'
+    assert build_match_query("  -- ") == ""
+    print("✓ 特殊字符被转义为普通词")
+
+
+def test_incremental_index():
+    """测试保存时增量索引与从存储重建"""
+    print("\n=== 测试 2: 增量索引与重建 ===")
+    storage = PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory", storage_options={})
+    storage.save_daily_papers([_paper(i) for i in range(10)], date(2025, 10, 1))
+    storage.save_daily_papers([_paper(i) for i in range(10, 20)], date(2025, 10, 2))
+
+    results = storage.search_index.search("video generation")
+    assert len(results) == 4 and all("video" in r['title'].lower() for r in results)
+    assert storage.search_index.search("diffus*")[0]['day'] == "2025-10-01"
+    assert storage.search_index.search("Author 13")[0]['paper_id'] == "2510.00013"
+    print(f"✓ 保存后即可检索: {results[0]['title']} / {results[0]['snippet']}")
+
+    # 归档后用新索引重建；第二次重建跳过未变化的文件
+    storage.archive_month(2025, 10, delete_daily_files=False)
+    index = SearchIndex()
+    first = index.rebuild(storage, workers=4)
+    assert index.count() == 20 and first['files'] == 3
+    second = index.rebuild(storage, workers=4)
+    assert second['files'] == 0 and second['skipped'] == 3
+    assert index.search("video generation")[0]['day'] in ("2025-10-01", "2025-10-02")
+    print(f"✓ 并行重建: {first}, 增量: {second}")
+
+    # 每日文件删除后，/paper 按索引日期回退到归档查找（采集日期可能已进入下个月）
+    storage.archive_month(2025, 10, delete_daily_files=True)
+    assert storage.find_record("2510.00013", date(2025, 10, 2)).title == _paper(13).title
+    assert storage.find_record("2510.00013", date(2025, 11, 1)).title == _paper(13).title
+    assert storage.find_record("2510.99999", date(2025, 11, 1)) is None
+    print("✓ 每日文件删除后从归档找到论文")
+
+
+def test_query_latency():
+    """测试数万篇论文上的查询延迟"""
+    print("\n=== 测试 3: 查询延迟 ===")
+    index = SearchIndex()
+    papers = [_paper(i) for i in range(30000)]
+    index.add_papers(papers, date(2025, 10, 1))
+
+    started = time.perf_counter()
+    for query in ["reinforcement learning", "diffus*", "benchmark 12345", "language agents objective"]:
+        index.search(query, limit=10)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / 4
+    assert index.search("benchmark 12345")[0]['paper_id'] == "2510.12345"
+    print(f"✓ 30000 篇论文, 平均查询 {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    print("开始测试全文检索...")
+    test_match_query()
+    test_incremental_index()
+    test_query_latency()
+    print("\n✓ 所有测试完成!")
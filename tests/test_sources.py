@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""测试多来源抓取：并发运行、按 arXiv ID 去重、并发数与频率限制、来源失败，以及 arXiv 分类列表来源"""
+import asyncio
+import sys
+import threading
+import time
+from contextlib import aclosing
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hf import Paper
+from helpers import make_paper
+from main import format_paper_message
+from resilience import RetryPolicy, Upstream
+from sources import SOURCES, ArxivListingSource, PaperSource, SourceSet, create_source, paper_key, register_source
+
+DAY = date(2025, 10, 2)
+
+
+class FakeSource(PaperSource):
+    """每篇论文通过 fetch() 模拟一次耗时 delay 秒的请求"""
+
+    def __init__(self, name, urls, delay=0.1, fail=False, **limits):
+        super().__init__(**limits)
+        self.name = name
+        self.urls = urls
+        self.delay = delay
+        self.fail = fail
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = []
+
+    def _request(self, url):
+        self.started.append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        self.in_flight -= 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} down")
+        return make_paper(url=url, title=f"{self.name}:{url}")
+
+    async def papers(self, target_date, context):
+        tasks = [asyncio.ensure_future(self.fetch(self._request, url)) for url in self.urls]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def _collect(sources):
+    return [paper async for paper in sources.papers(DAY)]
+
+
+def test_concurrent_merge():
+    """测试来源并发运行、按 arXiv ID 去重"""
+    print("\n=== 测试 1: 并发合并与去重 ===")
+    hf = FakeSource("hf", ["https://huggingface.co/papers/2510.00001", "https://huggingface.co/papers/2510.00002"], delay=0.2, concurrency=2)
+    arxiv = FakeSource("arxiv", ["https://arxiv.org/abs/2510.00002", "https://arxiv.org/abs/2510.00003"], delay=0.2, concurrency=2)
+    started = time.monotonic()
+    papers = asyncio.run(_collect(SourceSet([hf, arxiv])))
+    elapsed = time.monotonic() - started
+    # 两个来源同时运行：总耗时约等于单个来源
+    assert elapsed < 0.35, elapsed
+    assert sorted(paper_key(p) for p in papers) == ["2510.00001", "2510.00002", "2510.00003"]
+
+    # 同一篇论文的不同写法得到相同的键
+    assert paper_key(make_paper(url="https://arxiv.org/pdf/2510.00002v3.pdf")) == "2510.00002"
+    assert paper_key(Paper(title="t", authors=[], abstract="a", url="https://example.com/x",
+                           arxiv_url="https://arxiv.org/abs/2510.00002v1")) == "2510.00002"
+    assert paper_key(make_paper(url="https://example.com/x")) == "https://example.com/x"
+    print(f"✓ 2 个来源 4 篇论文合并为 {len(papers)} 篇，用时 {elapsed:.2f}s（串行约 0.4s）")
+
+
+def test_limits():
+    """测试每个来源的并发数与频率限制"""
+    print("\n=== 测试 2: 并发数与频率限制 ===")
+    urls = [f"https://arxiv.org/abs/2510.{i:05d}" for i in range(6)]
+    bounded = FakeSource("bounded", urls, delay=0.05, concurrency=2)
+    asyncio.run(_collect(SourceSet([bounded])))
+    assert bounded.max_in_flight == 2
+
+    paced = FakeSource("paced", urls, delay=0.0, concurrency=6, rate_limit=20)
+    asyncio.run(_collect(SourceSet([paced])))
+    span = paced.started[-1] - paced.started[0]
+    assert span >= 5 / 20 * 0.9, span
+    print(f"✓ 最多 {bounded.max_in_flight} 个并发请求；20 次/秒限制下 6 个请求间隔 {span:.2f}s")
+
+
+def test_failures():
+    """测试单个来源失败不影响其他来源，全部失败时抛出错误，提前停止时来源被取消"""
+    print("\n=== 测试 3: 来源失败 ===")
+    broken = FakeSource("broken", ["https://arxiv.org/abs/2510.00009"], fail=True)
+    healthy = FakeSource("healthy", ["https://arxiv.org/abs/2510.00001"])
+    sources = SourceSet([broken, healthy])
+    papers = asyncio.run(_collect(sources))
+    assert [paper_key(p) for p in papers] == ["2510.00001"] and sources.failed == ["broken"]
+
+    try:
+        asyncio.run(_collect(SourceSet([broken])))
+        raise AssertionError("all sources failed without an error")
+    except ConnectionError:
+        pass
+
+    async def first_only():
+        slow = FakeSource("slow", [f"https://arxiv.org/abs/2510.{i:05d}" for i in range(20)], delay=0.05)
+        async with aclosing(SourceSet([slow]).papers(DAY)) as stream:
+            async for paper in stream:
+                break
+        return slow
+
+    slow = asyncio.run(first_only())
+    requested = len(slow.started)
+    time.sleep(0.2)
+    assert requested < 5 and len(slow.started) == requested
+    print("✓ 失败来源被跳过并记录，全部失败时抛出，消费者提前停止时不再请求")
+
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+<entry><id>http://arxiv.org/abs/2510.00011v1</id><published>2025-10-02T10:00:00Z</published>
+  <title>New paper</title><summary>Abstract 11</summary><author><name>Alice</name></author>
+  <category term="cs.CL"/></entry>
+<entry><id>http://arxiv.org/abs/2510.00010v2</id><published>2025-10-01T10:00:00Z</published>
+  <title>Yesterday's paper</title><summary>Abstract 10</summary><author><name>Bob</name></author>
+  <category term="cs.LG"/></entry>
+<entry><id>http://arxiv.org/abs/2509.00001v1</id><published>2025-09-20T10:00:00Z</published>
+  <title>Old paper</title><summary>Old</summary><author><name>Carol</name></author></entry>
+</feed>"""
+
+
+class ListingHandler(BaseHTTPRequestHandler):
+    queries = []
+
+    def do_GET(self):
+        self.queries.append(parse_qs(urlparse(self.path).query))
+        body = FEED.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_arxiv_listing():
+    """测试 arXiv 分类列表来源（本地 HTTP 服务模拟 export API）"""
+    print("\n=== 测试 4: arXiv 分类列表 ===")
+    assert {"huggingface", "arxiv"} <= set(SOURCES)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ListingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        source = ArxivListingSource(
+            ["cs.CL", "cs.LG"], max_results=3, api_url=f"http://127.0.0.1:{server.server_port}/api/query",
+            upstream=Upstream("arxiv-test", timeout=5, policy=RetryPolicy(attempts=1)), rate_limit=0,
+        )
+        papers = asyncio.run(_collect(SourceSet([source])))
+    finally:
+        server.shutdown()
+    query = ListingHandler.queries[0]
+    assert query['search_query'] == ["cat:cs.CL OR cat:cs.LG"] and query['max_results'] == ["3"]
+    # 只保留当天和前一天提交的论文
+    assert [p.get_paper_id() for p in papers] == ["2510.00011", "2510.00010"]
+    assert papers[1].arxiv_version == 2 and papers[1].arxiv_categories == ["cs.LG"]
+    # 没有 HF 页面的论文只链接一次 arXiv，不标为 HuggingFace
+    message = format_paper_message(papers[0])
+    assert "HuggingFace" not in message and message.count("arxiv.org/abs/2510.00011") == 1
+
+    @register_source
+    class CustomSource(FakeSource):
+        name = "custom"
+
+        @classmethod
+        def from_config(cls):
+            return cls("custom", [])
+
+    assert isinstance(create_source("custom"), CustomSource)
+    print(f"✓ 查询 {query['search_query'][0]}，返回 {len(papers)} 篇近期论文；自定义来源可注册")
+
+
+if __name__ == "__main__":
+    print("开始测试多来源抓取...")
+    test_concurrent_merge()
+    test_limits()
+    test_failures()
+    test_arxiv_listing()
+    print("\n✓ 所有测试完成!")
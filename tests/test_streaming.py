@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""测试流式抓取：生成器逐篇产出论文、并发/顺序选项、分批增量保存"""
+import asyncio
+import sys
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import hf
+from hf import FetchInterrupted, aiter_huggingface_papers, iter_huggingface_papers
+from storage import PaperStorage
+
+DAY = date(2025, 10, 1)
+ENTRIES = [
+    {'title': f"Paper {i}", 'url': f"https://huggingface.co/papers/2510.{i:05d}", 'hero_image': None}
+    for i in range(6)
+]
+# 第 1 篇的详情页最慢
+DELAYS = [0.05, 0.3, 0.05, 0.05, 0.05, 0.05]
+_sleep = time.sleep
+fetch_log = []
+fetch_lock = threading.Lock()
+
+
+def fake_fetch_list(target_date, known_details, enricher):
+    return list(ENTRIES), {}
+
+
+def fake_fetch_details(paper_url):
+    index = int(paper_url[-5:])
+    _sleep(DELAYS[index])
+    with fetch_lock:
+        fetch_log.append(index)
+    return {'abstract': f"Abstract {index}", 'authors': ["Alice"], 'arxiv_url': None,
+            'github_url': None, 'github_stars': None, 'hf_upvotes': index}
+
+
+def _ids(papers):
+    return [int(p.get_paper_id()[-5:]) for p in papers]
+
+
+def test_sync_generator():
+    """测试同步生成器按顺序逐篇产出，消费者停下时不再抓取"""
+    print("\n=== 测试 1: 同步生成器 ===")
+    fetch_log.clear()
+    stream = iter_huggingface_papers(DAY)
+    first = next(stream)
+    assert _ids([first]) == [0] and fetch_log == [0]
+    assert _ids(stream) == [1, 2, 3, 4, 5]
+
+    # 已抓取的详情（检查点）不会再次请求
+    fetch_log.clear()
+    known = {ENTRIES[0]['url']: fake_fetch_details(ENTRIES[0]['url'])}
+    fetch_log.clear()
+    stop = lambda: len(fetch_log) >= 2
+    papers = []
+    try:
+        for paper in iter_huggingface_papers(DAY, known_details=known, should_stop=stop):
+            papers.append(paper)
+    except FetchInterrupted:
+        pass
+    assert _ids(papers) == [0, 1, 2] and fetch_log == [1, 2]
+    print("✓ 第一篇论文在其余详情页抓取前产出，停止请求后不再抓取")
+
+
+def test_async_generator():
+    """测试异步生成器的并发抓取、顺序与完成顺序两种产出方式"""
+    print("\n=== 测试 2: 异步生成器 ===")
+
+    async def collect(concurrency, ordered, work=0.0):
+        papers = []
+        started = time.monotonic()
+        async for paper in aiter_huggingface_papers(DAY, concurrency=concurrency, ordered=ordered):
+            papers.append(paper)
+            await asyncio.sleep(work)  # 模拟发送
+        return papers, time.monotonic() - started
+
+    sequential = sum(DELAYS)
+    papers, elapsed = asyncio.run(collect(3, True))
+    assert _ids(papers) == [0, 1, 2, 3, 4, 5] and elapsed < sequential * 0.8, elapsed
+
+    papers, _ = asyncio.run(collect(3, False))
+    assert _ids(papers)[:3] == [0, 2, 3] and sorted(_ids(papers)) == list(range(6))
+
+    # concurrency=1 时下一篇详情页在消费者处理当前论文期间抓取
+    papers, overlapped = asyncio.run(collect(1, True, work=0.05))
+    assert overlapped < sequential + 6 * 0.05 - 0.15, overlapped
+    print(f"✓ 顺序产出 {elapsed:.2f}s（串行约 {sequential:.2f}s），完成顺序产出先返回快的论文，"
+          f"抓取与处理重叠 {overlapped:.2f}s")
+
+
+def test_incremental_save():
+    """测试保存直接消费生成器，每批合并一次"""
+    print("\n=== 测试 3: 分批增量保存 ===")
+    storage = PaperStorage(local_data_dir="/data", archive_dir="/archive", scheme="memory",
+                           storage_options={}, search_index_path=":memory:")
+    saves = []
+    storage.add_save_listener(lambda day, paper_ids: saves.append(len(paper_ids)))
+    path = storage.save_daily_papers(iter_huggingface_papers(DAY), DAY, batch_size=4)
+    assert path is not None and saves == [4, 2]
+    assert len(storage.load_papers_by_date(DAY)) == 6
+    assert storage.save_daily_papers(iter([]), DAY, batch_size=4) is None
+    print(f"✓ 6 篇论文分 {len(saves)} 批写入每日文件")
+
+
+if __name__ == "__main__":
+    print("开始测试流式抓取...")
+    hf._fetch_list = fake_fetch_list
+    hf.fetch_paper_details = fake_fetch_details
+    # hf.time 即 time 模块：跳过详情页之间 0.5 秒的间隔
+    time.sleep = lambda seconds: None if seconds == 0.5 else _sleep(seconds)
+    test_sync_generator()
+    test_async_generator()
+    test_incremental_save()
+    print("\n✓ 所有测试完成!")